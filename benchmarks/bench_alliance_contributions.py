@@ -0,0 +1,149 @@
+from utility_functions.print_formats import seperation_bar
+from utility_functions.alliance_contributions import ALLIANCE_SIZE, AllianceContributions, contribution_columns
+from synthetic_data import EVENT_PRESETS, generate_event
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import scipy.linalg  # Loaded up front so no timing includes importing it
+import scipy.sparse.linalg
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+DEFAULT_PRESETS = ["championship_division", "championship", "season"]
+DEFAULT_FIELDS = 8  # Numeric fields fitted at once (the schema's own, plus synthetic ones)
+DEFAULT_NEW_MATCHES = [1, 10]  # Matches added by the incremental updates
+DENSE_CHECK_MAX_TEAMS = 1000  # Larger fits are not checked against a dense solve
+TOLERANCE = 1e-8
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def timed(function):
+    """
+    Calls a function and returns its result and the seconds it took.
+
+    :param function: Callable without arguments.
+    :return: Tuple of (result, seconds).
+    """
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def build_matches(preset, num_fields):
+    """
+    Builds a flat DataFrame of a synthetic event, with extra numeric fields so several are fitted at once.
+
+    :param preset: Name of an event preset in `synthetic_data.EVENT_PRESETS`.
+    :param num_fields: Total number of numeric fields.
+    :return: Tuple of (matches DataFrame, team keys).
+    """
+    num_teams, num_matches = EVENT_PRESETS[preset]
+    matches_df = pd.json_normalize(list(generate_event(num_teams, num_matches, error_rate=0.0)))
+    rng = np.random.default_rng(0)
+    existing_fields = contribution_columns(matches_df)
+    for index in range(len(existing_fields), num_fields):
+        matches_df[f"field_{index + 1}"] = rng.integers(0, 20, len(matches_df))
+    return matches_df, matches_df["metadata.robotTeam"].astype(str).astype(object)
+
+
+def dense_difference(model, contributions):
+    """
+    Solves the same centered ridge problem with dense NumPy algebra and compares the results.
+
+    :param model: A fitted `AllianceContributions`.
+    :param contributions: Result of `model.solve()`.
+    :return: Largest absolute difference.
+    """
+    columns = {team: column for column, team in enumerate(model.teams)}
+    rows = list(model.alliances.values())
+    design = np.zeros((len(rows), len(model.teams)))
+    for row, (teams, _) in enumerate(rows):
+        design[row, [columns[team] for team in teams]] = 1
+    values = np.vstack([row_values for _, row_values in rows])
+    mean_totals = values.mean(axis=0)
+    normal = design.T @ design + model.ridge * np.eye(len(model.teams))
+    solution = np.linalg.solve(normal, design.T @ (values - mean_totals)) + mean_totals / ALLIANCE_SIZE
+    num_metrics = len(model.metrics)
+    difference = 0.0
+    for team, team_contributions in contributions.items():
+        for index, metric in enumerate(model.metrics):
+            difference = max(difference,
+                             abs(team_contributions[f"{metric}_opr"] - solution[columns[team], index]),
+                             abs(team_contributions[f"{metric}_dpr"] - solution[columns[team], num_metrics + index]))
+    return difference
+
+
+def solve_per_field(model):
+    """
+    Solves each field's offensive and defensive columns with its own factorization, for comparison
+    with the single shared factorization of `AllianceContributions.solve`.
+
+    :param model: A fitted `AllianceContributions`.
+    """
+    for column in range(2 * len(model.metrics)):
+        model.factorize()(model._moments[:, column])
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Benchmark the alliance contribution (OPR/DPR) fit of script 04.")
+parser.add_argument("--presets", nargs="+", default=DEFAULT_PRESETS, choices=EVENT_PRESETS, help="Event sizes.")
+parser.add_argument("--fields", type=int, default=DEFAULT_FIELDS, help="Numeric fields fitted at once.")
+parser.add_argument("--new-matches", type=int, nargs="+", default=DEFAULT_NEW_MATCHES,
+                    help="Matches added by the incremental updates.")
+args = parser.parse_args()
+
+print(seperation_bar)
+print("Benchmark: Alliance Contributions (Script 04)\n")
+
+failed = False
+print(f"{'preset':<22} | {'teams':>5} | {'alliances':>9} | {'step':<26} | {'time (s)':>8}")
+for preset in args.presets:
+    matches_df, team_keys = build_matches(preset, args.fields)
+    metrics = contribution_columns(matches_df)
+    match_numbers = matches_df["metadata.matchNumber"]
+
+    model = AllianceContributions(metrics)
+    _, fit_seconds = timed(lambda: model.update(matches_df, team_keys))
+    contributions, solve_seconds = timed(model.solve)
+    _, per_field_seconds = timed(lambda: solve_per_field(model))
+    label = f"{preset:<22} | {len(model.teams):>5} | {len(model.alliances):>9,}"
+    print(f"{label} | {'build matrix':<26} | {fit_seconds:8.3f}")
+    print(f"{label} | {f'solve {len(metrics)} fields (shared)':<26} | {solve_seconds:8.3f}")
+    print(f"{label} | {f'solve {len(metrics)} fields (one each)':<26} | {per_field_seconds:8.3f}")
+
+    if len(model.teams) <= DENSE_CHECK_MAX_TEAMS:
+        difference = dense_difference(model, contributions)
+        if difference > TOLERANCE:
+            print(f"[ERROR] The sparse fit differs from a dense solve by {difference:.3g}.")
+            failed = True
+
+    for new_matches in args.new_matches:
+        # Fit every match but the last few, then add those matches by replacing their teams' matches
+        earlier = (match_numbers <= match_numbers.max() - new_matches).to_numpy()
+        incremental_model = AllianceContributions(metrics)
+        incremental_model.update(matches_df[earlier], team_keys[earlier])
+        changed_teams = set(team_keys[~earlier])
+        selected = team_keys.isin(changed_teams).to_numpy()
+        _, update_seconds = timed(lambda: incremental_model.update(matches_df[selected], team_keys[selected], changed_teams))
+        incremental_contributions, resolve_seconds = timed(incremental_model.solve)
+        print(f"{label} | {f'add {new_matches} matches + solve':<26} | {update_seconds + resolve_seconds:8.3f}")
+
+        difference = max(
+            abs(value - contributions[team][key])
+            for team, team_contributions in incremental_contributions.items()
+            for key, value in team_contributions.items()
+        )
+        if difference > TOLERANCE or len(incremental_contributions) != len(contributions):
+            print(f"[ERROR] The incremental update differs from the full fit by {difference:.3g}.")
+            failed = True
+
+print(seperation_bar)
+if failed:
+    raise SystemExit(1)
@@ -0,0 +1,102 @@
+from utility_functions.print_formats import seperation_bar
+from utility_functions.chart_rendering import bar_chart_spec, render_charts
+import time
+import random
+import argparse
+import tempfile
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+DEFAULT_NUM_CHARTS = 24
+DEFAULT_WORKER_COUNTS = [1, 2, 4]
+BARS_PER_CHART = 10
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def synthetic_chart_specs(num_charts, seed=0):
+    """
+    Builds chart specs like script 05's top-team charts.
+
+    :param num_charts: Number of charts.
+    :param seed: Random seed so runs are reproducible.
+    :return: List of chart spec dictionaries.
+    """
+    rng = random.Random(seed)
+    specs = []
+    for index in range(num_charts):
+        teams = rng.sample(range(1, 10000), BARS_PER_CHART)
+        specs.append(bar_chart_spec(
+            file_name=f"top_{BARS_PER_CHART}_metric_{index}.png",
+            title=f"Top {BARS_PER_CHART} Teams by Metric {index}",
+            labels=teams,
+            values=[rng.uniform(-2, 2) for _ in teams],
+            ylabel=f"Metric {index}",
+        ))
+    return specs
+
+
+def render_with_pyplot(specs, output_dir):
+    """
+    The previous approach: stateful `pyplot`, one chart after another.
+
+    :param specs: List of chart spec dictionaries.
+    :param output_dir: Folder the PNGs are written to.
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    for spec in specs:
+        plt.bar(range(len(spec["values"])), spec["values"], width=0.5)
+        plt.title(spec["title"])
+        plt.ylabel(spec["ylabel"])
+        plt.xticks(ticks=range(len(spec["labels"])), labels=spec["labels"], rotation=45, ha="right")
+        plt.tight_layout()
+        plt.savefig(f"{output_dir}/{spec['file_name']}")
+        plt.close()
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark chart rendering for script 05.")
+    parser.add_argument("--charts", type=int, default=DEFAULT_NUM_CHARTS, help="Number of charts to render.")
+    parser.add_argument("--workers", type=int, nargs="+", default=DEFAULT_WORKER_COUNTS, help="Worker counts to time.")
+    args = parser.parse_args()
+
+    specs = synthetic_chart_specs(args.charts)
+
+    print(seperation_bar)
+    print("Benchmark: Chart Rendering (Script 05)\n")
+
+    # Warm-up, so no timing below includes importing Matplotlib
+    with tempfile.TemporaryDirectory() as output_dir:
+        render_with_pyplot(specs[:1], output_dir)
+        render_charts(specs[:1], output_dir)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        render_with_pyplot(specs, output_dir)
+        print(f"[INFO] {'pyplot, serial':<28} | {time.perf_counter() - start:7.2f} s")
+
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as output_dir:
+            start = time.perf_counter()
+            report = render_charts(specs, output_dir, workers)
+            elapsed = time.perf_counter() - start
+            rendered = sum(status == "rendered" for _, status, _ in report)
+            print(f"[INFO] {f'Figure API, workers={workers}':<28} | {elapsed:7.2f} s | {rendered} rendered")
+
+            # Same inputs again: every chart is reused
+            start = time.perf_counter()
+            report = render_charts(specs, output_dir, workers)
+            reused = sum(status == "reused" for _, status, _ in report)
+            print(f"[INFO] {'  rerun, unchanged inputs':<28} | {time.perf_counter() - start:7.2f} s | {reused} reused")
+
+    print(seperation_bar)
@@ -0,0 +1,116 @@
+from utility_functions.print_formats import seperation_bar
+from utility_functions.pipeline_runner import load_stage
+from utility_functions.artifacts import update_artifact_manifest, load_artifact_manifest, current_artifacts
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+CLEAR_SCRIPT = "01_clear_files.py"
+DEFAULT_FILE_COUNTS = [1_000, 10_000, 50_000]
+FILE_SIZE = 4096  # Bytes per file (a small chart)
+CHART_FOLDER = os.path.join("outputs", "visualizations")
+STALE_SHARE = 0.1  # Share of files left out of the artifact manifest in the "stale" case
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def fill_chart_folder(num_files):
+    """
+    Writes a folder of chart-sized files, as script 05 does for many metrics.
+
+    :param num_files: Number of files.
+    :return: List of the file paths.
+    """
+    os.makedirs(CHART_FOLDER, exist_ok=True)
+    content = b"\0" * FILE_SIZE
+    paths = []
+    for index in range(num_files):
+        path = os.path.join(CHART_FOLDER, f"chart_{index}.png")
+        with open(path, "wb") as outfile:
+            outfile.write(content)
+        paths.append(path)
+    return paths
+
+
+def clear_file_by_file(folder_path):
+    """
+    The previous way of clearing a preserved folder: one `os.unlink` and one printed line per file.
+
+    :param folder_path: Folder to clear.
+    """
+    for item in os.listdir(folder_path):
+        item_path = os.path.join(folder_path, item)
+        if os.path.isfile(item_path) or os.path.islink(item_path):
+            os.unlink(item_path)
+            print(f"[INFO] Deleted file: {item_path}")
+        elif os.path.isdir(item_path):
+            shutil.rmtree(item_path)
+            print(f"[INFO] Deleted folder: {item_path}")
+
+
+def timed_quietly(function):
+    """
+    Calls a function with its printed output discarded and returns the seconds it took.
+
+    :param function: Callable without arguments.
+    :return: Seconds.
+    """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        function()
+        return time.perf_counter() - start
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Benchmark clearing a large chart folder with script 01.")
+parser.add_argument("--files", type=int, nargs="+", default=DEFAULT_FILE_COUNTS, help="Numbers of files to clear.")
+args = parser.parse_args()
+
+clear_script = load_stage(CLEAR_SCRIPT)
+# Deleting in the background would finish after the timing; wait for it here so runs don't overlap
+clear_script.BACKGROUND_DELETE = False
+
+print(seperation_bar)
+print("Benchmark: Clearing Output Folders (Script 01)\n")
+
+print(f"{'files':>8} | {'mode':<37} | {'seconds':>8} | {'files left':>10}")
+original_dir = os.getcwd()
+for num_files in args.files:
+    cases = [
+        ("file by file (previous)", lambda: clear_file_by_file(CHART_FOLDER)),
+        ("full: move aside, delete after", lambda: clear_script.clear_folder_with_exceptions(
+            "outputs", preserved_folders=["visualizations"])),
+        ("full: move aside (deletion not timed)", None),
+        ("stale: manifest-aware", lambda: clear_script.clear_stale_artifacts(
+            "outputs", [], current_artifacts(load_artifact_manifest()))),
+    ]
+    for label, clear in cases:
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as work_dir:
+            os.chdir(work_dir)
+            try:
+                paths = fill_chart_folder(num_files)
+                if clear is None:
+                    # What a user waits for when the deletion runs in the background
+                    clear_script.BACKGROUND_DELETE = True
+                    seconds = timed_quietly(lambda: clear_script.clear_folder_with_exceptions(
+                        "outputs", preserved_folders=["visualizations"]))
+                    clear_script.BACKGROUND_DELETE = False
+                else:
+                    update_artifact_manifest("05", paths[int(num_files * STALE_SHARE):], "completed")
+                    seconds = timed_quietly(clear)
+                files_left = len(os.listdir(CHART_FOLDER))
+            finally:
+                os.chdir(original_dir)
+        print(f"{num_files:>8,} | {label:<37} | {seconds:8.3f} | {files_left:>10,}")
+
+print(seperation_bar)
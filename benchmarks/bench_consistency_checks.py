@@ -0,0 +1,125 @@
+from utility_functions.print_formats import seperation_bar
+from utility_functions.cleaning_accumulator import CleaningAccumulator
+from utility_functions.consistency_checks import find_consistency_issues
+from synthetic_data import ROBOT_POSITIONS, generate_entries
+import copy
+import time
+import random
+import argparse
+from collections import defaultdict
+import pandas  # Loaded up front so the timings don't include importing it
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DUPLICATE_RATE = 0.005  # Entries submitted a second time by another scouter
+WRONG_TEAM_RATE = 0.005  # Entries whose team is replaced by another team in the same match
+DROPPED_RATE = 0.005  # Entries never submitted (missing positions)
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def build_match_keys(num_entries, seed=0):
+    """
+    Records the match keys of synthetic entries, with some duplicated, dropped and mislabeled ones.
+
+    :param num_entries: Number of generated entries (before duplicates and drops).
+    :param seed: Random seed so runs are reproducible.
+    :return: `CleaningAccumulator.match_keys` of the entries.
+    """
+    rng = random.Random(seed)
+    accumulator = CleaningAccumulator()
+    match_teams = []
+    for entry in generate_entries(num_entries, error_rate=0.0, seed=seed):
+        metadata = entry["metadata"]
+        if metadata["robotPosition"] == ROBOT_POSITIONS[0]:
+            match_teams = []
+        match_teams.append(metadata["robotTeam"])
+        if rng.random() < DROPPED_RATE:
+            continue
+        if rng.random() < WRONG_TEAM_RATE and len(match_teams) > 1:
+            metadata["robotTeam"] = match_teams[0]
+        accumulator.record_match_key(entry)
+        if rng.random() < DUPLICATE_RATE:
+            duplicate = copy.deepcopy(entry)
+            duplicate["metadata"]["scouterName"] = "Duplicate Scouter"
+            accumulator.record_match_key(duplicate)
+    return accumulator.match_keys
+
+
+def find_consistency_issues_per_entry(match_keys, valid_robot_positions):
+    """
+    Reference implementation with one Python loop iteration per entry, for comparison.
+
+    :param match_keys: Dictionary of column -> list of values.
+    :param valid_robot_positions: The positions every match should have.
+    :return: The same dictionary as `find_consistency_issues`.
+    """
+    team_matches = defaultdict(set)
+    match_positions = defaultdict(set)
+    position_scouters = defaultdict(list)
+    team_positions = defaultdict(set)
+    rows = zip(match_keys["matchNumber"], match_keys["robotTeam"], match_keys["robotPosition"], match_keys["scouterName"])
+    for match, team, position, scouter in rows:
+        if match is None:
+            continue
+        match_positions[match]
+        if team is not None:
+            team_matches[team].add(match)
+            team_positions[(match, team)].add(position)
+        if position in valid_robot_positions:
+            match_positions[match].add(position)
+            position_scouters[(match, position)].append(scouter)
+
+    match_count_groups = defaultdict(list)
+    for team, matches in team_matches.items():
+        match_count_groups[len(matches)].append(team)
+    return {
+        "match_count_groups": {count: sorted(teams) for count, teams in sorted(match_count_groups.items())},
+        "missing_positions": [
+            (match, sorted(valid_robot_positions - positions))
+            for match, positions in sorted(match_positions.items()) if positions != valid_robot_positions
+        ],
+        "duplicate_submissions": [
+            (match, position, scouters)
+            for (match, position), scouters in sorted(position_scouters.items()) if len(scouters) > 1
+        ],
+        "teams_scouted_twice": [
+            (match, team, sorted(map(str, positions)))
+            for (match, team), positions in sorted(team_positions.items()) if len(positions) > 1
+        ],
+    }
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Benchmark the match consistency checks of script 02.")
+parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Entry counts to benchmark.")
+args = parser.parse_args()
+
+valid_positions = set(ROBOT_POSITIONS)
+find_consistency_issues(build_match_keys(100), valid_positions)  # Warm-up
+
+print(seperation_bar)
+print("Benchmark: Match Consistency Checks (Script 02)\n")
+print(f"{'entries':>10} | {'per-entry (s)':>13} | {'vectorized (s)':>14} | {'speedup':>8} | issues found | same output")
+for size in args.sizes:
+    match_keys = build_match_keys(size)
+
+    start = time.perf_counter()
+    expected = find_consistency_issues_per_entry(match_keys, valid_positions)
+    per_entry_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    issues = find_consistency_issues(match_keys, valid_positions)
+    vectorized_time = time.perf_counter() - start
+
+    found = sum(len(issues[key]) for key in ("missing_positions", "duplicate_submissions", "teams_scouted_twice"))
+    print(f"{len(match_keys['matchNumber']):>10,} | {per_entry_time:13.3f} | {vectorized_time:14.3f} | "
+          f"{per_entry_time / vectorized_time:7.1f}x | {found:>12,} | {issues == expected}")
+
+print(seperation_bar)
@@ -0,0 +1,115 @@
+from utility_functions.print_formats import seperation_bar
+from utility_functions.intermediate_formats import ParquetEntryWriter, read_table
+from synthetic_data import generate_entries
+import os
+import json
+import time
+import argparse
+import tempfile
+import pandas as pd
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+# Same structure as scripts/02_data_cleaning_and_preprocessing.py
+EXPECTED_STRUCTURE = {
+    "metadata": {
+        "scouterName": str,
+        "matchNumber": int,
+        "robotTeam": int,
+        "robotPosition": str
+    },
+    "var1": int,
+    "var2": str,
+    "var3": bool
+}
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+SUBSET_COLUMNS = ["metadata.robotTeam", "var1"]  # Columns loaded by the "column subset" case
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def timed(function):
+    """
+    Calls a function and returns its result and the seconds it took.
+
+    :param function: Callable without arguments.
+    :return: Tuple of (result, seconds).
+    """
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def save_json(entries, file_path, indent):
+    """
+    Saves entries as a JSON array.
+
+    :param entries: Cleaned entries.
+    :param file_path: Output path.
+    :param indent: JSON indentation (None for compact).
+    """
+    with open(file_path, "w") as outfile:
+        json.dump(entries, outfile, indent=indent)
+
+
+def save_parquet(entries, file_path):
+    """
+    Saves entries as a flattened Parquet table.
+
+    :param entries: Cleaned entries.
+    :param file_path: Output path.
+    """
+    with ParquetEntryWriter(file_path, EXPECTED_STRUCTURE) as writer:
+        for entry in entries:
+            writer.write(entry)
+
+
+def load_json_frame(file_path):
+    """
+    Loads a JSON array and flattens it into a DataFrame, as script 04 does.
+
+    :param file_path: Path to the JSON file.
+    :return: A pandas DataFrame.
+    """
+    with open(file_path, "r") as infile:
+        return pd.json_normalize(json.load(infile))
+
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Benchmark JSON vs. Parquet intermediate files.")
+parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Entry counts to benchmark.")
+args = parser.parse_args()
+
+print(seperation_bar)
+print("Benchmark: Intermediate Formats\n")
+
+print(f"{'entries':>9} | {'format':<16} | {'save (s)':>8} | {'load frame (s)':>14} | {'load 2 cols (s)':>15} | {'size (MiB)':>10}")
+for size in args.sizes:
+    entries = list(generate_entries(size, error_rate=0.0))
+    with tempfile.TemporaryDirectory() as work_dir:
+        cases = [
+            ("JSON indent=4", "data_indented.json", lambda path: save_json(entries, path, 4), load_json_frame, None),
+            ("JSON compact", "data_compact.json", lambda path: save_json(entries, path, None), load_json_frame, None),
+            (
+                "Parquet (mmap)", "data.parquet", lambda path: save_parquet(entries, path),
+                lambda path: read_table(path).to_pandas(),
+                lambda path: read_table(path, columns=SUBSET_COLUMNS).to_pandas(),
+            ),
+        ]
+        for label, file_name, save, load, load_subset in cases:
+            file_path = os.path.join(work_dir, file_name)
+            _, save_time = timed(lambda: save(file_path))
+            _, load_time = timed(lambda: load(file_path))
+            # JSON has to be parsed completely even when only a few columns are needed
+            subset_time = timed(lambda: load_subset(file_path))[1] if load_subset else load_time
+            size_mib = os.path.getsize(file_path) / (1024 * 1024)
+            print(f"{size:>9,} | {label:<16} | {save_time:8.3f} | {load_time:14.3f} | {subset_time:15.3f} | {size_mib:10.2f}")
+
+print(seperation_bar)
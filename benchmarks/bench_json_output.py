@@ -0,0 +1,114 @@
+from utility_functions.print_formats import seperation_bar
+from utility_functions.pipeline_runner import load_stage
+from utility_functions import json_output
+from synthetic_data import generate_entries
+import os
+import json
+import time
+import argparse
+import tempfile
+import pandas  # Loaded up front so no mode's timing includes importing it
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+AGGREGATION_SCRIPT = "04_data_analysis_and_statistics_aggregation.py"
+DEFAULT_SIZES = [10_000, 100_000]  # Cleaned entries per data set
+DEFAULT_MATCHES_PER_TEAM = 12
+DEFAULT_REPEATS = 3  # The fastest of several writes is reported
+
+# (label, backend, output style); None as the style means the previous `json.dump(indent=4)` writer
+MODES = [
+    ("previous json.dump", "stdlib", None),
+    ("stdlib indented", "stdlib", json_output.INDENTED),
+    ("stdlib compact", "stdlib", json_output.COMPACT),
+    ("orjson indented", "orjson", json_output.INDENTED),
+    ("orjson compact", "orjson", json_output.COMPACT),
+]
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def build_data_sets(num_entries, matches_per_team):
+    """
+    Builds the two kinds of data the pipeline writes as JSON: cleaned entries and team performance data.
+
+    :param num_entries: Number of cleaned entries.
+    :param matches_per_team: Average matches per team (sets the number of teams).
+    :return: List of (data set label, object to serialize).
+    """
+    num_teams = max(1, num_entries // matches_per_team)
+    entries = list(generate_entries(num_entries, num_teams=num_teams, error_rate=0.0))
+
+    aggregation_script = load_stage(AGGREGATION_SCRIPT)
+    team_data = {}
+    for entry in entries:
+        team_data.setdefault(str(entry["metadata"]["robotTeam"]), {"matches": []})["matches"].append(entry)
+    team_performance_data = aggregation_script.calculate_team_performance_data_groupby(
+        *aggregation_script.team_data_to_frame(team_data)
+    )
+    return [
+        (f"cleaned entries ({num_entries:,})", entries),
+        (f"team statistics ({len(team_performance_data):,} teams)", team_performance_data),
+    ]
+
+
+def time_write(data, file_path, backend, style, repeats):
+    """
+    Writes an object to JSON several times in one mode.
+
+    :param data: Object to write.
+    :param file_path: Output path.
+    :param backend: Value for `json_output.JSON_BACKEND`.
+    :param style: Output style, or None for the previous `json.dump(indent=4)` writer.
+    :param repeats: Number of writes.
+    :return: Tuple of (fastest write in seconds, file size in bytes, seconds to load the file back).
+    """
+    json_output.JSON_BACKEND = backend
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        if style is None:
+            with open(file_path, "w") as outfile:
+                json.dump(data, outfile, indent=4)
+        else:
+            json_output.write_json(data, file_path, style)
+        seconds.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with open(file_path, "r") as infile:
+        json.load(infile)
+    return min(seconds), os.path.getsize(file_path), time.perf_counter() - start
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Benchmark JSON serialization time and output size per backend and style.")
+parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Numbers of cleaned entries.")
+parser.add_argument("--matches-per-team", type=int, default=DEFAULT_MATCHES_PER_TEAM, help="Average matches per team.")
+parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Writes per mode.")
+args = parser.parse_args()
+
+modes = [mode for mode in MODES if mode[1] != "orjson" or json_output.orjson is not None]
+
+print(seperation_bar)
+print("Benchmark: JSON Output Backends and Styles\n")
+if json_output.orjson is None:
+    print("[INFO] orjson is not installed (pip install orjson); only the standard library is benchmarked.\n")
+
+print(f"{'data set':<30} | {'mode':<18} | {'write (s)':>9} | {'size (MB)':>9} | {'vs previous':>11} | {'load (s)':>8}")
+with tempfile.TemporaryDirectory() as work_dir:
+    file_path = os.path.join(work_dir, "output.json")
+    for num_entries in args.sizes:
+        for label, data in build_data_sets(num_entries, args.matches_per_team):
+            previous_seconds = None
+            for mode_label, backend, style in modes:
+                seconds, size, load_seconds = time_write(data, file_path, backend, style, args.repeats)
+                previous_seconds = previous_seconds or seconds
+                print(f"{label:<30} | {mode_label:<18} | {seconds:9.3f} | {size / 1e6:9.2f} | "
+                      f"{previous_seconds / seconds:10.1f}x | {load_seconds:8.3f}")
+
+print(seperation_bar)
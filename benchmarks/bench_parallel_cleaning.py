@@ -0,0 +1,54 @@
+from utility_functions.print_formats import seperation_bar
+from synthetic_data import write_raw_file
+from benchmark_helpers import run_script
+import os
+import filecmp
+import argparse
+import tempfile
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+CLEANING_SCRIPT = "02_data_cleaning_and_preprocessing.py"
+DEFAULT_NUM_ENTRIES = 500_000
+DEFAULT_WORKER_COUNTS = [1, 2, 4, 8]
+OUTPUT_FILES = ["data/processed/cleaned_match_data.json", "outputs/statistics/scouter_leaderboard.txt"]
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Benchmark parallel cleaning in script 02 (--workers N).")
+parser.add_argument("--entries", type=int, default=DEFAULT_NUM_ENTRIES, help="Synthetic entries to clean.")
+parser.add_argument("--workers", type=int, nargs="+", default=DEFAULT_WORKER_COUNTS, help="Worker counts to time.")
+parser.add_argument("--error-rate", type=float, default=0.05, help="Injected error rate.")
+args = parser.parse_args()
+
+print(seperation_bar)
+print("Benchmark: Parallel Cleaning (Script 02)\n")
+
+with tempfile.TemporaryDirectory() as work_dir, tempfile.TemporaryDirectory() as reference_dir:
+    os.makedirs(os.path.join(work_dir, "data", "raw"))
+    raw_path = os.path.join("data", "raw", "raw_match_data.json")
+    print(f"[INFO] Generating {args.entries:,} synthetic entries.")
+    write_raw_file(os.path.join(work_dir, raw_path), args.entries, error_rate=args.error_rate)
+
+    baseline_time = None
+    for workers in args.workers:
+        elapsed, peak_mib = run_script(CLEANING_SCRIPT, ["--input", raw_path, "--workers", str(workers)], work_dir)
+        baseline_time = baseline_time or elapsed
+
+        # The first run is the reference; every other worker count must produce identical files
+        identical = True
+        for output_file in OUTPUT_FILES:
+            reference_path = os.path.join(reference_dir, os.path.basename(output_file))
+            if workers == args.workers[0]:
+                os.replace(os.path.join(work_dir, output_file), reference_path)
+            else:
+                identical &= filecmp.cmp(reference_path, os.path.join(work_dir, output_file), shallow=False)
+
+        print(f"[INFO] workers={workers:<2} | {elapsed:7.2f} s | speedup {baseline_time / elapsed:5.2f}x | "
+              f"{peak_mib:8.1f} MiB peak RSS | output identical: {identical}")
+
+print(seperation_bar)
@@ -0,0 +1,139 @@
+from utility_functions.print_formats import seperation_bar
+from utility_functions.pick_list import PickListEngine
+import time
+import random
+import argparse
+import statistics
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+DEFAULT_TEAMS = 400
+DEFAULT_METRICS = 50
+DEFAULT_ITERATIONS = 2000  # Re-rankings timed per path (the pandas path is timed over fewer)
+PANDAS_ITERATIONS = 100
+PICK_LIST_SIZE = 24
+ASCENDING_SHARE = 0.2  # Share of metrics where lower is better
+MISSING_SHARE = 0.02  # Share of missing values
+TARGET_MS = 1.0
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def team_frame(num_teams, num_metrics, seed):
+    """
+    Builds a team DataFrame of random metrics with some missing values.
+
+    :return: Tuple of (DataFrame indexed by team, list of ascending metric names).
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    values = rng.normal(10, 3, size=(num_teams, num_metrics)) * rng.uniform(0.1, 10, size=num_metrics)
+    values[rng.random(values.shape) < MISSING_SHARE] = np.nan
+    names = [f"metric_{index}" for index in range(num_metrics)]
+    frame = pd.DataFrame(values, index=list(range(1, num_teams + 1)), columns=names)
+    return frame, names[:int(num_metrics * ASCENDING_SHARE)]
+
+
+def pandas_pick_list(frame, ascending_names, weights, picked, n):
+    """
+    The per-change pandas path: z-score every column, sum the weighted columns, drop the picked teams and sort.
+
+    :return: List of (team, score), best first.
+    """
+    z_scores = ((frame - frame.mean()) / frame.std(ddof=0)).fillna(0.0)
+    z_scores[ascending_names] = -z_scores[ascending_names]
+    scores = (z_scores[list(weights)] * list(weights.values())).sum(axis=1)
+    scores = scores.drop(index=[int(team) for team in picked])
+    top = scores.sort_values(ascending=False, kind="stable").head(n)
+    return [(str(team), float(score)) for team, score in top.items()]
+
+
+def engine_pick_list(engine, weights, picked, n):
+    """
+    The engine path: one matrix-vector product for the weights, a mask for the picks, `argpartition` for the top N.
+
+    :return: List of (team, score), best first.
+    """
+    engine.set_weights(weights)
+    engine.reset_picks()
+    engine.pick(*picked)
+    return engine.top(n)
+
+
+def random_changes(names, teams, count, seed):
+    """
+    Alliance-selection changes: new weights on a few metrics, and a growing list of picked teams.
+
+    :return: List of (weights, picked teams).
+    """
+    rng = random.Random(seed)
+    changes, picked = [], []
+    for _ in range(count):
+        weights = {name: rng.uniform(-1, 3) for name in rng.sample(names, rng.randint(3, 12))}
+        if len(picked) < 24 and rng.random() < 0.3:
+            picked.append(rng.choice([team for team in teams if team not in picked]))
+        changes.append((weights, list(picked)))
+    return changes
+
+
+def timed(function, changes):
+    """
+    :return: Tuple of (results, sorted milliseconds per call).
+    """
+    results, times = [], []
+    for weights, picked in changes:
+        start = time.perf_counter()
+        results.append(function(weights, picked))
+        times.append((time.perf_counter() - start) * 1000)
+    return results, sorted(times)
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Benchmark pick-list re-ranking on weight and pick changes (script 05 and the stats server).")
+parser.add_argument("--teams", type=int, default=DEFAULT_TEAMS, help="Teams in the pick list.")
+parser.add_argument("--metrics", type=int, default=DEFAULT_METRICS, help="Metrics per team.")
+parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="Re-rankings timed.")
+parser.add_argument("--target-ms", type=float, default=TARGET_MS, help="Fail if the median re-ranking is slower.")
+args = parser.parse_args()
+
+print(seperation_bar)
+print("Benchmark: Pick-List Re-Ranking\n")
+
+frame, ascending_names = team_frame(args.teams, args.metrics, seed=0)
+changes = random_changes(list(frame.columns), [str(team) for team in frame.index], args.iterations, seed=0)
+
+start = time.perf_counter()
+engine = PickListEngine.from_frame(frame, ascending_names=ascending_names)
+build_ms = (time.perf_counter() - start) * 1000
+
+engine_results, engine_ms = timed(lambda weights, picked: engine_pick_list(engine, weights, picked, PICK_LIST_SIZE), changes)
+pandas_results, pandas_ms = timed(lambda weights, picked: pandas_pick_list(frame, ascending_names, weights, picked, PICK_LIST_SIZE),
+                                  changes[:PANDAS_ITERATIONS])
+
+print(f"[INFO] {args.teams} teams x {args.metrics} metrics, top {PICK_LIST_SIZE}; engine built once in {build_ms:.2f} ms.\n")
+print(f"{'path':<8} | {'re-ranks':>8} | {'median (ms)':>11} | {'p99 (ms)':>8}")
+for name, times in (("pandas", pandas_ms), ("engine", engine_ms)):
+    print(f"{name:<8} | {len(times):>8,} | {statistics.median(times):11.4f} | {times[min(len(times) - 1, int(0.99 * len(times)))]:8.4f}")
+
+failed = False
+for (engine_list, pandas_list) in zip(engine_results, pandas_results):
+    if [team for team, _ in engine_list] != [team for team, _ in pandas_list] or any(
+            abs(engine_score - pandas_score) > 1e-9 * max(1.0, abs(pandas_score))
+            for (_, engine_score), (_, pandas_score) in zip(engine_list, pandas_list)):
+        print("[ERROR] The engine's pick list differs from the pandas pick list.")
+        failed = True
+        break
+if statistics.median(engine_ms) > args.target_ms:
+    print(f"[ERROR] The median re-ranking is above the {args.target_ms:.1f} ms target.")
+    failed = True
+
+print(seperation_bar)
+if failed:
+    raise SystemExit(1)
@@ -0,0 +1,65 @@
+from utility_functions.print_formats import seperation_bar
+from utility_functions.pipeline_runner import PIPELINE_STAGES
+from synthetic_data import write_raw_file
+from benchmark_helpers import run_command, run_script
+import os
+import shutil
+import filecmp
+import argparse
+import tempfile
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+DEFAULT_SIZES = [3_000, 30_000, 300_000]
+RESULT_FILES = [
+    "outputs/team_data/team_performance_data.json",
+    "outputs/team_data/advanced_team_performance_data.json",
+    "outputs/statistics/team_comparison_analysis_stats.txt",
+    "outputs/statistics/scouter_leaderboard.txt",
+]
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Compare the single-process pipeline runner with running scripts 01-05.")
+parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Raw entry counts to benchmark.")
+args = parser.parse_args()
+
+print(seperation_bar)
+print("Benchmark: Pipeline Runner vs. Scripts 01-05\n")
+
+print(f"{'entries':>9} | {'mode':<32} | {'wall (s)':>8} | {'peak RSS (MiB)':>14} | same results")
+for size in args.sizes:
+    with tempfile.TemporaryDirectory() as work_dir, tempfile.TemporaryDirectory() as reference_dir:
+        os.makedirs(os.path.join(work_dir, "data", "raw"))
+        write_raw_file(os.path.join(work_dir, "data", "raw", "raw_match_data.json"), size)
+
+        cases = [
+            ("scripts one after another", None),
+            ("runner", ["-m", "utility_functions.pipeline_runner", "run"]),
+            ("runner --no-intermediates", ["-m", "utility_functions.pipeline_runner", "run", "--no-intermediates"]),
+        ]
+        for label, command in cases:
+            if command is None:
+                elapsed, peak_mib = 0.0, 0.0
+                for _, script_name, _, _ in PIPELINE_STAGES:
+                    script_time, script_peak = run_script(script_name, [], work_dir)
+                    elapsed += script_time
+                    peak_mib = max(peak_mib, script_peak)
+            else:
+                elapsed, peak_mib = run_command(command, work_dir)
+
+            # The first case is the reference; the runner must produce identical results
+            same = True
+            for result_file in RESULT_FILES:
+                reference_path = os.path.join(reference_dir, os.path.basename(result_file))
+                if command is None:
+                    shutil.copyfile(os.path.join(work_dir, result_file), reference_path)
+                else:
+                    same &= filecmp.cmp(reference_path, os.path.join(work_dir, result_file), shallow=False)
+            print(f"{size:>9,} | {label:<32} | {elapsed:8.2f} | {peak_mib:14.1f} | {'' if command is None else same}")
+
+print(seperation_bar)
@@ -0,0 +1,161 @@
+from utility_functions.print_formats import seperation_bar
+from utility_functions.pipeline_runner import PIPELINE_STAGES
+from synthetic_data import EVENT_PRESETS, generate_event, write_entries
+from benchmark_helpers import REPO_ROOT, run_script
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import tempfile
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+BENCHMARKED_STAGES = ["02", "03", "04", "05"]
+DEFAULT_PRESETS = ["regional", "district_championship", "championship"]
+DEFAULT_REPEATS = 3  # Each stage is run several times; the median wall time and largest peak RSS are kept
+BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "baselines", "pipeline_stages.json")
+
+# A stage regresses when it is slower (or uses more memory) than its baseline by more than the relative
+# tolerance plus the absolute slack. The slack keeps process start-up noise on small events from failing the check.
+WALL_TIME_TOLERANCE = 0.25
+WALL_TIME_SLACK_S = 0.15
+PEAK_RSS_TOLERANCE = 0.15
+PEAK_RSS_SLACK_MIB = 10
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def benchmark_preset(preset, repeats, error_rate, seed):
+    """
+    Generates one synthetic event and runs each pipeline stage on it in a child process.
+
+    :param preset: Name of an event preset in `synthetic_data.EVENT_PRESETS`.
+    :param repeats: Runs per stage.
+    :param error_rate: Probability of an injected schema error per entry.
+    :param seed: Random seed for the generated event.
+    :return: Tuple of (number of entries, {stage -> {"wall_s", "peak_rss_mib"}}).
+    """
+    stage_scripts = {name: script_name for name, script_name, _, _ in PIPELINE_STAGES}
+    num_teams, num_matches = EVENT_PRESETS[preset]
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.makedirs(os.path.join(work_dir, "data", "raw"))
+        num_entries = write_entries(
+            os.path.join(work_dir, "data", "raw", "raw_match_data.json"),
+            generate_event(num_teams, num_matches, error_rate=error_rate, seed=seed),
+        )
+        # Each stage reads the previous stage's output, so run the stages in order and repeat the whole sequence
+        samples = {stage: [] for stage in BENCHMARKED_STAGES}
+        for _ in range(repeats):
+            for stage in BENCHMARKED_STAGES:
+                samples[stage].append(run_script(stage_scripts[stage], [], work_dir))
+
+    results = {}
+    for stage, runs in samples.items():
+        results[stage] = {
+            "wall_s": round(statistics.median(wall for wall, _ in runs), 4),
+            "peak_rss_mib": round(max(peak for _, peak in runs), 1),
+        }
+    return num_entries, results
+
+
+def find_regressions(results, baseline):
+    """
+    Compares results with a stored baseline.
+
+    :param results: {preset -> {"entries", "stages": {stage -> measurements}}}.
+    :param baseline: Baseline in the same format (the "results" of a saved baseline file).
+    :return: List of regression messages (empty if none).
+    """
+    regressions = []
+    for preset, preset_results in results.items():
+        baseline_preset = baseline.get(preset)
+        if baseline_preset is None:
+            print(f"[INFO] No baseline for preset '{preset}'; skipping its comparison.")
+            continue
+        if baseline_preset["entries"] != preset_results["entries"]:
+            print(f"[INFO] Baseline for preset '{preset}' has a different number of entries; skipping its comparison.")
+            continue
+        for stage, measured in preset_results["stages"].items():
+            expected = baseline_preset["stages"].get(stage)
+            if expected is None:
+                continue
+            wall_limit = expected["wall_s"] * (1 + WALL_TIME_TOLERANCE) + WALL_TIME_SLACK_S
+            if measured["wall_s"] > wall_limit:
+                regressions.append(f"{preset} stage {stage}: wall time {measured['wall_s']:.2f} s "
+                                   f"(baseline {expected['wall_s']:.2f} s, limit {wall_limit:.2f} s)")
+            rss_limit = expected["peak_rss_mib"] * (1 + PEAK_RSS_TOLERANCE) + PEAK_RSS_SLACK_MIB
+            if measured["peak_rss_mib"] > rss_limit:
+                regressions.append(f"{preset} stage {stage}: peak RSS {measured['peak_rss_mib']:.1f} MiB "
+                                   f"(baseline {expected['peak_rss_mib']:.1f} MiB, limit {rss_limit:.1f} MiB)")
+    return regressions
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(
+    description="Time and memory-profile scripts 02-05 on synthetic events, and compare with a stored baseline."
+)
+parser.add_argument("--presets", nargs="+", default=DEFAULT_PRESETS, choices=EVENT_PRESETS, help="Event sizes to run.")
+parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Runs per stage.")
+parser.add_argument("--error-rate", type=float, default=0.02, help="Probability of an injected error per entry.")
+parser.add_argument("--seed", type=int, default=0, help="Random seed for the generated events.")
+parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file to compare with or save to.")
+parser.add_argument("--save-baseline", action="store_true", help="Save the results as the new baseline.")
+args = parser.parse_args()
+
+print(seperation_bar)
+print("Benchmark: Pipeline Stages 02-05 on Synthetic Events\n")
+
+results = {}
+print(f"{'preset':<22} | {'entries':>8} | {'stage':>5} | {'wall (s)':>8} | {'entries/s':>10} | {'peak RSS (MiB)':>14}")
+for preset in args.presets:
+    num_entries, stage_results = benchmark_preset(preset, args.repeats, args.error_rate, args.seed)
+    results[preset] = {"entries": num_entries, "stages": stage_results}
+    for stage, measured in stage_results.items():
+        throughput = num_entries / measured["wall_s"] if measured["wall_s"] else 0.0
+        print(f"{preset:<22} | {num_entries:>8,} | {stage:>5} | {measured['wall_s']:8.2f} | "
+              f"{throughput:10,.0f} | {measured['peak_rss_mib']:14.1f}")
+    total = sum(measured["wall_s"] for measured in stage_results.values())
+    peak = max(measured["peak_rss_mib"] for measured in stage_results.values())
+    print(f"{preset:<22} | {num_entries:>8,} | {'all':>5} | {total:8.2f} | {num_entries / total:10,.0f} | {peak:14.1f}")
+
+print()
+if args.save_baseline:
+    os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+    with open(args.baseline, "w") as outfile:
+        json.dump({
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "machine": {
+                "platform": platform.platform(),
+                "processor": platform.processor() or platform.machine(),
+                "cpu_count": os.cpu_count(),
+                "python": platform.python_version(),
+            },
+            "error_rate": args.error_rate,
+            "seed": args.seed,
+            "repeats": args.repeats,
+            "results": results,
+        }, outfile, indent=4)
+    print(f"[INFO] Baseline saved to: {args.baseline}")
+    print(seperation_bar)
+elif not os.path.exists(args.baseline):
+    print(f"[INFO] No baseline at {args.baseline}. Run with --save-baseline to create one on this machine.")
+    print(seperation_bar)
+else:
+    with open(args.baseline, "r") as infile:
+        baseline = json.load(infile)
+    print(f"[INFO] Comparing with the baseline from {baseline['created']} ({baseline['machine']['platform']}).")
+    regressions = find_regressions(results, baseline["results"])
+    for regression in regressions:
+        print(f"[ERROR] Regression: {regression}")
+    if not regressions:
+        print("[INFO] No regressions.")
+    print(seperation_bar)
+    sys.exit(1 if regressions else 0)
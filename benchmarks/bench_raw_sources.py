@@ -0,0 +1,101 @@
+from utility_functions.print_formats import seperation_bar
+from utility_functions.json_streaming import load_raw_entries
+from utility_functions.raw_sources import RawSourceMerger, resolve_raw_files
+from synthetic_data import EVENT_PRESETS, generate_event, write_entries, write_tablet_exports
+import os
+import time
+import argparse
+import tempfile
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+DEFAULT_PRESETS = ["regional", "championship"]
+DEFAULT_EVENTS = 4  # Events per data set, one folder each
+DEFAULT_TABLETS = 6  # Export files per event (one tablet per robot position)
+DEFAULT_DUPLICATE_RATE = 0.05  # Share of entries a second tablet exports again
+DEFAULT_THREADS = [1, 2, 4, 8]
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def timed(function):
+    """
+    Calls a function and returns its result and the seconds it took.
+
+    :param function: Callable without arguments.
+    :return: Tuple of (result, seconds).
+    """
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def write_events(raw_dir, preset, num_events, num_tablets, duplicate_rate):
+    """
+    Writes several synthetic events as per-tablet exports, plus all their entries in one file.
+
+    :param raw_dir: Folder for the event folders.
+    :param preset: Name of an event preset in `synthetic_data.EVENT_PRESETS`.
+    :param num_events: Number of events.
+    :param num_tablets: Export files per event.
+    :param duplicate_rate: Probability that an entry is exported twice.
+    :return: Tuple of (path of the single merged file, number of entries written to the exports).
+    """
+    num_teams, num_matches = EVENT_PRESETS[preset]
+    all_entries = []
+    num_exported = 0
+    for event in range(num_events):
+        entries = list(generate_event(num_teams, num_matches, error_rate=0.0, seed=event))
+        for entry in entries:
+            # Matches of later events get their own numbers, so no event repeats another's keys
+            entry["metadata"]["matchNumber"] += event * num_matches
+        all_entries.extend(entries)
+        num_exported += write_tablet_exports(
+            os.path.join(raw_dir, "events", f"event_{event + 1}"), entries, num_tablets, duplicate_rate, seed=event
+        )
+    merged_path = os.path.join(raw_dir, "merged.json")
+    write_entries(merged_path, all_entries)
+    return merged_path, num_exported
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Benchmark loading and merging raw data exported as one file per tablet.")
+parser.add_argument("--presets", nargs="+", default=DEFAULT_PRESETS, choices=EVENT_PRESETS, help="Event sizes.")
+parser.add_argument("--events", type=int, default=DEFAULT_EVENTS, help="Events per data set.")
+parser.add_argument("--tablets", type=int, default=DEFAULT_TABLETS, help="Export files per event.")
+parser.add_argument("--duplicate-rate", type=float, default=DEFAULT_DUPLICATE_RATE, help="Share of entries exported twice.")
+parser.add_argument("--threads", type=int, nargs="+", default=DEFAULT_THREADS, help="Loader thread counts.")
+args = parser.parse_args()
+
+print(seperation_bar)
+print("Benchmark: Multi-File Raw Data Loading (Script 02)\n")
+
+print(f"{'preset':<14} | {'files':>5} | {'entries':>8} | {'mode':<18} | {'load (s)':>8} | {'kept':>8} | {'dropped':>7}")
+with tempfile.TemporaryDirectory() as work_dir:
+    for preset in args.presets:
+        raw_dir = os.path.join(work_dir, preset)
+        merged_path, num_exported = write_events(raw_dir, preset, args.events, args.tablets, args.duplicate_rate)
+        files = resolve_raw_files(os.path.join(raw_dir, "events"))
+
+        entries, seconds = timed(lambda: load_raw_entries(merged_path))
+        print(f"{preset:<14} | {1:>5} | {len(entries):>8,} | {'one merged file':<18} | {seconds:8.3f} | "
+              f"{len(entries):>8,} | {0:>7,}")
+        expected_entries = entries
+        for threads in args.threads:
+            merger = RawSourceMerger(files)
+            entries, seconds = timed(lambda: merger.load_entries(threads))
+            print(f"{preset:<14} | {len(files):>5} | {num_exported:>8,} | {f'{threads} threads':<18} | {seconds:8.3f} | "
+                  f"{len(entries):>8,} | {len(merger.duplicates):>7,}")
+        merger = RawSourceMerger(files)
+        num_streamed, seconds = timed(lambda: sum(1 for _ in merger.iter_entries()))
+        print(f"{preset:<14} | {len(files):>5} | {num_exported:>8,} | {'stream':<18} | {seconds:8.3f} | "
+              f"{num_streamed:>8,} | {len(merger.duplicates):>7,}")
+        if len(entries) != len(expected_entries):
+            print(f"[ERROR] Merging kept {len(entries)} entries; the events hold {len(expected_entries)}.")
+
+print(seperation_bar)
@@ -0,0 +1,144 @@
+from utility_functions.print_formats import seperation_bar
+from utility_functions.schema_validation import compile_schema
+from utility_functions.warning_log import format_warning, warning_record
+from synthetic_data import generate_entries
+import copy
+import time
+import argparse
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+# Same structure as scripts/02_data_cleaning_and_preprocessing.py
+EXPECTED_STRUCTURE = {
+    "metadata": {
+        "scouterName": str,
+        "matchNumber": int,
+        "robotTeam": int,
+        "robotPosition": str
+    },
+    "var1": int,
+    "var2": str,
+    "var3": bool
+}
+VALID_ROBOT_POSITIONS = {"red_1", "red_2", "red_3", "blue_1", "blue_2", "blue_3"}
+
+DEFAULT_NUM_ENTRIES = 200_000
+DEFAULT_ERROR_RATES = [0.0, 0.02, 0.2]
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def validate_structure_recursive(data, expected_structure, scouter, log_warning, path=""):
+    """
+    Reference copy of the recursive validator that the compiled schema replaced.
+
+    :param data: The input data to validate.
+    :param expected_structure: The expected structure.
+    :param scouter: The scouter responsible for the data.
+    :param log_warning: Callable taking (message, scouter).
+    :param path: The path to the current key for logging purposes.
+    :return: A validated and cleaned version of the data.
+    """
+    validated = {}
+    for key, expected_type in expected_structure.items():
+        full_key_path = f"{path}.{key}" if path else key
+
+        if key not in data:
+            log_warning(f"[WARNING] Missing key '{full_key_path}'.", scouter)
+            continue
+
+        if isinstance(expected_type, dict):
+            validated[key] = validate_structure_recursive(data[key], expected_type, scouter, log_warning, full_key_path)
+        else:
+            value = data[key]
+            if not isinstance(value, expected_type):
+                log_warning(
+                    f"[WARNING] Incorrect type for '{full_key_path}'. Expected {expected_type}, got {type(value)}.",
+                    scouter,
+                )
+            else:
+                if key == "robotPosition" and value not in VALID_ROBOT_POSITIONS:
+                    log_warning(
+                        f"[WARNING] Invalid robot position '{value}' at '{full_key_path}'. Defaulting to 'unknown'.",
+                        scouter,
+                    )
+                    value = "unknown"
+
+                if isinstance(value, int) and value < 0:
+                    log_warning(
+                        f"[WARNING] Negative value '{value}' at '{full_key_path}'. Defaulting to 0.",
+                        scouter,
+                    )
+                    value = 0
+
+                validated[key] = value
+
+    extra_keys = set(data.keys()) - set(expected_structure.keys())
+    for extra_key in extra_keys:
+        log_warning(f"[WARNING] Extra key '{path}.{extra_key}' found and removed.", scouter)
+
+    return validated
+
+
+def run_validator(validate, entries):
+    """
+    Validates every entry and collects the cleaned entries and warnings.
+
+    :param validate: Callable taking (entry, scouter, log_warning).
+    :param entries: Raw entries.
+    :return: Tuple of (cleaned entries, warnings as the arguments passed to `log_warning`, seconds elapsed).
+    """
+    warnings = []
+
+    def log_warning(*warning):
+        warnings.append(warning)
+
+    start = time.perf_counter()
+    cleaned = [
+        validate(entry, entry.get("metadata", {}).get("scouterName", "Unknown"), log_warning)
+        for entry in entries
+    ]
+    return cleaned, warnings, time.perf_counter() - start
+
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Microbenchmark the compiled schema validator used by script 02.")
+parser.add_argument("--entries", type=int, default=DEFAULT_NUM_ENTRIES, help="Entries per run.")
+parser.add_argument("--error-rates", type=float, nargs="+", default=DEFAULT_ERROR_RATES, help="Injected error rates.")
+args = parser.parse_args()
+
+print(seperation_bar)
+print("Benchmark: Schema Validation (Script 02)\n")
+
+schema = compile_schema(EXPECTED_STRUCTURE, VALID_ROBOT_POSITIONS)
+
+for error_rate in args.error_rates:
+    entries = list(generate_entries(args.entries, error_rate=error_rate))
+
+    recursive_cleaned, recursive_warnings, recursive_time = run_validator(
+        lambda entry, scouter, log: validate_structure_recursive(entry, EXPECTED_STRUCTURE, scouter, log),
+        entries,
+    )
+    # The compiled fast path returns valid entries as-is, so give it its own copy of the input
+    compiled_cleaned, compiled_records, compiled_time = run_validator(schema.validate, copy.deepcopy(entries))
+    # The compiled validator reports warning records; format them (outside the timing) to compare the messages
+    compiled_warnings = [
+        (format_warning(warning_record(code, key_path, scouter, detail=detail)), scouter)
+        for code, key_path, scouter, detail in compiled_records
+    ]
+
+    if compiled_cleaned != recursive_cleaned or compiled_warnings != recursive_warnings:
+        raise AssertionError(f"Compiled validator output differs from the recursive validator (error rate {error_rate}).")
+
+    print(f"[INFO] Error rate {error_rate:.0%} ({len(recursive_warnings):,} warnings, outputs identical):")
+    print(f"       recursive validate_structure: {args.entries / recursive_time:12,.0f} entries/sec")
+    print(f"       compiled schema:              {args.entries / compiled_time:12,.0f} entries/sec"
+          f"  ({recursive_time / compiled_time:.2f}x)")
+
+print(seperation_bar)
@@ -0,0 +1,165 @@
+from utility_functions.print_formats import seperation_bar
+from utility_functions.scouter_consensus import (
+    MATCH_COLUMN,
+    TEAM_COLUMN,
+    SCOUTER_COLUMN,
+    AGREEMENT_SHARE,
+    consensus_fields,
+    entries_to_frame,
+    score_scouters,
+)
+from synthetic_data import EVENT_PRESETS, STRING_CHOICES, generate_event, script_schema
+import copy
+import time
+import random
+import argparse
+import statistics
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+DEFAULT_PRESET = "season"
+DEFAULT_SCOUTERS = 300
+DEFAULT_SCOUTERS_PER_ROBOT = 2  # Each robot in each match is scouted this many times
+CHECK_MATCHES = 60  # Matches in the small input compared against the pairwise reference
+MAX_ERROR_RATE = 0.4  # Scouter error rates are spread evenly from 0 to this
+FLOAT_TOLERANCE = 1e-9
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def duplicate_scouting(entries, num_scouters, scouters_per_robot, seed):
+    """
+    Scouts every robot several times. Each scouter has an error rate: the share of fields they get wrong.
+
+    :param entries: Iterable of entries (the true values).
+    :param num_scouters: Number of scouters.
+    :param scouters_per_robot: Entries per robot per match.
+    :param seed: Random seed.
+    :return: Tuple of (list of entries, dictionary of scouter -> error rate).
+    """
+    structure, _ = script_schema()
+    rng = random.Random(seed)
+    error_rates = {f"Scouter {i}": MAX_ERROR_RATE * i / max(1, num_scouters - 1) for i in range(num_scouters)}
+    scouters = list(error_rates)
+    scouted = []
+    for entry in entries:
+        for scouter in rng.sample(scouters, scouters_per_robot):
+            copied = copy.deepcopy(entry)
+            copied["metadata"]["scouterName"] = scouter
+            for key, expected_type in structure.items():
+                if isinstance(expected_type, dict) or rng.random() >= error_rates[scouter]:
+                    continue
+                if expected_type is bool:
+                    copied[key] = not copied[key]
+                elif expected_type is str:
+                    copied[key] = rng.choice([choice for choice in STRING_CHOICES if choice != copied[key]])
+                elif expected_type is int:
+                    copied[key] += rng.choice([-3, -2, -1, 1, 2, 3])
+            scouted.append(copied)
+    return scouted, error_rates
+
+
+def pairwise_reference(matches_df, numeric_fields, categorical_fields):
+    """
+    The same scores computed the slow way: for every value, loop over the other scouters of its robot and match.
+
+    :return: Dictionary of scouter -> (compared values, accuracy, agreement rate).
+    """
+    import pandas as pd
+
+    fields = numeric_fields + categorical_fields
+    scales = {field: pd.to_numeric(matches_df[field]).std(ddof=0) or 1.0 for field in numeric_fields}
+    rows = matches_df.drop_duplicates([MATCH_COLUMN, TEAM_COLUMN, SCOUTER_COLUMN], keep="last").to_dict("records")
+    groups = {}
+    for row in rows:
+        groups.setdefault((row[MATCH_COLUMN], row[TEAM_COLUMN]), []).append(row)
+    totals = {}
+    for group in groups.values():
+        for row in group:
+            others = [other for other in group if other is not row]
+            for field in fields:
+                other_values = [other[field] for other in others if not pd.isna(other[field])]
+                if pd.isna(row[field]) or not other_values:
+                    continue
+                if field in numeric_fields:
+                    difference = abs(row[field] - sum(other_values) / len(other_values))
+                    disagreement, agrees = min(difference / scales[field], 1.0), difference == 0
+                else:
+                    agreement = sum(value == row[field] for value in other_values) / len(other_values)
+                    disagreement, agrees = 1.0 - agreement, agreement >= AGREEMENT_SHARE
+                total = totals.setdefault(row[SCOUTER_COLUMN], [0, 0.0, 0])
+                total[0] += 1
+                total[1] += disagreement
+                total[2] += agrees
+    return {scouter: (count, 1.0 - disagreement / count, agreed / count) for scouter, (count, disagreement, agreed) in totals.items()}
+
+
+def rank_correlation(first, second):
+    """
+    :return: Spearman rank correlation of two equal-length lists.
+    """
+    def ranks(values):
+        order = sorted(range(len(values)), key=values.__getitem__)
+        result = [0] * len(values)
+        for rank, index in enumerate(order):
+            result[index] = rank
+        return result
+    return statistics.correlation(ranks(first), ranks(second))
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Benchmark cross-scouter consensus scoring (script 02 `--consensus`).")
+parser.add_argument("--preset", choices=EVENT_PRESETS, default=DEFAULT_PRESET, help="Data pool size (teams, matches).")
+parser.add_argument("--scouters", type=int, default=DEFAULT_SCOUTERS, help="Number of scouters.")
+parser.add_argument("--per-robot", type=int, default=DEFAULT_SCOUTERS_PER_ROBOT, help="Scouters per robot per match.")
+args = parser.parse_args()
+
+print(seperation_bar)
+print("Benchmark: Scouter Consensus Scoring\n")
+
+structure, _ = script_schema()
+numeric_fields, categorical_fields = consensus_fields(structure)
+failed = False
+
+# Correctness: the vectorized scores equal a pairwise loop on a small input (3 scouters per robot, so
+# leave-one-out averages and partial agreement are exercised)
+small_entries, _ = duplicate_scouting(generate_event(40, CHECK_MATCHES, error_rate=0.0), 12, 3, seed=1)
+small_df = entries_to_frame(small_entries, structure)
+small_scores, _ = score_scouters(small_df, numeric_fields, categorical_fields)
+reference = pairwise_reference(small_df, numeric_fields, categorical_fields)
+for scouter, (count, accuracy, agreement_rate) in reference.items():
+    row = small_scores.loc[scouter]
+    if (row["compared_values"] != count or abs(row["accuracy"] - accuracy) > FLOAT_TOLERANCE
+            or abs(row["agreement_rate"] - agreement_rate) > FLOAT_TOLERANCE):
+        print(f"[ERROR] {scouter}: vectorized scores differ from the pairwise reference.")
+        failed = True
+if len(reference) != len(small_scores):
+    print("[ERROR] The vectorized and pairwise scores cover different scouters.")
+    failed = True
+
+# Season scale: one pass over every scouter
+num_teams, num_matches = EVENT_PRESETS[args.preset]
+entries, error_rates = duplicate_scouting(generate_event(num_teams, num_matches, error_rate=0.0), args.scouters, args.per_robot, seed=0)
+start = time.perf_counter()
+matches_df = entries_to_frame(entries, structure)
+frame_seconds = time.perf_counter() - start
+start = time.perf_counter()
+scouter_df, field_df = score_scouters(matches_df, numeric_fields, categorical_fields)
+score_seconds = time.perf_counter() - start
+
+correlation = rank_correlation([error_rates[scouter] for scouter in scouter_df.index], list(-scouter_df["accuracy"]))
+print(f"{'entries':>9} | {'scouters':>8} | {'build frame (s)':>15} | {'score (s)':>9} | {'error rate vs. accuracy':>23}")
+print(f"{len(entries):>9,} | {len(scouter_df):>8} | {frame_seconds:15.3f} | {score_seconds:9.3f} | {correlation:23.3f}")
+print(f"\n{field_df.to_string(float_format='{:.3f}'.format)}")
+if correlation < 0.9:
+    print("[ERROR] The accuracy ranking does not follow the scouters' error rates.")
+    failed = True
+
+print(seperation_bar)
+if failed:
+    raise SystemExit(1)
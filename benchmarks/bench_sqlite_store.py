@@ -0,0 +1,198 @@
+from utility_functions.print_formats import seperation_bar
+from utility_functions.json_streaming import JsonArrayWriter
+from utility_functions.team_index import TeamIndex
+from utility_functions.pipeline_runner import load_stage
+from utility_functions.sqlite_store import MatchStore, SQLiteEntryWriter, connect
+from synthetic_data import generate_entries, script_schema
+import os
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import statistics
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+AGGREGATION_SCRIPT = "04_data_analysis_and_statistics_aggregation.py"
+DEFAULT_SIZES = [10_000, 100_000]
+DEFAULT_LOOKUPS = 50  # Lookups timed per path (the JSON scan is timed over fewer, since each one parses the file)
+JSON_SCAN_LOOKUPS = 3
+NUM_TEAMS = 400
+NUM_SCOUTERS = 40
+FLOAT_TOLERANCE = 1e-9  # Relative tolerance when comparing the aggregation engines' statistics
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def median_ms(function, arguments):
+    """
+    Calls a function once per argument and returns the median time.
+
+    :param function: Callable taking one argument.
+    :param arguments: Arguments to time it with.
+    :return: Tuple of (list of results, median milliseconds).
+    """
+    results, times = [], []
+    for argument in arguments:
+        start = time.perf_counter()
+        results.append(function(argument))
+        times.append(time.perf_counter() - start)
+    return results, statistics.median(times) * 1000
+
+
+def json_scan(cleaned_path, key, value):
+    """
+    The JSON path: parse the whole cleaned file to answer one question.
+
+    :param cleaned_path: Path to the cleaned JSON file.
+    :param key: Metadata key to filter on.
+    :param value: Value to look for.
+    :return: Matching entries in file order.
+    """
+    with open(cleaned_path, "r") as infile:
+        return [entry for entry in json.load(infile) if entry["metadata"][key] == value]
+
+
+def statistics_match(expected, actual):
+    """
+    Compares two team statistics dictionaries, allowing floating-point rounding differences.
+
+    :return: True if they hold the same teams, keys (in order) and values.
+    """
+    if list(expected) != list(actual):
+        return False
+    for team, team_statistics in expected.items():
+        if list(team_statistics) != list(actual[team]):
+            return False
+        for key, value in team_statistics.items():
+            other = actual[team][key]
+            if isinstance(value, float):
+                if not (value == other or (value != value and other != other)
+                        or abs(value - other) <= FLOAT_TOLERANCE * max(1.0, abs(value))):
+                    return False
+            elif value != other:
+                return False
+    return True
+
+
+def read_during_insert(database_path, entries):
+    """
+    Inserts entries in an open transaction on one connection while another reads, as when new scouting
+    entries arrive during an analysis run. In WAL mode the reader is not blocked and sees the last
+    committed data.
+
+    :param database_path: Path of the database.
+    :param entries: Flattened rows to insert.
+    :return: Tuple of (read milliseconds, entries seen during the insert, entries seen after the commit,
+             entries before the insert).
+    """
+    store = MatchStore(database_path)
+    before = store.count_entries()
+    writer = connect(database_path)
+    columns = ", ".join(f'"{name}"' for name in store.columns)
+    writer.execute("BEGIN IMMEDIATE")
+    writer.executemany(f"INSERT INTO matches ({columns}) VALUES ({', '.join('?' for _ in store.columns)})", entries)
+    try:
+        start = time.perf_counter()
+        seen_during = store.count_entries()
+        elapsed = (time.perf_counter() - start) * 1000
+    except sqlite3.OperationalError:
+        seen_during, elapsed = None, float("nan")
+    writer.execute("COMMIT")
+    writer.close()
+    seen_after = store.count_entries()
+    store.close()
+    return elapsed, seen_during, seen_after, before
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Benchmark per-team lookups in the SQLite store against the JSON scan (scripts 02-04).")
+parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Cleaned entry counts to benchmark.")
+parser.add_argument("--lookups", type=int, default=DEFAULT_LOOKUPS, help="Lookups timed per path.")
+args = parser.parse_args()
+
+print(seperation_bar)
+print("Benchmark: SQLite Store vs. JSON Scan (Scripts 02-04)\n")
+
+structure, _ = script_schema()
+aggregation_script = load_stage(AGGREGATION_SCRIPT)
+failed = False
+print(f"{'entries':>9} | {'path':<10} | {'write (s)':>9} | {'team lookup (ms)':>16} | {'scouter lookup (ms)':>19} | {'aggregate (s)':>13}")
+for size in args.sizes:
+    entries = list(generate_entries(size, num_teams=NUM_TEAMS, num_scouters=NUM_SCOUTERS, error_rate=0.0))
+    rng = random.Random(0)
+    teams = [rng.choice(entries)["metadata"]["robotTeam"] for _ in range(args.lookups)]
+    scouters = [rng.choice(entries)["metadata"]["scouterName"] for _ in range(args.lookups)]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        # JSON: script 02 writes an array, and every question parses all of it
+        cleaned_path = os.path.join(work_dir, "cleaned_match_data.json")
+        start = time.perf_counter()
+        with JsonArrayWriter(cleaned_path) as writer:
+            for entry in entries:
+                writer.write(entry)
+        json_write = time.perf_counter() - start
+        json_teams, json_team_ms = median_ms(lambda team: json_scan(cleaned_path, "robotTeam", team), teams[:JSON_SCAN_LOOKUPS])
+        json_scouters, json_scouter_ms = median_ms(lambda scouter: json_scan(cleaned_path, "scouterName", scouter), scouters[:JSON_SCAN_LOOKUPS])
+        start = time.perf_counter()
+        with open(cleaned_path, "r") as infile:
+            team_data = {}
+            for entry in json.load(infile):
+                team_data.setdefault(str(entry["metadata"]["robotTeam"]), {"matches": []})["matches"].append(entry)
+        expected_statistics = aggregation_script.calculate_team_performance_data_groupby(*aggregation_script.team_data_to_frame(team_data))
+        json_aggregate = time.perf_counter() - start
+        print(f"{size:>9,} | {'json scan':<10} | {json_write:9.3f} | {json_team_ms:16.2f} | {json_scouter_ms:19.2f} | {json_aggregate:13.3f}")
+
+        # Team index ("index" layout of script 03): one team's rows are read by offset, scouters still need a scan
+        index_path = os.path.join(work_dir, "team_index.npz")
+        start = time.perf_counter()
+        TeamIndex.build_from_json(cleaned_path).save(index_path)
+        index_write = json_write + time.perf_counter() - start
+        team_index = TeamIndex.load(index_path)
+        index_teams, index_team_ms = median_ms(lambda team: team_index.team_data({str(team)})[str(team)]["matches"], teams)
+        print(f"{size:>9,} | {'team index':<10} | {index_write:9.3f} | {index_team_ms:16.2f} | {'-':>19} | {'-':>13}")
+
+        # SQLite: bulk insert in one transaction, then indexed lookups and SQL aggregation
+        database_path = os.path.join(work_dir, "cleaned_match_data.sqlite")
+        start = time.perf_counter()
+        with SQLiteEntryWriter(database_path, structure) as writer:
+            for entry in entries:
+                writer.write(entry)
+        with MatchStore(database_path) as store:
+            store.build_team_summary()
+        sqlite_write = time.perf_counter() - start
+        with MatchStore(database_path) as store:
+            store.load_team_summary()
+            sqlite_teams, sqlite_team_ms = median_ms(lambda team: store.team_matches(str(team)), teams)
+            sqlite_scouters, sqlite_scouter_ms = median_ms(lambda scouter: store.entries_where("metadata.scouterName", scouter), scouters)
+            start = time.perf_counter()
+            sqlite_statistics = store.team_statistics()
+            sqlite_aggregate = time.perf_counter() - start
+        print(f"{size:>9,} | {'sqlite':<10} | {sqlite_write:9.3f} | {sqlite_team_ms:16.2f} | {sqlite_scouter_ms:19.2f} | {sqlite_aggregate:13.3f}")
+
+        if (sqlite_teams[:JSON_SCAN_LOOKUPS] != json_teams or index_teams != sqlite_teams
+                or sqlite_scouters[:JSON_SCAN_LOOKUPS] != json_scouters):
+            print("[ERROR] The SQLite lookups returned different entries than the JSON scan.")
+            failed = True
+        if not statistics_match(expected_statistics, sqlite_statistics):
+            print("[ERROR] The SQL aggregation differs from the groupby engine.")
+            failed = True
+
+        new_rows = [(None,) * len(store.columns)] * 1000
+        read_ms, seen_during, seen_after, before = read_during_insert(database_path, new_rows)
+        if seen_during != before or seen_after != before + len(new_rows):
+            print(f"[ERROR] A read during an insert saw {seen_during} entries (expected {before}).")
+            failed = True
+        else:
+            print(f"{'':>9}   [INFO] Read during an open insert transaction: {read_ms:.2f} ms, not blocked (WAL).")
+
+print(seperation_bar)
+if failed:
+    raise SystemExit(1)
@@ -0,0 +1,232 @@
+from utility_functions.print_formats import seperation_bar
+from benchmark_helpers import REPO_ROOT
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+DEFAULT_CLIENTS = 20
+DEFAULT_REQUESTS = 500  # Requests per client
+DEFAULT_TEAMS = 400
+TARGET_P99_MS = 5.0
+PERFORMANCE_PATH = "outputs/team_data/team_performance_data.json"
+ADVANCED_PATH = "outputs/team_data/advanced_team_performance_data.json"
+CUSTOM_METRIC = "consistency"  # Defined in script 05's CUSTOM_METRICS
+FIELDS = ["var1", "var4", "var5", "var6"]
+RELOAD_WAIT_SECONDS = 3.0  # Longest wait for the server to pick up rewritten outputs
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def write_outputs(work_dir, num_teams, seed):
+    """
+    Writes team statistics in the layout of scripts 04 and 05.
+
+    :param work_dir: Working directory holding the `outputs/` folder.
+    :param num_teams: Number of teams.
+    :param seed: Random seed (a different seed writes different statistics).
+    :return: Team performance data.
+    """
+    rng = random.Random(seed)
+    performance_data, advanced_data = {}, {}
+    for team in range(1, num_teams + 1):
+        statistics = {"number_of_matches": rng.randint(8, 14)}
+        for field in FIELDS:
+            average = rng.uniform(0, 20)
+            statistics.update({
+                f"{field}_average": average, f"{field}_min": 0.0, f"{field}_max": 20.0, f"{field}_std_dev": rng.uniform(0, 6),
+            })
+        statistics["var2_value_counts"] = {"low": rng.randint(0, 5), "mid": rng.randint(0, 5), "high": rng.randint(0, 5)}
+        statistics["var1_opr"] = rng.uniform(-2, 12)
+        performance_data[str(team)] = statistics
+        advanced_data[str(team)] = dict(statistics, **{CUSTOM_METRIC: rng.gauss(0, 1)})
+
+    os.makedirs(os.path.join(work_dir, "outputs", "team_data"), exist_ok=True)
+    for relative_path, data in ((PERFORMANCE_PATH, performance_data), (ADVANCED_PATH, advanced_data)):
+        temp_path = os.path.join(work_dir, relative_path + ".tmp")
+        with open(temp_path, "w") as outfile:
+            json.dump(data, outfile, indent=4)
+        os.replace(temp_path, os.path.join(work_dir, relative_path))
+    return performance_data
+
+
+def start_server(work_dir):
+    """
+    Starts the stats server in a child process on a free port.
+
+    :param work_dir: Working directory holding the `outputs/` folder.
+    :return: Tuple of (process, port).
+    """
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""), PYTHONUNBUFFERED="1")
+    process = subprocess.Popen([sys.executable, "-m", "utility_functions.stats_server", "--port", "0"],
+                               cwd=work_dir, env=env, stdout=subprocess.PIPE, text=True)
+    for line in process.stdout:
+        if "http://" in line:
+            port = int(line.split("http://", 1)[1].split("/", 1)[0].rsplit(":", 1)[1])
+            # Keep draining the server's output so it never blocks on a full pipe
+            threading.Thread(target=process.stdout.read, daemon=True).start()
+            return process, port
+    raise RuntimeError("The stats server exited before it started serving.")
+
+
+def get(connection, path, etag=None):
+    """
+    Sends one GET request on a keep-alive connection.
+
+    :return: Tuple of (status, ETag, body bytes).
+    """
+    headers = {"If-None-Match": etag} if etag else {}
+    connection.request("GET", path, headers=headers)
+    response = connection.getresponse()
+    return response.status, response.getheader("ETag"), response.read()
+
+
+async def read_response(reader):
+    """
+    Reads one HTTP response from a keep-alive connection.
+
+    :return: Tuple of (status, ETag).
+    """
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    headers = dict(line.split(": ", 1) for line in head[1:] if line)
+    await reader.readexactly(int(headers.get("Content-Length", 0)))
+    return int(head[0].split(" ")[1]), headers.get("ETag")
+
+
+async def run_client(port, paths, num_requests, seed, latencies, errors, start_event):
+    """
+    One pick-list tablet: a keep-alive connection sending a mix of team, top-N and ranking requests,
+    about a quarter of them revalidations with If-None-Match.
+
+    :param latencies: List the request times (seconds) are appended to.
+    :param errors: List unexpected statuses are appended to.
+    :param start_event: `asyncio.Event` set when every client is connected.
+    """
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    etags = {}
+    await start_event.wait()
+    for _ in range(num_requests):
+        path = rng.choice(paths)
+        etag = etags.get(path) if rng.random() < 0.25 else None
+        request = f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n" + (f"If-None-Match: {etag}\r\n" if etag else "") + "\r\n"
+        start = time.perf_counter()
+        writer.write(request.encode("latin-1"))
+        status, response_etag = await read_response(reader)
+        latencies.append(time.perf_counter() - start)
+        if status not in (200, 304) or (status == 304 and etag is None):
+            errors.append((path, status))
+        etags[path] = response_etag
+    writer.close()
+
+
+async def load_test(port, paths, num_clients, num_requests):
+    """
+    Runs concurrent clients from one event loop (a separate process from the server).
+
+    :return: Tuple of (sorted latencies in seconds, errors, elapsed seconds).
+    """
+    latencies, errors = [], []
+    start_event = asyncio.Event()
+    clients = [
+        asyncio.create_task(run_client(port, paths, num_requests, seed, latencies, errors, start_event))
+        for seed in range(num_clients)
+    ]
+    await asyncio.sleep(0.2)  # Let every client connect first
+    start = time.perf_counter()
+    start_event.set()
+    await asyncio.gather(*clients)
+    return sorted(latencies), errors, time.perf_counter() - start
+
+
+def percentile(sorted_values, fraction):
+    """
+    :return: The value below which `fraction` of the sorted values fall.
+    """
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Load-test the stats server with concurrent pick-list clients.")
+parser.add_argument("--clients", type=int, default=DEFAULT_CLIENTS, help="Concurrent keep-alive clients.")
+parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS, help="Requests per client.")
+parser.add_argument("--teams", type=int, default=DEFAULT_TEAMS, help="Teams in the served statistics.")
+parser.add_argument("--target-p99-ms", type=float, default=TARGET_P99_MS, help="Fail if the p99 latency is higher.")
+args = parser.parse_args()
+
+print(seperation_bar)
+print("Benchmark: Stats Server Load Test\n")
+
+failed = False
+with tempfile.TemporaryDirectory() as work_dir:
+    performance_data = write_outputs(work_dir, args.teams, seed=0)
+    process, port = start_server(work_dir)
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+
+        # Correctness: team statistics, rankings, conditional requests and reloading
+        status, etag, body = get(connection, "/teams/1")
+        if status != 200 or json.loads(body)["statistics"] != performance_data["1"]:
+            print("[ERROR] /teams/1 did not return the team's statistics.")
+            failed = True
+        if get(connection, "/teams/1", etag)[0] != 304:
+            print("[ERROR] A matching If-None-Match header was not answered with 304.")
+            failed = True
+        top = json.loads(get(connection, "/top/var1_average?n=3")[2])
+        expected_top = sorted(performance_data, key=lambda team: -performance_data[team]["var1_average"])[:3]
+        if [entry["team"] for entry in top] != expected_top:
+            print("[ERROR] /top/var1_average returned the wrong teams.")
+            failed = True
+        if get(connection, "/teams/unknown")[0] != 404:
+            print("[ERROR] An unknown team was not answered with 404.")
+            failed = True
+
+        # Load test
+        paths = ([f"/teams/{team}" for team in performance_data]
+                 + [f"/top/{CUSTOM_METRIC}?n=10", f"/rankings/{CUSTOM_METRIC}", "/metrics"] * 20
+                 + [f"/top/{field}_average?n=8" for field in FIELDS] * 10 + [f"/rankings/{field}_average" for field in FIELDS] * 5)
+        latencies, errors, elapsed = asyncio.run(load_test(port, paths, args.clients, args.requests))
+        p50, p95, p99 = (percentile(latencies, fraction) * 1000 for fraction in (0.50, 0.95, 0.99))
+        print(f"{'clients':>7} | {'requests':>8} | {'req/s':>7} | {'p50 (ms)':>8} | {'p95 (ms)':>8} | {'p99 (ms)':>8} | {'max (ms)':>8}")
+        print(f"{args.clients:>7} | {len(latencies):>8,} | {len(latencies) / elapsed:7.0f} | {p50:8.2f} | {p95:8.2f} | {p99:8.2f} | {latencies[-1] * 1000:8.2f}")
+        if errors:
+            print(f"[ERROR] {len(errors)} requests failed, e.g. {errors[0]}.")
+            failed = True
+        if p99 > args.target_p99_ms:
+            print(f"[ERROR] p99 latency {p99:.2f} ms is above the {args.target_p99_ms:.1f} ms target.")
+            failed = True
+
+        # Invalidation: rewritten outputs are served without restarting the server
+        performance_data = write_outputs(work_dir, args.teams, seed=1)
+        deadline = time.monotonic() + RELOAD_WAIT_SECONDS
+        new_etag = etag
+        while new_etag == etag and time.monotonic() < deadline:
+            time.sleep(0.05)
+            status, new_etag, body = get(connection, "/teams/1")
+        if new_etag == etag or json.loads(body)["statistics"] != performance_data["1"]:
+            print("[ERROR] The server kept serving the old statistics after the outputs were rewritten.")
+            failed = True
+        else:
+            print(f"\n[INFO] Rewritten outputs were served {RELOAD_WAIT_SECONDS - (deadline - time.monotonic()):.2f} s after they were written.")
+        connection.close()
+    finally:
+        process.terminate()
+        process.wait()
+
+print(seperation_bar)
+if failed:
+    raise SystemExit(1)
@@ -0,0 +1,69 @@
+from utility_functions.print_formats import seperation_bar
+from synthetic_data import write_raw_file
+from benchmark_helpers import run_script
+import os
+import argparse
+import tempfile
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+CLEANING_SCRIPT = "02_data_cleaning_and_preprocessing.py"
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+# (label, raw file name, extra script arguments)
+MODES = [
+    ("batch (json.load)", "raw_match_data.json", []),
+    ("stream JSON array", "raw_match_data.json", ["--stream"]),
+    ("stream NDJSON", "raw_match_data.ndjson", ["--stream"]),
+]
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def run_cleaning(work_dir, raw_file, extra_args):
+    """
+    Runs script 02 on one raw file and measures its wall time and peak RSS.
+
+    :param work_dir: Working directory holding `data/raw`.
+    :param raw_file: Raw file name inside `data/raw`.
+    :param extra_args: Additional command-line arguments for the script.
+    :return: Tuple of (wall seconds, peak RSS in MiB).
+    """
+    script_args = ["--input", os.path.join("data", "raw", raw_file)] + extra_args
+    return run_script(CLEANING_SCRIPT, script_args, work_dir)
+
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Benchmark streaming vs. batch raw ingest in script 02.")
+parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Entry counts to benchmark.")
+args = parser.parse_args()
+
+print(seperation_bar)
+print("Benchmark: Streaming Raw Ingest (Script 02)\n")
+
+results = []
+for size in args.sizes:
+    with tempfile.TemporaryDirectory() as work_dir:
+        raw_dir = os.path.join(work_dir, "data", "raw")
+        os.makedirs(raw_dir)
+        print(f"[INFO] Generating {size:,} synthetic entries.")
+        write_raw_file(os.path.join(raw_dir, "raw_match_data.json"), size)
+        write_raw_file(os.path.join(raw_dir, "raw_match_data.ndjson"), size, ndjson=True)
+
+        for label, raw_file, extra_args in MODES:
+            elapsed, peak_mib = run_cleaning(work_dir, raw_file, extra_args)
+            results.append((size, label, elapsed, peak_mib))
+            print(f"[INFO] {size:>9,} entries | {label:<18} | {elapsed:8.2f} s | {peak_mib:8.1f} MiB peak RSS")
+
+print("\nSummary:")
+print(f"{'entries':>9} | {'mode':<18} | {'wall (s)':>8} | {'peak RSS (MiB)':>14}")
+for size, label, elapsed, peak_mib in results:
+    print(f"{size:>9,} | {label:<18} | {elapsed:8.2f} | {peak_mib:14.1f}")
+
+print(seperation_bar)
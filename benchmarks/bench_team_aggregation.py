@@ -0,0 +1,114 @@
+from utility_functions.print_formats import seperation_bar
+from synthetic_data import generate_entries
+from benchmark_helpers import SCRIPTS_DIR
+import os
+import math
+import time
+import argparse
+import importlib.util
+import pandas  # Loaded up front so neither engine's timing includes importing it
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+AGGREGATION_SCRIPT = "04_data_analysis_and_statistics_aggregation.py"
+DEFAULT_TEAM_COUNTS = [30, 60, 120, 400]
+DEFAULT_MATCHES_PER_TEAM = 12
+FLOAT_TOLERANCE = 1e-9  # Relative tolerance when comparing the engines' statistics
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def load_aggregation_script():
+    """
+    Imports script 04 as a module (its main section is guarded, so nothing runs).
+
+    :return: The script module.
+    """
+    spec = importlib.util.spec_from_file_location("aggregation_script", os.path.join(SCRIPTS_DIR, AGGREGATION_SCRIPT))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_team_data(num_teams, matches_per_team):
+    """
+    Builds team-based match data in the layout script 03 writes.
+
+    :param num_teams: Number of teams.
+    :param matches_per_team: Average number of matches per team.
+    :return: Dictionary of team key -> {"matches": [...]}.
+    """
+    team_data = {}
+    for entry in generate_entries(num_teams * matches_per_team, num_teams=num_teams, error_rate=0.0):
+        team_data.setdefault(str(entry["metadata"]["robotTeam"]), {"matches": []})["matches"].append(entry)
+    return team_data
+
+
+def statistics_match(expected, actual):
+    """
+    Checks that two team performance dictionaries have the same keys in the same order
+    and the same values (floats within `FLOAT_TOLERANCE`).
+
+    :param expected: Result of the per-team engine.
+    :param actual: Result of the groupby engine.
+    :return: True if they match.
+    """
+    if list(expected) != list(actual):
+        return False
+    for team, stats in expected.items():
+        if list(stats) != list(actual[team]):
+            return False
+        for key, value in stats.items():
+            other = actual[team][key]
+            if isinstance(value, float):
+                if not (math.isclose(value, other, rel_tol=FLOAT_TOLERANCE) or (math.isnan(value) and math.isnan(other))):
+                    return False
+            elif value != other:
+                return False
+    return True
+
+
+def timed(function):
+    """
+    Calls a function and returns its result and the seconds it took.
+
+    :param function: Callable without arguments.
+    :return: Tuple of (result, seconds).
+    """
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Benchmark the per-team and groupby aggregation engines of script 04.")
+parser.add_argument("--teams", type=int, nargs="+", default=DEFAULT_TEAM_COUNTS, help="Team counts to benchmark.")
+parser.add_argument("--matches-per-team", type=int, default=DEFAULT_MATCHES_PER_TEAM, help="Average matches per team.")
+args = parser.parse_args()
+
+aggregation_script = load_aggregation_script()
+
+print(seperation_bar)
+print("Benchmark: Team Aggregation Engines (Script 04)\n")
+
+print(f"{'teams':>6} | {'matches':>8} | {'per_team (s)':>12} | {'groupby (s)':>11} | {'speedup':>8} | same output")
+for num_teams in args.teams:
+    team_data = build_team_data(num_teams, args.matches_per_team)
+    num_matches = sum(len(data["matches"]) for data in team_data.values())
+
+    per_team_result, per_team_time = timed(lambda: aggregation_script.calculate_team_performance_data(team_data))
+    # The groupby engine's time includes flattening all matches into one DataFrame
+    groupby_result, groupby_time = timed(lambda: aggregation_script.calculate_team_performance_data_groupby(
+        *aggregation_script.team_data_to_frame(team_data)
+    ))
+
+    same_output = statistics_match(per_team_result, groupby_result)
+    print(f"{num_teams:>6} | {num_matches:>8,} | {per_team_time:12.3f} | {groupby_time:11.3f} | "
+          f"{per_team_time / groupby_time:7.1f}x | {same_output}")
+
+print(seperation_bar)
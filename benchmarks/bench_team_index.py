@@ -0,0 +1,86 @@
+from utility_functions.print_formats import seperation_bar
+from utility_functions.json_streaming import JsonArrayWriter
+from utility_functions.team_index import TeamIndex
+from synthetic_data import generate_entries
+import os
+import json
+import time
+import argparse
+import tempfile
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+DEFAULT_SIZES = [10_000, 100_000, 500_000]
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def team_copy_round_trip(cleaned_path, team_path):
+    """
+    The "copy" layout: script 03 loads the cleaned data and writes a team-grouped copy,
+    then script 04 parses that copy again.
+
+    :param cleaned_path: Path to the cleaned JSON file.
+    :param team_path: Path of the team-based JSON file to write.
+    :return: The team-based data as script 04 sees it.
+    """
+    with open(cleaned_path, "r") as infile:
+        cleaned_data = json.load(infile)
+    team_data = {}
+    for match in cleaned_data:
+        team_data.setdefault(match["metadata"]["robotTeam"], {"matches": []})["matches"].append(match)
+    with open(team_path, "w") as outfile:
+        json.dump(team_data, outfile, indent=4)
+    with open(team_path, "r") as infile:
+        return json.load(infile)
+
+
+def team_index_round_trip(cleaned_path, index_path):
+    """
+    The "index" layout: script 03 scans the cleaned data and writes the team index,
+    then script 04 reads each team's matches through it.
+
+    :param cleaned_path: Path to the cleaned JSON file.
+    :param index_path: Path of the index file to write.
+    :return: The team-based data as script 04 sees it.
+    """
+    TeamIndex.build_from_json(cleaned_path).save(index_path)
+    return TeamIndex.load(index_path).team_data()
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Benchmark the team index against the team-based copy (scripts 03-04).")
+parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Cleaned entry counts to benchmark.")
+args = parser.parse_args()
+
+print(seperation_bar)
+print("Benchmark: Team Index vs. Team-based Copy (Scripts 03-04)\n")
+
+print(f"{'entries':>9} | {'layout':<6} | {'03 + 04 load (s)':>16} | {'data/processed (MiB)':>20} | same matches")
+for size in args.sizes:
+    with tempfile.TemporaryDirectory() as work_dir:
+        cleaned_path = os.path.join(work_dir, "cleaned_match_data.json")
+        with JsonArrayWriter(cleaned_path) as writer:
+            for entry in generate_entries(size, error_rate=0.0):
+                writer.write(entry)
+        cleaned_size = os.path.getsize(cleaned_path)
+
+        results = {}
+        for layout, round_trip, output_name in (
+            ("copy", team_copy_round_trip, "team_based_match_data.json"),
+            ("index", team_index_round_trip, "team_index.npz"),
+        ):
+            output_path = os.path.join(work_dir, output_name)
+            start = time.perf_counter()
+            results[layout] = round_trip(cleaned_path, output_path)
+            elapsed = time.perf_counter() - start
+            total_mib = (cleaned_size + os.path.getsize(output_path)) / (1024 * 1024)
+            same = "" if layout == "copy" else str(results["copy"] == results["index"])
+            print(f"{size:>9,} | {layout:<6} | {elapsed:16.3f} | {total_mib:20.2f} | {same}")
+
+print(seperation_bar)
@@ -0,0 +1,172 @@
+from utility_functions.print_formats import seperation_bar
+from synthetic_data import generate_event, write_entries, script_schema
+from benchmark_helpers import REPO_ROOT
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+DEFAULT_MATCHES = 400  # Matches in the first export (six entries each)
+EXPORT_MATCHES = 40  # Matches per tablet export that lands while watching
+NUM_TEAMS = 60
+DEBOUNCE_SECONDS = 0.5
+POLL_INTERVAL = 0.1
+BURST_FILES = 3  # Exports written in one burst, which should make one run
+BURST_GAP_SECONDS = 0.2  # Time between the writes of a burst (less than the debounce)
+DURING_RUN_FILES = 2  # Exports written while a run is in progress, which should make one more run
+WATCH_LOG_PATH = "outputs/statistics/watch_log.ndjson"
+TEAM_PERFORMANCE_PATH = "outputs/team_data/team_performance_data.json"
+EVENT_FOLDER = "data/raw/2025test"
+TIMEOUT_SECONDS = 120
+LATENCY_SLACK_SECONDS = 1.0  # Allowed latency beyond detection, debounce and run time
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def write_export(work_dir, name, num_matches, first_match, seed):
+    """
+    Writes one tablet export with its own match numbers, as a temporary file renamed into place (like a sync tool).
+
+    :return: Number of entries written.
+    """
+    _, positions = script_schema()
+    entries = []
+    for entry in generate_event(NUM_TEAMS, num_matches, error_rate=0.0, seed=seed):
+        entry["metadata"]["matchNumber"] += first_match - 1
+        entries.append(entry)
+    file_path = os.path.join(work_dir, EVENT_FOLDER, name)
+    count = write_entries(file_path + ".part", entries)
+    os.replace(file_path + ".part", file_path)
+    return count
+
+
+def start_watcher(work_dir, max_runs):
+    """
+    Starts watch mode in a child process and follows its output.
+
+    :return: Tuple of (process, list that receives the output lines as they are printed).
+    """
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""), PYTHONUNBUFFERED="1")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "utility_functions.pipeline_runner", "watch", "--input", "data/raw",
+         "--debounce", str(DEBOUNCE_SECONDS), "--poll", str(POLL_INTERVAL), "--max-runs", str(max_runs)],
+        cwd=work_dir, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    lines = []
+    threading.Thread(target=lambda: lines.extend(process.stdout), daemon=True).start()
+    return process, lines
+
+
+def watch_log(work_dir):
+    """
+    :return: List of watch-mode run records written so far.
+    """
+    try:
+        with open(os.path.join(work_dir, WATCH_LOG_PATH), "r") as log_file:
+            return [json.loads(line) for line in log_file if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def wait_for(condition, description):
+    """
+    Waits until a condition holds.
+
+    :raises TimeoutError: If it does not hold within `TIMEOUT_SECONDS`.
+    """
+    deadline = time.monotonic() + TIMEOUT_SECONDS
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Timed out waiting for {description}.")
+        time.sleep(0.02)
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Check that watch mode debounces, coalesces and refreshes outputs quickly.")
+parser.add_argument("--matches", type=int, default=DEFAULT_MATCHES, help="Matches in the first export.")
+args = parser.parse_args()
+
+print(seperation_bar)
+print("Benchmark: Watch Mode (Debouncing, Coalescing and Latency)\n")
+
+failed = False
+with tempfile.TemporaryDirectory() as work_dir:
+    os.makedirs(os.path.join(work_dir, EVENT_FOLDER))
+    total_entries = write_export(work_dir, "tablet_0.json", args.matches, 1, seed=0)
+    next_match = args.matches + 1
+    max_runs = 3 + bool(DURING_RUN_FILES)
+    process, lines = start_watcher(work_dir, max_runs)
+    try:
+        # Run 1: the first run at start
+        wait_for(lambda: len(watch_log(work_dir)) >= 1, "the first run")
+
+        # Run 2: a burst of exports a little apart, which should be one run
+        for index in range(BURST_FILES):
+            total_entries += write_export(work_dir, f"burst_{index}.json", EXPORT_MATCHES, next_match, seed=index + 1)
+            next_match += EXPORT_MATCHES
+            time.sleep(BURST_GAP_SECONDS)
+        wait_for(lambda: len(watch_log(work_dir)) >= 2, "the burst run")
+
+        # Run 3: a large export; runs 4: the exports written while run 3 is in progress, coalesced into one run
+        total_entries += write_export(work_dir, "large.json", args.matches, next_match, seed=10)
+        next_match += args.matches
+        wait_for(lambda: any("Watch run 3:" in line for line in lines), "the third run to start")
+        for index in range(DURING_RUN_FILES):
+            total_entries += write_export(work_dir, f"during_run_{index}.json", EXPORT_MATCHES, next_match, seed=20 + index)
+            next_match += EXPORT_MATCHES
+        during_run_written = len(watch_log(work_dir)) < 3
+        process.wait(timeout=TIMEOUT_SECONDS)
+    except (TimeoutError, subprocess.TimeoutExpired) as e:
+        print(f"[ERROR] {e}")
+        failed = True
+        during_run_written = False
+    finally:
+        process.terminate()
+        process.wait()
+
+    records = watch_log(work_dir)
+    print(f"{'run':>3} | {'stages':<6} | {'files':>5} | {'noticed (s)':>11} | {'waited (s)':>10} | {'ran (s)':>7} | {'latency (s)':>11} | status")
+    for record in records:
+        stages = f"{record['stages'][0]}-{record['stages'][-1]}"
+        print(f"{record['run']:>3} | {stages:<6} | {record['changed_files']:>5} | {record.get('detect_s', 0):11.2f} | "
+              f"{record.get('wait_s', 0):10.2f} | {record['run_s']:7.2f} | {record.get('latency_s', float('nan')):11.2f} | {record['status']}")
+
+    expected_files = [0, BURST_FILES, 1] + [DURING_RUN_FILES] * bool(DURING_RUN_FILES)
+    if [record["changed_files"] for record in records] != expected_files:
+        print(f"[ERROR] Expected runs for {expected_files} changed files, got {[record['changed_files'] for record in records]}.")
+        failed = True
+    if not during_run_written:
+        print("[ERROR] Run 3 finished before the exports meant to land during it were written; use a larger --matches.")
+        failed = True
+    for record in records:
+        if record["status"] != "completed":
+            print(f"[ERROR] Run {record['run']} failed: {record.get('error') or record['failed_stages']}.")
+            failed = True
+        if "latency_s" in record and record["latency_s"] > record["run_s"] + DEBOUNCE_SECONDS + POLL_INTERVAL + LATENCY_SLACK_SECONDS:
+            print(f"[ERROR] Run {record['run']}: latency {record['latency_s']:.2f} s is above detection, debounce and run time.")
+            failed = True
+    try:
+        with open(os.path.join(work_dir, TEAM_PERFORMANCE_PATH), "r") as infile:
+            scouted = sum(statistics["number_of_matches"] for statistics in json.load(infile).values())
+    except (OSError, ValueError, KeyError):
+        scouted = None
+    if scouted != total_entries:
+        print(f"[ERROR] The refreshed outputs hold {scouted} team matches, expected {total_entries}.")
+        failed = True
+    else:
+        print(f"\n[INFO] The outputs hold every one of the {total_entries} entries written while watching.")
+
+print(seperation_bar)
+if failed:
+    raise SystemExit(1)
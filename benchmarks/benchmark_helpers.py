@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+import subprocess
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(REPO_ROOT, "scripts")
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def run_command(command, work_dir):
+    """
+    Runs a Python command in a child process and measures its wall time and peak RSS.
+
+    :param command: Arguments after the Python interpreter (e.g. a script path or `-m module`).
+    :param work_dir: Working directory holding the `data/` and `outputs/` folders.
+    :return: Tuple of (wall seconds, peak RSS in MiB).
+    """
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable] + list(command), cwd=work_dir, env=env, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} exited with code {process.returncode}")
+    # ru_maxrss is reported in KiB on Linux
+    return elapsed, usage.ru_maxrss / 1024
+
+
+def run_script(script_name, script_args, work_dir):
+    """
+    Runs a pipeline script in a child process and measures its wall time and peak RSS.
+
+    :param script_name: File name of the script inside `scripts/`.
+    :param script_args: Command-line arguments for the script.
+    :param work_dir: Working directory holding the `data/` and `outputs/` folders.
+    :return: Tuple of (wall seconds, peak RSS in MiB).
+    """
+    return run_command([os.path.join(SCRIPTS_DIR, script_name)] + list(script_args), work_dir)
@@ -0,0 +1,106 @@
+from utility_functions.print_formats import seperation_bar
+from utility_functions.pipeline_runner import PIPELINE_STAGES
+from benchmark_helpers import REPO_ROOT, SCRIPTS_DIR
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+# Startup budget per stage: milliseconds spent importing the script's own dependencies
+# (`python -X importtime`, minus the interpreter's baseline imports). Raise these deliberately, not casually.
+IMPORT_TIME_BUDGETS_MS = {"01": 50, "02": 120, "03": 120, "04": 120, "05": 120}
+
+# Libraries that must only be imported once a stage actually needs them
+HEAVY_MODULES = {"pandas", "numpy", "scipy", "matplotlib", "pyarrow"}
+
+DEFAULT_RUNS = 5  # The median of several runs is compared with the budget
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def measure_imports(code):
+    """
+    Runs Python code with `-X importtime` and parses the report.
+
+    :param code: Code passed to `python -c`.
+    :return: Tuple of (total milliseconds of top-level imports, set of imported module names).
+    """
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    total_us, modules = 0, set()
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, package = line[len("import time:"):].split("|")
+        modules.add(package.strip())
+        # Top-level imports are indented by exactly one space; nested ones by more
+        if not package.startswith("  "):
+            total_us += int(cumulative)
+    return total_us / 1000, modules
+
+
+def median_import_time(code, runs):
+    """
+    Measures the import time of some code several times.
+
+    :param code: Code passed to `python -c`.
+    :param runs: Number of runs.
+    :return: Tuple of (median milliseconds, set of imported module names).
+    """
+    times, modules = [], set()
+    for _ in range(runs):
+        milliseconds, modules = measure_imports(code)
+        times.append(milliseconds)
+    return statistics.median(times), modules
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Fail if a pipeline script's startup imports exceed their budget.")
+parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Runs per stage (the median is used).")
+parser.add_argument("--budget-ms", type=float, default=None, help="Use one budget for every stage instead.")
+args = parser.parse_args()
+
+print(seperation_bar)
+print("Check: Script Import Time\n")
+
+baseline_ms, _ = median_import_time("import runpy", args.runs)
+print(f"[INFO] Interpreter baseline: {baseline_ms:.1f} ms (subtracted below)")
+
+failures = []
+for name, script_name, _, _ in PIPELINE_STAGES:
+    # run_path imports the script without running its guarded main section
+    code = f"import runpy; runpy.run_path({os.path.join(SCRIPTS_DIR, script_name)!r}, run_name='import_check')"
+    total_ms, modules = median_import_time(code, args.runs)
+    stage_ms = max(0.0, total_ms - baseline_ms)
+    budget_ms = args.budget_ms if args.budget_ms is not None else IMPORT_TIME_BUDGETS_MS[name]
+    heavy = sorted(module for module in HEAVY_MODULES if module in modules)
+
+    status = "ok"
+    if stage_ms > budget_ms:
+        status = "OVER BUDGET"
+        failures.append(f"script {name}: {stage_ms:.1f} ms > {budget_ms:.0f} ms")
+    if heavy:
+        status = "HEAVY IMPORTS"
+        failures.append(f"script {name} imports {', '.join(heavy)} at startup")
+    print(f"[INFO] script {name} | {stage_ms:7.1f} ms | budget {budget_ms:5.0f} ms | {status}")
+
+if failures:
+    print("\n[ERROR] Import-time check failed:")
+    for failure in failures:
+        print(f"  {failure}")
+    print(seperation_bar)
+    sys.exit(1)
+
+print("\n[INFO] All scripts are within their import-time budgets.")
+print(seperation_bar)
@@ -0,0 +1,155 @@
+from utility_functions.print_formats import seperation_bar
+from utility_functions.streaming_stats import TeamTrendAccumulator, TeamStatsAccumulator
+from synthetic_data import generate_entries
+from utility_functions.pipeline_runner import load_stage
+import sys
+import json
+import math
+import time
+import argparse
+import pandas as pd
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+AGGREGATION_SCRIPT = "04_data_analysis_and_statistics_aggregation.py"
+FLOAT_TOLERANCE = 1e-9  # Relative (and absolute, for values near zero) tolerance when comparing floats
+DEFAULT_TEAMS = 40
+DEFAULT_MATCHES_PER_TEAM = 30
+DEFAULT_RECENT_MATCHES = 5
+DEFAULT_EVENT_WINDOW_MATCHES = 20
+# Teams whose statistics are compared after every single match (the rest only at the end)
+STEP_BY_STEP_TEAMS = 3
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def statistics_agree(expected, actual):
+    """
+    Checks that streaming statistics match the batch statistics of script 04: the same keys,
+    floats within `FLOAT_TOLERANCE`, and the same value counts (tied values may be ordered differently).
+
+    :param expected: Batch statistics (`calculate_team_statistics`).
+    :param actual: Streaming statistics.
+    :return: Description of the first difference, or None if they agree.
+    """
+    if set(expected) != set(actual):
+        return f"keys differ: {sorted(set(expected) ^ set(actual))}"
+    for key, value in expected.items():
+        other = actual[key]
+        if isinstance(value, float):
+            if not (math.isclose(value, other, rel_tol=FLOAT_TOLERANCE, abs_tol=FLOAT_TOLERANCE)
+                    or (math.isnan(value) and math.isnan(other))):
+                return f"{key}: batch {value!r}, streaming {other!r}"
+        elif value != other:
+            return f"{key}: batch {value!r}, streaming {other!r}"
+    return None
+
+
+def build_team_matches(num_teams, matches_per_team):
+    """
+    Builds each team's matches in match order.
+
+    :param num_teams: Number of teams.
+    :param matches_per_team: Average number of matches per team.
+    :return: Dictionary of team key -> list of matches.
+    """
+    team_matches = {}
+    for entry in generate_entries(num_teams * matches_per_team, num_teams=num_teams, error_rate=0.0):
+        team_matches.setdefault(str(entry["metadata"]["robotTeam"]), []).append(entry)
+    return team_matches
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+parser = argparse.ArgumentParser(description="Check streaming team statistics against the batch pandas statistics.")
+parser.add_argument("--teams", type=int, default=DEFAULT_TEAMS, help="Number of teams.")
+parser.add_argument("--matches-per-team", type=int, default=DEFAULT_MATCHES_PER_TEAM, help="Average matches per team.")
+parser.add_argument("--recent", type=int, default=DEFAULT_RECENT_MATCHES, help="Size of the last-N-matches window.")
+parser.add_argument("--event-window", type=int, default=DEFAULT_EVENT_WINDOW_MATCHES, help="Match numbers per event window.")
+args = parser.parse_args()
+
+batch_statistics = load_stage(AGGREGATION_SCRIPT).calculate_team_statistics
+team_matches = build_team_matches(args.teams, args.matches_per_team)
+
+print(seperation_bar)
+print("Check: Streaming Team Statistics\n")
+
+failures = []
+streaming_seconds, batch_seconds, updates = 0.0, 0.0, 0
+
+for team_number, (team, matches) in enumerate(team_matches.items()):
+    trends = TeamTrendAccumulator(recent_matches=args.recent, event_window_matches=args.event_window)
+    step_by_step = team_number < STEP_BY_STEP_TEAMS
+
+    for count, match in enumerate(matches, start=1):
+        start = time.perf_counter()
+        trends.add_match(match)
+        streaming_seconds += time.perf_counter() - start
+        updates += 1
+
+        if step_by_step or count == len(matches):
+            # Batch: rebuild the DataFrames from scratch, as script 04 would after each match
+            start = time.perf_counter()
+            expected = {
+                "all_matches": batch_statistics(pd.json_normalize(matches[:count])),
+                f"last_{args.recent}_matches": batch_statistics(pd.json_normalize(matches[max(0, count - args.recent):count])),
+            }
+            batch_seconds += time.perf_counter() - start
+            actual = trends.statistics()
+            for view, statistics in expected.items():
+                difference = statistics_agree(statistics, actual[view])
+                if difference:
+                    failures.append(f"team {team}, after {count} matches, {view}: {difference}")
+
+    # Event windows: every match in the same block of match numbers
+    actual = trends.statistics()
+    windows = {}
+    for match in matches:
+        windows.setdefault(trends.event_window_label(match["metadata"]["matchNumber"]), []).append(match)
+    for label, window_matches in windows.items():
+        difference = statistics_agree(batch_statistics(pd.json_normalize(window_matches)), actual.get(label, {}))
+        if difference:
+            failures.append(f"team {team}, {label}: {difference}")
+
+# A window that has been filled and emptied many times (exercises the inverse Welford update)
+long_window = TeamStatsAccumulator(window=args.recent)
+long_matches = [match for matches in team_matches.values() for match in matches]
+for match in long_matches:
+    long_window.add_match(match)
+difference = statistics_agree(batch_statistics(pd.json_normalize(long_matches[-args.recent:])), long_window.statistics())
+if difference:
+    failures.append(f"window after {len(long_matches)} matches: {difference}")
+
+# Saved and restored halfway through (as incremental runs of script 04 do), an accumulator gives the same
+# statistics as one that saw every match
+for team, matches in team_matches.items():
+    uninterrupted = TeamTrendAccumulator(recent_matches=args.recent, event_window_matches=args.event_window)
+    restored = TeamTrendAccumulator(recent_matches=args.recent, event_window_matches=args.event_window)
+    for count, match in enumerate(matches):
+        if count == len(matches) // 2:
+            restored = TeamTrendAccumulator.from_state(json.loads(json.dumps(restored.state())))
+        uninterrupted.add_match(match)
+        restored.add_match(match)
+    expected, actual = uninterrupted.statistics(), restored.statistics()
+    for view, statistics in expected.items():
+        difference = statistics_agree(statistics, actual.get(view, {}))
+        if difference:
+            failures.append(f"team {team}, {view}, saved and restored: {difference}")
+
+print(f"[INFO] {len(team_matches)} teams, {updates} match updates")
+print(f"[INFO] Streaming update: {streaming_seconds / updates * 1e6:8.1f} µs per match (all views)")
+print(f"[INFO] Batch rebuild:    {batch_seconds:8.2f} s for the compared checkpoints")
+
+if failures:
+    print(f"\n[ERROR] Streaming statistics differ from the batch statistics ({len(failures)} differences):")
+    for failure in failures[:20]:
+        print(f"  {failure}")
+    print(seperation_bar)
+    sys.exit(1)
+
+print("\n[INFO] Streaming statistics agree with the batch statistics.")
+print(seperation_bar)
@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import random
+import argparse
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+CLEANING_SCRIPT = "02_data_cleaning_and_preprocessing.py"  # Entries follow its EXPECTED_STRUCTURE and VALID_ROBOT_POSITIONS
+
+# Position order within a match (used when the script's valid positions are the standard six)
+ROBOT_POSITIONS = ["red_1", "red_2", "red_3", "blue_1", "blue_2", "blue_3"]
+STRING_CHOICES = ["low", "mid", "high"]  # Values for text fields
+MAX_INT_VALUE = 20  # Number fields are drawn from 0..MAX_INT_VALUE
+INVALID_ROBOT_POSITION = "purple_4"
+EXTRA_FIELD = "extraField"
+
+# Event sizes for sizing hardware: (teams, matches). Every match has one entry per robot position.
+EVENT_PRESETS = {
+    "regional": (40, 80),
+    "district_championship": (60, 120),
+    "championship_division": (75, 130),
+    "championship": (600, 1100),  # Every division of a championship in one data pool
+    "season": (3500, 20000),  # A season's worth of events in one data pool
+}
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+_schema_cache = {}
+
+
+def script_schema():
+    """
+    Loads `EXPECTED_STRUCTURE` and `VALID_ROBOT_POSITIONS` from script 02, so generated data follows
+    the structure the pipeline is configured for.
+
+    :return: Tuple of (expected structure, list of robot positions in match order).
+    """
+    if not _schema_cache:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from utility_functions.pipeline_runner import load_stage
+
+        cleaning_script = load_stage(CLEANING_SCRIPT)
+        valid_positions = cleaning_script.VALID_ROBOT_POSITIONS
+        positions = ROBOT_POSITIONS if set(ROBOT_POSITIONS) == set(valid_positions) else sorted(valid_positions)
+        _schema_cache["schema"] = (cleaning_script.EXPECTED_STRUCTURE, positions)
+    return _schema_cache["schema"]
+
+
+def random_value(expected_type, rng):
+    """
+    Draws a random value of an expected type.
+
+    :param expected_type: A type or tuple of types from the expected structure.
+    :param rng: Random number generator.
+    :return: The value (None for unsupported types).
+    """
+    if isinstance(expected_type, tuple):
+        expected_type = expected_type[0]
+    if issubclass(expected_type, bool):
+        return rng.random() < 0.5
+    if issubclass(expected_type, int):
+        return rng.randint(0, MAX_INT_VALUE)
+    if issubclass(expected_type, float):
+        return round(rng.uniform(0, MAX_INT_VALUE), 2)
+    if issubclass(expected_type, str):
+        return rng.choice(STRING_CHOICES)
+    return None
+
+
+def build_entry(structure, rng, known_values):
+    """
+    Builds an entry following the expected structure, in its key order.
+
+    :param structure: Expected structure (nested dictionary of types).
+    :param rng: Random number generator.
+    :param known_values: Key -> callable returning the value (match number, team, position, scouter).
+    :return: The entry.
+    """
+    entry = {}
+    for key, expected_type in structure.items():
+        if isinstance(expected_type, dict):
+            entry[key] = build_entry(expected_type, rng, known_values)
+        elif key in known_values:
+            entry[key] = known_values[key]()
+        else:
+            entry[key] = random_value(expected_type, rng)
+    return entry
+
+
+def top_level_fields(structure, field_type):
+    """
+    Lists the top-level keys of one type (the scouted variables, not the nested metadata).
+
+    :param structure: Expected structure.
+    :param field_type: The type to look for.
+    :return: List of keys.
+    """
+    return [
+        key for key, expected_type in structure.items()
+        if isinstance(expected_type, type) and expected_type is field_type
+    ]
+
+
+def generate_entries(num_entries, num_teams=60, num_scouters=12, error_rate=0.02, seed=0):
+    """
+    Yields synthetic raw scouting entries, one per robot position per match.
+
+    :param num_entries: Total number of entries to generate.
+    :param num_teams: Number of distinct teams at the event.
+    :param num_scouters: Number of distinct scouters.
+    :param error_rate: Probability that an entry contains an injected schema error.
+    :param seed: Random seed so runs are reproducible.
+    """
+    structure, positions = script_schema()
+    int_fields, str_fields = top_level_fields(structure, int), top_level_fields(structure, str)
+    rng = random.Random(seed)
+    teams = list(range(1, num_teams + 1))
+    scouters = [f"Scouter {i}" for i in range(1, num_scouters + 1)]
+
+    for index in range(num_entries):
+        match_number = index // len(positions) + 1
+        position = positions[index % len(positions)]
+        if index % len(positions) == 0:
+            match_teams = rng.sample(teams, min(len(positions), num_teams))
+        team = match_teams[index % len(match_teams)]
+        entry = build_entry(structure, rng, {
+            "scouterName": lambda: rng.choice(scouters),
+            "matchNumber": lambda: match_number,
+            "robotTeam": lambda: team,
+            "robotPosition": lambda: position,
+        })
+        if rng.random() < error_rate:
+            inject_error(entry, rng, int_fields, str_fields)
+        yield entry
+
+
+def generate_event(num_teams, num_matches, num_scouters=12, error_rate=0.02, seed=0):
+    """
+    Yields the entries of a whole event: every position of every match.
+
+    :param num_teams: Number of distinct teams.
+    :param num_matches: Number of matches.
+    :param num_scouters: Number of distinct scouters.
+    :param error_rate: Probability that an entry contains an injected schema error.
+    :param seed: Random seed so runs are reproducible.
+    """
+    _, positions = script_schema()
+    return generate_entries(num_matches * len(positions), num_teams, num_scouters, error_rate, seed)
+
+
+def inject_error(entry, rng, int_fields, str_fields):
+    """
+    Mutates an entry with one of the schema errors script 02 detects.
+
+    :param entry: The entry to mutate.
+    :param rng: Random number generator.
+    :param int_fields: Top-level number fields of the structure.
+    :param str_fields: Top-level text fields of the structure.
+    """
+    error_type = rng.randrange(5)
+    if error_type == 0 and int_fields:
+        entry[int_fields[0]] = -rng.randint(1, 5)
+    elif error_type == 1 and int_fields:
+        entry[int_fields[0]] = str(entry[int_fields[0]])
+    elif error_type == 2 and str_fields:
+        del entry[str_fields[0]]
+    elif error_type == 4 and "robotPosition" in entry.get("metadata", {}):
+        entry["metadata"]["robotPosition"] = INVALID_ROBOT_POSITION
+    else:
+        entry[EXTRA_FIELD] = True
+
+
+def write_entries(file_path, entries, ndjson=False):
+    """
+    Writes entries to disk one at a time, without holding them all in memory.
+
+    :param file_path: Output path.
+    :param entries: Iterable of entries.
+    :param ndjson: Write one entry per line instead of a JSON array.
+    :return: Number of entries written.
+    """
+    count = 0
+    with open(file_path, "w") as outfile:
+        if not ndjson:
+            outfile.write("[")
+        for entry in entries:
+            if ndjson:
+                outfile.write(json.dumps(entry) + "\n")
+            else:
+                outfile.write((", " if count else "") + json.dumps(entry))
+            count += 1
+        if not ndjson:
+            outfile.write("]")
+    return count
+
+
+def write_tablet_exports(folder, entries, num_tablets=6, duplicate_rate=0.0, seed=0):
+    """
+    Splits entries across one export file per tablet, as scouts hand them in. With a duplicate rate,
+    some entries are exported again by the next tablet, like a tablet that re-sends old matches.
+
+    :param folder: Output folder (created if missing).
+    :param entries: Iterable of entries; entry i goes to tablet i % num_tablets.
+    :param num_tablets: Number of export files.
+    :param duplicate_rate: Probability that an entry also appears in the next tablet's export.
+    :param seed: Random seed so runs are reproducible.
+    :return: Number of entries written, duplicates included.
+    """
+    rng = random.Random(seed)
+    exports = [[] for _ in range(num_tablets)]
+    for index, entry in enumerate(entries):
+        exports[index % num_tablets].append(entry)
+        if duplicate_rate and rng.random() < duplicate_rate:
+            exports[(index + 1) % num_tablets].append(entry)
+    os.makedirs(folder, exist_ok=True)
+    return sum(
+        write_entries(os.path.join(folder, f"tablet_{tablet + 1}.json"), export)
+        for tablet, export in enumerate(exports)
+    )
+
+
+def write_raw_file(file_path, num_entries, ndjson=False, **kwargs):
+    """
+    Writes synthetic entries to disk without holding them all in memory.
+
+    :param file_path: Output path.
+    :param num_entries: Number of entries to write.
+    :param ndjson: Write one entry per line instead of a JSON array.
+    :param kwargs: Extra options forwarded to `generate_entries`.
+    """
+    write_entries(file_path, generate_entries(num_entries, **kwargs), ndjson)
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic raw scouting data for the pipeline.")
+    parser.add_argument("--preset", choices=EVENT_PRESETS, default="regional", help="Event size to generate.")
+    parser.add_argument("--teams", type=int, default=None, help="Number of teams (overrides the preset).")
+    parser.add_argument("--matches", type=int, default=None, help="Number of matches (overrides the preset).")
+    parser.add_argument("--scouters", type=int, default=12, help="Number of scouters.")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Probability of an injected error per entry.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument("--output", default="data/raw/raw_match_data.json", help="Output file.")
+    parser.add_argument("--ndjson", action="store_true", help="Write one entry per line instead of a JSON array.")
+    args = parser.parse_args()
+
+    preset_teams, preset_matches = EVENT_PRESETS[args.preset]
+    num_teams = args.teams or preset_teams
+    num_matches = args.matches or preset_matches
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    count = write_entries(
+        args.output, generate_event(num_teams, num_matches, args.scouters, args.error_rate, args.seed), args.ndjson
+    )
+    print(f"[INFO] Wrote {count:,} entries ({num_teams} teams, {num_matches} matches, "
+          f"{args.scouters} scouters, error rate {args.error_rate:.0%}) to: {args.output}")
@@ -1,6 +1,10 @@
 from utility_functions.print_formats import seperation_bar
+from utility_functions.artifacts import ARTIFACT_MANIFEST_PATH, load_artifact_manifest, current_artifacts
+from utility_functions.instrumentation import StageFailed
 import os
+import time
 import shutil
+import argparse
 
 # ===========================
 # CONFIGURATION SECTION
@@ -16,6 +20,22 @@ OUTPUTS_UNTOUCHED_FOLDERS = []  # Leave these folders untouched
 OUTPUTS_PRESERVED_FOLDERS = ["visualizations", "statistics", "team_data"]  # Clear contents but preserve these folders
 DATA_UNTOUCHED_FOLDERS = ["raw"]  # Keep raw data untouched
 DATA_PRESERVED_FOLDERS = ["processed"]  # Clear contents but preserve processed data folder structure
+# Caches a full clear keeps: they are keyed by their inputs, so a kept result is only reused when it is still
+# correct (the chart cache isn't listed: it only skips charts whose PNG still exists, and a full clear removes them)
+KEPT_CACHE_FILES = ["data/processed/metric_cache.json"]
+
+# Clearing Mode
+# "full": clear everything except the untouched folders, as configured above. Items are moved aside with one
+#         rename each and deleted afterwards, so clearing takes milliseconds however many files they hold.
+# "stale": remove only files that no stage recorded as an output of its latest run (scripts 02-05 record them in
+#          the artifact manifest, `data/processed/artifact_manifest.json`), e.g. charts of removed metrics or
+#          leftover temporary files. Current outputs and the incremental caches are kept, so incremental runs can follow.
+# Can be set for a single run with `--mode`; `--dry-run` lists what would be removed without deleting anything.
+CLEAR_MODE = "full"
+CLEAR_MODES = ("full", "stale")
+BACKGROUND_DELETE = True  # Delete moved-aside items in a detached process instead of waiting for them
+TRASH_PREFIX = ".trash-"  # Folder items are moved into before deletion; leftovers are deleted on the next run
+BACKGROUND_DELETE_COMMAND = "import shutil, sys; [shutil.rmtree(path, ignore_errors=True) for path in sys.argv[1:]]"
 
 # ===========================
 # HELPER FUNCTIONS SECTION
@@ -34,13 +54,66 @@ def ensure_folder_exists(folder_path):
         print(f"[INFO] Folder exists: {folder_path}")
 
 
-def clear_folder_with_exceptions(folder_path, untouched_folders=None, preserved_folders=None):
+def delete_folders(folder_paths):
+    """
+    Deletes folders that were moved aside, in a detached background process when `BACKGROUND_DELETE` is set
+    (so the script finishes without waiting for the disk), otherwise before returning.
+
+    :param folder_paths: Folders to delete.
+    :return: True if the folders are being deleted in the background.
+    """
+    if not folder_paths:
+        return False
+    if BACKGROUND_DELETE:
+        import subprocess
+        import sys
+
+        detach = {"start_new_session": True} if os.name == "posix" else {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        try:
+            subprocess.Popen(
+                [sys.executable, "-c", BACKGROUND_DELETE_COMMAND] + list(folder_paths),
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **detach
+            )
+            return True
+        except OSError as e:
+            print(f"[ERROR] Could not start background deletion ({e}). Deleting now.")
+    for folder_path in folder_paths:
+        shutil.rmtree(folder_path, ignore_errors=True)
+    return False
+
+
+def describe_size(path):
+    """
+    Counts the files under a path and their total size (used only for dry-run listings).
+
+    :param path: File or folder.
+    :return: Text such as "1,234 files, 56.7 MB".
+    """
+    if not os.path.isdir(path) or os.path.islink(path):
+        return f"1 file, {os.path.getsize(path) / 1e6:.1f} MB"
+    num_files = 0
+    num_bytes = 0
+    for folder, _, file_names in os.walk(path):
+        for file_name in file_names:
+            num_files += 1
+            num_bytes += os.path.getsize(os.path.join(folder, file_name))
+    return f"{num_files:,} files, {num_bytes / 1e6:.1f} MB"
+
+
+def clear_folder_with_exceptions(folder_path, untouched_folders=None, preserved_folders=None, dry_run=False,
+                                 kept_files=None):
     """
     Clears all contents of a folder while keeping specific subfolders untouched or preserved.
 
+    Nothing is deleted file by file: every item is moved into one trash folder with a single rename
+    (preserved folders are moved whole and recreated empty), and the trash folder is deleted afterwards.
+    Kept files are renamed back out of the trash folder before it is deleted.
+
     :param folder_path: The root folder to clear.
     :param untouched_folders: Subfolders to leave completely untouched (including their contents).
     :param preserved_folders: Subfolders to preserve but clear their contents.
+    :param dry_run: If True, only list what would be removed.
+    :param kept_files: Paths of files inside the folder to keep (e.g. caches keyed by their inputs).
     """
     # Ensure the root folder exists
     ensure_folder_exists(folder_path)
@@ -50,82 +123,192 @@ def clear_folder_with_exceptions(folder_path, untouched_folders=None, preserved_
         untouched_folders = []
     if preserved_folders is None:
         preserved_folders = []
+    kept_files = [
+        os.path.relpath(file_path, folder_path) for file_path in kept_files or []
+        if os.path.isfile(file_path) and not os.path.relpath(file_path, folder_path).startswith(os.pardir)
+    ]
 
     # Ensure all folders in untouched_folders and preserved_folders exist
     for subfolder in untouched_folders + preserved_folders:
         subfolder_path = os.path.join(folder_path, subfolder)
         ensure_folder_exists(subfolder_path)
 
-    for item in os.listdir(folder_path):
+    # Trash left behind by an interrupted background deletion is deleted along with this run's
+    leftover_trash = [os.path.join(folder_path, item) for item in os.listdir(folder_path) if item.startswith(TRASH_PREFIX)]
+    to_remove = [
+        item for item in sorted(os.listdir(folder_path))
+        if item not in untouched_folders and not item.startswith(TRASH_PREFIX)
+    ]
+
+    if dry_run:
+        for item in to_remove:
+            item_path = os.path.join(folder_path, item)
+            kind = "contents of preserved folder" if item in preserved_folders else "folder" if os.path.isdir(item_path) else "file"
+            print(f"[DRY RUN] Would remove {kind}: {item_path} ({describe_size(item_path)})")
+        for kept_file in kept_files:
+            print(f"[DRY RUN] Would keep cache file: {os.path.join(folder_path, kept_file)}")
+        print(f"[INFO] Dry run: {len(to_remove)} items in {folder_path} would be removed; nothing was deleted.")
+        return
+
+    trash_path = os.path.join(folder_path, f"{TRASH_PREFIX}{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    moved = 0
+    failed = 0
+    for item in to_remove:
         item_path = os.path.join(folder_path, item)
+        try:
+            if moved == 0:
+                os.makedirs(trash_path)
+            os.rename(item_path, os.path.join(trash_path, item))
+            moved += 1
+            if item in preserved_folders:
+                os.makedirs(item_path)
+        except OSError as e:
+            failed += 1
+            print(f"[ERROR] Failed to clear {item_path}. Reason: {e}")
+
+    for kept_file in kept_files:
+        try:
+            if os.path.exists(os.path.join(trash_path, kept_file)):
+                os.makedirs(os.path.dirname(os.path.join(folder_path, kept_file)), exist_ok=True)
+                os.rename(os.path.join(trash_path, kept_file), os.path.join(folder_path, kept_file))
+                print(f"[INFO] Kept cache file: {os.path.join(folder_path, kept_file)}")
+        except OSError as e:
+            print(f"[ERROR] Failed to keep {os.path.join(folder_path, kept_file)}. Reason: {e}")
+
+    trash_folders = leftover_trash + ([trash_path] if moved else [])
+    in_background = delete_folders(trash_folders)
+    untouched = f", {len(untouched_folders)} untouched" if untouched_folders else ""
+    deletion = " (deleting in the background)" if in_background else ""
+    print(f"[INFO] Cleared {folder_path}: {moved} items removed{deletion}, {failed} failed{untouched}.")
+
+
+def clear_stale_artifacts(folder_path, untouched_folders, current_paths, dry_run=False):
+    """
+    Removes the files in a folder that no stage recorded as one of its current outputs.
+
+    :param folder_path: The root folder to clear.
+    :param untouched_folders: Subfolders to leave completely untouched.
+    :param current_paths: Absolute paths of the files to keep (see `artifacts.current_artifacts`).
+    :param dry_run: If True, only list what would be removed.
+    """
+    ensure_folder_exists(folder_path)
+    stale = []
+    kept = 0
+    visited_folders = []
+    for folder, subfolders, file_names in os.walk(folder_path):
+        visited_folders.append(folder)
+        if folder == folder_path:
+            subfolders[:] = [
+                subfolder for subfolder in subfolders
+                if subfolder not in untouched_folders and not subfolder.startswith(TRASH_PREFIX)
+            ]
+        subfolders.sort()
+        absolute_folder = os.path.abspath(folder)
+        for file_name in sorted(file_names):
+            if os.path.join(absolute_folder, file_name) in current_paths:
+                kept += 1
+            else:
+                stale.append(os.path.join(folder, file_name))
 
-        if item in untouched_folders:
-            # Skip untouched folders entirely
-            print(f"[INFO] Untouched folder: {item_path}")
-            continue
-
-        if item in preserved_folders:
-            # Clear contents of preserved folders
-            print(f"[INFO] Clearing preserved folder: {item_path}")
-            for sub_item in os.listdir(item_path):
-                sub_item_path = os.path.join(item_path, sub_item)
-                try:
-                    if os.path.isfile(sub_item_path) or os.path.islink(sub_item_path):
-                        os.unlink(sub_item_path)
-                        print(f"[INFO] Deleted file: {sub_item_path}")
-                    elif os.path.isdir(sub_item_path):
-                        shutil.rmtree(sub_item_path)
-                        print(f"[INFO] Deleted folder: {sub_item_path}")
-                except Exception as e:
-                    print(f"[ERROR] Failed to clear {sub_item_path}. Reason: {e}")
-            continue
-
-        # Delete everything else
+    stale_bytes = sum(os.path.getsize(file_path) for file_path in stale)
+    if dry_run:
+        for file_path in stale:
+            print(f"[DRY RUN] Would remove stale file: {file_path}")
+        print(f"[INFO] Dry run: {len(stale)} stale files ({stale_bytes / 1e6:.1f} MB) in {folder_path} "
+              f"would be removed, {kept} current files kept; nothing was deleted.")
+        return
+
+    failed = 0
+    for file_path in stale:
         try:
-            if os.path.isfile(item_path) or os.path.islink(item_path):
-                os.unlink(item_path)
-                print(f"[INFO] Deleted file: {item_path}")
-            elif os.path.isdir(item_path):
-                shutil.rmtree(item_path)
-                print(f"[INFO] Deleted folder: {item_path}")
-        except Exception as e:
-            print(f"[ERROR] Failed to delete {item_path}. Reason: {e}")
+            os.unlink(file_path)
+        except OSError as e:
+            failed += 1
+            print(f"[ERROR] Failed to delete {file_path}. Reason: {e}")
+
+    # Remove folders left empty below the top level (top-level folders are part of the layout).
+    # Walking the visited folders backwards reaches every subfolder before its parent.
+    for folder in reversed(visited_folders):
+        if folder != folder_path and os.path.dirname(folder) != folder_path and not os.listdir(folder):
+            os.rmdir(folder)
+
+    print(f"[INFO] Cleared {folder_path}: {len(stale) - failed} stale files removed ({stale_bytes / 1e6:.1f} MB), "
+          f"{kept} current files kept, {failed} failed.")
 
 
 # ===========================
 # MAIN SCRIPT SECTION
 # ===========================
 
-print(seperation_bar)
-print("Script 01: Clear Files\n")
+def main(argv=None):
+    """
+    Clears the output and processed data folders. Called when the script is run directly
+    or as the first stage of the pipeline runner.
+
+    :param argv: Command-line arguments (defaults to `sys.argv`).
+    :raises StageFailed: If clearing failed.
+    """
+    print(seperation_bar)
+    print("Script 01: Clear Files\n")
+
+    parser = argparse.ArgumentParser(description="Script 01: Clear Files")
+    parser.add_argument("--mode", choices=CLEAR_MODES, default=CLEAR_MODE,
+                        help="Clear everything (full) or only files no stage produced in its latest run (stale).")
+    parser.add_argument("--dry-run", action="store_true", help="List what would be removed without deleting anything.")
+    args = parser.parse_args(argv)
+
+    status = "failed"
+    try:
+        # Guidance for FRC teams:
+        # - `OUTPUTS_DIR` stores analysis results. Modify untouched/preserved folders above to suit your needs.
+        # - `DATA_DIR` stores your team's scouting data. Ensure raw data is in `data/raw`.
+
+        # Ensure root folders exist
+        ensure_folder_exists(OUTPUTS_DIR)
+        ensure_folder_exists(DATA_DIR)
 
-try:
-    # Guidance for FRC teams:
-    # - `OUTPUTS_DIR` stores analysis results. Modify untouched/preserved folders above to suit your needs.
-    # - `DATA_DIR` stores your team's scouting data. Ensure raw data is in `data/raw`.
+        if args.mode == "stale":
+            stages = load_artifact_manifest()
+            if stages is None:
+                # Without a manifest no file is known to be current, so nothing is known to be stale either
+                print(f"[INFO] No artifact manifest at {ARTIFACT_MANIFEST_PATH}. Nothing was removed; "
+                      f"run scripts 02-05 once, or clear with --mode full.")
+            else:
+                current_paths = current_artifacts(stages)
+                clear_stale_artifacts(OUTPUTS_DIR, OUTPUTS_UNTOUCHED_FOLDERS, current_paths, args.dry_run)
+                clear_stale_artifacts(DATA_DIR, DATA_UNTOUCHED_FOLDERS, current_paths, args.dry_run)
+        else:
+            # Clear outputs folder
+            clear_folder_with_exceptions(
+                OUTPUTS_DIR,
+                untouched_folders=OUTPUTS_UNTOUCHED_FOLDERS,
+                preserved_folders=OUTPUTS_PRESERVED_FOLDERS,
+                dry_run=args.dry_run
+            )
 
-    # Ensure root folders exist
-    ensure_folder_exists(OUTPUTS_DIR)
-    ensure_folder_exists(DATA_DIR)
+            # Clear data folder
+            clear_folder_with_exceptions(
+                DATA_DIR,
+                untouched_folders=DATA_UNTOUCHED_FOLDERS,
+                preserved_folders=DATA_PRESERVED_FOLDERS,
+                dry_run=args.dry_run,
+                kept_files=KEPT_CACHE_FILES
+            )
 
-    # Clear outputs folder
-    clear_folder_with_exceptions(
-        OUTPUTS_DIR,
-        untouched_folders=OUTPUTS_UNTOUCHED_FOLDERS,
-        preserved_folders=OUTPUTS_PRESERVED_FOLDERS
-    )
+        print("\n[INFO] Script 01: Completed.")
+        status = "completed"
 
-    # Clear data folder
-    clear_folder_with_exceptions(
-        DATA_DIR,
-        untouched_folders=DATA_UNTOUCHED_FOLDERS,
-        preserved_folders=DATA_PRESERVED_FOLDERS
-    )
+    except Exception as e:
+        print(f"\n[ERROR] An error occurred: {e}")
+        print("\nScript 01: Failed.")
 
-    print("\n[INFO] Script 01: Completed.")
+    print(seperation_bar)
+    if status != "completed":
+        raise StageFailed("01")
 
-except Exception as e:
-    print(f"\n[ERROR] An error occurred: {e}")
-    print("\nScript 01: Failed.")
 
-print(seperation_bar)
\ No newline at end of file
+if __name__ == "__main__":
+    try:
+        main()
+    except StageFailed:
+        raise SystemExit(1)
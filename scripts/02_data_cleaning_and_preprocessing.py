@@ -1,17 +1,145 @@
 from utility_functions.print_formats import seperation_bar
+from utility_functions.json_streaming import (
+    JsonArrayWriter,
+    iter_raw_entries,
+    open_entry_writer,
+)
+from utility_functions.schema_validation import compile_schema
+from utility_functions.cleaning_accumulator import (
+    CleaningAccumulator,
+    clean_entry,
+    clean_entries_parallel,
+    default_worker_count,
+)
+from utility_functions.incremental import (
+    entry_hash,
+    schema_fingerprint,
+    load_cleaning_manifest,
+    save_cleaning_manifest,
+    invalidate_incremental_data,
+    record_change,
+    append_to_json_array,
+)
+from utility_functions.consistency_checks import find_consistency_issues
+from utility_functions.raw_sources import EVENT_FIELD, RawSourceMerger, resolve_raw_files, with_event_field
+from utility_functions.json_output import check_output_style, output_indent, write_json
+from utility_functions.instrumentation import (
+    StageFailed,
+    StageInstrumentation,
+    add_instrumentation_arguments,
+    record_artifact,
+    set_counter,
+    step,
+)
+from utility_functions.warning_log import (
+    WARNING_OUTPUT_MODES,
+    WARNING_RECORD_VERSION,
+    INCONSISTENT_MATCH_COUNTS,
+    MISSING_POSITIONS,
+    DUPLICATE_SUBMISSION,
+    TEAM_SCOUTED_TWICE,
+    DUPLICATE_ENTRY,
+    WarningSink,
+    jsonable_detail,
+)
+from utility_functions.intermediate_formats import (
+    JSON_FORMAT,
+    PARQUET_FORMAT,
+    SQLITE_FORMAT,
+    check_format,
+    parquet_path_for,
+    sqlite_path_for,
+    open_cleaned_data_writer,
+    read_table,
+    export_table_to_json,
+)
+from utility_functions.sqlite_store import MatchStore, append_cleaned_entries, export_store_to_json
+from utility_functions.scouter_consensus import (
+    consensus_fields,
+    entries_to_frame,
+    score_scouters,
+    write_consensus_report,
+)
 import os
 import json
+import argparse
 import traceback
-from collections import defaultdict
 
 # ===========================
 # CONFIGURATION SECTION
 # ===========================
 
 # File Paths (Update These)
-RAW_MATCH_DATA_PATH = "data/raw/raw_match_data.json"  # Input raw match data
+RAW_MATCH_DATA_PATH = "data/raw/raw_match_data.json"  # Input raw match data (a file, a folder or a glob, see below)
 CLEANED_MATCH_DATA_PATH = "data/processed/cleaned_match_data.json"  # Output cleaned match data
+ENTRY_SOURCES_PATH = "data/processed/entry_sources.json"  # Output raw file and event of each cleaned entry
 SCOUTER_LEADERBOARD_PATH = "outputs/statistics/scouter_leaderboard.txt"  # Output scouter leaderboard
+SCOUTER_CONSENSUS_PATH = "outputs/statistics/scouter_consensus.txt"  # Output scouter consensus accuracy
+
+# Multiple Raw Files
+# RAW_MATCH_DATA_PATH (or `--input`) may be a folder, searched recursively for .json/.ndjson/.jsonl files,
+# or a glob such as "data/raw/*/tablet_*.json", e.g. one export per tablet in one folder per event.
+# Files are merged in path order, and each file's event is the name of the folder holding it. An entry whose
+# (matchNumber, robotPosition, scouterName) already appeared in an earlier file of the same event is dropped as a
+# duplicate export. When the files span several events, each cleaned entry gets its event as `metadata.event`, and
+# the match checks and later scripts treat match N of two events as two different matches.
+LOAD_THREADS = 4  # Raw files read at the same time (not used in streaming mode, which reads them in turn)
+
+# Streaming Mode
+# When enabled, raw entries are read one at a time (from an NDJSON file or incrementally from a JSON array)
+# and each cleaned entry is written immediately, so memory use stays flat regardless of the dataset size.
+# Can also be enabled for a single run with the `--stream` command-line flag.
+STREAMING_MODE = False
+
+# Parallel Cleaning
+# Number of worker processes used to validate entries (1 = no process pool, 0 = one per CPU).
+# Can be overridden for a single run with `--workers N`.
+NUM_WORKERS = 1
+PARALLEL_CHUNK_SIZE = 5000  # Entries sent to a worker at a time
+
+# Incremental Mode
+# When enabled, a content-hash manifest of already cleaned entries is kept in `data/processed`, and only
+# new or changed raw entries are validated. Scripts 03 and 04 then only rebuild the teams those entries touched.
+# Only run script 01 with `--mode stale` between incremental runs (a full clear empties `data/processed`).
+# Can be enabled for a single run with the `--incremental` command-line flag.
+INCREMENTAL_MODE = False
+
+# Intermediate Format
+# "json": cleaned data is written to CLEANED_MATCH_DATA_PATH as a JSON array.
+# "parquet": cleaned data is written next to it as `.parquet`, with one flattened column per field
+# (e.g. `metadata.robotTeam`), so later scripts can load it column by column instead of re-parsing JSON.
+# "sqlite": cleaned data is written next to it as a `.sqlite` database (one flattened column per field, indexed
+# on team, match and scouter), so scripts 03 and 04 group and aggregate in SQL and one team's or one scouter's
+# entries are looked up without a scan. The database is in WAL mode: it can be read while entries are inserted.
+# Set the same format in scripts 03-05.
+INTERMEDIATE_FORMAT = "json"
+EXPORT_JSON = False  # With "parquet" or "sqlite", also write the JSON file for people to read
+
+# JSON Output Style
+# "indented": cleaned data is written indented for people to read. "compact": no whitespace, which is faster to
+# write and read and much smaller; use it when only scripts read the file. Encoded with orjson when it is
+# installed (see `utility_functions/json_output.py`).
+JSON_OUTPUT_STYLE = "indented"
+
+# Warning Output
+# Warnings are kept as compact records and only turned into messages when they are printed or logged.
+# "all": print every warning. "sample": print the number of warnings of each type and the first
+# WARNING_SAMPLE_SIZE of each. "summary": print only the numbers. Can be set for a single run with `--warnings`.
+WARNING_OUTPUT = "sample"
+WARNING_SAMPLE_SIZE = 5
+# Optional file that receives every warning, one per line (`.ndjson`/`.jsonl`, or `.csv`),
+# e.g. "outputs/statistics/cleaning_warnings.ndjson". Can be set for a single run with `--warning-log`.
+WARNING_LOG_PATH = None
+
+# Scouter Consensus
+# The leaderboard only counts schema warnings, so a scouter whose numbers are wrong but well-typed is not caught.
+# When enabled, entries that scout the same robot in the same match (duplicate scouting, or several tablets or
+# exports) are compared field by field, and each scouter gets an accuracy score for how well their values agree
+# with the other scouters' (see `utility_functions/scouter_consensus.py`). Metadata fields are not compared.
+# Written to SCOUTER_CONSENSUS_PATH. Can be enabled for a single run with the `--consensus` flag.
+SCOUTER_CONSENSUS = False
+# Largest difference in a numeric field that still counts as agreeing (default 0, an exact match), e.g. {"var1": 1}
+CONSENSUS_TOLERANCES = {}
 
 # Expected JSON Structure
 # IMPORTANT: Update this dictionary to reflect the expected structure of your raw JSON data.
@@ -34,164 +162,458 @@ VALID_ROBOT_POSITIONS = {"red_1", "red_2", "red_3", "blue_1", "blue_2", "blue_3"
 # HELPER FUNCTIONS SECTION
 # ===========================
 
-warnings = []
-scouter_warnings = defaultdict(int)
-scouter_participation = defaultdict(int)
-team_match_counts = defaultdict(int)
-match_robot_positions = defaultdict(set)
+# Compiled once from EXPECTED_STRUCTURE and reused for every entry
+COMPILED_SCHEMA = compile_schema(EXPECTED_STRUCTURE, VALID_ROBOT_POSITIONS)
 
 
-def log_warning(message, scouter=None):
+def cleaned_output_path():
     """
-    Logs a warning and associates it with the scouter.
+    Returns the path the cleaned data is written to for the configured intermediate format.
+    """
+    if INTERMEDIATE_FORMAT == PARQUET_FORMAT:
+        return parquet_path_for(CLEANED_MATCH_DATA_PATH)
+    if INTERMEDIATE_FORMAT == SQLITE_FORMAT:
+        return sqlite_path_for(CLEANED_MATCH_DATA_PATH)
+    return CLEANED_MATCH_DATA_PATH
+
+
+def cleaning_schema(merger):
+    """
+    Returns the expected structure and compiled schema for the raw files being merged: EXPECTED_STRUCTURE, plus
+    the event field in its metadata when the files span several events.
 
-    :param message: The warning message to log.
-    :param scouter: The scouter responsible for the data.
+    :param merger: The `RawSourceMerger` the raw entries are read through.
+    :return: Tuple of (expected structure, compiled schema).
     """
-    global warnings, scouter_warnings
-    warnings.append(message)
-    if scouter:
-        scouter_warnings[scouter] += 1
+    if not merger.tags_events:
+        return EXPECTED_STRUCTURE, COMPILED_SCHEMA
+    print(f"[INFO] Raw files span {len(set(merger.events))} events; each entry's event is saved as "
+          f"metadata.{EVENT_FIELD}.")
+    structure = with_event_field(EXPECTED_STRUCTURE)
+    return structure, compile_schema(structure, VALID_ROBOT_POSITIONS)
 
 
-def validate_structure(data, expected_structure, scouter, path=""):
+def validate_and_clean_entry(entry, accumulator, schema=COMPILED_SCHEMA):
     """
-    Validates and fixes a nested structure.
+    Validates and cleans a single entry, ensuring it adheres to the correct structure and rules.
 
-    :param data: The input data to validate.
-    :param expected_structure: The expected structure.
-    :param scouter: The scouter responsible for the data.
-    :param path: The path to the current key for logging purposes.
-    :return: A validated and cleaned version of the data.
+    :param entry: The raw data entry.
+    :param accumulator: The `CleaningAccumulator` collecting warnings and counts.
+    :param schema: The compiled schema (see `cleaning_schema`).
+    :return: A cleaned entry.
     """
-    validated = {}
-    for key, expected_type in expected_structure.items():
-        full_key_path = f"{path}.{key}" if path else key
+    return clean_entry(entry, schema, accumulator)
 
-        if key not in data:
-            log_warning(f"[WARNING] Missing key '{full_key_path}'.", scouter)
-            continue
 
-        if isinstance(expected_type, dict):
-            validated[key] = validate_structure(data[key], expected_type, scouter, full_key_path)
-        else:
-            value = data[key]
-            if not isinstance(value, expected_type):
-                log_warning(
-                    f"[WARNING] Incorrect type for '{full_key_path}'. Expected {expected_type}, got {type(value)}.",
-                    scouter,
-                )
-            else:
-                # Handle specific cases (robotPosition, negative integers)
-                if key == "robotPosition" and value not in VALID_ROBOT_POSITIONS:
-                    log_warning(
-                        f"[WARNING] Invalid robot position '{value}' at '{full_key_path}'. Defaulting to 'unknown'.",
-                        scouter,
-                    )
-                    value = "unknown"
+def analyze_data_consistency(accumulator):
+    """
+    Analyzes data consistency for matches and robot teams: teams with different numbers of matches,
+    matches with missing positions, positions submitted more than once, and teams scouted at more
+    than one position in the same match.
 
-                if isinstance(value, int) and value < 0:
-                    log_warning(
-                        f"[WARNING] Negative value '{value}' at '{full_key_path}'. Defaulting to 0.",
-                        scouter,
-                    )
-                    value = 0
+    :param accumulator: The `CleaningAccumulator` collecting warnings and counts.
+    """
+    with step("consistency"):
+        issues = find_consistency_issues(accumulator.match_keys, VALID_ROBOT_POSITIONS)
+
+    # Check team match counts
+    match_count_groups = issues["match_count_groups"]
+    if len(match_count_groups) > 1:
+        accumulator.log_dataset_warning(INCONSISTENT_MATCH_COUNTS, list(match_count_groups.items()))
 
-                validated[key] = value
+    # Check match completeness
+    for match, missing_positions in issues["missing_positions"]:
+        accumulator.log_dataset_warning(MISSING_POSITIONS, (match, missing_positions))
 
-    # Remove extra keys
-    extra_keys = set(data.keys()) - set(expected_structure.keys())
-    for extra_key in extra_keys:
-        log_warning(f"[WARNING] Extra key '{path}.{extra_key}' found and removed.", scouter)
+    # Check for duplicate submissions
+    for match, position, scouters in issues["duplicate_submissions"]:
+        accumulator.log_dataset_warning(DUPLICATE_SUBMISSION, (match, position, len(scouters), scouters))
 
-    return validated
+    # Check for teams scouted twice in one match
+    for match, team, positions in issues["teams_scouted_twice"]:
+        accumulator.log_dataset_warning(TEAM_SCOUTED_TWICE, (match, team, positions))
 
 
-def validate_and_clean_entry(entry):
+def score_scouter_consensus(cleaned_data, output_path, structure):
     """
-    Validates and cleans a single entry, ensuring it adheres to the correct structure and rules.
+    Compares the entries of robots scouted by more than one scouter in the same match and writes each
+    scouter's accuracy score next to the scouter leaderboard.
 
-    :param entry: The raw data entry.
-    :return: A cleaned entry.
+    :param cleaned_data: List of cleaned entries if they are in memory, else None (read back from `output_path`).
+    :param output_path: Path the cleaned data was written to.
+    :param structure: The expected structure the entries were cleaned with (see `cleaning_schema`).
     """
-    scouter = entry.get("metadata", {}).get("scouterName", "Unknown")
-    scouter_participation[scouter] += 1
-    return validate_structure(entry, EXPECTED_STRUCTURE, scouter)
+    numeric_fields, categorical_fields = consensus_fields(structure)
+    with step("consensus"):
+        if cleaned_data is not None:
+            matches_df = entries_to_frame(cleaned_data, structure)
+        elif INTERMEDIATE_FORMAT == PARQUET_FORMAT:
+            matches_df = read_table(output_path).to_pandas()
+        elif INTERMEDIATE_FORMAT == SQLITE_FORMAT:
+            with MatchStore(output_path) as store:
+                matches_df = entries_to_frame(store.iter_entries(), structure)
+        else:
+            matches_df = entries_to_frame(iter_raw_entries(output_path), structure)
+        scouter_df, field_df = score_scouters(matches_df, numeric_fields, categorical_fields, CONSENSUS_TOLERANCES)
 
+    os.makedirs(os.path.dirname(SCOUTER_CONSENSUS_PATH), exist_ok=True)
+    write_consensus_report(scouter_df, field_df, SCOUTER_CONSENSUS_PATH)
+    record_artifact(SCOUTER_CONSENSUS_PATH)
+    set_counter("consensus_scouters", len(scouter_df))
+    if scouter_df.empty:
+        print("[INFO] Scouter consensus: no robot was scouted by more than one scouter in the same match.")
+    else:
+        print(f"[INFO] Scouter consensus: compared {int(scouter_df['shared_entries'].sum())} entries from "
+              f"{len(scouter_df)} scouters, saved to: {SCOUTER_CONSENSUS_PATH}")
 
-def analyze_data_consistency():
+
+def record_entry_sources(merger, accumulator):
     """
-    Analyzes data consistency for matches and robot teams.
+    Reports the entries dropped as duplicate exports and saves which raw file and event each cleaned entry came from.
+
+    :param merger: The `RawSourceMerger` the raw entries were read through.
+    :param accumulator: The `CleaningAccumulator` collecting warnings and counts.
     """
-    global warnings
+    for duplicate in merger.duplicates:
+        accumulator.log_dataset_warning(DUPLICATE_ENTRY, duplicate)
 
-    # Check team match counts
-    match_count_groups = defaultdict(list)
-    for team, count in team_match_counts.items():
-        match_count_groups[count].append(team)
+    if len(merger.sources) > 1:
+        print(f"[INFO] Merged {len(merger.sources)} raw files:")
+        for source in merger.sources:
+            print(f"  {source['file']} (event {source['event']}): {source['entries']} entries, "
+                  f"{source['duplicates']} duplicates dropped")
 
-    if len(match_count_groups) > 1:
-        log_warning(
-            "[WARNING] Inconsistent match counts detected:\n"
-            + "\n".join(
-                f"  Teams with {count} matches: {teams}"
-                for count, teams in match_count_groups.items()
-            )
-        )
+    # Each file's entries are one contiguous range of the cleaned data: `first_entry` to `first_entry + entries`
+    os.makedirs(os.path.dirname(ENTRY_SOURCES_PATH), exist_ok=True)
+    write_json({"entries": merger.num_entries, "sources": merger.sources}, ENTRY_SOURCES_PATH, JSON_OUTPUT_STYLE)
+    record_artifact(ENTRY_SOURCES_PATH)
+    set_counter("raw_files", len(merger.sources))
+    set_counter("duplicates_dropped", len(merger.duplicates))
 
-    # Check match completeness
-    for match, positions in match_robot_positions.items():
-        if len(positions) != 6:
-            missing_positions = VALID_ROBOT_POSITIONS - positions
-            log_warning(
-                f"[WARNING] Match {match} is missing positions: {missing_positions}."
-            )
+
+def clean_in_parallel(entries, writer, accumulator, workers, schema):
+    """
+    Validates entries in a process pool and writes the cleaned entries in input order.
+
+    :param entries: Iterable of raw data entries (a list or a streaming iterator).
+    :param writer: An open incremental writer from `open_entry_writer`.
+    :param accumulator: The `CleaningAccumulator` that each chunk's results are merged into.
+    :param workers: Number of worker processes.
+    :param schema: The compiled schema (see `cleaning_schema`).
+    """
+    chunk_results = clean_entries_parallel(
+        entries, schema, workers, PARALLEL_CHUNK_SIZE, encode=writer.encode
+    )
+    for encoded_entries, chunk_accumulator in chunk_results:
+        for encoded_entry in encoded_entries:
+            writer.write_encoded(encoded_entry)
+        accumulator.merge(chunk_accumulator)
+
+
+def clean_incrementally(raw_data, accumulator, structure, schema):
+    """
+    Cleans only the raw entries that are new or changed since the last incremental run.
+
+    Unchanged entries reuse their cleaned version and replay their recorded warnings, so the cleaned
+    data, warnings and leaderboard are identical to a full rebuild. The teams whose entries were added,
+    changed or removed are recorded for scripts 03 and 04.
+
+    :param raw_data: List of raw data entries.
+    :param accumulator: The `CleaningAccumulator` collecting warnings and counts.
+    :param structure: The expected structure (see `cleaning_schema`).
+    :param schema: The compiled schema for `structure`.
+    :return: List of cleaned entries, in raw entry order.
+    """
+    fingerprint = schema_fingerprint(structure, sorted(VALID_ROBOT_POSITIONS), WARNING_RECORD_VERSION)
+    records = load_cleaning_manifest(fingerprint)
+    cleaned_data = None
+    if records is not None:
+        try:
+            with open(CLEANED_MATCH_DATA_PATH, "r") as infile:
+                cleaned_data = json.load(infile)
+        except (FileNotFoundError, json.JSONDecodeError):
+            cleaned_data = None
+        if not isinstance(cleaned_data, list) or len(cleaned_data) != len(records):
+            records = None
+
+    full_rebuild = records is None
+    if full_rebuild:
+        print("[INFO] No usable cleaning manifest found. Cleaning every entry.")
+        records, cleaned_data = [], []
+
+    new_records = []
+    new_cleaned_data = []
+    touched_teams = set()
+    first_changed_index = None
+    num_validated = 0
+    with step("validate"):
+        for index, entry in enumerate(raw_data):
+            content_hash = entry_hash(entry)
+            if index < len(records) and records[index][0] == content_hash:
+                # Unchanged entry: reuse the cleaned entry and replay its warnings
+                _, scouter, _, warnings = records[index]
+                accumulator.scouter_participation[scouter] += 1
+                for code, key_path, detail in warnings:
+                    accumulator.log_warning(code, key_path, scouter, detail)
+                accumulator.record_match_key(cleaned_data[index])
+                new_records.append(records[index])
+                new_cleaned_data.append(cleaned_data[index])
+                continue
+
+            if first_changed_index is None:
+                first_changed_index = index
+            num_validated += 1
+            entry_accumulator = CleaningAccumulator()
+            cleaned_entry = validate_and_clean_entry(entry, entry_accumulator, schema)
+            accumulator.merge(entry_accumulator)
+
+            scouter = next(iter(entry_accumulator.scouter_participation))
+            team = cleaned_entry.get("metadata", {}).get("robotTeam")
+            touched_teams.add(team)
+            if index < len(records):
+                touched_teams.add(records[index][2])
+            warnings = [[code, key_path, jsonable_detail(detail)] for code, key_path, _, _, detail in entry_accumulator.warnings]
+            new_records.append([content_hash, scouter, team, warnings])
+            new_cleaned_data.append(cleaned_entry)
+
+    # Entries removed from the end of the raw file
+    for record in records[len(raw_data):]:
+        touched_teams.add(record[2])
+
+    num_reused = len(raw_data) - num_validated
+    print(f"[INFO] Reused {num_reused} cleaned entries, validated {num_validated} new or changed entries.")
+    set_counter("entries_reused", num_reused)
+    set_counter("entries_validated", num_validated)
+
+    with step("serialize"):
+        os.makedirs(os.path.dirname(CLEANED_MATCH_DATA_PATH), exist_ok=True)
+        only_appended = len(raw_data) >= len(records) and (
+            first_changed_index is None or first_changed_index >= len(records)
+        )
+        writer = open_entry_writer(CLEANED_MATCH_DATA_PATH, indent=output_indent(JSON_OUTPUT_STYLE))
+        written = False
+        if not full_rebuild and only_appended and isinstance(writer, JsonArrayWriter):
+            # Only new entries at the end: append them in place instead of rewriting the file
+            encoded_entries = [writer.encode(entry) for entry in new_cleaned_data[len(records):]]
+            if encoded_entries:
+                print(f"[INFO] Appending {len(encoded_entries)} entries to: {CLEANED_MATCH_DATA_PATH}")
+            written = append_to_json_array(CLEANED_MATCH_DATA_PATH, encoded_entries, writer.indent)
+        if not written:
+            print(f"[INFO] Saving cleaned data to: {CLEANED_MATCH_DATA_PATH}")
+            with writer:
+                for cleaned_entry in new_cleaned_data:
+                    writer.write(cleaned_entry)
+        record_artifact(CLEANED_MATCH_DATA_PATH)
+
+        if INTERMEDIATE_FORMAT != JSON_FORMAT:
+            # The JSON file above is the incremental cache; the Parquet or SQLite file is what scripts 03-05 read
+            appended = False
+            if INTERMEDIATE_FORMAT == SQLITE_FORMAT and not full_rebuild and only_appended:
+                appended = append_cleaned_entries(
+                    cleaned_output_path(), structure, new_cleaned_data[len(records):], len(records)
+                )
+                if appended:
+                    print(f"[INFO] Inserted {len(new_cleaned_data) - len(records)} entries into: {cleaned_output_path()}")
+            if not appended:
+                print(f"[INFO] Saving cleaned data to: {cleaned_output_path()}")
+                with open_cleaned_data_writer(cleaned_output_path(), structure) as data_writer:
+                    for cleaned_entry in new_cleaned_data:
+                        data_writer.write(cleaned_entry)
+            record_artifact(cleaned_output_path())
+        save_cleaning_manifest(fingerprint, new_records)
+
+    if full_rebuild:
+        record_change([record[2] for record in new_records], full_rebuild=True)
+    else:
+        record_change(touched_teams)
+        print(f"[INFO] Teams touched by this run: {len(touched_teams)}")
+    return new_cleaned_data
 
 
 # ===========================
 # MAIN SCRIPT SECTION
 # ===========================
 
-print(seperation_bar)
-print("Script 02: Data Cleaning and Preprocessing\n")
-
-try:
-    print(f"[INFO] Loading raw data from: {RAW_MATCH_DATA_PATH}")
-    with open(RAW_MATCH_DATA_PATH, "r") as infile:
-        raw_data = json.load(infile)
-
-    if not isinstance(raw_data, list):
-        raise ValueError("Raw data must be a list of matches.")
-
-    cleaned_data = []
-    for entry in raw_data:
-        cleaned_entry = validate_and_clean_entry(entry)
-        cleaned_data.append(cleaned_entry)
-
-    analyze_data_consistency()
-
-    print(f"[INFO] Saving cleaned data to: {CLEANED_MATCH_DATA_PATH}")
-    os.makedirs(os.path.dirname(CLEANED_MATCH_DATA_PATH), exist_ok=True)
-    with open(CLEANED_MATCH_DATA_PATH, "w") as outfile:
-        json.dump(cleaned_data, outfile, indent=4)
-
-    # Save scouter leaderboard
-    os.makedirs(os.path.dirname(SCOUTER_LEADERBOARD_PATH), exist_ok=True)
-    with open(SCOUTER_LEADERBOARD_PATH, "w") as leaderboard_file:
-        leaderboard_file.write("Scouter Error Leaderboard:\n")
-        for scouter, count in sorted(scouter_warnings.items(), key=lambda x: -x[1]):
-            leaderboard_file.write(f"{scouter}: {count} errors/warnings\n")
-        leaderboard_file.write("\nScouter Leaderboard:\n")
-        for scouter, count in sorted(scouter_participation.items(), key=lambda x: -x[1]):
-            leaderboard_file.write(f"{scouter}: {count} matches\n")
-
-    print("\n".join(warnings))
-    print(f"[INFO] Total warnings/errors: {len(warnings)}")
-    print("Script 02: Completed.")
-
-except Exception as e:
-    print(f"[ERROR] An unexpected error occurred: {e}")
-    print(traceback.format_exc())
-    print("Script 02: Failed.")
-
-print(seperation_bar)
\ No newline at end of file
+def main(argv=None, write_intermediates=True):
+    """
+    Cleans the raw match data. Called when the script is run directly or by the pipeline runner.
+
+    :param argv: Command-line arguments (defaults to `sys.argv`).
+    :param write_intermediates: If False, the cleaned data is not written to `data/processed`
+                                (batch mode only; the other modes write while they clean).
+    :return: List of cleaned entries if they were kept in memory (batch and incremental modes), else None.
+    :raises StageFailed: If cleaning failed (the cleaned data on disk is left as it was).
+    """
+    print(seperation_bar)
+    print("Script 02: Data Cleaning and Preprocessing\n")
+
+    parser = argparse.ArgumentParser(description="Script 02: Data Cleaning and Preprocessing")
+    parser.add_argument("--input", default=RAW_MATCH_DATA_PATH,
+                        help="Raw match data: a file (JSON array or NDJSON), a folder of files, or a glob.")
+    parser.add_argument("--stream", action="store_true", default=STREAMING_MODE,
+                        help="Clean entries one at a time with constant memory use.")
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS,
+                        help="Worker processes for validation (0 = one per CPU, 1 = no process pool).")
+    parser.add_argument("--incremental", action="store_true", default=INCREMENTAL_MODE,
+                        help="Only validate raw entries that are new or changed since the last incremental run.")
+    parser.add_argument("--warnings", choices=WARNING_OUTPUT_MODES, default=WARNING_OUTPUT,
+                        help="Print every warning, a sample of each type, or only the counts per type.")
+    parser.add_argument("--warning-log", default=WARNING_LOG_PATH,
+                        help="Write every warning to this file (.ndjson/.jsonl, or .csv).")
+    parser.add_argument("--consensus", action="store_true", default=SCOUTER_CONSENSUS,
+                        help="Score each scouter by agreement with other scouters of the same robot and match.")
+    add_instrumentation_arguments(parser)
+    args = parser.parse_args(argv)
+    workers = args.workers if args.workers > 0 else default_worker_count()
+    check_format(INTERMEDIATE_FORMAT)
+    check_output_style(JSON_OUTPUT_STYLE)
+    output_path = cleaned_output_path()
+    output_indent_level = output_indent(JSON_OUTPUT_STYLE)
+
+    cleaned_data = None
+    sink = None
+    status = "failed"
+    instrumentation = StageInstrumentation("02")
+    instrumentation.start(profile=args.profile, trace_memory=args.trace_memory)
+
+    try:
+        if args.warning_log:
+            os.makedirs(os.path.dirname(args.warning_log) or ".", exist_ok=True)
+        sink = WarningSink(args.warnings, WARNING_SAMPLE_SIZE, args.warning_log)
+        accumulator = CleaningAccumulator(sink)
+        merger = RawSourceMerger(resolve_raw_files(args.input))
+        if len(merger.files) > 1:
+            print(f"[INFO] Found {len(merger.files)} raw files in: {args.input}")
+        structure, schema = cleaning_schema(merger)
+
+        if args.incremental:
+            print(f"[INFO] Loading raw data from: {args.input}")
+            with step("load"):
+                raw_data = merger.load_entries(LOAD_THREADS)
+            cleaned_data = clean_incrementally(raw_data, accumulator, structure, schema)
+
+            analyze_data_consistency(accumulator)
+        elif args.stream:
+            # Streaming path: read -> validate -> write one entry at a time
+            print(f"[INFO] Streaming raw data from: {args.input}")
+            print(f"[INFO] Saving cleaned data to: {output_path}")
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            # Reading, validating and writing are interleaved, so they are timed as one step
+            with step("stream"), open_cleaned_data_writer(output_path, structure, output_indent_level) as writer:
+                if workers > 1:
+                    print(f"[INFO] Cleaning with {workers} worker processes.")
+                    clean_in_parallel(merger.iter_entries(), writer, accumulator, workers, schema)
+                else:
+                    for entry in merger.iter_entries():
+                        writer.write(validate_and_clean_entry(entry, accumulator, schema))
+            record_artifact(output_path)
+            print(f"[INFO] Streamed {writer.count} entries.")
+
+            analyze_data_consistency(accumulator)
+        elif workers > 1:
+            print(f"[INFO] Loading raw data from: {args.input}")
+            with step("load"):
+                raw_data = merger.load_entries(LOAD_THREADS)
+
+            # Workers serialize their cleaned entries, so the cleaned file is written as the chunks arrive
+            print(f"[INFO] Cleaning with {workers} worker processes.")
+            print(f"[INFO] Saving cleaned data to: {output_path}")
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            # Cleaned entries are written as the chunks arrive, so writing is part of this step
+            with step("validate"), open_cleaned_data_writer(output_path, structure, output_indent_level) as writer:
+                clean_in_parallel(raw_data, writer, accumulator, workers, schema)
+            record_artifact(output_path)
+
+            analyze_data_consistency(accumulator)
+        else:
+            print(f"[INFO] Loading raw data from: {args.input}")
+            with step("load"):
+                raw_data = merger.load_entries(LOAD_THREADS)
+
+            cleaned_data = []
+            with step("validate"):
+                for entry in raw_data:
+                    cleaned_entry = validate_and_clean_entry(entry, accumulator, schema)
+                    cleaned_data.append(cleaned_entry)
+
+            analyze_data_consistency(accumulator)
+
+            if not write_intermediates:
+                print("[INFO] Keeping cleaned data in memory (not written to disk).")
+            elif INTERMEDIATE_FORMAT != JSON_FORMAT:
+                print(f"[INFO] Saving cleaned data to: {output_path}")
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                with step("serialize"), open_cleaned_data_writer(output_path, structure) as writer:
+                    for cleaned_entry in cleaned_data:
+                        writer.write(cleaned_entry)
+                record_artifact(output_path)
+            else:
+                print(f"[INFO] Saving cleaned data to: {output_path}")
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                with step("serialize"):
+                    write_json(cleaned_data, output_path, JSON_OUTPUT_STYLE)
+                record_artifact(output_path)
+
+        record_entry_sources(merger, accumulator)
+
+        if INTERMEDIATE_FORMAT != JSON_FORMAT and EXPORT_JSON and not args.incremental and write_intermediates:
+            print(f"[INFO] Exporting cleaned data as JSON to: {CLEANED_MATCH_DATA_PATH}")
+            with step("serialize"):
+                if INTERMEDIATE_FORMAT == SQLITE_FORMAT:
+                    export_store_to_json(output_path, CLEANED_MATCH_DATA_PATH)
+                else:
+                    export_table_to_json(read_table(output_path), CLEANED_MATCH_DATA_PATH)
+            record_artifact(CLEANED_MATCH_DATA_PATH)
+
+        if not args.incremental:
+            # A full run rewrites the cleaned data, so the incremental manifest no longer describes it
+            invalidate_incremental_data()
+
+        sink.close()
+
+        # Save scouter leaderboard (warning counts come from the same records as the printed warnings)
+        os.makedirs(os.path.dirname(SCOUTER_LEADERBOARD_PATH), exist_ok=True)
+        with open(SCOUTER_LEADERBOARD_PATH, "w") as leaderboard_file:
+            leaderboard_file.write("Scouter Error Leaderboard:\n")
+            for scouter, count in sorted(sink.scouter_counts.items(), key=lambda x: -x[1]):
+                leaderboard_file.write(f"{scouter}: {count} errors/warnings\n")
+            leaderboard_file.write("\nScouter Leaderboard:\n")
+            for scouter, count in sorted(accumulator.scouter_participation.items(), key=lambda x: -x[1]):
+                leaderboard_file.write(f"{scouter}: {count} matches\n")
+        record_artifact(SCOUTER_LEADERBOARD_PATH)
+        if args.consensus:
+            score_scouter_consensus(cleaned_data, output_path, structure)
+        if args.warning_log:
+            record_artifact(args.warning_log)
+
+        set_counter("entries", accumulator.num_entries)
+        set_counter("warnings", sink.total)
+        set_counter("scouters", len(accumulator.scouter_participation))
+        set_counter("teams", len({team for team in accumulator.match_keys["robotTeam"] if team is not None}))
+
+        sink.print_report()
+        print("Script 02: Completed.")
+        status = "completed"
+
+    except Exception as e:
+        print(f"[ERROR] An unexpected error occurred: {e}")
+        print(traceback.format_exc())
+        print("Script 02: Failed.")
+        cleaned_data = None
+    finally:
+        if sink is not None:
+            sink.close()
+
+    instrumentation.finish(status)
+    print(seperation_bar)
+    if status != "completed":
+        raise StageFailed("02")
+    return cleaned_data
+
+
+# The main section is guarded so worker processes can import this script safely
+if __name__ == "__main__":
+    try:
+        main()
+    except StageFailed:
+        raise SystemExit(1)
@@ -1,7 +1,31 @@
 from utility_functions.print_formats import seperation_bar
 import os
 import json
+import argparse
 import traceback
+from utility_functions.incremental import current_change_version, teams_changed_since, save_stage_version
+from utility_functions.team_index import TEAM_INDEX_PATH, TeamIndex
+from utility_functions.json_output import check_output_style, write_json
+from utility_functions.instrumentation import (
+    StageFailed,
+    StageInstrumentation,
+    add_instrumentation_arguments,
+    record_artifact,
+    set_counter,
+    step,
+)
+from utility_functions.intermediate_formats import (
+    PARQUET_FORMAT,
+    SQLITE_FORMAT,
+    check_format,
+    parquet_path_for,
+    sqlite_path_for,
+    read_table,
+    write_table,
+    group_table_by_team,
+    export_team_table_to_json,
+)
+from utility_functions.sqlite_store import MatchStore
 
 # ===========================
 # CONFIGURATION SECTION
@@ -11,30 +35,46 @@ import traceback
 CLEANED_MATCH_DATA_PATH = "data/processed/cleaned_match_data.json"  # Input: Cleaned match-level data
 TEAM_BASED_MATCH_DATA_PATH = "data/processed/team_based_match_data.json"  # Output: Team-based data
 
+# Team Data Layout
+# "index": writes a small team index (`data/processed/team_index.npz`) of each team's rows in the cleaned
+#          data instead of a second, team-grouped copy. Script 04 reads each team's matches through it.
+# "copy": writes the full team-based file, as earlier versions did. Set the same value in script 04.
+TEAM_DATA_LAYOUT = "index"
+
+# Incremental Mode (see script 02)
+# When enabled, the team-based file is left as is if no team was touched since it was last built.
+# Can be enabled for a single run with the `--incremental` command-line flag.
+INCREMENTAL_MODE = False
+
+# Intermediate Format (see script 02)
+# "parquet" reads `cleaned_match_data.parquet` and writes `team_based_match_data.parquet`: the same flat
+# table with each team's matches stored together, in the order the team-based JSON file uses.
+# "sqlite" groups `cleaned_match_data.sqlite` by team in SQL and stores a team summary table in the same database
+# (TEAM_DATA_LAYOUT is not used); script 04 looks up each team's matches through the team column's index.
+INTERMEDIATE_FORMAT = "json"
+EXPORT_JSON = False  # With "parquet" or "sqlite", also write the team-based JSON file for people to read
+TEAM_COLUMN = "metadata.robotTeam"  # Flattened column holding the team number
+
+# JSON Output Style (see script 02)
+# "compact" writes the team-based file ("copy" layout) without whitespace; only script 04 reads it.
+JSON_OUTPUT_STYLE = "indented"
+
 # ===========================
 # HELPER FUNCTIONS SECTION
 # ===========================
 
-def restructure_to_team_based(cleaned_file_path, team_file_path):
+def group_matches_by_team(cleaned_data):
     """
-    Restructures cleaned match data into a team-based format with advanced statistics.
+    Groups cleaned matches by team and applies the advanced statistics placeholder.
 
-    :param cleaned_file_path: Path to the cleaned JSON file.
-    :param team_file_path: Path to save the team-based JSON file.
+    :param cleaned_data: List of cleaned matches.
+    :return: Dictionary of team key (as a string, like the saved JSON file) -> {"matches": [...]}.
     """
-    try:
-        # Load cleaned data
-        print(f"[INFO] Loading cleaned data from: {cleaned_file_path}")
-        with open(cleaned_file_path, 'r') as infile:
-            cleaned_data = json.load(infile)
-
-        if not isinstance(cleaned_data, list):
-            raise ValueError("[ERROR] Cleaned data must be a list of matches.")
-
+    with step("group"):
         # Group matches by team
         team_data = {}
         for match in cleaned_data:
-            team = match["metadata"]["robotTeam"]
+            team = str(match["metadata"]["robotTeam"])
             if team not in team_data:
                 team_data[team] = {"matches": []}
             team_data[team]["matches"].append(match)
@@ -47,10 +87,37 @@ def restructure_to_team_based(cleaned_file_path, team_file_path):
                 # match["example_stat"] = some_calculation(match)
                 pass
 
+    set_counter("entries", len(cleaned_data))
+    set_counter("teams", len(team_data))
+    return team_data
+
+def restructure_to_team_based(cleaned_file_path, team_file_path, team_data=None):
+    """
+    Restructures cleaned match data into a team-based format with advanced statistics.
+
+    :param cleaned_file_path: Path to the cleaned JSON file.
+    :param team_file_path: Path to save the team-based JSON file.
+    :param team_data: Optional team-based data already grouped in memory (skips loading the cleaned file).
+    :return: True if the team-based file was written.
+    """
+    try:
+        if team_data is None:
+            # Load cleaned data
+            print(f"[INFO] Loading cleaned data from: {cleaned_file_path}")
+            with step("load"), open(cleaned_file_path, 'r') as infile:
+                cleaned_data = json.load(infile)
+
+            if not isinstance(cleaned_data, list):
+                raise ValueError("[ERROR] Cleaned data must be a list of matches.")
+
+            team_data = group_matches_by_team(cleaned_data)
+
         # Save team-based data
         print(f"[INFO] Saving team-based match data to: {team_file_path}")
-        with open(team_file_path, 'w') as outfile:
-            json.dump(team_data, outfile, indent=4)
+        with step("serialize"):
+            write_json(team_data, team_file_path, JSON_OUTPUT_STYLE)
+        record_artifact(team_file_path)
+        return True
 
     except FileNotFoundError as e:
         print(f"[ERROR] Cleaned data file not found: {e}")
@@ -59,30 +126,233 @@ def restructure_to_team_based(cleaned_file_path, team_file_path):
     except Exception as e:
         print(f"[ERROR] An unexpected error occurred during restructuring: {e}")
         print(traceback.format_exc())
+    return False
+
+def build_team_index(cleaned_file_path, use_parquet):
+    """
+    Builds the team index for the cleaned match data.
+
+    :param cleaned_file_path: Path to the cleaned JSON or Parquet file.
+    :param use_parquet: True if the cleaned data is a Parquet file.
+    :return: True if the index was written.
+    """
+    try:
+        print(f"[INFO] Indexing cleaned data from: {cleaned_file_path}")
+        # Building the index reads the cleaned file and groups its rows by team in one pass
+        with step("group"):
+            if use_parquet:
+                cleaned_table = read_table(cleaned_file_path, columns=[TEAM_COLUMN])
+                team_index = TeamIndex.build_from_table(cleaned_file_path, cleaned_table, TEAM_COLUMN)
+            else:
+                team_index = TeamIndex.build_from_json(cleaned_file_path)
+        print(f"[INFO] Indexed {len(team_index.rows)} matches for {len(team_index.teams)} teams.")
+        set_counter("entries", len(team_index.rows))
+        set_counter("teams", len(team_index.teams))
+
+        print(f"[INFO] Saving team index to: {TEAM_INDEX_PATH}")
+        with step("serialize"):
+            team_index.save(TEAM_INDEX_PATH)
+        record_artifact(TEAM_INDEX_PATH)
+
+        if use_parquet and EXPORT_JSON:
+            print(f"[INFO] Exporting team-based match data as JSON to: {TEAM_BASED_MATCH_DATA_PATH}")
+            with step("serialize"):
+                export_team_table_to_json(team_index.take(read_table(cleaned_file_path)), TEAM_COLUMN, TEAM_BASED_MATCH_DATA_PATH)
+            record_artifact(TEAM_BASED_MATCH_DATA_PATH)
+        return True
+
+    except FileNotFoundError as e:
+        print(f"[ERROR] Cleaned data file not found: {e}")
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"[ERROR] Failed to index cleaned data: {e}")
+    except Exception as e:
+        print(f"[ERROR] An unexpected error occurred during indexing: {e}")
+        print(traceback.format_exc())
+    return False
+
+def build_team_summary(cleaned_file_path):
+    """
+    Groups the matches of a cleaned SQLite database by team, inside the database.
+
+    :param cleaned_file_path: Path to the cleaned SQLite database.
+    :return: True if the team summary was written.
+    """
+    try:
+        with MatchStore(cleaned_file_path, TEAM_COLUMN) as store:
+            print(f"[INFO] Grouping cleaned data by team in: {cleaned_file_path}")
+            with step("group"):
+                num_entries, num_teams = store.build_team_summary()
+            print(f"[INFO] Grouped {num_entries} matches for {num_teams} teams.")
+            set_counter("entries", num_entries)
+            set_counter("teams", num_teams)
+            record_artifact(cleaned_file_path)
+
+            if EXPORT_JSON:
+                print(f"[INFO] Exporting team-based match data as JSON to: {TEAM_BASED_MATCH_DATA_PATH}")
+                with step("serialize"):
+                    write_json(store.load_team_summary().team_data(), TEAM_BASED_MATCH_DATA_PATH, JSON_OUTPUT_STYLE)
+                record_artifact(TEAM_BASED_MATCH_DATA_PATH)
+        return True
+
+    except FileNotFoundError as e:
+        print(f"[ERROR] Cleaned data file not found: {e}")
+    except ValueError as e:
+        print(f"[ERROR] Failed to group cleaned data: {e}")
+    except Exception as e:
+        print(f"[ERROR] An unexpected error occurred during grouping: {e}")
+        print(traceback.format_exc())
+    return False
+
+def restructure_to_team_based_parquet(cleaned_file_path, team_file_path):
+    """
+    Restructures a cleaned match Parquet table into team-grouped order.
+
+    Custom per-match calculations from `restructure_to_team_based` should be added here as new columns.
+
+    :param cleaned_file_path: Path to the cleaned Parquet file.
+    :param team_file_path: Path to save the team-based Parquet file.
+    :return: True if the team-based file was written.
+    """
+    try:
+        print(f"[INFO] Loading cleaned data from: {cleaned_file_path}")
+        with step("load"):
+            cleaned_table = read_table(cleaned_file_path)
+
+        with step("group"):
+            team_table, team_counts = group_table_by_team(cleaned_table, TEAM_COLUMN)
+        print(f"[INFO] Grouped {team_table.num_rows} matches for {len(team_counts)} teams.")
+        set_counter("entries", team_table.num_rows)
+        set_counter("teams", len(team_counts))
+
+        print(f"[INFO] Saving team-based match data to: {team_file_path}")
+        with step("serialize"):
+            write_table(team_table, team_file_path)
+        record_artifact(team_file_path)
+
+        if EXPORT_JSON:
+            print(f"[INFO] Exporting team-based match data as JSON to: {TEAM_BASED_MATCH_DATA_PATH}")
+            with step("serialize"):
+                export_team_table_to_json(team_table, TEAM_COLUMN, TEAM_BASED_MATCH_DATA_PATH)
+            record_artifact(TEAM_BASED_MATCH_DATA_PATH)
+        return True
+
+    except FileNotFoundError as e:
+        print(f"[ERROR] Cleaned data file not found: {e}")
+    except Exception as e:
+        print(f"[ERROR] An unexpected error occurred during restructuring: {e}")
+        print(traceback.format_exc())
+    return False
 
 # ===========================
 # MAIN SCRIPT SECTION
 # ===========================
 
-print(seperation_bar)
-print("Script 03: Team-based Match Data Restructuring\n")
+def main(argv=None, cleaned_data=None, write_intermediates=True):
+    """
+    Restructures the cleaned match data by team. Called when the script is run directly or by the pipeline runner.
+
+    :param argv: Command-line arguments (defaults to `sys.argv`).
+    :param cleaned_data: Optional cleaned matches handed over in memory by script 02.
+    :param write_intermediates: If False, nothing is written to `data/processed` (needs `cleaned_data`).
+    :return: Team-based match data if `cleaned_data` was given, else None (script 04 reads it from disk).
+    :raises StageFailed: If the team-based data could not be built.
+    """
+    print(seperation_bar)
+    print("Script 03: Team-based Match Data Restructuring\n")
+
+    status = "failed"
+    instrumentation = StageInstrumentation("03")
+    try:
+        # Guidance for FRC teams:
+        # - Ensure the cleaned match data file is located at `data/processed/cleaned_match_data.json`.
+        # - Customize advanced statistics calculations in the helper function above if needed.
+
+        parser = argparse.ArgumentParser(description="Script 03: Team-based Match Data Restructuring")
+        parser.add_argument("--incremental", action="store_true", default=INCREMENTAL_MODE,
+                            help="Skip the rebuild when no team changed since the last run.")
+        add_instrumentation_arguments(parser)
+        args = parser.parse_args(argv)
+        instrumentation.start(profile=args.profile, trace_memory=args.trace_memory)
+
+        check_format(INTERMEDIATE_FORMAT)
+        check_output_style(JSON_OUTPUT_STYLE)
+        if TEAM_DATA_LAYOUT not in ("index", "copy"):
+            raise ValueError(f"Unknown team data layout '{TEAM_DATA_LAYOUT}'. Use 'index' or 'copy'.")
+        use_parquet = INTERMEDIATE_FORMAT == PARQUET_FORMAT
+        use_sqlite = INTERMEDIATE_FORMAT == SQLITE_FORMAT
+        cleaned_path = parquet_path_for(CLEANED_MATCH_DATA_PATH) if use_parquet else CLEANED_MATCH_DATA_PATH
+        if use_sqlite:
+            # The team summary is a table in the cleaned database itself
+            cleaned_path = sqlite_path_for(CLEANED_MATCH_DATA_PATH)
+            team_output_path = cleaned_path
+        elif TEAM_DATA_LAYOUT == "index":
+            team_output_path = TEAM_INDEX_PATH
+        else:
+            team_output_path = parquet_path_for(TEAM_BASED_MATCH_DATA_PATH) if use_parquet else TEAM_BASED_MATCH_DATA_PATH
 
-try:
-    # Guidance for FRC teams:
-    # - Ensure the cleaned match data file is located at `data/processed/cleaned_match_data.json`.
-    # - Customize advanced statistics calculations in the helper function above if needed.
+        # Ensure the output directory exists
+        os.makedirs(os.path.dirname(team_output_path), exist_ok=True)
 
-    # Ensure the output directory exists
-    os.makedirs(os.path.dirname(TEAM_BASED_MATCH_DATA_PATH), exist_ok=True)
+        team_data = group_matches_by_team(cleaned_data) if cleaned_data is not None else None
 
-    # Restructure data to team-based format
-    restructure_to_team_based(CLEANED_MATCH_DATA_PATH, TEAM_BASED_MATCH_DATA_PATH)
+        touched_teams, change_version = teams_changed_since("03") if args.incremental else (None, current_change_version())
+        if use_sqlite:
+            output_current = False
+            if os.path.exists(team_output_path):
+                with MatchStore(team_output_path, TEAM_COLUMN) as store:
+                    output_current = store.has_team_summary()
+        else:
+            output_current = os.path.exists(team_output_path) and (
+                TEAM_DATA_LAYOUT == "copy" or TeamIndex.load(team_output_path).is_current()
+            )
+        if team_data is not None and not write_intermediates:
+            print(f"[INFO] Grouped {len(cleaned_data)} matches for {len(team_data)} teams in memory (not written to disk).")
+            change_version = None
+        elif touched_teams is not None and not touched_teams and output_current:
+            # Grouping is one linear pass, so any touched team means regrouping; nothing touched means no work
+            print("[INFO] No teams changed since the last run. Team-based match data is up to date.")
+            record_artifact(team_output_path)
+            if (use_parquet or use_sqlite) and EXPORT_JSON:
+                record_artifact(TEAM_BASED_MATCH_DATA_PATH)
+        else:
+            if touched_teams is not None:
+                print(f"[INFO] Teams changed since the last run: {len(touched_teams)}")
+            # Restructure data to team-based format
+            if use_sqlite:
+                written = build_team_summary(cleaned_path)
+            elif TEAM_DATA_LAYOUT == "index":
+                written = build_team_index(cleaned_path, use_parquet)
+            elif use_parquet:
+                written = restructure_to_team_based_parquet(cleaned_path, team_output_path)
+            else:
+                written = restructure_to_team_based(CLEANED_MATCH_DATA_PATH, TEAM_BASED_MATCH_DATA_PATH, team_data)
+            if not written:
+                # Force a rebuild next time, and fail so script 04 does not run on the old team-based data
+                save_stage_version("03", None)
+                raise RuntimeError("The team-based match data could not be written (see the error above).")
 
-    print("\n[INFO] Script 03: Completed.")
+        # Remember which change version the team-based file reflects (None forces a rebuild next time)
+        if change_version is not None or args.incremental:
+            save_stage_version("03", change_version)
 
-except Exception as e:
-    print(f"\n[ERROR] An unexpected error occurred: {e}")
-    print(traceback.format_exc())
-    print("\nScript 03: Failed.")
+        print("\n[INFO] Script 03: Completed.")
+        status = "completed"
 
-print(seperation_bar)
\ No newline at end of file
+    except Exception as e:
+        print(f"\n[ERROR] An unexpected error occurred: {e}")
+        print(traceback.format_exc())
+        print("\nScript 03: Failed.")
+        team_data = None
+
+    instrumentation.finish(status)
+    print(seperation_bar)
+    if status != "completed":
+        raise StageFailed("03")
+    return team_data
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except StageFailed:
+        raise SystemExit(1)
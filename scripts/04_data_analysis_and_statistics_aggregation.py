@@ -1,40 +1,136 @@
 from utility_functions.print_formats import seperation_bar
 import os
 import json
+import hashlib
+import argparse
 import traceback
-import pandas as pd
-import numpy as np
+from utility_functions.incremental import (
+    built_stage_version,
+    current_change_version,
+    save_stage_version,
+    teams_changed_since,
+)
+from utility_functions.alliance_contributions import AllianceContributions, contribution_columns, merge_contributions
+from utility_functions.team_index import load_current_team_index
+from utility_functions.streaming_stats import MATCH_NUMBER_KEY, TeamTrendAccumulator, flatten_match
+from utility_functions.json_output import check_output_style, write_json
+from utility_functions.instrumentation import (
+    StageFailed,
+    StageInstrumentation,
+    add_instrumentation_arguments,
+    record_artifact,
+    set_counter,
+    step,
+)
+from utility_functions.intermediate_formats import (
+    PARQUET_FORMAT,
+    SQLITE_FORMAT,
+    check_format,
+    parquet_path_for,
+    sqlite_path_for,
+    read_table,
+    write_team_performance_parquet,
+    json_normalize_column_order,
+)
+from utility_functions.sqlite_store import MatchStore
+
+# pandas and numpy are imported inside the functions that need them, so the script starts quickly
+# and exits quickly when its input is missing.
 
 # ===========================
 # CONFIGURATION SECTION
 # ===========================
 
 # File paths (Modify these as needed)
-TEAM_BASED_MATCH_DATA_PATH = "data/processed/team_based_match_data.json"  # Input: Team-based match data
+CLEANED_MATCH_DATA_PATH = "data/processed/cleaned_match_data.json"  # Input: Cleaned match data (with the team index)
+TEAM_BASED_MATCH_DATA_PATH = "data/processed/team_based_match_data.json"  # Input: Team-based match data ("copy" layout)
 TEAM_PERFORMANCE_DATA_PATH = "outputs/team_data/team_performance_data.json"  # Output: Team performance data
+TEAM_TREND_DATA_PATH = "outputs/team_data/team_trend_data.json"  # Output: Team trend data (see below)
+
+# Incremental Mode (see script 02)
+# When enabled, only teams whose matches changed since the last run are recalculated;
+# every other team keeps its statistics from the existing output file.
+# Can be enabled for a single run with the `--incremental` command-line flag.
+INCREMENTAL_MODE = False
+
+# Team Data Layout (see script 03)
+# "index" reads each team's matches from the cleaned data through the team index; "copy" reads the team-based file.
+TEAM_DATA_LAYOUT = "index"
+
+# Intermediate Format (see script 02)
+# "parquet" loads `team_based_match_data.parquet` memory-mapped into one flat DataFrame and also writes
+# `team_performance_data.parquet` for script 05. The JSON team performance file is always written.
+# "sqlite" reads `cleaned_match_data.sqlite` (grouped by script 03; TEAM_DATA_LAYOUT is not used): the groupby
+# engine aggregates in SQL, and each team's matches are looked up through the team column's index.
+INTERMEDIATE_FORMAT = "json"
+TEAM_COLUMN = "metadata.robotTeam"  # Flattened column holding the team number
+
+# JSON Output Style (see script 02)
+# "compact" writes the team performance and trend files without whitespace. NumPy and pandas values are
+# converted while the files are encoded, so results are written without a separate conversion pass.
+JSON_OUTPUT_STYLE = "indented"
+
+# Aggregation Engine
+# "groupby": loads all matches into one flat DataFrame and computes every team's statistics in a single
+#            groupby pass (plus one grouped count for categorical columns). Much faster with many teams.
+# "per_team": builds a separate DataFrame per team and aggregates it column by column. Easier to customize.
+# With the "sqlite" format, "groupby" runs the same aggregation as SQL GROUP BY queries inside the database.
+# Both produce the same statistics (numeric results agree to floating-point rounding).
+AGGREGATION_ENGINE = "groupby"
+
+# Trend Statistics
+# Each team's statistics over its last N matches and over blocks of match numbers (e.g. matches 1-20, 21-40),
+# next to the statistics over all matches. Built with streaming accumulators that update in constant time
+# per match, so no view re-scans the team's history. The accumulators are saved, and incremental runs add only
+# the new matches of each changed team to them. Can be enabled for a single run with `--trends`.
+TREND_STATISTICS = False
+TREND_RECENT_MATCHES = 5  # Size of the last-N-matches window (0 = none)
+TREND_EVENT_WINDOW_MATCHES = 20  # Match numbers per event window (0 = none)
+TEAM_TREND_STATE_PATH = "data/processed/team_trend_state.json"  # Saved accumulators for incremental runs
+TREND_STATE_VERSION = 1  # Bump when the saved accumulator layout changes so old states are ignored
+
+# Alliance Contributions
+# Each team's estimated contribution to its alliance's total of every numeric field (OPR), to its opponents'
+# total (DPR) and the difference (CCWM), fitted by least squares over every fully scouted match. They are added
+# to each team's statistics as `<field>_opr`, `<field>_dpr` and `<field>_ccwm`, so script 05's CUSTOM_METRICS
+# can rank teams by them. Incremental runs update the saved fit with only the changed teams' matches.
+# Matches are told apart by event when the cleaned data has `metadata.event` (raw files from several events).
+# Can be enabled for a single run with `--contributions`.
+ALLIANCE_CONTRIBUTIONS = False
+ALLIANCE_CONTRIBUTION_STATE_PATH = "data/processed/alliance_contribution_state.npz"  # Saved fit for incremental runs
 
 # ===========================
 # HELPER FUNCTIONS SECTION
 # ===========================
 
-def convert_to_serializable(obj):
+def calculate_team_statistics(df):
     """
-    Converts all non-serializable types (like NumPy types) to Python native types.
+    Calculates the statistics of one team from a DataFrame of its matches.
 
-    :param obj: Object to convert.
-    :return: Serializable object.
+    :param df: DataFrame with one row per match and flattened columns.
+    :return: A dictionary of team statistics.
     """
-    if isinstance(obj, (pd.Series, pd.DataFrame)):
-        return obj.to_dict()
-    if isinstance(obj, (np.int64, np.float64)):
-        return obj.item()
-    if isinstance(obj, (pd.Timestamp, pd.Timedelta)):
-        return str(obj)
-    if isinstance(obj, (int, float, str, bool, list, dict)):
-        return obj
-    if hasattr(obj, "__iter__") and not isinstance(obj, (str, bytes)):
-        return [convert_to_serializable(item) for item in obj]
-    return obj
+    import pandas as pd
+
+    # Initialize team_performance dictionary for this team
+    team_performance = {}
+
+    # Number of matches played
+    team_performance["number_of_matches"] = len(df)
+
+    # Process data based on detected types
+    for column in df.columns:
+        if pd.api.types.is_numeric_dtype(df[column]):
+            team_performance[f"{column}_average"] = float(df[column].mean())
+            team_performance[f"{column}_min"] = float(df[column].min())
+            team_performance[f"{column}_max"] = float(df[column].max())
+            team_performance[f"{column}_std_dev"] = float(df[column].std())
+        elif pd.api.types.is_categorical_dtype(df[column]) or pd.api.types.is_object_dtype(df[column]):
+            team_performance[f"{column}_value_counts"] = df[column].value_counts().to_dict()
+        elif pd.api.types.is_bool_dtype(df[column]):
+            team_performance[f"{column}_percent_true"] = float(df[column].mean() * 100)
+
+    return team_performance
 
 
 def calculate_team_performance_data(team_data):
@@ -44,71 +140,602 @@ def calculate_team_performance_data(team_data):
     :param team_data: Dictionary containing match data for each team.
     :return: A dictionary with aggregated team statistics.
     """
+    import pandas as pd
+
     all_team_performance_data = {}
 
     for team, data in team_data.items():
         matches = data["matches"]
-        df = pd.DataFrame(matches)
-
-        # Initialize team_performance dictionary for this team
-        team_performance = {}
-
-        # Number of matches played
-        team_performance["number_of_matches"] = len(df)
-
-        # Process data based on detected types
-        for column in df.columns:
-            if pd.api.types.is_numeric_dtype(df[column]):
-                team_performance[f"{column}_average"] = float(df[column].mean())
-                team_performance[f"{column}_min"] = float(df[column].min())
-                team_performance[f"{column}_max"] = float(df[column].max())
-                team_performance[f"{column}_std_dev"] = float(df[column].std())
-            elif pd.api.types.is_categorical_dtype(df[column]) or pd.api.types.is_object_dtype(df[column]):
-                team_performance[f"{column}_value_counts"] = df[column].value_counts().to_dict()
-            elif pd.api.types.is_bool_dtype(df[column]):
-                team_performance[f"{column}_percent_true"] = float(df[column].mean() * 100)
+        # Flatten nested fields (e.g. `metadata`) into `metadata.<key>` columns
+        df = pd.json_normalize(matches)
 
         # Add processed statistics for the team
+        all_team_performance_data[team] = calculate_team_statistics(df)
+
+    return all_team_performance_data
+
+
+def calculate_team_performance_data_from_frame(matches_df, team_column, teams=None):
+    """
+    Calculates team performance data from one flat DataFrame of all matches (Parquet input).
+
+    :param matches_df: DataFrame with one row per match, grouped by team (in `pd.json_normalize` column order).
+    :param team_column: Name of the team number column.
+    :param teams: Optional set of team keys (as strings) to calculate; all teams if None.
+    :return: A dictionary with aggregated team statistics, keyed by team as a string.
+    """
+    import numpy as np
+
+    all_team_performance_data = {}
+    for team, team_df in matches_df.groupby(team_column, sort=False):
+        team_key = str(team)
+        if teams is not None and team_key not in teams:
+            continue
+        # Match the per-team JSON path: fields a team never reported have no column,
+        # columns widened by other teams' missing values get their natural type back,
+        # and columns are ordered by the first match that reported them
+        team_df = team_df.dropna(axis=1, how="all").infer_objects()
+        first_reported = team_df.notna().to_numpy().argmax(axis=0)
+        team_df = team_df.iloc[:, np.lexsort((np.arange(len(first_reported)), first_reported))]
+        all_team_performance_data[team_key] = calculate_team_statistics(team_df)
+
+    return all_team_performance_data
+
+
+def team_data_to_frame(team_data):
+    """
+    Flattens team-based match data into one DataFrame of all matches plus the team key of each row.
+
+    :param team_data: Dictionary containing match data for each team.
+    :return: Tuple of (DataFrame with one row per match, Series of team keys aligned with the rows).
+    """
+    import numpy as np
+    import pandas as pd
+
+    all_matches = [match for data in team_data.values() for match in data["matches"]]
+    team_keys = np.repeat(np.array(list(team_data), dtype=object), [len(data["matches"]) for data in team_data.values()])
+    return pd.json_normalize(all_matches), pd.Series(team_keys, dtype=object)
+
+
+def calculate_team_performance_data_groupby(matches_df, team_keys, teams=None):
+    """
+    Calculates team performance data for every team in one vectorized pass.
+
+    Produces the same keys, in the same order, as running `calculate_team_statistics` on each team's
+    matches: numeric columns get average/min/max/std_dev, other columns get value counts, columns a
+    team never reported are skipped, and true/false columns with missing values for a team are
+    counted like the per-team path does.
+
+    :param matches_df: DataFrame with one row per match and flattened columns (in `pd.json_normalize` order).
+    :param team_keys: Series of team keys (strings) aligned with the rows of `matches_df`.
+    :param teams: Optional set of team keys to calculate; all teams if None.
+    :return: A dictionary with aggregated team statistics, keyed by team.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if teams is not None:
+        selected = team_keys.isin(teams).to_numpy()
+        matches_df, team_keys = matches_df[selected], team_keys[selected]
+    matches_df = matches_df.reset_index(drop=True)
+    team_keys = pd.Series(team_keys.to_numpy(), dtype=object)
+    if matches_df.empty:
+        return {}
+
+    columns = list(matches_df.columns)
+    reported = matches_df.notna()
+
+    # Classify columns the way the per-team path would see them
+    numeric_columns, bool_object_columns, categorical_columns = [], [], []
+    for column in columns:
+        values = matches_df[column]
+        if pd.api.types.is_numeric_dtype(values):
+            numeric_columns.append(column)
+        elif values.dropna().map(type).eq(bool).all():
+            # true/false with missing values elsewhere: numeric for complete teams, counted otherwise
+            bool_object_columns.append(column)
+            categorical_columns.append(column)
+        else:
+            categorical_columns.append(column)
+
+    grouped_reported = reported.groupby(team_keys, sort=False)
+    team_sizes = grouped_reported.size()
+    reported_counts = grouped_reported.sum()
+    # Row position of each team's first match that reported a column (orders the output keys)
+    positions = np.where(reported.to_numpy(), np.arange(len(matches_df))[:, None], len(matches_df))
+    first_reported = pd.DataFrame(positions, columns=columns).groupby(team_keys, sort=False).min()
+
+    # One groupby pass for all numeric statistics
+    stat_columns = numeric_columns + bool_object_columns
+    numeric_stats = None
+    if stat_columns:
+        numeric_stats = (
+            matches_df[stat_columns].astype("float64")
+            .groupby(team_keys, sort=False)
+            .agg(["mean", "min", "max", "std"])
+        )
+
+    # One grouped count for all categorical columns (long format: team, column, value)
+    value_counts = {}
+    if categorical_columns:
+        long_frames = []
+        for column in categorical_columns:
+            column_reported = reported[column].to_numpy()
+            long_frames.append(pd.DataFrame({
+                "team": team_keys[column_reported].to_numpy(),
+                "column": column,
+                "value": matches_df[column][column_reported].to_numpy(),
+            }))
+        long_df = pd.concat(long_frames, ignore_index=True)
+        counts = long_df.groupby(["team", "column", "value"], sort=False).size().reset_index(name="size")
+        # A stable sort makes each (team, column) block contiguous, with values in first-appearance order
+        counts = counts.sort_values(["team", "column"], kind="stable")
+        count_teams, count_columns = counts["team"].to_numpy(), counts["column"].to_numpy()
+        count_values, count_sizes = counts["value"].to_numpy(), counts["size"].to_numpy()
+        boundaries = np.flatnonzero(
+            (count_teams[1:] != count_teams[:-1]) | (count_columns[1:] != count_columns[:-1])
+        ) + 1
+        for start, end in zip(np.concatenate(([0], boundaries)), np.concatenate((boundaries, [len(counts)]))):
+            sizes = count_sizes[start:end]
+            # Same descending sort as `Series.value_counts`, so tied values come out in the same order
+            order = np.arange(len(sizes))[::-1][sizes[::-1].argsort(kind="quicksort")][::-1]
+            value_counts[(count_teams[start], count_columns[start])] = {
+                count_values[start + index]: int(sizes[index]) for index in order
+            }
+
+    # Assemble the per-team dictionaries from plain arrays (no per-team DataFrames)
+    team_order = list(pd.unique(team_keys))
+    team_sizes = team_sizes.reindex(team_order).to_numpy()
+    reported_counts = reported_counts.reindex(team_order).to_numpy()
+    first_reported = first_reported.reindex(team_order).to_numpy()
+    if numeric_stats is not None:
+        numeric_stats = numeric_stats.reindex(team_order).to_numpy()
+        stat_offsets = {column: index * 4 for index, column in enumerate(stat_columns)}
+    categorical_set, bool_object_set = set(categorical_columns), set(bool_object_columns)
+    column_positions = np.arange(len(columns))
+
+    all_team_performance_data = {}
+    for team_index, team in enumerate(team_order):
+        team_size = int(team_sizes[team_index])
+        team_performance = {"number_of_matches": team_size}
+        for column_index in np.lexsort((column_positions, first_reported[team_index])):
+            column = columns[column_index]
+            count = reported_counts[team_index, column_index]
+            if count == 0:
+                continue  # The per-team path has no column for fields the team never reported
+            if column in categorical_set and (column not in bool_object_set or count < team_size):
+                team_performance[f"{column}_value_counts"] = value_counts[(team, column)]
+            else:
+                mean, minimum, maximum, std = numeric_stats[team_index, stat_offsets[column]:stat_offsets[column] + 4]
+                team_performance[f"{column}_average"] = float(mean)
+                team_performance[f"{column}_min"] = float(minimum)
+                team_performance[f"{column}_max"] = float(maximum)
+                team_performance[f"{column}_std_dev"] = float(std)
         all_team_performance_data[team] = team_performance
 
     return all_team_performance_data
 
+
+def trend_match_digests(matches, prefix_length):
+    """
+    Hashes a team's matches in the order they are added, so a later run can tell whether the matches
+    its saved accumulator holds are unchanged. Missing values are left out, so nested and flat matches agree.
+
+    :param matches: List of matches (nested or flat).
+    :param prefix_length: Number of leading matches whose digest is also returned.
+    :return: Tuple of (digest of the first `prefix_length` matches, or None if there are fewer; digest of all).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    prefix_digest = digest.hexdigest() if prefix_length == 0 else None
+    for count, match in enumerate(matches, start=1):
+        # NaN is the only value not equal to itself
+        reported = {key: value for key, value in flatten_match(match).items() if value is not None and value == value}
+        digest.update(json.dumps(reported, default=str).encode("utf-8"))
+        if count == prefix_length:
+            prefix_digest = digest.hexdigest()
+    return prefix_digest, digest.hexdigest()
+
+
+def calculate_team_trend_data(team_matches, team_states=None):
+    """
+    Calculates each team's trend statistics by streaming its matches, in match number order,
+    through a `TeamTrendAccumulator`.
+
+    With saved accumulators, a team whose earlier matches are unchanged only adds its new matches to its
+    saved accumulator. A team whose earlier matches changed or were removed, or that got a match with a lower
+    match number than the ones already added, is rebuilt from all its matches.
+
+    :param team_matches: Iterable of (team key, list of matches); matches may be nested or flat.
+    :param team_states: Optional dictionary of team key -> saved accumulator (see `load_team_trend_state`),
+                        updated in place with the accumulators of the teams calculated here.
+    :return: Dictionary of team key -> {view name -> team statistics}.
+    """
+    all_team_trend_data = {}
+    added_matches, rebuilt_teams = 0, 0
+    for team, matches in team_matches:
+        # Missing match numbers sort first; the sort is stable, so ties keep their file order
+        ordered = sorted(matches, key=lambda match: flatten_match(match).get(MATCH_NUMBER_KEY) or 0)
+        trends, new_matches = None, ordered
+        if team_states is not None:
+            saved = team_states.get(team)
+            prefix_digest, digest = trend_match_digests(ordered, saved["matches"] if saved else 0)
+            if saved and prefix_digest == saved["digest"]:
+                trends = TeamTrendAccumulator.from_state(saved["state"])
+                new_matches = ordered[saved["matches"]:]
+        if trends is None:
+            trends = TeamTrendAccumulator(TREND_RECENT_MATCHES, TREND_EVENT_WINDOW_MATCHES)
+            rebuilt_teams += 1
+        for match in new_matches:
+            trends.add_match(match)
+        added_matches += len(new_matches)
+        all_team_trend_data[team] = trends.statistics()
+        if team_states is not None:
+            team_states[team] = {"matches": len(ordered), "digest": digest, "state": trends.state()}
+    if team_states is not None:
+        print(f"[INFO] Trend accumulators: {added_matches} matches added, {rebuilt_teams} teams rebuilt from all their matches.")
+    set_counter("trend_matches_added", added_matches)
+    set_counter("trend_teams_rebuilt", rebuilt_teams)
+    return all_team_trend_data
+
+
+def load_team_trend_state():
+    """
+    Loads the trend accumulators saved by the run the existing outputs come from.
+
+    :return: Dictionary of team key -> {"matches": count, "digest": digest of those matches, "state": accumulator},
+             empty if there is no usable saved state (other trend settings, or saved by another run).
+    """
+    try:
+        with open(TEAM_TREND_STATE_PATH, "r") as infile:
+            saved = json.load(infile)
+    except (OSError, ValueError):
+        return {}
+    if (not isinstance(saved, dict) or saved.get("version") != TREND_STATE_VERSION
+            or saved.get("settings") != [TREND_RECENT_MATCHES, TREND_EVENT_WINDOW_MATCHES]
+            or saved.get("change_version") != built_stage_version("04")):
+        return {}
+    return saved["teams"]
+
+
+def save_team_trend_state(team_states, change_version):
+    """
+    Saves the trend accumulators atomically (write to a temporary file, then rename). If a match value
+    can't be saved as JSON, the saved state is removed instead, and the next incremental run rebuilds the trends.
+
+    :param team_states: Dictionary of team key -> saved accumulator.
+    :param change_version: Change version the accumulators reflect.
+    """
+    saved = {
+        "version": TREND_STATE_VERSION,
+        "settings": [TREND_RECENT_MATCHES, TREND_EVENT_WINDOW_MATCHES],
+        "change_version": change_version,
+        "teams": team_states,
+    }
+    os.makedirs(os.path.dirname(TEAM_TREND_STATE_PATH) or ".", exist_ok=True)
+    try:
+        with open(TEAM_TREND_STATE_PATH + ".tmp", "w") as outfile:
+            json.dump(saved, outfile)
+    except (TypeError, ValueError) as e:
+        print(f"[INFO] Team trend state not saved ({e}); the next incremental run rebuilds the trends.")
+        for file_path in (TEAM_TREND_STATE_PATH + ".tmp", TEAM_TREND_STATE_PATH):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        return
+    os.replace(TEAM_TREND_STATE_PATH + ".tmp", TEAM_TREND_STATE_PATH)
+    record_artifact(TEAM_TREND_STATE_PATH)
+
+
+def calculate_alliance_contributions(matches_frame_for, changed_teams, change_version):
+    """
+    Fits alliance contributions, updating the saved fit with only the changed teams' matches when it
+    reflects the data script 04 was last built from.
+
+    :param matches_frame_for: Function returning (matches DataFrame, team keys) for a set of teams (None = all).
+    :param changed_teams: Teams whose matches changed since the last run, or None to fit from scratch.
+    :param change_version: Change version the fit will reflect.
+    :return: Dictionary of team key -> contribution statistics.
+    """
+    model = None
+    if changed_teams is not None:
+        model = AllianceContributions.load(ALLIANCE_CONTRIBUTION_STATE_PATH)
+        if model is not None and model.change_version != built_stage_version("04"):
+            model = None  # Saved by a run that is not the one the existing outputs come from
+
+    if model is not None and changed_teams:
+        matches_df, team_keys = matches_frame_for(changed_teams)
+        if set(contribution_columns(matches_df)) <= set(model.metrics):
+            added, removed = model.update(matches_df, team_keys, changed_teams)
+            print(f"[INFO] Updated alliance contributions with the matches of {len(changed_teams)} teams "
+                  f"({added} alliance rows added, {removed} removed).")
+        else:
+            model = None  # New fields: fit from scratch
+    elif model is not None:
+        print("[INFO] Reusing alliance contributions (no match changed).")
+
+    if model is None:
+        matches_df, team_keys = matches_frame_for()
+        model = AllianceContributions(contribution_columns(matches_df))
+        print(f"[INFO] Fitting alliance contributions (OPR/DPR) for: {', '.join(model.metrics) or 'no numeric fields'}")
+        model.update(matches_df, team_keys)
+
+    contributions = model.solve()
+    print(f"[INFO] Fitted {len(model.alliances)} alliances of fully scouted matches ({len(contributions)} teams).")
+    set_counter("alliances_fitted", len(model.alliances))
+    complete_matches = model.complete_matches() if not model.alliances else 0
+    if complete_matches:
+        print(f"[WARNING] {complete_matches} matches have every position scouted, but none of their alliances could be "
+              "fitted. Each position needs exactly one team, no team may appear twice in an alliance, and every "
+              "numeric field must be reported.")
+
+    model.change_version = change_version
+    model.save(ALLIANCE_CONTRIBUTION_STATE_PATH)
+    record_artifact(ALLIANCE_CONTRIBUTION_STATE_PATH)
+    return contributions
+
+
+def load_previous_team_performance_data(file_path):
+    """
+    Loads the team performance data written by a previous run, if any.
+
+    :param file_path: Path to the team performance JSON file.
+    :return: Dictionary of team statistics, or None if the file is missing or unreadable.
+    """
+    try:
+        with open(file_path, 'r') as infile:
+            previous_data = json.load(infile)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return previous_data if isinstance(previous_data, dict) else None
+
 # ===========================
 # MAIN SCRIPT SECTION
 # ===========================
 
-print(seperation_bar)
-print("Script 04: Data Analysis & Statistics Aggregation\n")
+def main(argv=None, team_data=None):
+    """
+    Calculates team statistics. Called when the script is run directly or by the pipeline runner.
+
+    :param argv: Command-line arguments (defaults to `sys.argv`).
+    :param team_data: Optional team-based match data handed over in memory by script 03.
+    :return: The serializable team performance data.
+    :raises StageFailed: If the statistics could not be calculated.
+    """
+    print(seperation_bar)
+    print("Script 04: Data Analysis & Statistics Aggregation\n")
+
+    parser = argparse.ArgumentParser(description="Script 04: Data Analysis & Statistics Aggregation")
+    parser.add_argument("--incremental", action="store_true", default=INCREMENTAL_MODE,
+                        help="Only recalculate teams whose matches changed since the last run.")
+    parser.add_argument("--trends", action="store_true", default=TREND_STATISTICS,
+                        help=f"Also write last-N-match and per-event-window statistics to {TEAM_TREND_DATA_PATH}.")
+    parser.add_argument("--contributions", action="store_true", default=ALLIANCE_CONTRIBUTIONS,
+                        help="Also fit each team's contribution to alliance totals (OPR, DPR and CCWM).")
+    add_instrumentation_arguments(parser)
+    args = parser.parse_args(argv)
+    team_performance_data_serializable = None
+    status = "failed"
+    instrumentation = StageInstrumentation("04")
+    instrumentation.start(profile=args.profile, trace_memory=args.trace_memory)
+    store = None
+
+    try:
+        # Guidance for FRC teams:
+        # - Run script 03 first so the team index (or the team-based file with the "copy" layout) is up to date.
+        # - Modify the file paths above if your structure is different.
+
+        check_format(INTERMEDIATE_FORMAT)
+        check_output_style(JSON_OUTPUT_STYLE)
+        use_parquet = INTERMEDIATE_FORMAT == PARQUET_FORMAT
+        use_sqlite = INTERMEDIATE_FORMAT == SQLITE_FORMAT
+
+        if AGGREGATION_ENGINE not in ("groupby", "per_team"):
+            raise ValueError(f"Unknown aggregation engine '{AGGREGATION_ENGINE}'. Use 'groupby' or 'per_team'.")
+        if TEAM_DATA_LAYOUT not in ("index", "copy"):
+            raise ValueError(f"Unknown team data layout '{TEAM_DATA_LAYOUT}'. Use 'index' or 'copy'.")
+        use_index = TEAM_DATA_LAYOUT == "index"
+
+        if team_data is None and use_parquet:
+            if use_index:
+                cleaned_parquet_path = parquet_path_for(CLEANED_MATCH_DATA_PATH)
+                team_index = load_current_team_index(cleaned_parquet_path)
+                print(f"[INFO] Loading match data from: {cleaned_parquet_path} (team index: {len(team_index.teams)} teams)")
+                with step("load"):
+                    matches_df = team_index.take(read_table(cleaned_parquet_path)).to_pandas()
+            else:
+                team_based_parquet_path = parquet_path_for(TEAM_BASED_MATCH_DATA_PATH)
+                print(f"[INFO] Loading team-based match data from: {team_based_parquet_path}")
+                with step("load"):
+                    matches_df = read_table(team_based_parquet_path).to_pandas()
+            with step("load"):
+                matches_df = matches_df[json_normalize_column_order(matches_df.columns)]
+                team_keys = matches_df[TEAM_COLUMN].astype(str).astype(object)
+                team_order = list(dict.fromkeys(team_keys))
+
+            def calculate_for_teams(teams=None):
+                if AGGREGATION_ENGINE == "groupby":
+                    return calculate_team_performance_data_groupby(matches_df, team_keys, teams)
+                return calculate_team_performance_data_from_frame(matches_df, TEAM_COLUMN, teams)
+
+            def team_matches_for(teams=None):
+                for team, team_df in matches_df.groupby(team_keys, sort=False):
+                    if teams is None or team in teams:
+                        yield team, team_df.to_dict("records")
+
+            def matches_frame_for(teams=None):
+                if teams is None:
+                    return matches_df, team_keys
+                selected = team_keys.isin(teams).to_numpy()
+                return matches_df[selected], team_keys[selected]
+        elif team_data is None and use_sqlite:
+            # Grouping and aggregation run inside the database; matches are only read for per-team work
+            cleaned_sqlite_path = sqlite_path_for(CLEANED_MATCH_DATA_PATH)
+            store = MatchStore(cleaned_sqlite_path, TEAM_COLUMN)
+            store.load_team_summary()
+            print(f"[INFO] Reading match data from: {cleaned_sqlite_path} ({len(store.teams)} teams)")
+            team_order = store.teams
+
+            def calculate_for_teams(teams=None):
+                if AGGREGATION_ENGINE == "groupby":
+                    return store.team_statistics(teams)
+                all_team_performance_data = {}
+                for team, matches in store.iter_team_matches(teams):
+                    all_team_performance_data.update(calculate_team_performance_data({team: {"matches": matches}}))
+                return all_team_performance_data
+
+            def team_matches_for(teams=None):
+                return store.iter_team_matches(teams)
+
+            def matches_frame_for(teams=None):
+                return team_data_to_frame(store.team_data(teams))
+        elif team_data is None and use_index:
+            # Matches are read from disk team by team while aggregating, so loading is part of that step
+            team_index = load_current_team_index(CLEANED_MATCH_DATA_PATH)
+            print(f"[INFO] Reading match data from: {CLEANED_MATCH_DATA_PATH} (team index: {len(team_index.teams)} teams)")
+            team_order = team_index.teams
+
+            def calculate_for_teams(teams=None):
+                # Only the selected teams' matches are read from disk
+                if AGGREGATION_ENGINE == "groupby":
+                    return calculate_team_performance_data_groupby(*team_data_to_frame(team_index.team_data(teams)))
+                # One team's matches in memory at a time
+                all_team_performance_data = {}
+                for team, matches in team_index.iter_team_matches(teams):
+                    all_team_performance_data.update(calculate_team_performance_data({team: {"matches": matches}}))
+                return all_team_performance_data
+
+            def team_matches_for(teams=None):
+                return team_index.iter_team_matches(teams)
+
+            def matches_frame_for(teams=None):
+                return team_data_to_frame(team_index.team_data(teams))
+        else:
+            if team_data is not None:
+                print("[INFO] Using team-based match data handed over in memory.")
+            else:
+                print(f"[INFO] Loading team-based match data from: {TEAM_BASED_MATCH_DATA_PATH}")
+                with step("load"), open(TEAM_BASED_MATCH_DATA_PATH, 'r') as infile:
+                    team_data = json.load(infile)
+
+            if not isinstance(team_data, dict):
+                raise ValueError("[ERROR] Team-based match data must be a dictionary.")
+            team_order = list(team_data)
+            if AGGREGATION_ENGINE == "groupby":
+                with step("load"):
+                    matches_df, team_keys = team_data_to_frame(team_data)
+
+            def calculate_for_teams(teams=None):
+                if AGGREGATION_ENGINE == "groupby":
+                    return calculate_team_performance_data_groupby(matches_df, team_keys, teams)
+                selected_data = team_data if teams is None else {team: team_data[team] for team in teams}
+                return calculate_team_performance_data(selected_data)
+
+            def team_matches_for(teams=None):
+                selected_teams = team_data if teams is None else [team for team in team_data if team in teams]
+                return ((team, team_data[team]["matches"]) for team in selected_teams)
+
+            def matches_frame_for(teams=None):
+                selected_teams = team_data if teams is None else [team for team in team_data if team in teams]
+                return team_data_to_frame({team: team_data[team] for team in selected_teams})
+
+        touched_teams, change_version = teams_changed_since("04") if args.incremental else (None, current_change_version())
+        previous_data = load_previous_team_performance_data(TEAM_PERFORMANCE_DATA_PATH) if touched_teams is not None else None
+
+        if previous_data is None:
+            print(f"[INFO] Calculating team performance data ({AGGREGATION_ENGINE} engine).")
+            with step("aggregate"):
+                team_performance_data_serializable = calculate_for_teams()
+            set_counter("teams_calculated", len(team_performance_data_serializable))
+        else:
+            # Recalculate only teams that changed (or are new); keep the previous results for the rest
+            teams_to_update = {team for team in team_order if team in touched_teams or team not in previous_data}
+            print(f"[INFO] Recalculating team performance data for {len(teams_to_update)} of {len(team_order)} teams.")
+            with step("aggregate"):
+                updated_data = calculate_for_teams(teams_to_update)
+            set_counter("teams_calculated", len(updated_data))
+            team_performance_data_serializable = {
+                team: updated_data[team] if team in updated_data else previous_data[team] for team in team_order
+            }
+
+        if args.contributions:
+            # Every team's contributions move when any match changes, so all of them are replaced
+            changed_teams = None if previous_data is None else touched_teams | teams_to_update
+            with step("contributions"):
+                contributions = calculate_alliance_contributions(matches_frame_for, changed_teams, change_version)
+            merge_contributions(team_performance_data_serializable, contributions)
+        elif previous_data is not None:
+            merge_contributions(team_performance_data_serializable, {})  # Drop contributions kept from an earlier run
 
-try:
-    # Guidance for FRC teams:
-    # - Ensure your team-based match data is in `data/processed/team_based_match_data.json`.
-    # - Modify the file paths above if your structure is different.
+        # Save team performance data
+        print(f"[INFO] Saving team performance data to: {TEAM_PERFORMANCE_DATA_PATH}")
+        os.makedirs(os.path.dirname(TEAM_PERFORMANCE_DATA_PATH), exist_ok=True)
+        with step("serialize"):
+            write_json(team_performance_data_serializable, TEAM_PERFORMANCE_DATA_PATH, JSON_OUTPUT_STYLE)
+        record_artifact(TEAM_PERFORMANCE_DATA_PATH)
+        set_counter("teams", len(team_performance_data_serializable))
 
-    print(f"[INFO] Loading team-based match data from: {TEAM_BASED_MATCH_DATA_PATH}")
-    with open(TEAM_BASED_MATCH_DATA_PATH, 'r') as infile:
-        team_data = json.load(infile)
+        if args.trends:
+            previous_trend_data = (
+                load_previous_team_performance_data(TEAM_TREND_DATA_PATH) if previous_data is not None else None
+            )
+            if previous_trend_data is None:
+                print(f"[INFO] Calculating team trend data (last {TREND_RECENT_MATCHES} matches, "
+                      f"{TREND_EVENT_WINDOW_MATCHES}-match event windows).")
+                team_states = {}
+                with step("trends"):
+                    team_trend_data = calculate_team_trend_data(team_matches_for(), team_states)
+            else:
+                # The saved accumulators take only the new matches of each changed team
+                team_states = load_team_trend_state()
+                trend_teams = {team for team in team_order if team in teams_to_update or team not in previous_trend_data}
+                print(f"[INFO] Recalculating team trend data for {len(trend_teams)} of {len(team_order)} teams.")
+                with step("trends"):
+                    updated_trend_data = calculate_team_trend_data(team_matches_for(trend_teams), team_states)
+                team_trend_data = {
+                    team: updated_trend_data[team] if team in updated_trend_data else previous_trend_data[team]
+                    for team in team_order
+                }
+                team_states = {team: team_states[team] for team in team_order if team in team_states}
+            save_team_trend_state(team_states, change_version)
+            print(f"[INFO] Saving team trend data to: {TEAM_TREND_DATA_PATH}")
+            with step("serialize"):
+                write_json(team_trend_data, TEAM_TREND_DATA_PATH, JSON_OUTPUT_STYLE)
+            record_artifact(TEAM_TREND_DATA_PATH)
 
-    if not isinstance(team_data, dict):
-        raise ValueError("[ERROR] Team-based match data must be a dictionary.")
+        if use_parquet:
+            team_performance_parquet_path = parquet_path_for(TEAM_PERFORMANCE_DATA_PATH)
+            print(f"[INFO] Saving team performance data to: {team_performance_parquet_path}")
+            with step("serialize"):
+                write_team_performance_parquet(team_performance_data_serializable, team_performance_parquet_path)
+            record_artifact(team_performance_parquet_path)
 
-    print("[INFO] Calculating team performance data.")
-    team_performance_data = calculate_team_performance_data(team_data)
+        # Remember which change version the output reflects
+        if change_version is not None:
+            save_stage_version("04", change_version)
 
-    # Convert data to serializable format
-    team_performance_data_serializable = convert_to_serializable(team_performance_data)
+        print("\n[INFO] Script 04: Completed.")
+        status = "completed"
 
-    # Save team performance data
-    print(f"[INFO] Saving team performance data to: {TEAM_PERFORMANCE_DATA_PATH}")
-    os.makedirs(os.path.dirname(TEAM_PERFORMANCE_DATA_PATH), exist_ok=True)
-    with open(TEAM_PERFORMANCE_DATA_PATH, 'w') as outfile:
-        json.dump(team_performance_data_serializable, outfile, indent=4)
+    except Exception as e:
+        print(f"\n[ERROR] An unexpected error occurred: {e}")
+        print(traceback.format_exc())
+        print("\nScript 04: Failed.")
+        team_performance_data_serializable = None
+    finally:
+        # Watch mode and the pipeline runner call `main` repeatedly, so a failed run must not leave the
+        # SQLite connection (and its WAL reader) open
+        if store is not None:
+            store.close()
 
-    print("\n[INFO] Script 04: Completed.")
+    instrumentation.finish(status)
+    print(seperation_bar)
+    if status != "completed":
+        raise StageFailed("04")
+    return team_performance_data_serializable
 
-except Exception as e:
-    print(f"\n[ERROR] An unexpected error occurred: {e}")
-    print(traceback.format_exc())
-    print("\nScript 04: Failed.")
 
-print(seperation_bar)
\ No newline at end of file
+# The main section is guarded so the aggregation engines can be imported (e.g. by benchmarks)
+if __name__ == "__main__":
+    try:
+        main()
+    except StageFailed:
+        raise SystemExit(1)
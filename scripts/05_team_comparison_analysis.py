@@ -1,9 +1,30 @@
 from utility_functions.print_formats import seperation_bar
-import pandas as pd
 import os
+import time
+import argparse
 import traceback
-import matplotlib.pyplot as plt
-from scipy.stats import zscore
+from utility_functions.intermediate_formats import (
+    PARQUET_FORMAT,
+    check_format,
+    parquet_path_for,
+    read_team_performance_parquet,
+    team_performance_to_frame,
+)
+from utility_functions.cleaning_accumulator import default_worker_count
+from utility_functions.chart_rendering import CHART_MANIFEST_NAME, bar_chart_spec, render_charts, print_render_report
+from utility_functions.metric_registry import MetricRegistry, print_metric_profile
+from utility_functions.pick_list import PickListEngine, parse_weights, write_pick_list
+from utility_functions.instrumentation import (
+    StageFailed,
+    StageInstrumentation,
+    add_instrumentation_arguments,
+    record_artifact,
+    set_counter,
+    step,
+)
+
+# pandas, SciPy and Matplotlib are imported where they are first needed, so the script starts
+# quickly, exits quickly when its input is missing, and can list metrics without loading them.
 
 # ===========================
 # CONFIGURATION SECTION
@@ -14,8 +35,40 @@ TEAM_PERFORMANCE_DATA_PATH = "outputs/team_data/team_performance_data.json"  # I
 ADVANCED_TEAM_PERFORMANCE_DATA_PATH = "outputs/team_data/advanced_team_performance_data.json"  # Output: Advanced team performance data
 TEAM_COMPARISON_ANALYSIS_STATS_PATH = "outputs/statistics/team_comparison_analysis_stats.txt"  # Output: Team comparison stats
 VISUALIZATIONS_DIR = "outputs/visualizations"  # Output: Visualizations folder
+PICK_LIST_PATH = "outputs/statistics/pick_list.txt"  # Output: Weighted pick list
+
+# Intermediate Format (see script 02)
+# "parquet" loads `team_performance_data.parquet` (written by script 04) memory-mapped instead of parsing JSON.
+# "sqlite" reads the JSON team performance file: one row per team is small enough that SQL gains nothing.
+INTERMEDIATE_FORMAT = "json"
+
+# Chart Rendering
+# Charts are drawn off-screen with Matplotlib's object-oriented API. A chart whose input data is unchanged
+# since it was last rendered is reused instead of drawn again, as long as its PNG is still there (script 01's
+# full clear removes it; `--mode stale`, incremental runs and watch mode keep it).
+CHART_WORKERS = 0  # Worker processes for rendering (0 = one per CPU, 1 = render in this process)
+TOP_N_TEAMS = 10  # Teams shown per chart
+
+# Pick List
+# One composite score per team for alliance selection: a weighted sum of custom metrics and numeric statistics.
+# Every column is turned into z-scores across teams first, so weights are comparable, and metrics with
+# "ascending": True are flipped, so a positive weight always favours better teams. Leave empty for no pick list.
+# Can be set for a single run with `--weights var1_average:2,consistency:1`, and teams already picked are left
+# out with `--picked 254,1678`. To re-weight live during alliance selection, use the stats server's `/picklist`.
+PICK_LIST_WEIGHTS = {}  # e.g. {"var1_average": 2, "consistency": 1}
+PICK_LIST_SIZE = 24  # Teams listed
 
 # Custom Metrics Configuration
+# Each metric declares what it reads:
+# - "columns": input columns (a list of names, or a function that picks them from all column names).
+#   Leave it out to receive every column plus every metric calculated before it.
+# - "depends_on": other custom metrics it uses; they appear as columns named after the metric.
+# - "version" (optional): change it when results change for a reason the cache can't see, e.g. a file the
+#   calculation reads or a library upgrade.
+# Metrics are calculated after the metrics they depend on, and a result is reused from
+# `METRIC_CACHE_PATH` while the metric's inputs, calculation (including the values and helper functions
+# of this script it uses, like `zscore`) and version are unchanged.
+METRIC_CACHE_PATH = "data/processed/metric_cache.json"
 CUSTOM_METRICS = {
     "consistency": {
         "description": (
@@ -23,104 +76,224 @@ CUSTOM_METRICS = {
             "This uses the average of the z-scores of standard deviations across all metrics. "
             "Lower values indicate better consistency."
         ),
-        "calculation": lambda df: df[
-            [col for col in df.columns if col.endswith("_std_dev")]
-        ].apply(zscore).mean(axis=1),
+        "columns": lambda columns: [col for col in columns if col.endswith("_std_dev")],
+        "calculation": lambda df: df.apply(zscore).mean(axis=1),
         "ascending": True  # Lower values are better for consistency
     }
+    # Rank by alliance contributions (run script 04 with `--contributions` first), e.g.:
+    # "alliance_contribution": {
+    #     "description": "Average z-score of the team's contribution to its alliance's totals (OPR) across all fields.",
+    #     "columns": lambda columns: [col for col in columns if col.endswith("_opr")],
+    #     "calculation": lambda df: df.apply(zscore).mean(axis=1),
+    # },
     # Add more custom metrics here..
 }
 
 # ===========================
-# MAIN SCRIPT SECTION
+# HELPER FUNCTIONS SECTION
 # ===========================
 
-print(seperation_bar)
-print("Script 05: Team Comparison Analysis\n")
-
-try:
-    # Step 1: Verify input file exists
-    if not os.path.exists(TEAM_PERFORMANCE_DATA_PATH):
-        raise FileNotFoundError(f"Team performance data file not found: {TEAM_PERFORMANCE_DATA_PATH}")
-
-    # Step 2: Load team performance data
-    print(f"[INFO] Loading team performance data from: {TEAM_PERFORMANCE_DATA_PATH}")
-    with open(TEAM_PERFORMANCE_DATA_PATH, "r") as infile:
-        team_performance_data = pd.read_json(infile, orient="index")
-
-    # Ensure the DataFrame is not empty
-    if team_performance_data.empty:
-        raise ValueError(f"Team performance data is empty. Check the file: {TEAM_PERFORMANCE_DATA_PATH}")
-
-    # Step 3: Calculate custom metrics
-    print("[INFO] Calculating custom metrics.")
-    for metric_name, metric_details in CUSTOM_METRICS.items():
-        print(f"[INFO] Adding custom metric: {metric_name} - {metric_details['description']}")
-        try:
-            # NOTE: Ensure your custom calculation:
-            # - Takes the `team_performance_data` DataFrame as input.
-            # - Outputs a Pandas Series with team indices and calculated metric values.
-            team_performance_data[metric_name] = metric_details["calculation"](team_performance_data)
-        except Exception as e:
-            print(f"[ERROR] Failed to calculate metric '{metric_name}'. Reason: {e}")
-
-    # Step 4: Save advanced team performance data
-    print(f"[INFO] Saving advanced analysis to: {ADVANCED_TEAM_PERFORMANCE_DATA_PATH}")
-    os.makedirs(os.path.dirname(ADVANCED_TEAM_PERFORMANCE_DATA_PATH), exist_ok=True)
-    team_performance_data.to_json(ADVANCED_TEAM_PERFORMANCE_DATA_PATH, orient="index", indent=4)
-
-    # Step 5: Rank teams for each metric
-    print("[INFO] Ranking teams for metrics.")
-    rankings = {}
-    for metric_name, metric_details in CUSTOM_METRICS.items():
-        ascending = metric_details.get("ascending", False)
-        team_performance_data[f"{metric_name}_rank"] = team_performance_data[metric_name].rank(ascending=ascending)
-        rankings[metric_name] = team_performance_data.sort_values(by=metric_name, ascending=ascending)
-
-    # Step 6: Save rankings to text file
-    print(f"[INFO] Saving rankings to: {TEAM_COMPARISON_ANALYSIS_STATS_PATH}")
-    os.makedirs(os.path.dirname(TEAM_COMPARISON_ANALYSIS_STATS_PATH), exist_ok=True)
-    with open(TEAM_COMPARISON_ANALYSIS_STATS_PATH, 'w') as stats_file:
-        stats_file.write("Team Rankings by Custom Metrics\n")
-        stats_file.write("=" * 80 + "\n\n")
-        for metric_name, ranked_df in rankings.items():
-            stats_file.write(f"Rankings by {metric_name}:\n")
-            stats_file.write(
-                ranked_df[[metric_name, f"{metric_name}_rank"]].to_string(index=True) + "\n\n"
-            )
+def zscore(values):
+    """
+    Standard scores of a column (`scipy.stats.zscore`, imported on first use).
+
+    :param values: A pandas Series.
+    :return: The z-scores of the values.
+    """
+    from scipy.stats import zscore as scipy_zscore
 
-    # Step 7: Generate visualizations
-    print(f"[INFO] Generating visualizations in: {VISUALIZATIONS_DIR}")
-    os.makedirs(VISUALIZATIONS_DIR, exist_ok=True)
-    for metric_name, ranked_df in rankings.items():
-        top_n = 10  # Top 10 teams for visualization
-        ranked_df.head(top_n).plot(
-            y=metric_name,
-            kind="bar",
-            title=f"Top {top_n} Teams by {metric_name.replace('_', ' ').title()}",
-            legend=False
-        )
-        plt.ylabel(metric_name.replace("_", " ").title())
-        plt.xticks(ticks=range(top_n), labels=ranked_df.head(top_n).index, rotation=45, ha="right")
-        plt.tight_layout()
-        plt.savefig(os.path.join(VISUALIZATIONS_DIR, f"top_{top_n}_{metric_name}.png"))
-        plt.close()
-
-    print("\n[INFO] Script 05: Completed successfully.")
+    return scipy_zscore(values)
 
 # ===========================
-# ERROR HANDLING SECTION
+# MAIN SCRIPT SECTION
 # ===========================
 
-except FileNotFoundError as fnf_error:
-    print(f"[ERROR] File not found: {fnf_error}")
-except ValueError as value_error:
-    print(f"[ERROR] Data validation error: {value_error}")
-except PermissionError as perm_error:
-    print(f"[ERROR] Permission denied while accessing a file: {perm_error}")
-except Exception as e:
-    print(f"[ERROR] An unexpected error occurred: {e}")
-    print(traceback.format_exc())
-    print("\nScript 05: Failed.")
-
-print(seperation_bar)
\ No newline at end of file
+def main(argv=None, team_performance_data=None):
+    """
+    Compares teams by the custom metrics. Called when the script is run directly or by the pipeline runner.
+
+    :param argv: Command-line arguments (defaults to `sys.argv`).
+    :param team_performance_data: Optional team statistics dictionary handed over in memory by script 04.
+    :raises StageFailed: If the comparison failed.
+    """
+    print(seperation_bar)
+    print("Script 05: Team Comparison Analysis\n")
+
+    parser = argparse.ArgumentParser(description="Script 05: Team Comparison Analysis")
+    parser.add_argument("--list-metrics", action="store_true", help="List the custom metrics and exit.")
+    parser.add_argument("--chart-workers", type=int, default=CHART_WORKERS,
+                        help="Worker processes for chart rendering (0 = one per CPU, 1 = no process pool).")
+    parser.add_argument("--profile-metrics", action="store_true", help="Report the time spent on each custom metric.")
+    parser.add_argument("--weights", type=parse_weights, default=PICK_LIST_WEIGHTS,
+                        help="Pick-list weights as name:weight,name:weight (metrics or statistics).")
+    parser.add_argument("--picked", type=lambda text: [team.strip() for team in text.split(",") if team.strip()], default=[],
+                        help="Teams already picked, left out of the pick list (comma-separated).")
+    add_instrumentation_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.list_metrics:
+        registry = MetricRegistry.from_config(CUSTOM_METRICS)
+        for metric_name in registry.evaluation_order():
+            metric_details = CUSTOM_METRICS[metric_name]
+            order = "lower is better" if metric_details.get("ascending", False) else "higher is better"
+            depends_on = metric_details.get("depends_on")
+            uses = f" [uses: {', '.join(depends_on)}]" if depends_on else ""
+            print(f"[INFO] {metric_name} ({order}){uses}: {metric_details['description']}")
+        print(seperation_bar)
+        return
+
+    status = "failed"
+    instrumentation = StageInstrumentation("05")
+    instrumentation.start(profile=args.profile, trace_memory=args.trace_memory)
+    try:
+        # Step 1: Verify input file exists
+        check_format(INTERMEDIATE_FORMAT)
+        use_parquet = INTERMEDIATE_FORMAT == PARQUET_FORMAT
+        input_path = parquet_path_for(TEAM_PERFORMANCE_DATA_PATH) if use_parquet else TEAM_PERFORMANCE_DATA_PATH
+        if team_performance_data is None and not os.path.exists(input_path):
+            raise FileNotFoundError(f"Team performance data file not found: {input_path}")
+
+        # Step 2: Load team performance data
+        if team_performance_data is not None:
+            print("[INFO] Using team performance data handed over in memory.")
+            # Same DataFrame that reading the JSON file would produce
+            with step("load"):
+                team_performance_data = team_performance_to_frame(team_performance_data)
+        elif use_parquet:
+            print(f"[INFO] Loading team performance data from: {input_path}")
+            with step("load"):
+                team_performance_data = read_team_performance_parquet(input_path)
+        else:
+            print(f"[INFO] Loading team performance data from: {input_path}")
+            with step("load"):
+                import pandas as pd
+
+                with open(input_path, "r") as infile:
+                    team_performance_data = pd.read_json(infile, orient="index")
+
+        # Ensure the DataFrame is not empty
+        if team_performance_data.empty:
+            raise ValueError(f"Team performance data is empty. Check the file: {input_path}")
+
+        # Step 3: Calculate custom metrics
+        print("[INFO] Calculating custom metrics.")
+        registry = MetricRegistry.from_config(CUSTOM_METRICS)
+        for metric_name in registry.evaluation_order():
+            print(f"[INFO] Adding custom metric: {metric_name} - {CUSTOM_METRICS[metric_name]['description']}")
+        # NOTE: Ensure your custom calculation:
+        # - Takes a DataFrame of the metric's declared columns (and the metrics it depends on) as input.
+        # - Outputs a Pandas Series with team indices and calculated metric values.
+        with step("metrics"):
+            metric_results, metric_profile = registry.evaluate(
+                team_performance_data,
+                cache_path=METRIC_CACHE_PATH,
+                on_error=lambda name, e: print(f"[ERROR] Failed to calculate metric '{name}'. Reason: {e}"),
+            )
+        for metric_name, result in metric_results.items():
+            team_performance_data[metric_name] = result
+        record_artifact(METRIC_CACHE_PATH)
+        cached = sum(status == "cached" for _, status, _, _ in metric_profile)
+        print(f"[INFO] Custom metrics: {len(metric_results) - cached} calculated, {cached} reused from cache.")
+        set_counter("teams", len(team_performance_data))
+        set_counter("metrics", len(metric_results))
+        set_counter("metrics_cached", cached)
+        if args.profile_metrics:
+            print_metric_profile(metric_profile)
+
+        # Step 4: Save advanced team performance data
+        print(f"[INFO] Saving advanced analysis to: {ADVANCED_TEAM_PERFORMANCE_DATA_PATH}")
+        os.makedirs(os.path.dirname(ADVANCED_TEAM_PERFORMANCE_DATA_PATH), exist_ok=True)
+        with step("serialize"):
+            team_performance_data.to_json(ADVANCED_TEAM_PERFORMANCE_DATA_PATH, orient="index", indent=4)
+        record_artifact(ADVANCED_TEAM_PERFORMANCE_DATA_PATH)
+
+        # Step 5: Rank teams for each metric
+        print("[INFO] Ranking teams for metrics.")
+        rankings = {}
+        with step("rank"):
+            for metric_name in metric_results:
+                ascending = CUSTOM_METRICS[metric_name].get("ascending", False)
+                team_performance_data[f"{metric_name}_rank"] = team_performance_data[metric_name].rank(ascending=ascending)
+                rankings[metric_name] = team_performance_data.sort_values(by=metric_name, ascending=ascending)
+
+        # Step 6: Save rankings to text file
+        print(f"[INFO] Saving rankings to: {TEAM_COMPARISON_ANALYSIS_STATS_PATH}")
+        os.makedirs(os.path.dirname(TEAM_COMPARISON_ANALYSIS_STATS_PATH), exist_ok=True)
+        with step("serialize"), open(TEAM_COMPARISON_ANALYSIS_STATS_PATH, 'w') as stats_file:
+            stats_file.write("Team Rankings by Custom Metrics\n")
+            stats_file.write("=" * 80 + "\n\n")
+            for metric_name, ranked_df in rankings.items():
+                stats_file.write(f"Rankings by {metric_name}:\n")
+                stats_file.write(
+                    ranked_df[[metric_name, f"{metric_name}_rank"]].to_string(index=True) + "\n\n"
+                )
+        record_artifact(TEAM_COMPARISON_ANALYSIS_STATS_PATH)
+
+        # Step 7: Save the weighted pick list
+        if args.weights:
+            print(f"[INFO] Saving pick list to: {PICK_LIST_PATH}")
+            with step("pick_list"):
+                ascending_names = [name for name, details in CUSTOM_METRICS.items() if details.get("ascending", False)]
+                engine = PickListEngine.from_frame(team_performance_data, ascending_names=ascending_names)
+                engine.set_weights(args.weights)
+                engine.pick(*args.picked)
+                pick_list = engine.top(PICK_LIST_SIZE)
+            os.makedirs(os.path.dirname(PICK_LIST_PATH), exist_ok=True)
+            write_pick_list(pick_list, args.weights, args.picked, PICK_LIST_PATH)
+            record_artifact(PICK_LIST_PATH)
+            if pick_list:
+                print(f"[INFO] Best available team: {pick_list[0][0]} (score {pick_list[0][1]:.3f}).")
+
+        # Step 8: Generate visualizations
+        print(f"[INFO] Generating visualizations in: {VISUALIZATIONS_DIR}")
+        chart_specs = []
+        for metric_name, ranked_df in rankings.items():
+            top_teams = ranked_df.head(TOP_N_TEAMS)
+            chart_specs.append(bar_chart_spec(
+                file_name=f"top_{TOP_N_TEAMS}_{metric_name}.png",
+                title=f"Top {TOP_N_TEAMS} Teams by {metric_name.replace('_', ' ').title()}",
+                labels=top_teams.index,
+                values=top_teams[metric_name],
+                ylabel=metric_name.replace("_", " ").title(),
+            ))
+        chart_workers = args.chart_workers if args.chart_workers > 0 else default_worker_count()
+        render_start = time.perf_counter()
+        with step("render"):
+            render_report = render_charts(chart_specs, VISUALIZATIONS_DIR, chart_workers)
+        print_render_report(render_report, time.perf_counter() - render_start)
+        # Rendered and reused charts are both current; charts of metrics that were removed become stale
+        record_artifact(os.path.join(VISUALIZATIONS_DIR, CHART_MANIFEST_NAME))
+        for file_name, _, _ in render_report:
+            record_artifact(os.path.join(VISUALIZATIONS_DIR, file_name))
+        set_counter("charts", len(render_report))
+        set_counter("charts_rendered", sum(chart_status == "rendered" for _, chart_status, _ in render_report))
+
+        print("\n[INFO] Script 05: Completed successfully.")
+        status = "completed"
+
+    # ===========================
+    # ERROR HANDLING SECTION
+    # ===========================
+
+    except FileNotFoundError as fnf_error:
+        print(f"[ERROR] File not found: {fnf_error}")
+    except ValueError as value_error:
+        print(f"[ERROR] Data validation error: {value_error}")
+    except PermissionError as perm_error:
+        print(f"[ERROR] Permission denied while accessing a file: {perm_error}")
+    except Exception as e:
+        print(f"[ERROR] An unexpected error occurred: {e}")
+        print(traceback.format_exc())
+        print("\nScript 05: Failed.")
+
+    instrumentation.finish(status)
+    print(seperation_bar)
+    if status != "completed":
+        raise StageFailed("05")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except StageFailed:
+        raise SystemExit(1)
@@ -0,0 +1,438 @@
+import os
+
+# numpy, pandas and scipy are imported inside the functions that need them, so importing this
+# module (e.g. from script 04) stays fast.
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+MATCH_COLUMN = "metadata.matchNumber"  # Flattened column holding the match number
+POSITION_COLUMN = "metadata.robotPosition"  # Flattened column holding the robot position (e.g. "red_1")
+EVENT_COLUMN = "metadata.event"  # Flattened column holding the event (only when the raw files span several events)
+METADATA_PREFIX = "metadata."  # Fields under `metadata` are never fitted
+ALLIANCE_SIZE = 3  # Robots per alliance; only alliances with every position scouted are fitted
+
+# Small ridge (Tikhonov) term added to the normal equations. It keeps the fit solvable early in an event,
+# when some teams have only played together, and pulls those teams towards an even share of the alliance
+# total instead of an arbitrary split. With a full schedule its effect is far below the data's precision.
+CONTRIBUTION_RIDGE = 1e-3
+
+# The normal equations are only teams x teams. Random schedules leave them too well connected for a sparse
+# factorization to stay sparse, so up to this many teams they are factorized densely (LAPACK Cholesky, about
+# 15 ms for a 600-team championship); larger pools (e.g. a season of separate events) use a sparse LU.
+DENSE_SOLVE_MAX_TEAMS = 4000
+
+CONTRIBUTION_SUFFIXES = ("opr", "dpr", "ccwm")  # Statistic keys: `<field>_opr`, `<field>_dpr`, `<field>_ccwm`
+CONTRIBUTION_STATE_VERSION = 2  # Bump when the saved state layout changes so old states are ignored
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def contribution_columns(matches_df):
+    """
+    Picks the fields to fit: numeric, non-boolean columns outside `metadata`.
+
+    :param matches_df: DataFrame with one row per match and flattened columns.
+    :return: List of column names.
+    """
+    import pandas as pd
+
+    return [
+        column for column in matches_df.columns
+        if not column.startswith(METADATA_PREFIX)
+        and pd.api.types.is_numeric_dtype(matches_df[column])
+        and not pd.api.types.is_bool_dtype(matches_df[column])
+    ]
+
+
+def build_stations(matches_df, team_keys, metrics):
+    """
+    Reduces matches to one row per (event, match, position, team). Duplicate submissions for the same robot
+    are averaged, so a robot scouted twice counts once in its alliance's totals. Without an event column
+    (a single event) the event is "".
+
+    :param matches_df: DataFrame with one row per match and flattened columns.
+    :param team_keys: Series of team keys (strings) aligned with the rows of `matches_df`.
+    :param metrics: Fields to keep.
+    :return: DataFrame indexed by (event, match, position, team) with one column per field.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if MATCH_COLUMN not in matches_df.columns or POSITION_COLUMN not in matches_df.columns:
+        # No matches (e.g. every replaced team's matches were removed)
+        matches_df = pd.DataFrame({MATCH_COLUMN: [], POSITION_COLUMN: []})
+        team_keys = pd.Series([], dtype=object)
+    if EVENT_COLUMN in matches_df.columns:
+        events = matches_df[EVENT_COLUMN].astype(object)
+        events = events.where(events.notna(), "").to_numpy(dtype=object)
+    else:
+        events = np.full(len(matches_df), "", dtype=object)
+    frame = pd.DataFrame({
+        "event": events,
+        "match": matches_df[MATCH_COLUMN].to_numpy(dtype="float64"),
+        "position": matches_df[POSITION_COLUMN].to_numpy(dtype=object),
+        "team": team_keys.to_numpy(dtype=object),
+    })
+    for metric in metrics:
+        if metric in matches_df.columns:
+            frame[metric] = pd.to_numeric(matches_df[metric], errors="coerce").to_numpy(dtype="float64")
+        else:
+            frame[metric] = np.nan
+    frame = frame.dropna(subset=["match", "position"])
+    return frame.groupby(["event", "match", "position", "team"], sort=False)[list(metrics)].mean()
+
+
+def alliance_rows(stations, metrics):
+    """
+    Builds one least-squares row per alliance of every fully scouted match: the alliance's teams, the
+    totals of each field over its robots, and the opposing alliance's totals.
+
+    An alliance is used when each of its positions was scouted for exactly one team, no team appears twice
+    and every field was reported; a match is used when both of its alliances are.
+
+    :param stations: Result of `build_stations`.
+    :param metrics: Fields, in column order.
+    :return: Dictionary of (event, match, alliance color) -> (tuple of sorted team keys, values), where values
+             is an array of the alliance's totals followed by the opponents' totals.
+    """
+    import numpy as np
+
+    if stations.empty:
+        return {}
+    frame = stations.reset_index()
+    colors = {position: str(position).split("_", 1)[0] for position in frame["position"].unique()}
+    frame["alliance"] = frame["position"].map(colors)
+    # Sorting makes each alliance's robots contiguous, with its teams in a canonical order
+    frame = frame.sort_values(["event", "match", "alliance", "team"], kind="stable", ignore_index=True)
+    events, matches, alliances = frame["event"].to_numpy(), frame["match"].to_numpy(), frame["alliance"].to_numpy()
+    teams, positions = frame["team"].to_numpy(), frame["position"].to_numpy()
+
+    # Match N of two events is two different matches: number the (event, match) pairs in sorted order
+    new_match = np.r_[True, (events[1:] != events[:-1]) | (matches[1:] != matches[:-1])]
+    match_ids = np.cumsum(new_match) - 1
+    starts = np.flatnonzero(new_match | np.r_[True, alliances[1:] != alliances[:-1]])
+    sizes = np.diff(np.r_[starts, len(frame)])
+    # NaN propagates through the sums: a field missing for any robot leaves the alliance total unknown
+    totals = np.add.reduceat(frame[list(metrics)].to_numpy(dtype="float64"), starts, axis=0)
+    starts, totals = starts[sizes == ALLIANCE_SIZE], totals[sizes == ALLIANCE_SIZE]
+    robots = starts[:, None] + np.arange(ALLIANCE_SIZE)
+    complete = ~np.isnan(totals).any(axis=1)
+    for first in range(ALLIANCE_SIZE):
+        for second in range(first + 1, ALLIANCE_SIZE):
+            complete &= teams[robots[:, first]] != teams[robots[:, second]]
+            complete &= positions[robots[:, first]] != positions[robots[:, second]]
+    starts, totals, robots = starts[complete], totals[complete], robots[complete]
+
+    # Alliances are sorted by event and match, so the two alliances of a fully scouted match are neighbours
+    _, first_alliances, counts = np.unique(match_ids[starts], return_index=True, return_counts=True)
+    rows = {}
+    for first in first_alliances[counts == 2]:
+        for own, opponent in ((first, first + 1), (first + 1, first)):
+            key = (events[starts[own]], matches[starts[own]], alliances[starts[own]])
+            rows[key] = (tuple(teams[robots[own]]), np.concatenate((totals[own], totals[opponent])))
+    return rows
+
+
+class AllianceContributions:
+    """
+    Least-squares estimates of each team's contribution to its alliance's totals (OPR), to its
+    opponents' totals (DPR) and their difference (CCWM), for every fitted field at once.
+
+    Each alliance of a fully scouted match is one row of a sparse alliance-by-team matrix A (a 1 for each
+    of its teams). Only the normal equations AᵀA (team by team) and Aᵀ[Y, Y_opp] are kept, as running
+    sums: adding or replacing matches adds or subtracts the rows of the changed alliances, so an update
+    costs time proportional to the matches that changed. `solve` factorizes AᵀA once and solves for the
+    offensive and defensive columns of every field with that one factorization.
+
+    :param metrics: Fields to fit (see `contribution_columns`).
+    :param ridge: Ridge term added to the diagonal of AᵀA.
+    """
+
+    def __init__(self, metrics, ridge=CONTRIBUTION_RIDGE):
+        import numpy as np
+        import pandas as pd
+        from scipy import sparse
+
+        self.metrics = list(metrics)
+        self.ridge = ridge
+        self.change_version = None  # Change version (see `utility_functions.incremental`) the fit reflects
+        self.teams = []  # Team keys, in column order
+        self._team_columns = {}
+        self.alliances = {}  # (event, match, alliance color) -> (teams, values), see `alliance_rows`
+        self.stations = pd.DataFrame(
+            columns=self.metrics,
+            index=pd.MultiIndex.from_arrays([[], [], [], []], names=["event", "match", "position", "team"]),
+            dtype="float64",
+        )
+        self._normal = sparse.csr_matrix((0, 0))  # AᵀA
+        self._moments = np.zeros((0, 2 * len(self.metrics)))  # Aᵀ[Y, Y_opp]
+        self._totals = np.zeros(2 * len(self.metrics))  # Column sums of [Y, Y_opp]
+        self._num_rows = 0
+
+    def update(self, matches_df, team_keys, teams=None):
+        """
+        Replaces the matches of some teams (or of every team) and updates the normal equations with the
+        alliances that changed.
+
+        :param matches_df: DataFrame of the replaced teams' matches, with flattened columns.
+        :param team_keys: Series of team keys (strings) aligned with the rows of `matches_df`.
+        :param teams: Set of team keys whose matches `matches_df` holds (including teams that no longer
+                      have any), or None if it holds every match.
+        :return: Tuple of (alliance rows added, alliance rows removed).
+        """
+        import pandas as pd
+
+        stations = build_stations(matches_df, team_keys, self.metrics)
+        if teams is None:
+            removed_stations, self.stations = self.stations, stations
+        else:
+            replaced = self.stations.index.get_level_values("team").isin(teams)
+            removed_stations = self.stations[replaced]
+            stations = stations[stations.index.get_level_values("team").isin(teams)]
+            self.stations = pd.concat([self.stations[~replaced], stations])
+
+        affected_matches = _station_matches(removed_stations) | _station_matches(stations)
+        affected_stations = self.stations[self.stations.index.droplevel(["position", "team"]).isin(list(affected_matches))]
+        new_rows = alliance_rows(affected_stations, self.metrics)
+        old_rows = {key: row for key, row in self.alliances.items() if key[:2] in affected_matches}
+
+        removed = [key for key in old_rows if not _same_row(old_rows[key], new_rows.get(key))]
+        added = [key for key in new_rows if not _same_row(new_rows[key], old_rows.get(key))]
+        self._accumulate([old_rows[key] for key in removed], -1)
+        for key in removed:
+            del self.alliances[key]
+        self._accumulate([new_rows[key] for key in added], 1)
+        self.alliances.update((key, new_rows[key]) for key in added)
+        return len(added), len(removed)
+
+    def complete_matches(self):
+        """
+        Counts the matches with a robot scouted at every position of both alliances, whether or not they
+        could be fitted.
+
+        :return: Number of (event, match) pairs.
+        """
+        import pandas as pd
+
+        index = self.stations.index
+        positions = pd.Series(index.get_level_values("position")).groupby(
+            [index.get_level_values("event"), index.get_level_values("match")]
+        ).nunique()
+        return int((positions >= 2 * ALLIANCE_SIZE).sum())
+
+    def _accumulate(self, rows, sign):
+        """
+        Adds (sign 1) or subtracts (sign -1) alliance rows from the normal equations.
+
+        :param rows: List of (teams, values) rows.
+        :param sign: 1 or -1.
+        """
+        import numpy as np
+        from scipy import sparse
+
+        if not rows:
+            return
+        team_columns = np.array([[self._team_column(team) for team in teams] for teams, _ in rows])
+        values = np.vstack([row_values for _, row_values in rows])
+        num_teams = len(self.teams)
+        if self._normal.shape[0] < num_teams:
+            self._normal.resize((num_teams, num_teams))
+            self._moments = np.vstack((self._moments, np.zeros((num_teams - len(self._moments), values.shape[1]))))
+
+        design = sparse.csr_matrix(
+            (np.ones(team_columns.size), (np.repeat(np.arange(len(rows)), ALLIANCE_SIZE), team_columns.ravel())),
+            shape=(len(rows), num_teams),
+        )
+        design_t = design.T.tocsr()
+        self._normal = (self._normal + sign * (design_t @ design)).tocsr()
+        self._normal.eliminate_zeros()
+        self._moments += sign * (design_t @ values)
+        self._totals += sign * values.sum(axis=0)
+        self._num_rows += sign * len(rows)
+
+    def _team_column(self, team):
+        column = self._team_columns.get(team)
+        if column is None:
+            column = self._team_columns[team] = len(self.teams)
+            self.teams.append(team)
+        return column
+
+    def solve(self):
+        """
+        Solves the normal equations for every field.
+
+        The fit is centered: each team starts from an even share of the average alliance total, and the
+        least-squares solve (with the ridge term) estimates its difference from that share.
+
+        :return: Dictionary of team key -> {"<field>_opr", "<field>_dpr", "<field>_ccwm"} for every team in
+                 at least one fitted alliance.
+        """
+        import numpy as np
+
+        if self._num_rows == 0:
+            return {}
+        appearances = self._normal.diagonal()
+        mean_totals = self._totals / self._num_rows
+        rhs = self._moments - np.outer(appearances, mean_totals)
+        # One factorization, solved for the offensive and defensive columns of every field together
+        solution = self.factorize()(rhs) + mean_totals / ALLIANCE_SIZE
+
+        num_metrics = len(self.metrics)
+        contributions = {}
+        for column, team in enumerate(self.teams):
+            if appearances[column] == 0:
+                continue
+            team_contributions = {}
+            for index, metric in enumerate(self.metrics):
+                offense, defense = float(solution[column, index]), float(solution[column, num_metrics + index])
+                team_contributions[f"{metric}_opr"] = offense
+                team_contributions[f"{metric}_dpr"] = defense
+                team_contributions[f"{metric}_ccwm"] = offense - defense
+            contributions[team] = team_contributions
+        return contributions
+
+    def factorize(self):
+        """
+        Factorizes the normal equations AᵀA plus the ridge term (see `DENSE_SOLVE_MAX_TEAMS`).
+
+        :return: Function solving the factorized system for a vector or a matrix of right-hand sides.
+        """
+        import numpy as np
+        from scipy import sparse
+
+        if len(self.teams) <= DENSE_SOLVE_MAX_TEAMS:
+            from scipy.linalg import cho_factor, cho_solve
+
+            normal = self._normal.toarray()
+            normal[np.diag_indices_from(normal)] += self.ridge
+            factor = cho_factor(normal, overwrite_a=True, check_finite=False)
+            return lambda rhs: cho_solve(factor, rhs, check_finite=False)
+
+        from scipy.sparse.linalg import splu
+
+        normal = (self._normal + self.ridge * sparse.identity(len(self.teams), format="csr")).tocsc()
+        return splu(normal, permc_spec="MMD_AT_PLUS_A").solve
+
+    def save(self, file_path):
+        """
+        Saves the fit (stations, alliance rows and normal equations) so a later run can update it.
+
+        :param file_path: Output `.npz` path.
+        """
+        import numpy as np
+
+        normal = self._normal.tocoo()
+        keys = list(self.alliances)
+        stations_index = self.stations.index
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        with open(file_path + ".tmp", "wb") as outfile:
+            np.savez(
+                outfile,
+                state_version=CONTRIBUTION_STATE_VERSION,
+                change_version=-1 if self.change_version is None else self.change_version,
+                ridge=self.ridge,
+                metrics=np.array(self.metrics, dtype=str),
+                teams=np.array(self.teams, dtype=str),
+                station_event=stations_index.get_level_values("event").to_numpy(dtype=str),
+                station_match=stations_index.get_level_values("match").to_numpy(dtype="float64"),
+                station_position=stations_index.get_level_values("position").to_numpy(dtype=str),
+                station_team=stations_index.get_level_values("team").to_numpy(dtype=str),
+                station_values=self.stations.to_numpy(dtype="float64").reshape(len(self.stations), len(self.metrics)),
+                alliance_event=np.array([key[0] for key in keys], dtype=str),
+                alliance_match=np.array([key[1] for key in keys], dtype="float64"),
+                alliance_color=np.array([key[2] for key in keys], dtype=str),
+                alliance_teams=np.array([self.alliances[key][0] for key in keys], dtype=str).reshape(len(keys), ALLIANCE_SIZE),
+                alliance_values=np.array([self.alliances[key][1] for key in keys]).reshape(len(keys), 2 * len(self.metrics)),
+                normal_row=normal.row, normal_col=normal.col, normal_data=normal.data,
+                moments=self._moments, totals=self._totals, num_rows=self._num_rows,
+            )
+        os.replace(file_path + ".tmp", file_path)
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        Loads a fit saved by `save`.
+
+        :param file_path: Path of the `.npz` file.
+        :return: An `AllianceContributions`, or None if there is no usable saved fit.
+        """
+        import numpy as np
+        import pandas as pd
+        from scipy import sparse
+
+        try:
+            with np.load(file_path, allow_pickle=False) as state:
+                state = dict(state)
+        except (OSError, ValueError):
+            return None
+        if int(state.get("state_version", -1)) != CONTRIBUTION_STATE_VERSION:
+            return None
+
+        model = cls(state["metrics"].tolist(), float(state["ridge"]))
+        change_version = int(state["change_version"])
+        model.change_version = None if change_version < 0 else change_version
+        model.teams = state["teams"].tolist()
+        model._team_columns = {team: column for column, team in enumerate(model.teams)}
+        model.stations = pd.DataFrame(
+            state["station_values"],
+            columns=model.metrics,
+            index=pd.MultiIndex.from_arrays(
+                [state["station_event"].astype(object), state["station_match"], state["station_position"].astype(object),
+                 state["station_team"].astype(object)],
+                names=["event", "match", "position", "team"],
+            ),
+        )
+        model.alliances = {
+            (str(event), match, str(color)): (tuple(str(team) for team in teams), values)
+            for event, match, color, teams, values in zip(
+                state["alliance_event"], state["alliance_match"].tolist(), state["alliance_color"],
+                state["alliance_teams"], state["alliance_values"],
+            )
+        }
+        num_teams = len(model.teams)
+        model._normal = sparse.coo_matrix(
+            (state["normal_data"], (state["normal_row"], state["normal_col"])), shape=(num_teams, num_teams)
+        ).tocsr()
+        model._moments = state["moments"]
+        model._totals = state["totals"]
+        model._num_rows = int(state["num_rows"])
+        return model
+
+
+def _station_matches(stations):
+    """
+    :param stations: Stations indexed like the result of `build_stations`.
+    :return: Set of the (event, match) pairs the stations belong to.
+    """
+    index = stations.index
+    return set(zip(index.get_level_values("event"), index.get_level_values("match")))
+
+
+def _same_row(row, other):
+    """
+    Checks whether two alliance rows hold the same teams and totals.
+
+    :param row: A (teams, values) row.
+    :param other: Another row, or None.
+    :return: True if they are equal.
+    """
+    import numpy as np
+
+    return other is not None and row[0] == other[0] and np.array_equal(row[1], other[1])
+
+
+def merge_contributions(team_performance_data, contributions):
+    """
+    Adds contribution statistics to each team's statistics, replacing any from an earlier fit.
+
+    :param team_performance_data: Dictionary of team key -> team statistics (modified in place).
+    :param contributions: Result of `AllianceContributions.solve`.
+    """
+    for team, team_performance in team_performance_data.items():
+        stale_keys = [key for key in team_performance if key.rsplit("_", 1)[-1] in CONTRIBUTION_SUFFIXES]
+        for key in stale_keys:
+            del team_performance[key]
+        team_performance.update(contributions.get(team, {}))
@@ -0,0 +1,71 @@
+import os
+import json
+import time
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+# Files each stage produced (or kept up to date) in its latest run. Script 01 uses it to clear only stale files.
+ARTIFACT_MANIFEST_PATH = "data/processed/artifact_manifest.json"
+ARTIFACT_MANIFEST_VERSION = 1
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def load_artifact_manifest(manifest_path=ARTIFACT_MANIFEST_PATH):
+    """
+    Loads the artifact manifest.
+
+    :param manifest_path: Path of the artifact manifest.
+    :return: Dictionary of stage -> {"updated", "status", "artifacts"}, or None if there is no usable manifest.
+    """
+    try:
+        with open(manifest_path, "r") as infile:
+            manifest = json.load(infile)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("manifest_version") != ARTIFACT_MANIFEST_VERSION:
+        return None
+    return manifest["stages"]
+
+
+def update_artifact_manifest(stage, paths, status, manifest_path=ARTIFACT_MANIFEST_PATH):
+    """
+    Stores the files a stage produced, keeping the records of other stages, and writes the manifest atomically.
+
+    A completed run replaces the stage's previous files, so files it no longer produces become stale. A failed
+    run only adds to them: it may have stopped before rewriting its outputs, so none of them is known to be stale.
+
+    :param stage: Stage name (e.g. "02").
+    :param paths: Paths of the files the stage produced or kept up to date.
+    :param status: "completed" or "failed".
+    :param manifest_path: Path of the artifact manifest.
+    """
+    stages = load_artifact_manifest(manifest_path) or {}
+    previous = stages.get(stage, {}).get("artifacts", []) if status != "completed" else []
+    stages[stage] = {
+        "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "status": status,
+        "artifacts": list(dict.fromkeys(previous + [os.path.normpath(path) for path in paths])),
+    }
+
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    with open(manifest_path + ".tmp", "w") as outfile:
+        json.dump({"manifest_version": ARTIFACT_MANIFEST_VERSION, "stages": stages}, outfile, indent=4)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+
+def current_artifacts(stages, manifest_path=ARTIFACT_MANIFEST_PATH):
+    """
+    Returns every file recorded by any stage, plus the manifest itself.
+
+    :param stages: Result of `load_artifact_manifest`.
+    :param manifest_path: Path of the artifact manifest.
+    :return: Set of absolute paths.
+    """
+    paths = {os.path.abspath(manifest_path)}
+    for record in stages.values():
+        paths.update(os.path.abspath(path) for path in record["artifacts"])
+    return paths
@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import hashlib
+
+# Matplotlib is imported inside `render_bar_chart`, so only processes that actually draw a chart load it.
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+CHART_MANIFEST_NAME = ".chart_manifest.json"  # Input hash of every rendered chart, kept in the chart folder
+RENDERER_VERSION = 1  # Bump when the chart style changes so every chart is rendered again
+BAR_WIDTH = 0.5
+LABEL_ROTATION = 45
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def bar_chart_spec(file_name, title, labels, values, ylabel):
+    """
+    Describes a bar chart with plain, picklable data, so it can be hashed and sent to a worker process.
+
+    :param file_name: PNG file name inside the chart folder.
+    :param title: Chart title.
+    :param labels: Bar labels (e.g. team numbers).
+    :param values: Bar heights.
+    :param ylabel: Y axis label.
+    :return: Chart spec dictionary.
+    """
+    return {
+        "file_name": file_name,
+        "title": title,
+        "labels": [str(label) for label in labels],
+        "values": [float(value) for value in values],
+        "ylabel": ylabel,
+    }
+
+
+def chart_hash(spec):
+    """
+    Hashes everything that affects how a chart looks.
+
+    :param spec: Chart spec dictionary.
+    :return: Hex digest string.
+    """
+    text = json.dumps([RENDERER_VERSION, spec], sort_keys=True)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def render_bar_chart(spec, output_dir):
+    """
+    Renders one bar chart to PNG with Matplotlib's object-oriented API (no global `pyplot` state,
+    no GUI backend), so charts can be drawn in parallel processes.
+
+    Kept at module level so it can be sent to worker processes.
+
+    :param spec: Chart spec dictionary from `bar_chart_spec`.
+    :param output_dir: Folder the PNG is written to.
+    :return: Seconds spent rendering.
+    """
+    start = time.perf_counter()
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    positions = range(len(spec["values"]))
+    axes.bar(positions, spec["values"], width=BAR_WIDTH)
+    axes.set_xlim(-0.5, len(spec["values"]) - 0.5)
+    axes.set_title(spec["title"])
+    axes.set_ylabel(spec["ylabel"])
+    axes.set_xticks(positions, spec["labels"], rotation=LABEL_ROTATION, ha="right")
+    figure.tight_layout()
+    figure.savefig(os.path.join(output_dir, spec["file_name"]))
+    return time.perf_counter() - start
+
+
+def _load_manifest(output_dir):
+    """
+    Loads the chart manifest, or an empty one if it is missing or unreadable.
+
+    :param output_dir: Chart folder.
+    :return: Dictionary of file name -> input hash.
+    """
+    try:
+        with open(os.path.join(output_dir, CHART_MANIFEST_NAME), "r") as infile:
+            manifest = json.load(infile)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _save_manifest(output_dir, manifest):
+    """
+    Writes the chart manifest atomically (write to a temporary file, then rename).
+
+    :param output_dir: Chart folder.
+    :param manifest: Dictionary of file name -> input hash.
+    """
+    manifest_path = os.path.join(output_dir, CHART_MANIFEST_NAME)
+    with open(manifest_path + ".tmp", "w") as outfile:
+        json.dump(manifest, outfile, indent=4)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+
+def render_charts(specs, output_dir, workers=1):
+    """
+    Renders charts, skipping any whose PNG already exists and was rendered from the same input.
+
+    :param specs: List of chart spec dictionaries.
+    :param output_dir: Folder the PNGs are written to.
+    :param workers: Worker processes for rendering (1 = render in this process).
+    :return: List of (file name, "rendered" or "reused", seconds) in spec order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = _load_manifest(output_dir)
+    hashes = [chart_hash(spec) for spec in specs]
+
+    report = [None] * len(specs)
+    to_render = []
+    for index, (spec, input_hash) in enumerate(zip(specs, hashes)):
+        if manifest.get(spec["file_name"]) == input_hash and os.path.exists(os.path.join(output_dir, spec["file_name"])):
+            report[index] = (spec["file_name"], "reused", 0.0)
+        else:
+            to_render.append(index)
+
+    if workers > 1 and len(to_render) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(to_render))) as executor:
+            futures = {index: executor.submit(render_bar_chart, specs[index], output_dir) for index in to_render}
+            seconds = {index: future.result() for index, future in futures.items()}
+    else:
+        seconds = {index: render_bar_chart(specs[index], output_dir) for index in to_render}
+
+    for index in to_render:
+        report[index] = (specs[index]["file_name"], "rendered", seconds[index])
+
+    # Only charts produced by this run are remembered
+    _save_manifest(output_dir, {spec["file_name"]: input_hash for spec, input_hash in zip(specs, hashes)})
+    return report
+
+
+def print_render_report(report, wall_seconds):
+    """
+    Prints how many charts were rendered versus reused, and the time spent on each.
+
+    :param report: List from `render_charts`.
+    :param wall_seconds: Wall time of the whole `render_charts` call.
+    """
+    rendered = [seconds for _, status, seconds in report if status == "rendered"]
+    print(f"[INFO] Charts: {len(rendered)} rendered, {len(report) - len(rendered)} reused "
+          f"({sum(rendered):.2f} s rendering, {wall_seconds:.2f} s wall).")
+    for file_name, status, seconds in report:
+        print(f"[INFO]   {file_name}: {status}" + (f" in {seconds:.3f} s" if status == "rendered" else ""))
@@ -0,0 +1,183 @@
+import os
+from collections import defaultdict, deque
+from itertools import islice
+from utility_functions.warning_log import warning_record
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+CHUNKS_IN_FLIGHT_PER_WORKER = 2  # Bounds memory use when cleaning in parallel
+METADATA_KEY = "metadata"
+# Metadata fields recorded for every cleaned entry, for the match consistency checks
+# ("event" is only set when the raw files span several events, see `raw_sources.EVENT_FIELD`)
+MATCH_KEY_FIELDS = ("matchNumber", "robotTeam", "robotPosition", "scouterName", "event")
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+class CleaningAccumulator:
+    """
+    Collects the warnings and counters produced while cleaning entries.
+
+    Warnings are compact records (see `warning_log`). With a `WarningSink` attached they go straight
+    to it; otherwise (e.g. in a worker process) they are kept in `warnings` until merged.
+
+    Accumulators from separate chunks can be merged. Merging them in chunk order gives the same
+    warning order, entry indexes and dictionary insertion order (which breaks leaderboard ties) as
+    cleaning every entry serially with one accumulator.
+
+    :param sink: Optional `WarningSink` that receives every warning.
+    """
+
+    def __init__(self, sink=None):
+        self.sink = sink
+        self.warnings = []
+        self.num_entries = 0  # Entries recorded so far; the index of the entry being cleaned
+        self.scouter_participation = defaultdict(int)
+        # One column per field in MATCH_KEY_FIELDS, one row per cleaned entry (None if missing)
+        self.match_keys = {field: [] for field in MATCH_KEY_FIELDS}
+
+    def _add(self, record):
+        if self.sink is not None:
+            self.sink.emit(record)
+        else:
+            self.warnings.append(record)
+
+    def log_warning(self, code, key_path, scouter, detail=None):
+        """
+        Logs a warning about the entry being cleaned and associates it with the scouter.
+
+        :param code: Warning code (see `warning_log`).
+        :param key_path: Dotted key path the warning is about.
+        :param scouter: The scouter responsible for the data.
+        :param detail: Extra values used in the message.
+        """
+        # Called for every warning, so the record tuple is built inline (same layout as `warning_record`)
+        record = (code, key_path, scouter, self.num_entries, detail)
+        if self.sink is not None:
+            self.sink.emit(record)
+        else:
+            self.warnings.append(record)
+
+    def log_dataset_warning(self, code, detail=None):
+        """
+        Logs a warning about the dataset as a whole (not about one entry or scouter).
+
+        :param code: Warning code (see `warning_log`).
+        :param detail: Extra values used in the message.
+        """
+        self._add(warning_record(code, detail=detail))
+
+    def record_match_key(self, cleaned_entry):
+        """
+        Records the match number, team, position, scouter and event of a cleaned entry, and moves on to the next entry.
+
+        :param cleaned_entry: A cleaned entry.
+        """
+        metadata = cleaned_entry.get(METADATA_KEY, {})
+        for field, column in self.match_keys.items():
+            column.append(metadata.get(field))
+        self.num_entries += 1
+
+    def merge(self, other):
+        """
+        Adds the contents of another accumulator (from a later chunk) to this one.
+
+        :param other: The accumulator to merge in.
+        :return: This accumulator.
+        """
+        offset = self.num_entries
+        for code, key_path, scouter, entry_index, detail in other.warnings:
+            if entry_index is not None:
+                entry_index += offset
+            self._add(warning_record(code, key_path, scouter, entry_index, detail))
+        self.num_entries += other.num_entries
+        for scouter, count in other.scouter_participation.items():
+            self.scouter_participation[scouter] += count
+        for field, column in other.match_keys.items():
+            self.match_keys[field].extend(column)
+        return self
+
+
+def clean_entry(entry, schema, accumulator):
+    """
+    Validates and cleans a single entry, recording its scouter and any warnings.
+
+    :param entry: The raw data entry.
+    :param schema: A compiled schema (see `schema_validation.compile_schema`).
+    :param accumulator: The `CleaningAccumulator` to record into.
+    :return: A cleaned entry.
+    """
+    scouter = entry.get(METADATA_KEY, {}).get("scouterName", "Unknown")
+    accumulator.scouter_participation[scouter] += 1
+    cleaned_entry = schema.validate(entry, scouter, accumulator.log_warning)
+    accumulator.record_match_key(cleaned_entry)
+    return cleaned_entry
+
+
+def clean_chunk(entries, schema, encode=None):
+    """
+    Cleans a chunk of entries with a fresh accumulator. Runs inside worker processes.
+
+    :param entries: List of raw data entries.
+    :param schema: A compiled schema.
+    :param encode: Optional callable that serializes each cleaned entry before it is returned.
+    :return: Tuple of (cleaned or encoded entries, accumulator).
+    """
+    accumulator = CleaningAccumulator()
+    cleaned = [clean_entry(entry, schema, accumulator) for entry in entries]
+    if encode is not None:
+        cleaned = [encode(entry) for entry in cleaned]
+    return cleaned, accumulator
+
+
+def iter_chunks(entries, chunk_size):
+    """
+    Splits an iterable of entries into lists of at most `chunk_size` entries.
+
+    :param entries: Iterable of entries.
+    :param chunk_size: Maximum entries per chunk.
+    """
+    iterator = iter(entries)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def clean_entries_parallel(entries, schema, workers, chunk_size, encode=None):
+    """
+    Cleans entries in a process pool, yielding each chunk's results in input order.
+
+    Only a bounded number of chunks are in flight at once, so `entries` may be a streaming iterator.
+
+    :param entries: Iterable of raw data entries.
+    :param schema: A compiled schema.
+    :param workers: Number of worker processes.
+    :param chunk_size: Entries per chunk sent to a worker.
+    :param encode: Optional picklable callable that serializes cleaned entries inside the workers.
+    """
+    # Imported here so serial runs don't load multiprocessing at startup
+    from concurrent.futures import ProcessPoolExecutor
+
+    max_in_flight = max(1, workers * CHUNKS_IN_FLIGHT_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in iter_chunks(entries, chunk_size):
+            pending.append(executor.submit(clean_chunk, chunk, schema, encode))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def default_worker_count():
+    """
+    Returns the number of CPUs available to this process.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
@@ -0,0 +1,106 @@
+# pandas and NumPy are imported inside `find_consistency_issues`, so importing this module is cheap.
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+MATCH_COLUMN = "matchNumber"
+TEAM_COLUMN = "robotTeam"
+POSITION_COLUMN = "robotPosition"
+SCOUTER_COLUMN = "scouterName"
+EVENT_COLUMN = "event"  # None for every entry unless the raw files span several events
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def _native(value):
+    """
+    Converts a NumPy scalar to the matching Python value, so messages read "5" rather than "np.int64(5)".
+    """
+    return value.item() if hasattr(value, "item") else value
+
+
+def _match_label(event, match):
+    """
+    Names a match in an issue: its number, followed by its event when the data spans several events.
+    """
+    match = _native(match)
+    return f"{match} ({event})" if event else match
+
+
+def find_consistency_issues(match_keys, valid_robot_positions):
+    """
+    Checks match completeness over a table with one row per cleaned entry, using hash-based pandas
+    operations (factorize, duplicated) and NumPy counting, so every check is O(n) with no per-entry Python.
+
+    Matches are identified by event and match number, so match 5 of two events is two separate matches.
+
+    :param match_keys: Dictionary of column -> list of values (`CleaningAccumulator.match_keys`):
+                       matchNumber, robotTeam, robotPosition, scouterName and event, None where missing.
+    :param valid_robot_positions: The positions every match should have.
+    :return: Dictionary with:
+             - "match_count_groups": {number of matches -> sorted teams}, one entry per distinct count
+             - "missing_positions": [(match, sorted missing positions)]
+             - "duplicate_submissions": [(match, position, scouters)] for positions submitted more than once
+             - "teams_scouted_twice": [(match, team, sorted positions)] for teams at several positions in one match
+             Matches are their number, or "<number> (<event>)" when the data spans several events.
+             Lists are sorted by event, then match number.
+    """
+    import numpy as np
+    import pandas as pd
+
+    issues = {"match_count_groups": {}, "missing_positions": [], "duplicate_submissions": [], "teams_scouted_twice": []}
+    # A match is its number within one event; without events (a single-event dataset) the number alone is the key
+    multiple_events = any(event is not None for event in match_keys.get(EVENT_COLUMN, ()))
+    match_columns = [EVENT_COLUMN, MATCH_COLUMN] if multiple_events else [MATCH_COLUMN]
+    table = pd.DataFrame(match_keys, columns=[MATCH_COLUMN, TEAM_COLUMN, POSITION_COLUMN, SCOUTER_COLUMN]
+                         + [EVENT_COLUMN] * multiple_events)
+    table = table[table[MATCH_COLUMN].notna()]
+    if table.empty:
+        return issues
+    if multiple_events:
+        table[EVENT_COLUMN] = table[EVENT_COLUMN].where(table[EVENT_COLUMN].notna(), "")
+
+    def label(key):
+        # `key` starts with the match columns of a groupby key
+        return _match_label(key[0], key[1]) if multiple_events else _native(key[0])
+
+    # Matches played per team (a duplicated submission doesn't count twice)
+    played = table[table[TEAM_COLUMN].notna()].drop_duplicates([TEAM_COLUMN] + match_columns)
+    match_counts = played[TEAM_COLUMN].value_counts(sort=False)
+    for count, teams in match_counts.groupby(match_counts.to_numpy()).groups.items():
+        issues["match_count_groups"][int(count)] = sorted(_native(team) for team in teams)
+
+    # Missing positions: a (match x position) presence matrix filled in one scatter
+    positions = sorted(valid_robot_positions)
+    position_codes = pd.Categorical(table[POSITION_COLUMN], categories=positions).codes
+    if multiple_events:
+        match_codes, matches = pd.MultiIndex.from_frame(table[match_columns]).factorize()
+        match_keys_found = list(zip(matches.get_level_values(0), matches.get_level_values(1)))
+        order_keys = (matches.get_level_values(1).to_numpy(), matches.get_level_values(0).to_numpy())
+    else:
+        match_codes, matches = pd.factorize(table[MATCH_COLUMN])
+        match_keys_found = [(match,) for match in matches]
+        order_keys = (matches.to_numpy(),)
+    present = np.zeros((len(matches), len(positions)), dtype=bool)
+    known = position_codes >= 0
+    present[match_codes[known], position_codes[known]] = True
+    incomplete = np.flatnonzero(~present.all(axis=1))
+    for match_index in incomplete[np.lexsort(tuple(keys[incomplete] for keys in order_keys))]:
+        missing = [positions[index] for index in np.flatnonzero(~present[match_index])]
+        issues["missing_positions"].append((label(match_keys_found[match_index]), missing))
+
+    # Several submissions for the same position in one match
+    valid_rows = table[known]
+    duplicated = valid_rows[valid_rows.duplicated(match_columns + [POSITION_COLUMN], keep=False)]
+    for key, scouters in duplicated.groupby(match_columns + [POSITION_COLUMN], sort=True)[SCOUTER_COLUMN]:
+        issues["duplicate_submissions"].append((label(key), key[-1], scouters.tolist()))
+
+    # The same team at more than one position in one match
+    team_rows = table[table[TEAM_COLUMN].notna()].drop_duplicates(match_columns + [TEAM_COLUMN, POSITION_COLUMN])
+    repeated = team_rows[team_rows.duplicated(match_columns + [TEAM_COLUMN], keep=False)]
+    for key, team_positions in repeated.groupby(match_columns + [TEAM_COLUMN], sort=True)[POSITION_COLUMN]:
+        issues["teams_scouted_twice"].append((label(key), _native(key[-1]), sorted(map(str, team_positions))))
+
+    return issues
@@ -0,0 +1,236 @@
+import os
+import json
+import shutil
+import hashlib
+from utility_functions.instrumentation import record_artifact
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+CLEANING_MANIFEST_PATH = "data/processed/cleaning_manifest.json"  # Content hashes of already cleaned entries
+INCREMENTAL_CHANGES_PATH = "data/processed/incremental_changes.json"  # Teams touched by each incremental run
+INCREMENTAL_STATE_PATH = "data/processed/incremental_state.json"  # Change version each later stage was built from
+MAX_CHANGE_HISTORY = 100  # Number of change records kept for stages that fall behind
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def entry_hash(entry):
+    """
+    Returns a content hash of a raw entry. Key order is part of the content, since it affects
+    the order of extra-key warnings.
+
+    :param entry: The raw data entry.
+    :return: Hex digest string.
+    """
+    return hashlib.blake2b(json.dumps(entry).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def schema_fingerprint(*config_values):
+    """
+    Hashes the configuration that cleaning depends on (expected structure, valid positions, ...),
+    so a manifest built with a different configuration is never reused.
+
+    :param config_values: Configuration objects; their `repr` must be stable.
+    :return: Hex digest string.
+    """
+    text = "|".join(repr(value) for value in config_values)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _load_json(file_path, default):
+    """
+    Loads a JSON file, returning `default` if it is missing or unreadable.
+
+    :param file_path: Path to the JSON file.
+    :param default: Value returned when the file cannot be loaded.
+    """
+    try:
+        with open(file_path, "r") as infile:
+            return json.load(infile)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+
+def _save_json(file_path, data):
+    """
+    Writes a JSON file atomically (write to a temporary file, then rename).
+
+    :param file_path: Path to the JSON file.
+    :param data: JSON-serializable data.
+    """
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    temp_path = file_path + ".tmp"
+    with open(temp_path, "w") as outfile:
+        json.dump(data, outfile)
+    os.replace(temp_path, file_path)
+    record_artifact(file_path)
+
+
+def load_cleaning_manifest(fingerprint):
+    """
+    Loads the cleaning manifest if it was built with the same configuration.
+
+    Each manifest record is `[hash, scouter, team, warnings]` for the raw entry at that index.
+
+    :param fingerprint: Current `schema_fingerprint`.
+    :return: List of records, or None if there is no usable manifest.
+    """
+    manifest = _load_json(CLEANING_MANIFEST_PATH, None)
+    if not manifest or manifest.get("fingerprint") != fingerprint:
+        return None
+    return manifest["entries"]
+
+
+def save_cleaning_manifest(fingerprint, records):
+    """
+    Saves the cleaning manifest.
+
+    :param fingerprint: Current `schema_fingerprint`.
+    :param records: List of `[hash, scouter, team, warnings]` records in raw entry order.
+    """
+    _save_json(CLEANING_MANIFEST_PATH, {"fingerprint": fingerprint, "entries": records})
+
+
+def invalidate_incremental_data():
+    """
+    Removes the cleaning manifest, change history and stage versions. Called by full
+    (non-incremental) runs of script 02, whose output the manifest no longer describes.
+    """
+    for file_path in (CLEANING_MANIFEST_PATH, INCREMENTAL_CHANGES_PATH, INCREMENTAL_STATE_PATH):
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def record_change(touched_teams, full_rebuild=False):
+    """
+    Appends a change record for the later stages and returns its version number.
+
+    :param touched_teams: Teams whose entries were added, changed or removed.
+    :param full_rebuild: True if the later stages must rebuild every team.
+    :return: The new change version.
+    """
+    history = _load_json(INCREMENTAL_CHANGES_PATH, {"version": 0, "changes": []})
+    version = history["version"] + 1
+    history["version"] = version
+    history["changes"].append({
+        "version": version,
+        "full_rebuild": full_rebuild,
+        "teams": sorted(str(team) for team in touched_teams),
+    })
+    history["changes"] = history["changes"][-MAX_CHANGE_HISTORY:]
+    _save_json(INCREMENTAL_CHANGES_PATH, history)
+    return version
+
+
+def current_change_version():
+    """
+    Returns the latest change version written by script 02, or None if there is no history.
+    """
+    history = _load_json(INCREMENTAL_CHANGES_PATH, None)
+    return history["version"] if history else None
+
+
+def teams_changed_since(stage):
+    """
+    Returns the teams a later stage must rebuild since the change version it was last built from.
+
+    :param stage: Stage name (e.g. "03").
+    :return: Tuple of (set of team keys as strings, or None if every team must be rebuilt;
+             the current change version).
+    """
+    history = _load_json(INCREMENTAL_CHANGES_PATH, None)
+    if not history:
+        return None, None
+
+    built_version = _load_json(INCREMENTAL_STATE_PATH, {}).get(stage)
+    changes = [change for change in history["changes"] if built_version is None or change["version"] > built_version]
+    oldest_kept = history["changes"][0]["version"] if history["changes"] else history["version"] + 1
+
+    # Rebuild everything if the stage was never built incrementally or fell behind the kept history
+    if built_version is None or built_version > history["version"] or built_version + 1 < oldest_kept:
+        return None, history["version"]
+    if any(change["full_rebuild"] for change in changes):
+        return None, history["version"]
+
+    touched = set()
+    for change in changes:
+        touched.update(change["teams"])
+    return touched, history["version"]
+
+
+def built_stage_version(stage):
+    """
+    Returns the change version a later stage was last built from.
+
+    :param stage: Stage name (e.g. "04").
+    :return: Change version, or None if the stage was never built incrementally.
+    """
+    return _load_json(INCREMENTAL_STATE_PATH, {}).get(stage)
+
+
+def save_stage_version(stage, version):
+    """
+    Records the change version a later stage was built from.
+
+    :param stage: Stage name (e.g. "03").
+    :param version: Change version, or None to forget the stage (forces its next run to rebuild).
+    """
+    state = _load_json(INCREMENTAL_STATE_PATH, {})
+    if version is None:
+        state.pop(stage, None)
+    else:
+        state[stage] = version
+    _save_json(INCREMENTAL_STATE_PATH, state)
+
+
+def append_to_json_array(file_path, encoded_items, indent):
+    """
+    Appends already-encoded items to an existing JSON array file written by `JsonArrayWriter`
+    (or `json.dump(..., indent=4)`) without re-encoding the items before them.
+
+    The items are appended to a copy of the file that then replaces it, so a crash mid-write or a
+    reader running at the same time (watch mode, script 03) never sees a half-written array.
+
+    :param file_path: Path to the JSON array file.
+    :param encoded_items: Items encoded with `json_streaming.encode_array_item`.
+    :param indent: Indentation the file was written with, or None for compact output.
+    :return: False if the file does not end like a JSON array (the caller should rewrite it).
+    """
+    if not encoded_items:
+        return True
+    with open(file_path, "rb") as infile:
+        infile.seek(0, os.SEEK_END)
+        size = infile.tell()
+        tail_length = min(size, 2)
+        infile.seek(size - tail_length)
+        tail = infile.read(tail_length)
+    if not tail.endswith(b"]"):
+        return False
+    empty = size == 2 and tail == b"[]"
+    closing = b"]" if (empty or indent is None) else b"\n]"
+    if not tail.endswith(closing):
+        return False
+
+    if indent is None:
+        separator = ","
+        text = ("" if empty else separator) + separator.join(encoded_items) + "]"
+    else:
+        separator = ",\n"
+        text = ("\n" if empty else separator) + separator.join(encoded_items) + "\n]"
+
+    temp_path = file_path + ".tmp"
+    try:
+        shutil.copyfile(file_path, temp_path)
+        with open(temp_path, "rb+") as outfile:
+            outfile.seek(size - len(closing))
+            outfile.truncate()
+            outfile.write(text.encode("utf-8"))
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return True
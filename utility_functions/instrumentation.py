@@ -0,0 +1,252 @@
+import os
+import sys
+import json
+import time
+import platform
+from contextlib import contextmanager
+from utility_functions.artifacts import ARTIFACT_MANIFEST_PATH, update_artifact_manifest
+
+# cProfile, pstats and tracemalloc are imported only when a run asks for them, so timing every
+# run costs nothing but a few `perf_counter` calls.
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+RUN_REPORT_PATH = "outputs/statistics/run_report.json"  # Machine-readable timings, counters and memory per stage
+PROFILE_DIR = "outputs/statistics/profiles"  # cProfile dumps (`stage_02.prof`, ...), written with `--profile`
+RUN_REPORT_VERSION = 1
+PROFILE_TOP_FUNCTIONS = 15  # Functions printed from a profile, by cumulative time
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+_active_stage = None  # The stage being instrumented in this process, if any
+
+
+def peak_rss_mib():
+    """
+    Returns the peak resident memory of this process so far (None where the `resource` module is unavailable).
+
+    :return: Peak RSS in MiB, or None.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+@contextmanager
+def step(name):
+    """
+    Times a sub-step (e.g. "load", "validate", "serialize") of the stage being instrumented.
+    Repeated steps add up. Does nothing but time the block when no stage is instrumented.
+
+    :param name: Step name.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if _active_stage is not None:
+            _active_stage.add_step_time(name, time.perf_counter() - start)
+
+
+def set_counter(name, value):
+    """
+    Sets a counter (e.g. entries processed, warnings, teams) of the stage being instrumented.
+
+    :param name: Counter name.
+    :param value: Counter value.
+    """
+    if _active_stage is not None:
+        _active_stage.counters[name] = value
+
+
+def record_artifact(path):
+    """
+    Records a file the stage being instrumented produced or kept up to date, so clearing in script 01's
+    "stale" mode keeps it.
+
+    :param path: Path of the file.
+    """
+    if _active_stage is not None:
+        _active_stage.artifacts.append(path)
+
+
+def update_run_report(key, record, report_path=RUN_REPORT_PATH):
+    """
+    Stores one record in the run report, keeping the records of other stages, and writes it atomically.
+
+    :param key: Record name under "stages" (e.g. "02", or "pipeline" for the runner).
+    :param record: JSON-compatible dictionary.
+    :param report_path: Path of the run report.
+    """
+    report = None
+    if os.path.exists(report_path):
+        try:
+            with open(report_path, "r") as infile:
+                report = json.load(infile)
+        except (OSError, ValueError):
+            report = None
+    if not isinstance(report, dict) or report.get("report_version") != RUN_REPORT_VERSION:
+        report = {"report_version": RUN_REPORT_VERSION, "stages": {}}
+    report["updated"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    report["python"] = platform.python_version()
+    report["platform"] = platform.platform()
+    report["stages"][key] = record
+
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    with open(report_path + ".tmp", "w") as outfile:
+        json.dump(report, outfile, indent=4)
+    os.replace(report_path + ".tmp", report_path)
+
+
+class StageFailed(Exception):
+    """
+    Raised by a script's `main` after it reported a failure, so the pipeline runner stops instead of running the
+    next stages on old data. Run directly, the scripts turn it into exit code 1.
+
+    :param stage: Stage name (e.g. "02").
+    """
+
+    def __init__(self, stage):
+        super().__init__(f"Script {stage} failed.")
+        self.stage = stage
+        self.timings = None  # Set by the pipeline runner: (stage label, seconds) up to and including this stage
+
+
+class StageInstrumentation:
+    """
+    Collects a stage's wall time, sub-step timers, counters and peak memory, optionally with a
+    cProfile dump and tracemalloc's peak of Python allocations, and writes them to the run report.
+    The files the stage produced are written to the artifact manifest.
+
+    Sub-steps, counters and artifacts are recorded with the module-level `step`, `set_counter` and
+    `record_artifact` helpers, so helper functions can be instrumented without passing this object around.
+
+    :param stage: Stage name (e.g. "02").
+    :param report_path: Path of the run report.
+    :param profile_dir: Folder for cProfile dumps.
+    """
+
+    def __init__(self, stage, report_path=RUN_REPORT_PATH, profile_dir=PROFILE_DIR):
+        self.stage = stage
+        self.report_path = report_path
+        self.profile_dir = profile_dir
+        self.steps = {}  # Step name -> seconds, in first-use order
+        self.counters = {}
+        self.artifacts = []  # Paths of the files the stage produced or kept up to date
+        self._started = None
+        self._start_time = None
+        self._profiler = None
+        self._trace_memory = False
+
+    def add_step_time(self, name, seconds):
+        self.steps[name] = self.steps.get(name, 0.0) + seconds
+
+    def start(self, profile=False, trace_memory=False):
+        """
+        Starts the stage clock and makes this the stage that `step` and `set_counter` record into.
+
+        :param profile: Run the stage under cProfile and dump the statistics to `profile_dir`.
+        :param trace_memory: Track the peak of Python allocations with tracemalloc (slows the stage down;
+                             worker processes are not traced).
+        """
+        global _active_stage
+        _active_stage = self
+        self._started = time.strftime("%Y-%m-%dT%H:%M:%S")
+        if trace_memory:
+            import tracemalloc
+
+            tracemalloc.start()
+            self._trace_memory = True
+        if profile:
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._start_time = time.perf_counter()
+
+    def finish(self, status):
+        """
+        Stops the clock (and the profiler), prints a one-line timing summary and updates the run report
+        and the artifact manifest. A report that cannot be written is reported but never fails the stage.
+
+        :param status: "completed" or "failed".
+        :return: The stage's record in the run report (None if the stage was never started).
+        """
+        global _active_stage
+        if self._start_time is None:
+            return None
+        wall_seconds = time.perf_counter() - self._start_time
+        if _active_stage is self:
+            _active_stage = None
+
+        profile_path = None
+        if self._profiler is not None:
+            self._profiler.disable()
+            profile_path = os.path.join(self.profile_dir, f"stage_{self.stage}.prof")
+            os.makedirs(self.profile_dir, exist_ok=True)
+            self._profiler.dump_stats(profile_path)
+            self._profiler = None
+
+        peak_traced_mib = None
+        if self._trace_memory:
+            import tracemalloc
+
+            peak_traced_mib = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+            self._trace_memory = False
+
+        peak_rss = peak_rss_mib()
+        record = {
+            "status": status,
+            "started": self._started,
+            "wall_s": round(wall_seconds, 4),
+            "steps_s": {name: round(seconds, 4) for name, seconds in self.steps.items()},
+            "counters": self.counters,
+            "peak_rss_mib": round(peak_rss, 1) if peak_rss is not None else None,
+            "peak_traced_mib": round(peak_traced_mib, 1) if peak_traced_mib is not None else None,
+            "profile": profile_path,
+        }
+
+        steps = ", ".join(f"{name} {seconds:.2f} s" for name, seconds in self.steps.items())
+        print(f"[INFO] Stage {self.stage} took {wall_seconds:.2f} s" + (f" ({steps})." if steps else "."))
+        if peak_traced_mib is not None:
+            print(f"[INFO] Peak traced Python memory: {peak_traced_mib:.1f} MiB.")
+        if profile_path is not None:
+            import pstats
+
+            print(f"[INFO] Profile written to: {profile_path} (top {PROFILE_TOP_FUNCTIONS} by cumulative time)")
+            pstats.Stats(profile_path).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+
+        try:
+            update_run_report(self.stage, record, self.report_path)
+        except OSError as e:
+            print(f"[ERROR] Could not update the run report {self.report_path}: {e}")
+
+        self.artifacts.append(self.report_path)
+        if profile_path is not None:
+            self.artifacts.append(profile_path)
+        try:
+            update_artifact_manifest(self.stage, self.artifacts, status)
+        except OSError as e:
+            print(f"[ERROR] Could not update the artifact manifest {ARTIFACT_MANIFEST_PATH}: {e}")
+        return record
+
+
+def add_instrumentation_arguments(parser):
+    """
+    Adds the `--profile` and `--trace-memory` options shared by scripts 02-05.
+
+    :param parser: An `argparse.ArgumentParser`.
+    """
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Run under cProfile and write the statistics to {PROFILE_DIR}.")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Record the peak of Python allocations with tracemalloc (slower).")
@@ -0,0 +1,397 @@
+import os
+import json
+from functools import partial
+from utility_functions.json_streaming import JSON_INDENT, JsonArrayWriter, finish_temp_file, open_entry_writer, TEMP_SUFFIX
+
+# pyarrow and pandas are imported inside the functions that need them, so JSON-only runs don't pay for them.
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+JSON_FORMAT = "json"
+PARQUET_FORMAT = "parquet"
+SQLITE_FORMAT = "sqlite"
+SUPPORTED_FORMATS = {JSON_FORMAT, PARQUET_FORMAT, SQLITE_FORMAT}
+
+PARQUET_BATCH_SIZE = 10_000  # Rows buffered before a row group is written
+PARQUET_COMPRESSION = "zstd"
+JSON_COLUMNS_METADATA_KEY = b"json_columns"  # Schema metadata listing columns stored as JSON text
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def check_format(data_format):
+    """
+    Raises a ValueError for unknown intermediate formats.
+
+    :param data_format: Format name from a script's configuration section.
+    """
+    if data_format not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unknown intermediate format '{data_format}'. Use one of: {sorted(SUPPORTED_FORMATS)}.")
+
+
+def parquet_path_for(json_path):
+    """
+    Returns the Parquet file path that sits next to a JSON file path.
+
+    :param json_path: Path ending in `.json`.
+    :return: Same path ending in `.parquet`.
+    """
+    return os.path.splitext(json_path)[0] + ".parquet"
+
+
+def sqlite_path_for(json_path):
+    """
+    Returns the SQLite database path that sits next to a JSON file path.
+
+    :param json_path: Path ending in `.json`.
+    :return: Same path ending in `.sqlite`.
+    """
+    return os.path.splitext(json_path)[0] + ".sqlite"
+
+
+def flatten_structure(expected_structure, prefix=""):
+    """
+    Lists the flattened columns of an expected structure as (column name, key path, expected type),
+    in the same depth-first order as the keys of a cleaned entry.
+
+    :param expected_structure: Nested dictionary mapping keys to expected types.
+    :param prefix: Column name prefix for nested levels.
+    :return: List of column tuples.
+    """
+    columns = []
+    for key, expected_type in expected_structure.items():
+        if isinstance(expected_type, dict):
+            columns.extend(flatten_structure(expected_type, prefix + key + "."))
+        else:
+            columns.append((prefix + key, tuple((prefix + key).split(".")), expected_type))
+    return columns
+
+
+def json_normalize_column_order(column_names):
+    """
+    Reorders flattened column names the way `pd.json_normalize` orders them for a cleaned entry:
+    top-level fields first, then nested fields.
+
+    :param column_names: Dotted column names in entry order.
+    :return: Reordered list of column names.
+    """
+    return sorted(column_names, key=lambda column_name: "." in column_name)
+
+
+def arrow_type_for(expected_type):
+    """
+    Maps an expected Python type to an Arrow type.
+
+    :param expected_type: A type from the expected structure.
+    :return: A `pyarrow.DataType`.
+    """
+    import pyarrow as pa
+
+    # bool must be checked before int, since bool is a subclass of int
+    if expected_type is bool:
+        return pa.bool_()
+    if expected_type is int:
+        return pa.int64()
+    if expected_type is float or expected_type == (int, float) or expected_type == (float, int):
+        return pa.float64()
+    if expected_type is str:
+        return pa.string()
+    raise ValueError(
+        f"The Parquet format supports str, int, float and bool fields, got {expected_type}. "
+        f"Use the JSON format for this structure."
+    )
+
+
+def arrow_schema_for(expected_structure):
+    """
+    Builds the Arrow schema of the flattened cleaned match table.
+
+    :param expected_structure: Nested dictionary mapping keys to expected types.
+    :return: A `pyarrow.Schema`.
+    """
+    import pyarrow as pa
+
+    return pa.schema([
+        (name, arrow_type_for(expected_type)) for name, _, expected_type in flatten_structure(expected_structure)
+    ])
+
+
+def flatten_entry(entry, key_paths):
+    """
+    Flattens a cleaned entry into a row tuple. Missing fields become None (null).
+
+    Kept at module level so it can be sent to worker processes.
+
+    :param entry: The cleaned entry.
+    :param key_paths: Key path of each column.
+    :return: Tuple of column values.
+    """
+    row = []
+    for key_path in key_paths:
+        value = entry
+        for key in key_path:
+            if not isinstance(value, dict) or key not in value:
+                value = None
+                break
+            value = value[key]
+        row.append(value)
+    return tuple(row)
+
+
+def unflatten_row(column_names, values):
+    """
+    Rebuilds a nested entry from flattened column values, skipping null fields.
+
+    :param column_names: Dotted column names.
+    :param values: Column values for one row.
+    :return: The nested entry.
+    """
+    entry = {}
+    for column_name, value in zip(column_names, values):
+        if value is None:
+            continue
+        *parents, key = column_name.split(".")
+        level = entry
+        for parent in parents:
+            level = level.setdefault(parent, {})
+        level[key] = value
+    return entry
+
+
+class ParquetEntryWriter:
+    """
+    Writes cleaned entries to a Parquet file with one flattened column per field.
+
+    Has the same interface as the JSON writers in `json_streaming`, so every cleaning path
+    (batch, streaming and parallel) can write Parquet without changes. Like them, it writes to a
+    temporary file that only replaces `file_path` once every entry is written.
+    """
+
+    def __init__(self, file_path, expected_structure, batch_size=PARQUET_BATCH_SIZE):
+        """
+        :param file_path: Path of the Parquet file to write.
+        :param expected_structure: Nested dictionary mapping keys to expected types.
+        :param batch_size: Rows buffered before a row group is written.
+        """
+        self.file_path = file_path
+        self.schema = arrow_schema_for(expected_structure)
+        self.batch_size = batch_size
+        key_paths = tuple(key_path for _, key_path, _ in flatten_structure(expected_structure))
+        self.encode = partial(flatten_entry, key_paths=key_paths)
+        self.count = 0
+        self._rows = []
+        self._writer = None
+
+    def __enter__(self):
+        import pyarrow.parquet as pq
+
+        self._writer = pq.ParquetWriter(self.file_path + TEMP_SUFFIX, self.schema, compression=PARQUET_COMPRESSION)
+        return self
+
+    def write(self, item):
+        """
+        Appends one cleaned entry.
+
+        :param item: The cleaned entry.
+        """
+        self.write_encoded(self.encode(item))
+
+    def write_encoded(self, row):
+        """
+        Appends one entry that was already flattened with `self.encode`.
+
+        :param row: Tuple of column values.
+        """
+        self._rows.append(row)
+        self.count += 1
+        if len(self._rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        """
+        Writes the buffered rows as one row group.
+        """
+        import pyarrow as pa
+
+        if not self._rows:
+            return
+        columns = list(zip(*self._rows))
+        arrays = [pa.array(column, type=field.type) for column, field in zip(columns, self.schema)]
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self._rows = []
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self._flush()
+        self._writer.close()
+        self._writer = None
+        finish_temp_file(self.file_path, exc_type is None)
+        return False
+
+
+def open_cleaned_data_writer(file_path, expected_structure, indent=JSON_INDENT):
+    """
+    Opens the incremental writer for cleaned entries that matches the file extension.
+
+    :param file_path: Output path (`.parquet`, `.sqlite`, `.ndjson`/`.jsonl` or `.json`).
+    :param expected_structure: Nested dictionary mapping keys to expected types.
+    :param indent: Indentation for JSON array output, or None for compact output.
+    :return: A writer context manager.
+    """
+    if file_path.endswith(".parquet"):
+        return ParquetEntryWriter(file_path, expected_structure)
+    if file_path.endswith(".sqlite"):
+        # Imported here because the SQLite module builds on this one
+        from utility_functions.sqlite_store import SQLiteEntryWriter
+
+        return SQLiteEntryWriter(file_path, expected_structure)
+    return open_entry_writer(file_path, indent=indent)
+
+
+def read_table(file_path, columns=None):
+    """
+    Reads a Parquet file memory-mapped, optionally loading only some columns.
+
+    :param file_path: Path to the Parquet file.
+    :param columns: Optional list of column names to load.
+    :return: A `pyarrow.Table`.
+    """
+    import pyarrow.parquet as pq
+
+    return pq.read_table(file_path, columns=columns, memory_map=True)
+
+
+def write_table(table, file_path):
+    """
+    Writes an Arrow table to a Parquet file.
+
+    :param table: A `pyarrow.Table`.
+    :param file_path: Output path.
+    """
+    import pyarrow.parquet as pq
+
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    pq.write_table(table, file_path, compression=PARQUET_COMPRESSION)
+
+
+def iter_table_records(table):
+    """
+    Yields the rows of a flattened match table as nested entries, one record batch at a time.
+
+    :param table: A `pyarrow.Table` with dotted column names.
+    """
+    column_names = table.column_names
+    for batch in table.to_batches():
+        columns = [column.to_pylist() for column in batch.columns]
+        for values in zip(*columns):
+            yield unflatten_row(column_names, values)
+
+
+def export_table_to_json(table, json_path):
+    """
+    Writes a flattened match table as a nested JSON array, for people reading the data.
+
+    :param table: A `pyarrow.Table` with dotted column names.
+    :param json_path: Output JSON path.
+    """
+    with JsonArrayWriter(json_path) as writer:
+        for entry in iter_table_records(table):
+            writer.write(entry)
+
+
+def group_table_by_team(table, team_column):
+    """
+    Reorders a match table so each team's matches are contiguous. Teams appear in order of their
+    first match and matches keep their original order, like the team-based JSON file.
+
+    :param table: A `pyarrow.Table` of matches.
+    :param team_column: Name of the team number column.
+    :return: A tuple of (reordered table, list of (team, row count) in order).
+    """
+    team_rows = {}
+    for row_index, team in enumerate(table.column(team_column).to_pylist()):
+        team_rows.setdefault(team, []).append(row_index)
+    indices = [row_index for rows in team_rows.values() for row_index in rows]
+    return table.take(indices), [(team, len(rows)) for team, rows in team_rows.items()]
+
+
+def export_team_table_to_json(table, team_column, json_path):
+    """
+    Writes a team-grouped match table in the nested team-based JSON layout of script 03.
+
+    :param table: A `pyarrow.Table` grouped with `group_table_by_team`.
+    :param team_column: Name of the team number column.
+    :param json_path: Output JSON path.
+    """
+    team_data = {}
+    for entry, team in zip(iter_table_records(table), table.column(team_column).to_pylist()):
+        team_data.setdefault(team, {"matches": []})["matches"].append(entry)
+    with open(json_path, "w") as outfile:
+        json.dump(team_data, outfile, indent=4)
+
+
+def team_performance_to_frame(team_performance_data):
+    """
+    Builds the team performance DataFrame that `pd.read_json(..., orient="index")` would produce
+    from the team performance JSON file (integer team index, whole-number float columns as int64).
+
+    :param team_performance_data: Serializable dictionary of team statistics keyed by team.
+    :return: A pandas DataFrame indexed by team.
+    """
+    import pandas as pd
+
+    frame = pd.DataFrame.from_dict(team_performance_data, orient="index")
+    try:
+        frame.index = frame.index.astype("int64")
+    except (TypeError, ValueError):
+        pass  # Team keys that are not numbers stay as strings
+    for column in frame.columns:
+        values = frame[column]
+        if pd.api.types.is_float_dtype(values) and values.notna().all() and (values % 1 == 0).all():
+            frame[column] = values.astype("int64")
+    return frame
+
+
+def write_team_performance_parquet(team_performance_data, file_path):
+    """
+    Writes team statistics to Parquet. Dictionary-valued columns (value counts) are stored as JSON text.
+
+    :param team_performance_data: Serializable dictionary of team statistics keyed by team.
+    :param file_path: Output Parquet path.
+    """
+    import pyarrow as pa
+
+    frame = team_performance_to_frame(team_performance_data)
+    json_columns = [
+        column for column in frame.columns if frame[column].map(lambda value: isinstance(value, dict)).any()
+    ]
+    for column in json_columns:
+        frame[column] = frame[column].map(lambda value: json.dumps(value) if isinstance(value, dict) else None)
+
+    table = pa.Table.from_pandas(frame, preserve_index=True)
+    metadata = dict(table.schema.metadata or {})
+    metadata[JSON_COLUMNS_METADATA_KEY] = json.dumps(json_columns).encode("utf-8")
+    write_table(table.replace_schema_metadata(metadata), file_path)
+
+
+def read_team_performance_parquet(file_path, columns=None):
+    """
+    Reads team statistics written by `write_team_performance_parquet` (memory-mapped).
+
+    :param file_path: Path to the Parquet file.
+    :param columns: Optional list of statistic columns to load.
+    :return: A pandas DataFrame indexed by team.
+    """
+    import pyarrow.parquet as pq
+
+    # read_pandas also loads the team index column
+    table = pq.read_pandas(file_path, columns=columns, memory_map=True)
+    json_columns = json.loads((table.schema.metadata or {}).get(JSON_COLUMNS_METADATA_KEY, b"[]"))
+    frame = table.to_pandas()
+    for column in json_columns:
+        if column in frame.columns:
+            frame[column] = frame[column].map(lambda value: json.loads(value) if value is not None else None)
+    return frame
@@ -0,0 +1,132 @@
+import sys
+import json
+
+try:
+    import orjson  # Optional: much faster JSON encoding
+except ImportError:
+    orjson = None
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+# Serialization Backend
+# "auto": orjson when it is installed, else the standard library. "orjson" requires it; "stdlib" never uses it.
+# orjson writes NaN as `null` (the standard library writes `NaN`, which is not strict JSON) and only indents
+# by 2 spaces, so indented files use 2 spaces with orjson and 4 with the standard library.
+JSON_BACKEND = "auto"
+JSON_BACKENDS = ("auto", "orjson", "stdlib")
+
+# Output styles: "indented" for files people read, "compact" (no whitespace) for files only later stages read
+INDENTED = "indented"
+COMPACT = "compact"
+OUTPUT_STYLES = (INDENTED, COMPACT)
+
+STDLIB_INDENT = 4
+ORJSON_INDENT = 2
+COMPACT_SEPARATORS = (",", ":")  # Same bytes as orjson's compact output
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def uses_orjson():
+    """
+    Resolves `JSON_BACKEND`.
+
+    :return: True if JSON is encoded with orjson.
+    """
+    if JSON_BACKEND not in JSON_BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{JSON_BACKEND}'. Use one of: {', '.join(JSON_BACKENDS)}.")
+    if JSON_BACKEND == "orjson" and orjson is None:
+        raise ValueError("JSON_BACKEND is 'orjson', but orjson is not installed (pip install orjson).")
+    return orjson is not None and JSON_BACKEND != "stdlib"
+
+
+def check_output_style(style):
+    """
+    Validates an output style setting.
+
+    :param style: "indented" or "compact".
+    """
+    if style not in OUTPUT_STYLES:
+        raise ValueError(f"Unknown JSON output style '{style}'. Use one of: {', '.join(OUTPUT_STYLES)}.")
+
+
+def output_indent(style):
+    """
+    Returns the indentation the active backend writes for an output style.
+
+    :param style: "indented" or "compact".
+    :return: Number of spaces, or None for compact output.
+    """
+    check_output_style(style)
+    if style == COMPACT:
+        return None
+    return ORJSON_INDENT if uses_orjson() else STDLIB_INDENT
+
+
+def default_hook(obj):
+    """
+    Converts the NumPy and pandas values the statistics can contain while they are encoded,
+    so results never need a separate conversion pass before writing.
+
+    :param obj: A value the encoder cannot serialize by itself.
+    :return: A JSON-compatible value.
+    """
+    # pandas and NumPy are only checked for if a stage already imported them
+    if "pandas" in sys.modules:
+        import pandas as pd
+
+        if isinstance(obj, (pd.Series, pd.DataFrame)):
+            return obj.to_dict()
+        if isinstance(obj, (pd.Timestamp, pd.Timedelta)):
+            return str(obj)
+    if "numpy" in sys.modules:
+        import numpy as np
+
+        if isinstance(obj, (np.generic, np.ndarray)):
+            return obj.tolist()
+    if isinstance(obj, (set, frozenset, tuple)) or (hasattr(obj, "__iter__") and not isinstance(obj, (str, bytes))):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj, indent=None):
+    """
+    Encodes an object as JSON text. orjson is used whenever it can produce the requested layout
+    (compact, or its 2-space indentation); any other indentation uses the standard library.
+
+    :param obj: Object to encode.
+    :param indent: Number of spaces, or None for compact output.
+    :return: JSON text.
+    """
+    if uses_orjson() and indent in (None, ORJSON_INDENT):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent is not None:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default_hook, option=option).decode("utf-8")
+    if indent is None:
+        return json.dumps(obj, default=default_hook, separators=COMPACT_SEPARATORS)
+    return json.dumps(obj, default=default_hook, indent=indent)
+
+
+def write_json(obj, file_path, style=INDENTED):
+    """
+    Writes an object to a JSON file in an output style.
+
+    :param obj: Object to write.
+    :param file_path: Output path.
+    :param style: "indented" or "compact".
+    """
+    indent = output_indent(style)
+    if uses_orjson():
+        with open(file_path, "w", encoding="utf-8") as outfile:
+            outfile.write(dumps(obj, indent))
+        return
+    # The standard library encodes in chunks, so the whole text is never held in memory
+    with open(file_path, "w", encoding="utf-8") as outfile:
+        if indent is None:
+            json.dump(obj, outfile, default=default_hook, separators=COMPACT_SEPARATORS)
+        else:
+            json.dump(obj, outfile, default=default_hook, indent=indent)
@@ -0,0 +1,346 @@
+import json
+import os
+from functools import partial
+from utility_functions.json_output import INDENTED, dumps, output_indent
+
+try:
+    import ijson  # Optional: faster incremental parsing of large JSON arrays
+except ImportError:
+    ijson = None
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+NDJSON_EXTENSIONS = {".ndjson", ".jsonl"}  # Files with these extensions are read line by line
+READ_CHUNK_SIZE = 1 << 16  # Bytes read per step by the stdlib incremental array parser
+JSON_INDENT = output_indent(INDENTED)  # Indentation of the JSON array writer (4 spaces, or 2 with orjson)
+TEMP_SUFFIX = ".tmp"  # Writers write here first and rename the file into place once it is complete
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def is_ndjson_file(file_path):
+    """
+    Detects whether a file holds newline-delimited JSON instead of one JSON array.
+
+    Files are treated as NDJSON when their extension says so, or when the first
+    non-whitespace character is not the opening bracket of an array.
+
+    :param file_path: Path to the raw data file.
+    :return: True if the file should be read line by line.
+    """
+    if os.path.splitext(file_path)[1].lower() in NDJSON_EXTENSIONS:
+        return True
+    with open(file_path, "r") as infile:
+        while True:
+            char = infile.read(1)
+            if not char:
+                return False
+            if not char.isspace():
+                return char != "["
+
+
+def iter_ndjson_entries(file_path):
+    """
+    Yields one entry per non-blank line of an NDJSON file.
+
+    :param file_path: Path to the NDJSON file.
+    """
+    with open(file_path, "r") as infile:
+        for line_number, line in enumerate(infile, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number} of {file_path}: {e}") from e
+
+
+def _iter_array_entries_stdlib(infile, with_spans=False):
+    """
+    Incrementally decodes the items of a top-level JSON array using only the stdlib.
+
+    Only one read chunk plus the item currently being decoded is held in memory.
+
+    :param infile: Open text file positioned at the start of the document.
+    :param with_spans: If True, yields `(start, end, item)` with the character offsets of each item.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    base = 0  # Offset of `buffer[0]` in the file
+    position = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, base, position, eof
+        chunk = infile.read(READ_CHUNK_SIZE)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        base += position
+        position = 0
+
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if position >= len(buffer) or buffer[position] != "[":
+        raise ValueError("Raw data must be a list of matches.")
+    position += 1
+
+    expect_item = True
+    while True:
+        skip_whitespace()
+        if position >= len(buffer):
+            raise ValueError("Unexpected end of file inside JSON array.")
+        char = buffer[position]
+        if char == "]":
+            return
+        if char == ",":
+            if expect_item:
+                raise ValueError("Unexpected ',' inside JSON array.")
+            position += 1
+            expect_item = True
+            continue
+        if not expect_item:
+            raise ValueError(f"Expected ',' or ']' inside JSON array, got '{char}'.")
+
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+                # A value that ends exactly at the buffer edge may be truncated (e.g. numbers)
+                if end < len(buffer) or eof:
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill()
+        start, position = position, end
+        expect_item = False
+        yield (base + start, base + end, item) if with_spans else item
+
+
+def iter_json_array_entries(file_path):
+    """
+    Yields the items of a top-level JSON array one at a time.
+
+    Uses `ijson` when it is installed and falls back to a stdlib incremental decoder.
+
+    :param file_path: Path to the JSON file.
+    """
+    if ijson is not None:
+        with open(file_path, "rb") as infile:
+            try:
+                # use_float keeps numbers as int/float instead of Decimal, like `json.load`
+                yield from ijson.items(infile, "item", use_float=True)
+            except ijson.JSONError as e:
+                raise ValueError(f"Invalid JSON in {file_path}: {e}") from e
+        return
+
+    with open(file_path, "r") as infile:
+        yield from _iter_array_entries_stdlib(infile)
+
+
+def iter_json_array_spans(file_path):
+    """
+    Yields `(start, end, item)` for each item of a top-level JSON array, where `start` and `end`
+    are byte offsets of the item's text in the file.
+
+    The file is read as latin-1 so that every byte is one character. Offsets are exact for any
+    file; decoded strings are only exact for ASCII files, which the standard library writes by default.
+
+    :param file_path: Path to the JSON file.
+    """
+    with open(file_path, "r", encoding="latin-1", newline="") as infile:
+        yield from _iter_array_entries_stdlib(infile, with_spans=True)
+
+
+def iter_raw_entries(file_path):
+    """
+    Yields raw scouting entries from either a JSON array file or an NDJSON file.
+
+    :param file_path: Path to the raw data file.
+    """
+    if is_ndjson_file(file_path):
+        yield from iter_ndjson_entries(file_path)
+    else:
+        yield from iter_json_array_entries(file_path)
+
+
+def encode_array_item(item, indent=JSON_INDENT):
+    """
+    Encodes one item the way it appears inside a JSON array written by `JsonArrayWriter`.
+
+    Kept at module level so it can be sent to worker processes.
+
+    :param item: JSON-serializable item.
+    :param indent: Indentation level, or None for compact output.
+    :return: Encoded text without the separator between items.
+    """
+    if indent is None:
+        return dumps(item)
+    pad = " " * indent
+    return pad + dumps(item, indent).replace("\n", "\n" + pad)
+
+
+def encode_ndjson_item(item):
+    """
+    Encodes one item as a single NDJSON line (without the trailing newline).
+
+    :param item: JSON-serializable item.
+    :return: Encoded text.
+    """
+    return dumps(item)
+
+
+def load_raw_entries(file_path):
+    """
+    Loads every raw entry from either a JSON array file or an NDJSON file into a list.
+
+    :param file_path: Path to the raw data file.
+    :return: List of entries.
+    """
+    if is_ndjson_file(file_path):
+        return list(iter_ndjson_entries(file_path))
+    with open(file_path, "r") as infile:
+        raw_data = json.load(infile)
+    if not isinstance(raw_data, list):
+        raise ValueError("Raw data must be a list of matches.")
+    return raw_data
+
+
+def finish_temp_file(file_path, complete):
+    """
+    Moves a file written to `file_path + TEMP_SUFFIX` into place if it is complete, or removes it,
+    leaving any previous `file_path` untouched.
+
+    :param file_path: Final path.
+    :param complete: True if every item was written without an error.
+    """
+    temp_path = file_path + TEMP_SUFFIX
+    if complete:
+        os.replace(temp_path, file_path)
+    elif os.path.exists(temp_path):
+        os.remove(temp_path)
+
+
+class JsonArrayWriter:
+    """
+    Writes a JSON array one item at a time.
+
+    The output is byte-identical to encoding the whole list at once with the same indentation
+    (`json_output.dumps(items, indent)`), so files written in streaming mode can be read back by
+    every later script without changes. Items go to a temporary file that only replaces `file_path`
+    once the array is complete, so a run that fails partway never leaves a valid-looking partial file.
+    """
+
+    def __init__(self, file_path, indent=JSON_INDENT):
+        """
+        :param file_path: Path of the JSON file to write.
+        :param indent: Indentation level, or None for a compact single-line array.
+        """
+        self.file_path = file_path
+        self.indent = indent
+        self.encode = partial(encode_array_item, indent=indent)
+        self.count = 0
+        self._outfile = None
+
+    def __enter__(self):
+        self._outfile = open(self.file_path + TEMP_SUFFIX, "w", encoding="utf-8")
+        self._outfile.write("[")
+        return self
+
+    def write(self, item):
+        """
+        Appends one item to the array.
+
+        :param item: JSON-serializable item.
+        """
+        self.write_encoded(self.encode(item))
+
+    def write_encoded(self, text):
+        """
+        Appends one item that was already encoded with `self.encode`.
+
+        :param text: Encoded item.
+        """
+        if self.indent is None:
+            prefix = "," if self.count else ""
+        else:
+            prefix = ",\n" if self.count else "\n"
+        self._outfile.write(prefix + text)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            if self.count and self.indent is not None:
+                self._outfile.write("\n")
+            self._outfile.write("]")
+        self._outfile.close()
+        self._outfile = None
+        finish_temp_file(self.file_path, exc_type is None)
+        return False
+
+
+class NdjsonWriter:
+    """
+    Writes one JSON document per line (to a temporary file that replaces `file_path` once every line is written).
+    """
+
+    def __init__(self, file_path):
+        """
+        :param file_path: Path of the NDJSON file to write.
+        """
+        self.file_path = file_path
+        self.encode = encode_ndjson_item
+        self.count = 0
+        self._outfile = None
+
+    def __enter__(self):
+        self._outfile = open(self.file_path + TEMP_SUFFIX, "w", encoding="utf-8")
+        return self
+
+    def write(self, item):
+        """
+        Appends one item as a new line.
+
+        :param item: JSON-serializable item.
+        """
+        self.write_encoded(self.encode(item))
+
+    def write_encoded(self, text):
+        """
+        Appends one item that was already encoded with `self.encode`.
+
+        :param text: Encoded item.
+        """
+        self._outfile.write(text + "\n")
+        self.count += 1
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._outfile.close()
+        self._outfile = None
+        finish_temp_file(self.file_path, exc_type is None)
+        return False
+
+
+def open_entry_writer(file_path, indent=JSON_INDENT):
+    """
+    Opens the incremental writer that matches the file extension of `file_path`.
+
+    :param file_path: Output path (`.ndjson`/`.jsonl` for NDJSON, anything else for a JSON array).
+    :param indent: Indentation for JSON array output.
+    :return: A `JsonArrayWriter` or `NdjsonWriter` context manager.
+    """
+    if os.path.splitext(file_path)[1].lower() in NDJSON_EXTENSIONS:
+        return NdjsonWriter(file_path)
+    return JsonArrayWriter(file_path, indent=indent)
@@ -0,0 +1,363 @@
+import os
+import json
+import time
+import types
+import hashlib
+import functools
+
+# pandas is imported inside the functions that need it, so listing metrics stays fast.
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+CACHE_VERSION = 1  # Bump when the cache layout changes so old caches are ignored
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def _code_fingerprint(code):
+    """
+    Describes a function's compiled code without memory addresses, so an edited calculation
+    gets a new cache key while an unchanged one keeps its key across runs.
+
+    :param code: A code object.
+    :return: A string.
+    """
+    parts = [code.co_code.hex(), repr(code.co_names)]
+    for const in code.co_consts:
+        parts.append(_code_fingerprint(const) if hasattr(const, "co_code") else repr(const))
+    return "|".join(parts)
+
+
+def _global_names(code):
+    """
+    :return: Set of the global and attribute names a code object (and the functions nested in it) refers to.
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            names |= _global_names(const)
+    return names
+
+
+@functools.lru_cache(maxsize=None)
+def _library_prefixes():
+    """
+    :return: Tuple of the folders holding the standard library and installed packages.
+    """
+    import sysconfig
+
+    return tuple(sorted({
+        os.path.abspath(path) + os.sep for name, path in sysconfig.get_paths().items()
+        if name in ("stdlib", "platstdlib", "purelib", "platlib")
+    }))
+
+
+def _is_library_file(file_name):
+    """
+    :return: True if a source file belongs to the standard library or an installed package.
+    """
+    return os.path.abspath(file_name).startswith(_library_prefixes())
+
+
+def _value_fingerprint(value, seen):
+    """
+    Describes a value a calculation uses (a default, a closure variable or a global).
+
+    Functions of the project are described by their code and everything they use in turn; modules, classes and
+    library functions by their names. Other values are described by their `repr`, and arrays and DataFrames by a
+    hash of their contents. A value whose `repr` holds a memory address never matches, so it is recalculated.
+
+    :param value: The value.
+    :param seen: Ids of the functions already being described (for recursive helpers).
+    :return: A string.
+    """
+    if isinstance(value, types.FunctionType) and not _is_library_file(value.__code__.co_filename):
+        return _function_fingerprint(value, seen)
+    if isinstance(value, (types.ModuleType, type, types.FunctionType, types.BuiltinFunctionType)):
+        return f"{getattr(value, '__module__', None) or ''}:{getattr(value, '__qualname__', value.__name__)}"
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}({','.join(_value_fingerprint(item, seen) for item in value)})"
+    if isinstance(value, (set, frozenset)):
+        return f"{type(value).__name__}({','.join(sorted(_value_fingerprint(item, seen) for item in value))})"
+    if isinstance(value, dict):
+        items = sorted(f"{key!r}:{_value_fingerprint(item, seen)}" for key, item in value.items())
+        return f"dict({','.join(items)})"
+    module = type(value).__module__.split(".")[0]
+    if module == "numpy" and hasattr(value, "tobytes"):
+        return f"ndarray({value.dtype},{value.shape},{hashlib.blake2b(value.tobytes(), digest_size=16).hexdigest()})"
+    if module == "pandas" and hasattr(value, "to_frame"):
+        value = value.to_frame()
+    if module == "pandas" and hasattr(value, "columns"):
+        return f"frame({_hash_frame(value)})"
+    return repr(value)
+
+
+def _function_fingerprint(function, seen=None):
+    """
+    Describes what a calculation's result depends on besides its input: its code, default arguments, closure
+    variables and the current values of the globals it uses, including the helper functions it calls. So a
+    changed weight in a closure, a changed constant or an edited helper all give the metric a new cache key.
+
+    :param function: A function (e.g. a metric's calculation).
+    :param seen: Ids of the functions already being described (for recursive helpers).
+    :return: A string.
+    """
+    seen = set() if seen is None else seen
+    if id(function) in seen:
+        return f"recursive:{function.__qualname__}"
+    seen = seen | {id(function)}
+    code = function.__code__
+    parts = [_code_fingerprint(code)]
+    parts.append(_value_fingerprint(function.__defaults__ or (), seen))
+    parts.append(_value_fingerprint(function.__kwdefaults__ or {}, seen))
+    for name, cell in zip(code.co_freevars, function.__closure__ or ()):
+        try:
+            parts.append(f"{name}={_value_fingerprint(cell.cell_contents, seen)}")
+        except ValueError:  # A closure variable that is not assigned yet
+            parts.append(f"{name}=<empty>")
+    for name in sorted(_global_names(code)):
+        if name in function.__globals__:
+            parts.append(f"{name}={_value_fingerprint(function.__globals__[name], seen)}")
+    return "|".join(parts)
+
+
+def _hash_frame(frame):
+    """
+    Hashes the values, index and column names of a DataFrame.
+
+    :param frame: A pandas DataFrame.
+    :return: Hex digest string.
+    """
+    import pandas as pd
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([str(column) for column in frame.columns]).encode("utf-8"))
+    try:
+        digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    except TypeError:
+        # Columns holding dictionaries (e.g. value counts) can't be hashed directly
+        digest.update(frame.to_json(orient="split").encode("utf-8"))
+    return digest.hexdigest()
+
+
+class MetricRegistry:
+    """
+    Custom team metrics with declared inputs, evaluated in dependency order with a result cache.
+
+    Each metric declares the columns of the team performance data it reads (`columns`) and the
+    metrics it builds on (`depends_on`). Its calculation receives a DataFrame with exactly those
+    columns (dependencies appear as columns named after the metric) and returns a Series.
+    A metric that declares no columns receives every column plus every metric evaluated before it.
+    Results are cached by a hash of the metric's code (with the values and helper functions it uses), its
+    version and its inputs, so unchanged metrics are not recalculated.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, name, calculation, description="", columns=None, depends_on=(), ascending=False, version=None):
+        """
+        Adds a metric.
+
+        :param name: Metric name (also the name of its output column).
+        :param calculation: Callable taking the input DataFrame and returning a Series indexed by team.
+        :param description: Human-readable description.
+        :param columns: List of input column names, a callable that picks them from the list of
+                        available column names, or None for all columns.
+        :param depends_on: Names of metrics whose results this metric uses.
+        :param ascending: True if lower values are better.
+        :param version: Optional version, part of the cache key. Change it when the result changes for a reason
+                        the cache can't see (e.g. a file the calculation reads, or a library upgrade).
+        """
+        if name in self.metrics:
+            raise ValueError(f"Metric '{name}' is registered twice.")
+        self.metrics[name] = {
+            "calculation": calculation,
+            "description": description,
+            "columns": columns,
+            "depends_on": tuple(depends_on),
+            "ascending": ascending,
+            "version": version,
+        }
+
+    @classmethod
+    def from_config(cls, custom_metrics):
+        """
+        Builds a registry from a `CUSTOM_METRICS` dictionary (see script 05).
+
+        :param custom_metrics: Dictionary of metric name -> metric details.
+        :return: A `MetricRegistry`.
+        """
+        registry = cls()
+        for name, details in custom_metrics.items():
+            registry.register(
+                name,
+                details["calculation"],
+                description=details.get("description", ""),
+                columns=details.get("columns"),
+                depends_on=details.get("depends_on", ()),
+                ascending=details.get("ascending", False),
+                version=details.get("version"),
+            )
+        return registry
+
+    def evaluation_order(self):
+        """
+        Orders metrics so each comes after the metrics it depends on. Independent metrics keep
+        their registration order.
+
+        :return: List of metric names.
+        """
+        order, state = [], {}  # state: "visiting" or "done"
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Circular metric dependency: {' -> '.join(path + [name])}")
+            if name not in self.metrics:
+                raise ValueError(f"Metric '{path[-1]}' depends on unknown metric '{name}'.")
+            state[name] = "visiting"
+            for dependency in self.metrics[name]["depends_on"]:
+                visit(dependency, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.metrics:
+            visit(name, [])
+        return order
+
+    def _input_columns(self, name, available_columns):
+        """
+        Resolves the declared input columns of a metric.
+
+        :param name: Metric name.
+        :param available_columns: Column names of the team performance data.
+        :return: List of column names, or None for all columns.
+        """
+        columns = self.metrics[name]["columns"]
+        if columns is None:
+            return None
+        if callable(columns):
+            columns = columns(list(available_columns))
+        missing = [column for column in columns if column not in available_columns]
+        if missing:
+            raise KeyError(f"Metric '{name}' needs missing columns: {missing}")
+        return list(columns)
+
+    def evaluate(self, team_performance_data, cache_path=None, on_error=None):
+        """
+        Evaluates every metric in dependency order, reusing cached results whose inputs are unchanged.
+
+        :param team_performance_data: DataFrame of team statistics indexed by team.
+        :param cache_path: Optional path of the JSON result cache. Entries for removed metrics or
+                           changed inputs are evicted when the cache is saved.
+        :param on_error: Optional callable(name, exception) called when a metric fails. Metrics that
+                         depend on a failed metric are skipped.
+        :return: Tuple of (dictionary of metric name -> Series, list of profile records
+                 (name, "computed"/"cached"/"failed"/"skipped", hash seconds, calculation seconds)).
+        """
+        import pandas as pd
+
+        cache = _load_cache(cache_path) if cache_path else {}
+        new_cache = {}
+        results, keys, profile = {}, {}, []
+        frame = team_performance_data
+
+        for name in self.evaluation_order():
+            metric = self.metrics[name]
+            if any(dependency not in results for dependency in metric["depends_on"]):
+                profile.append((name, "skipped", 0.0, 0.0))
+                continue
+
+            start = time.perf_counter()
+            try:
+                columns = self._input_columns(name, team_performance_data.columns)
+                if columns is None:
+                    # Undeclared inputs: every column plus every metric evaluated so far
+                    inputs = frame.assign(**results) if results else frame
+                else:
+                    inputs = team_performance_data[columns].assign(
+                        **{dependency: results[dependency] for dependency in metric["depends_on"]}
+                    )
+                key_parts = [_value_fingerprint(metric["calculation"], set()), repr(metric["version"]), _hash_frame(inputs)]
+                key_parts += [keys[dependency] for dependency in metric["depends_on"]]
+                key = hashlib.blake2b("|".join(key_parts).encode("utf-8"), digest_size=16).hexdigest()
+            except Exception as e:
+                profile.append((name, "failed", time.perf_counter() - start, 0.0))
+                if on_error is not None:
+                    on_error(name, e)
+                continue
+            hash_seconds = time.perf_counter() - start
+
+            cached = cache.get(name)
+            if cached is not None and cached["key"] == key:
+                result = pd.Series(cached["values"], index=pd.Index(cached["index"], name=frame.index.name), name=name)
+                status, calculation_seconds = "cached", 0.0
+            else:
+                start = time.perf_counter()
+                try:
+                    result = metric["calculation"](inputs)
+                except Exception as e:
+                    profile.append((name, "failed", hash_seconds, time.perf_counter() - start))
+                    if on_error is not None:
+                        on_error(name, e)
+                    continue
+                status, calculation_seconds = "computed", time.perf_counter() - start
+
+            results[name], keys[name] = result, key
+            if isinstance(result, pd.Series):
+                new_cache[name] = {"key": key, "index": result.index.tolist(), "values": result.tolist()}
+            profile.append((name, status, hash_seconds, calculation_seconds))
+
+        if cache_path:
+            _save_cache(cache_path, new_cache)
+        return results, profile
+
+
+def _load_cache(cache_path):
+    """
+    Loads the metric result cache, or an empty one if it is missing, unreadable or outdated.
+
+    :param cache_path: Path of the JSON cache.
+    :return: Dictionary of metric name -> {"key", "index", "values"}.
+    """
+    try:
+        with open(cache_path, "r") as infile:
+            cache = json.load(infile)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("metrics", {})
+
+
+def _save_cache(cache_path, metrics):
+    """
+    Writes the metric result cache atomically (write to a temporary file, then rename).
+
+    :param cache_path: Path of the JSON cache.
+    :param metrics: Dictionary of metric name -> {"key", "index", "values"}.
+    """
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    with open(cache_path + ".tmp", "w") as outfile:
+        json.dump({"version": CACHE_VERSION, "metrics": metrics}, outfile)
+    os.replace(cache_path + ".tmp", cache_path)
+
+
+def print_metric_profile(profile):
+    """
+    Prints the time spent on each metric.
+
+    :param profile: Profile records from `MetricRegistry.evaluate`.
+    """
+    print("[INFO] Metric profile (hash = hashing inputs for the cache, calc = running the calculation):")
+    width = max((len(name) for name, _, _, _ in profile), default=0)
+    for name, status, hash_seconds, calculation_seconds in profile:
+        print(f"[INFO]   {name:<{width}} | {status:<8} | hash {hash_seconds * 1000:8.2f} ms | "
+              f"calc {calculation_seconds * 1000:8.2f} ms")
+    total = sum(hash_seconds + calculation_seconds for _, _, hash_seconds, calculation_seconds in profile)
+    print(f"[INFO]   {'total':<{width}} | {'':<8} | {total * 1000:.2f} ms")
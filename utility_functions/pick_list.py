@@ -0,0 +1,246 @@
+import math
+
+# NumPy is imported inside the functions that need it, so importing this module is cheap.
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+DEFAULT_PICK_LIST_SIZE = 24  # Teams listed when no size is given (enough for every pick of an event)
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def parse_weights(text):
+    """
+    Parses weights written as "name:weight,name:weight" (or with "=" instead of ":").
+
+    :param text: The weights text, e.g. "var1_average:2,consistency:1".
+    :return: Dictionary of name -> weight, in the order given.
+    :raises ValueError: If an item has no weight or the weight is not a finite number.
+    """
+    weights = {}
+    for item in text.split(","):
+        if not item.strip():
+            continue
+        name, separator, weight = item.replace("=", ":").rpartition(":")
+        if not separator or not name.strip():
+            raise ValueError(f"Weights must be written as name:weight, got: {item.strip()}")
+        try:
+            weights[name.strip()] = float(weight)
+        except ValueError:
+            raise ValueError(f"The weight of {name.strip()} is not a number: {weight.strip()}") from None
+        # float() also accepts "nan" and "inf", which would turn every score into NaN or infinity
+        if not math.isfinite(weights[name.strip()]):
+            raise ValueError(f"The weight of {name.strip()} must be a finite number: {weight.strip()}")
+    return weights
+
+
+def numeric_columns(frame):
+    """
+    Lists the columns of a team DataFrame a pick list can weight (numbers, not bools or ranks).
+
+    :param frame: Team DataFrame (one row per team).
+    :return: List of column names in frame order.
+    """
+    import pandas as pd
+
+    return [
+        column for column in frame.columns
+        if pd.api.types.is_numeric_dtype(frame[column]) and not pd.api.types.is_bool_dtype(frame[column])
+        and not str(column).endswith("_rank")
+    ]
+
+
+class PickListEngine:
+    """
+    Ranks teams by a weighted sum of many metrics, fast enough to re-rank on every change during alliance selection.
+
+    The metric matrix is z-normalized once (teams x metrics, NumPy): each column is centred and divided by its
+    standard deviation, so weights are comparable across metrics, and columns where lower is better are flipped,
+    so a positive weight always favours better teams. A missing value counts as the average (0).
+    After that, a weight change is one matrix-vector product, the top N come from `argpartition`, and picked
+    teams are excluded with a boolean mask, without rebuilding anything.
+
+    :param teams: List of team names, one per row.
+    :param names: List of metric or statistic names, one per column.
+    :param values: Array-like of shape (teams, names); NaN for missing values.
+    :param ascending_names: Names where lower values are better.
+    """
+
+    def __init__(self, teams, names, values, ascending_names=()):
+        import numpy as np
+
+        self.teams = [str(team) for team in teams]
+        self.names = list(names)
+        self._team_rows = {team: row for row, team in enumerate(self.teams)}
+        self._name_columns = {name: column for column, name in enumerate(self.names)}
+        values = np.array(values, dtype=np.float64).reshape(len(self.teams), len(self.names))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            present = np.isfinite(values)
+            counts = present.sum(axis=0)
+            means = np.where(present, values, 0.0).sum(axis=0) / np.maximum(counts, 1)
+            centred = np.where(present, values - means, 0.0)
+            deviations = np.sqrt((centred ** 2).sum(axis=0) / np.maximum(counts, 1))
+            matrix = np.where(deviations > 0, centred / deviations, 0.0)
+        ascending_names = set(ascending_names)
+        directions = np.array([-1.0 if name in ascending_names else 1.0 for name in self.names])
+        self.matrix = np.ascontiguousarray(matrix * directions)
+        self.weights = np.zeros(len(self.names))
+        self.scores = np.zeros(len(self.teams))
+        self.available = np.ones(len(self.teams), dtype=bool)
+
+    @classmethod
+    def from_frame(cls, frame, names=None, ascending_names=()):
+        """
+        Builds an engine from a team DataFrame (one row per team, e.g. script 05's team performance data).
+
+        :param frame: Team DataFrame.
+        :param names: Columns to include (defaults to every numeric column).
+        :param ascending_names: Names where lower values are better.
+        :return: A `PickListEngine`.
+        """
+        names = numeric_columns(frame) if names is None else list(names)
+        return cls(frame.index, names, frame[names].to_numpy(dtype="float64", na_value=float("nan")), ascending_names)
+
+    @classmethod
+    def from_records(cls, team_records, names, ascending_names=()):
+        """
+        Builds an engine from team statistics dictionaries (e.g. the JSON outputs of scripts 04 and 05).
+
+        :param team_records: Dictionary of team -> dictionary of name -> value.
+        :param names: Names to include; values that are missing, bools or not numbers count as missing.
+        :param ascending_names: Names where lower values are better.
+        :return: A `PickListEngine`.
+        """
+        nan = float("nan")
+        values = [
+            [value if isinstance(value, (int, float)) and not isinstance(value, bool) else nan
+             for value in map(record.get, names)]
+            for record in team_records.values()
+        ]
+        return cls(list(team_records), names, values, ascending_names)
+
+    def weight_vector(self, weights):
+        """
+        Turns a dictionary of weights into a vector aligned with the matrix columns (unweighted columns are 0).
+
+        :param weights: Dictionary of name -> weight.
+        :return: NumPy array of weights.
+        :raises ValueError: If a name is not a column or a weight is not a finite number.
+        """
+        import numpy as np
+
+        vector = np.zeros(len(self.names))
+        for name, weight in weights.items():
+            column = self._name_columns.get(name)
+            if column is None:
+                raise ValueError(f"Unknown metric or statistic: {name}")
+            if not math.isfinite(weight):
+                raise ValueError(f"The weight of {name} must be a finite number: {weight}")
+            vector[column] = weight
+        return vector
+
+    def set_weights(self, weights):
+        """
+        Re-scores every team with new weights (one matrix-vector product).
+
+        :param weights: Dictionary of name -> weight.
+        """
+        self.weights = self.weight_vector(weights)
+        self.scores = self.matrix @ self.weights
+
+    def _rows(self, teams):
+        """
+        :return: Row numbers of teams; unknown teams are skipped.
+        """
+        return [self._team_rows[team] for team in map(str, teams) if team in self._team_rows]
+
+    def pick(self, *teams):
+        """
+        Marks teams as picked, so they are left out of the pick list.
+        """
+        self.available[self._rows(teams)] = False
+
+    def unpick(self, *teams):
+        """
+        Puts picked teams back in the pick list (e.g. a declined invitation).
+        """
+        self.available[self._rows(teams)] = True
+
+    def reset_picks(self):
+        """
+        Makes every team available again.
+        """
+        self.available[:] = True
+
+    def available_mask(self, picked):
+        """
+        Builds an availability mask without changing the engine's own picks.
+
+        :param picked: Iterable of picked teams.
+        :return: Boolean NumPy array, False for picked teams.
+        """
+        import numpy as np
+
+        available = np.ones(len(self.teams), dtype=bool)
+        available[self._rows(picked)] = False
+        return available
+
+    def top(self, n=DEFAULT_PICK_LIST_SIZE, scores=None, available=None):
+        """
+        Lists the best available teams by score. Only the top N are sorted (`argpartition`), with ties in team order.
+
+        :param n: Number of teams to list (None for every available team).
+        :param scores: Scores to rank by (defaults to the scores of the current weights).
+        :param available: Availability mask (defaults to the engine's picks).
+        :return: List of (team, score), best first.
+        """
+        import numpy as np
+
+        scores = self.scores if scores is None else scores
+        available = self.available if available is None else available
+        rows = np.flatnonzero(available)
+        n = len(rows) if n is None else max(0, min(n, len(rows)))
+        if n == 0:
+            return []
+        candidate_scores = scores[rows]
+        if n < len(rows):
+            selected = np.argpartition(-candidate_scores, n - 1)[:n]
+            rows, candidate_scores = rows[selected], candidate_scores[selected]
+        order = np.lexsort((rows, -candidate_scores))
+        return [(self.teams[row], float(score)) for row, score in zip(rows[order].tolist(), candidate_scores[order].tolist())]
+
+    def rank(self, weights, picked=(), n=DEFAULT_PICK_LIST_SIZE):
+        """
+        Ranks teams with other weights and picks, without changing the engine's state (e.g. one request per tablet).
+
+        :param weights: Dictionary of name -> weight.
+        :param picked: Iterable of picked teams.
+        :param n: Number of teams to list (None for every available team).
+        :return: List of (team, score), best first.
+        """
+        return self.top(n, self.matrix @ self.weight_vector(weights), self.available_mask(picked))
+
+
+def write_pick_list(pick_list, weights, picked, file_path):
+    """
+    Writes a pick list as a text report.
+
+    :param pick_list: List of (team, score), best first.
+    :param weights: Dictionary of name -> weight it was scored with.
+    :param picked: Teams left out as already picked.
+    :param file_path: Output path.
+    """
+    with open(file_path, "w") as pick_list_file:
+        pick_list_file.write("Pick List\n")
+        pick_list_file.write("=" * 80 + "\n\n")
+        pick_list_file.write("Weights (on z-scores across teams; lower-is-better metrics are flipped):\n")
+        for name, weight in weights.items():
+            pick_list_file.write(f"  {name}: {weight:g}\n")
+        if picked:
+            pick_list_file.write(f"Already picked: {', '.join(map(str, picked))}\n")
+        pick_list_file.write("\n")
+        for position, (team, score) in enumerate(pick_list, start=1):
+            pick_list_file.write(f"{position:>3}. {team:<10} {score:8.3f}\n")
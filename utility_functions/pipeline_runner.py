@@ -0,0 +1,208 @@
+import os
+import time
+import argparse
+import importlib.util
+from utility_functions.print_formats import seperation_bar
+from utility_functions.instrumentation import StageFailed, update_run_report
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+
+# (stage, script file, keyword the previous stage's result is handed over as, accepts `write_intermediates`).
+# A result is only handed over from the stage directly before it in this list.
+PIPELINE_STAGES = [
+    ("01", "01_clear_files.py", None, False),
+    ("02", "02_data_cleaning_and_preprocessing.py", None, True),
+    ("03", "03_team_based_match_data_generation.py", "cleaned_data", True),
+    ("04", "04_data_analysis_and_statistics_aggregation.py", "team_data", False),
+    ("05", "05_team_comparison_analysis.py", "team_performance_data", False),
+]
+COMMAND_LINE_STAGES = {"01", "02", "03", "04", "05"}  # Stages with their own command-line options
+INCREMENTAL_STAGES = {"02", "03", "04"}  # Stages that accept `--incremental`
+INSTRUMENTED_STAGES = {"02", "03", "04", "05"}  # Stages that accept `--profile` and `--trace-memory`
+CLEAR_STAGE = "01"
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def load_stage(script_name):
+    """
+    Imports a pipeline script as a module. Its main section is guarded, so nothing runs yet.
+
+    :param script_name: File name of the script inside `scripts/`.
+    :return: The script module.
+    """
+    module_name = "pipeline_stage_" + script_name.split("_", 1)[0]
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(SCRIPTS_DIR, script_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_pipeline(stages, write_intermediates=True, incremental=False, profile=False, trace_memory=False,
+                 stage_arguments=None):
+    """
+    Runs pipeline stages in one process, handing each stage's result to the next in memory.
+
+    A stage that returns None (e.g. script 02 in streaming mode) makes the next stage read its
+    input from disk, exactly as when the scripts are run one after another. So does a stage whose
+    upstream stage was not selected (e.g. script 04 in `--stages 02 04`). A stage that fails
+    raises `StageFailed`, and the pipeline stops there: later stages never run on old data.
+
+    In incremental mode script 01 only removes stale files (`--mode stale`), so the incremental
+    caches and current outputs in `data/processed` and `outputs` survive.
+
+    :param stages: Stage names to run, in pipeline order (e.g. ["02", "03", "04", "05"]).
+    :param write_intermediates: If False, scripts 02 and 03 keep their data in memory instead of
+                                writing it to `data/processed`.
+    :param incremental: If True, scripts 02-04 run with `--incremental` and script 01 with `--mode stale`.
+    :param profile: If True, scripts 02-05 run with `--profile` (a cProfile dump per stage).
+    :param trace_memory: If True, scripts 02-05 run with `--trace-memory` (tracemalloc peak per stage).
+    :param stage_arguments: Optional dictionary of stage -> extra command-line arguments (e.g. {"02": ["--input", path]}).
+    :return: List of (stage label, seconds), starting with the time spent importing the stages.
+    :raises StageFailed: If a stage failed; its `timings` attribute holds the timings up to and including it.
+    """
+    selected = [stage for stage in PIPELINE_STAGES if stage[0] in stages]
+    upstream = {stage[0]: previous[0] for previous, stage in zip(PIPELINE_STAGES, PIPELINE_STAGES[1:])}
+
+    start = time.perf_counter()
+    modules = {name: load_stage(script_name) for name, script_name, _, _ in selected}
+    timings = [("import", time.perf_counter() - start)]
+
+    result, previous_name = None, None
+    for name, _, input_keyword, accepts_write_flag in selected:
+        kwargs = {}
+        if name in COMMAND_LINE_STAGES:
+            # Never let a stage parse the runner's own command line
+            kwargs["argv"] = ["--incremental"] if incremental and name in INCREMENTAL_STAGES else []
+            if name == CLEAR_STAGE and incremental:
+                kwargs["argv"] = ["--mode", "stale"]
+            if name in INSTRUMENTED_STAGES:
+                kwargs["argv"] += ["--profile"] * profile + ["--trace-memory"] * trace_memory
+            kwargs["argv"] += (stage_arguments or {}).get(name, [])
+        if input_keyword is not None and previous_name == upstream.get(name):
+            kwargs[input_keyword] = result
+        if accepts_write_flag:
+            kwargs["write_intermediates"] = write_intermediates
+
+        start = time.perf_counter()
+        try:
+            result = modules[name].main(**kwargs)
+        except StageFailed as e:
+            timings.append((name, time.perf_counter() - start))
+            e.timings = timings
+            raise
+        timings.append((name, time.perf_counter() - start))
+        previous_name = name
+
+    return timings
+
+
+def print_timings(timings):
+    """
+    Prints the per-stage timing summary.
+
+    :param timings: List of (stage label, seconds) from `run_pipeline`.
+    """
+    print(seperation_bar)
+    print("Pipeline Timings:\n")
+    for label, seconds in timings:
+        label = label if label == "import" else f"script {label}"
+        print(f"  {label:<10} {seconds:8.3f} s")
+    print(f"  {'total':<10} {sum(seconds for _, seconds in timings):8.3f} s")
+    print(seperation_bar)
+
+
+def record_timings(timings):
+    """
+    Adds the runner's own timings (stage imports and each stage's wall time) to the run report,
+    next to the per-stage records the scripts write themselves.
+
+    :param timings: List of (stage label, seconds) from `run_pipeline`.
+    """
+    try:
+        update_run_report("pipeline", {
+            "import_s": round(timings[0][1], 4),
+            "stages_s": {label: round(seconds, 4) for label, seconds in timings[1:]},
+            "total_s": round(sum(seconds for _, seconds in timings), 4),
+        })
+    except OSError as e:
+        print(f"[ERROR] Could not update the run report: {e}")
+
+
+def main(argv=None):
+    """
+    Command-line entry point: `python -m utility_functions.pipeline_runner run`.
+
+    :param argv: Command-line arguments (defaults to `sys.argv`).
+    """
+    parser = argparse.ArgumentParser(description="Run the scouting data pipeline in a single process.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Run scripts 01-05 in one process.")
+    run_parser.add_argument("--stages", nargs="+", default=[stage[0] for stage in PIPELINE_STAGES],
+                            choices=[stage[0] for stage in PIPELINE_STAGES], help="Stages to run (default: all).")
+    run_parser.add_argument("--no-intermediates", action="store_true",
+                            help="Keep cleaned and team-based data in memory instead of writing it to data/processed.")
+    run_parser.add_argument("--incremental", action="store_true",
+                            help="Run scripts 02-04 in incremental mode (script 01 only removes stale files).")
+    run_parser.add_argument("--profile", action="store_true",
+                            help="Run scripts 02-05 under cProfile and write one profile per stage.")
+    run_parser.add_argument("--trace-memory", action="store_true",
+                            help="Record each stage's peak of Python allocations with tracemalloc (slower).")
+    watch_parser = subparsers.add_parser(
+        "watch", help="Re-run scripts 02-05 whenever new raw data lands (incremental, debounced).")
+    watch_parser.add_argument("--input", default=None,
+                              help="Raw data to watch and clean: a file, a folder or a glob (default: script 02's path).")
+    watch_parser.add_argument("--poll", type=float, default=None, help="Seconds between checks of the raw files.")
+    watch_parser.add_argument("--debounce", type=float, default=None,
+                              help="Quiet seconds after the last change before a run starts.")
+    watch_parser.add_argument("--max-wait", type=float, default=None,
+                              help="Longest wait in seconds after the first change before a run starts.")
+    watch_parser.add_argument("--no-initial-run", action="store_true",
+                              help="Do not run the pipeline at start, only when something changes.")
+    watch_parser.add_argument("--no-scripts", action="store_true", help="Do not re-run stages whose script was edited.")
+    watch_parser.add_argument("--max-runs", type=int, default=None, help="Stop after this many runs.")
+    args = parser.parse_args(argv)
+
+    if args.command == "watch":
+        # Imported here: the watcher imports this module
+        from utility_functions import pipeline_watcher
+
+        watcher = pipeline_watcher.PipelineWatcher(
+            args.input or pipeline_watcher.default_raw_path(),
+            poll_interval=pipeline_watcher.POLL_INTERVAL if args.poll is None else args.poll,
+            debounce=pipeline_watcher.DEBOUNCE_SECONDS if args.debounce is None else args.debounce,
+            max_wait=pipeline_watcher.MAX_WAIT_SECONDS if args.max_wait is None else args.max_wait,
+            watch_scripts=not args.no_scripts,
+        )
+        watcher.watch(initial_run=not args.no_initial_run, max_runs=args.max_runs)
+        return
+
+    try:
+        timings = run_pipeline(
+            args.stages,
+            write_intermediates=not args.no_intermediates,
+            incremental=args.incremental,
+            profile=args.profile,
+            trace_memory=args.trace_memory,
+        )
+    except StageFailed as e:
+        skipped = [stage for stage in args.stages if stage > e.stage]
+        print(f"[ERROR] Script {e.stage} failed; the pipeline stopped"
+              + (f" before script(s) {', '.join(sorted(skipped))}." if skipped else "."))
+        print_timings(e.timings)
+        record_timings(e.timings)
+        raise SystemExit(1)
+    print_timings(timings)
+    record_timings(timings)
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+if __name__ == "__main__":
+    main()
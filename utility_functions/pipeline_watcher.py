@@ -0,0 +1,253 @@
+import os
+import json
+import time
+from utility_functions.print_formats import seperation_bar
+from utility_functions.raw_sources import resolve_raw_files
+from utility_functions.instrumentation import StageFailed
+from utility_functions.pipeline_runner import (
+    PIPELINE_STAGES,
+    SCRIPTS_DIR,
+    load_stage,
+    print_timings,
+    record_timings,
+    run_pipeline,
+)
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+CLEANING_SCRIPT = "02_data_cleaning_and_preprocessing.py"  # Its RAW_MATCH_DATA_PATH is watched by default
+WATCH_LOG_PATH = "outputs/statistics/watch_log.ndjson"  # One line per run: stages, changed files and latency
+POLL_INTERVAL = 0.5  # Seconds between checks of the raw files
+DEBOUNCE_SECONDS = 2.0  # Quiet time after the last change before a run starts (a sync writes several files)
+MAX_WAIT_SECONDS = 15.0  # Longest wait after the first change, so a source that keeps writing still gets runs
+RAW_STAGE = "02"  # First stage that reads the raw files
+WATCHED_STAGES = [stage for stage, _, _, _ in PIPELINE_STAGES if stage >= RAW_STAGE]  # Script 01 never runs
+CHANGES_LISTED = 5  # Changed files named in each log line
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def file_stamps(file_paths):
+    """
+    Returns the size and modification time of each file that exists.
+
+    :param file_paths: Iterable of file paths.
+    :return: Dictionary of path -> (size in bytes, mtime in nanoseconds).
+    """
+    stamps = {}
+    for file_path in file_paths:
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            continue
+        stamps[file_path] = (stat.st_size, stat.st_mtime_ns)
+    return stamps
+
+
+def raw_file_stamps(raw_path):
+    """
+    Stamps the raw files script 02 would read (a file, a folder or a glob, see `resolve_raw_files`).
+
+    :param raw_path: Raw data path.
+    :return: Dictionary of path -> (size, mtime); empty while there are no raw files yet.
+    """
+    try:
+        return file_stamps(resolve_raw_files(raw_path))
+    except ValueError:
+        return {}
+
+
+def changed_paths(before, after):
+    """
+    :return: Sorted list of paths that were added, removed or rewritten between two stamp dictionaries.
+    """
+    return sorted(path for path in before.keys() | after.keys() if before.get(path) != after.get(path))
+
+
+class PipelineWatcher:
+    """
+    Re-runs the pipeline when new raw data lands, e.g. tablet exports synced into `data/raw` during an event.
+
+    The raw files (and the stage scripts) are polled for size and modification time changes. A burst of writes is
+    debounced: a run starts once nothing changed for `debounce` seconds, or `max_wait` seconds after the first change.
+    Only the stages whose inputs changed run:
+    - New or changed raw files: scripts 02-05, with 02-04 incremental (only the touched teams are rebuilt).
+    - An edited script (e.g. a new custom metric in script 05): that stage and the ones after it, as a full run.
+    Runs never overlap: they run in this process one at a time, and everything that changes during a run is
+    coalesced into the next one. Each run logs its latency from the changed files landing to refreshed outputs.
+
+    :param raw_path: Raw data path (a file, a folder or a glob), passed to script 02 as `--input`.
+    :param poll_interval: Seconds between checks.
+    :param debounce: Quiet seconds after the last change before a run starts.
+    :param max_wait: Longest wait in seconds after the first change.
+    :param watch_scripts: If True, edited stage scripts also trigger runs.
+    :param log_path: NDJSON file receiving one record per run (None for no log file).
+    """
+
+    def __init__(self, raw_path, poll_interval=POLL_INTERVAL, debounce=DEBOUNCE_SECONDS, max_wait=MAX_WAIT_SECONDS,
+                 watch_scripts=True, log_path=WATCH_LOG_PATH):
+        self.raw_path = raw_path
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.log_path = log_path
+        self.script_stages = {
+            os.path.join(SCRIPTS_DIR, script_name): stage
+            for stage, script_name, _, _ in PIPELINE_STAGES if watch_scripts and stage in WATCHED_STAGES
+        }
+        self.runs = 0
+
+    def stamps(self):
+        """
+        :return: Tuple of (raw file stamps, script file stamps).
+        """
+        return raw_file_stamps(self.raw_path), file_stamps(self.script_stages)
+
+    def stages_for(self, raw_changes, script_changes):
+        """
+        Picks the stages to run for a set of changes.
+
+        :param raw_changes: Changed raw file paths.
+        :param script_changes: Changed script paths.
+        :return: Tuple of (stage names in pipeline order, True if scripts 02-04 can run incrementally).
+        """
+        first_stage = min([self.script_stages[path] for path in script_changes] + [RAW_STAGE] * bool(raw_changes))
+        return [stage for stage in WATCHED_STAGES if stage >= first_stage], not script_changes
+
+    def run(self, stages, incremental, changes, landed_at, detected_at):
+        """
+        Runs the stages once and logs the run.
+
+        :param stages: Stage names in pipeline order.
+        :param incremental: If True, scripts 02-04 run with `--incremental`.
+        :param changes: Changed file paths that triggered the run (empty for the first run).
+        :param landed_at: Wall-clock time the earliest change landed (None for the first run).
+        :param detected_at: Wall-clock time the change was noticed (None for the first run).
+        :return: The run's log record.
+        """
+        self.runs += 1
+        label = f"{stages[0]}-{stages[-1]}" if len(stages) > 1 else stages[0]
+        mode = "incremental" if incremental else "full"
+        reason = f"{len(changes)} changed file(s)" if changes else "first run"
+        print(seperation_bar)
+        print(f"[INFO] Watch run {self.runs}: scripts {label} ({mode}) for {reason}.")
+        started_at = time.time()
+        started = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started_at))
+        stage_arguments = {RAW_STAGE: ["--input", self.raw_path]}
+        failed_stages, skipped_stages, error = [], [], None
+        try:
+            timings = run_pipeline(stages, incremental=incremental, stage_arguments=stage_arguments)
+            print_timings(timings)
+            record_timings(timings)
+        except StageFailed as e:
+            # The pipeline stopped at the failed stage, so the later stages kept their previous outputs
+            failed_stages = [e.stage]
+            skipped_stages = [stage for stage in stages if stage > e.stage]
+            print_timings(e.timings)
+            record_timings(e.timings)
+        except Exception as e:
+            error = str(e)
+            print(f"[ERROR] Watch run {self.runs} stopped: {e}")
+        finished_at = time.time()
+
+        record = {
+            "run": self.runs,
+            "started": started,
+            "stages": stages,
+            "incremental": incremental,
+            "changed_files": len(changes),
+            "changes": changes[:CHANGES_LISTED],
+            "status": "failed" if error or failed_stages else "completed",
+            "failed_stages": failed_stages,
+            "skipped_stages": skipped_stages,
+            "run_s": round(finished_at - started_at, 3),
+        }
+        if landed_at is not None:
+            record.update({
+                "detect_s": round(detected_at - landed_at, 3),
+                "wait_s": round(started_at - detected_at, 3),
+                "latency_s": round(finished_at - landed_at, 3),
+            })
+        if error:
+            record["error"] = error
+        if self.log_path:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            with open(self.log_path, "a") as log_file:
+                log_file.write(json.dumps(record) + "\n")
+
+        if failed_stages:
+            skipped = f"; scripts {', '.join(skipped_stages)} were not run" if skipped_stages else ""
+            print(f"[ERROR] Watch run {self.runs} failed at script {failed_stages[0]}{skipped}. Waiting for the next change.")
+        elif error:
+            print(f"[ERROR] Watch run {self.runs} failed (scripts {label}); waiting for the next change.")
+        elif landed_at is None:
+            print(f"[INFO] Watch run {self.runs} completed in {record['run_s']:.2f} s.")
+        else:
+            print(f"[INFO] Watch run {self.runs}: outputs refreshed {record['latency_s']:.2f} s after the changes landed "
+                  f"(noticed after {record['detect_s']:.2f} s, waited {record['wait_s']:.2f} s, ran {record['run_s']:.2f} s).")
+        return record
+
+    def watch(self, initial_run=True, max_runs=None):
+        """
+        Polls for changes and runs the pipeline until interrupted (Ctrl+C) or `max_runs` runs are done.
+
+        :param initial_run: If True, run scripts 02-05 incrementally once at start, so the outputs are current.
+        :param max_runs: Stop after this many runs (None to watch forever).
+        """
+        raw_stamps, script_stamps = self.stamps()
+        last_check = time.time()
+        print(f"[INFO] Watching raw data: {self.raw_path} ({len(raw_stamps)} files)"
+              + (f" and {len(script_stamps)} stage scripts." if self.script_stages else "."))
+        print(f"[INFO] Runs start {self.debounce:g} s after the last change (at most {self.max_wait:g} s after the first). "
+              "Press Ctrl+C to stop.")
+        if initial_run:
+            self.run(WATCHED_STAGES, True, [], None, None)
+
+        # The stamps the current outputs were built from; a run's stamps are taken before it starts, so
+        # files that land during the run differ from them and trigger the next run
+        built_stamps = (raw_stamps, script_stamps)
+        seen_stamps = built_stamps
+        first_change = last_change = None  # Monotonic times of the pending changes
+        detected_at = window_start = None  # Wall-clock times: change noticed, and the check before it
+        try:
+            while max_runs is None or self.runs < max_runs:
+                time.sleep(self.poll_interval)
+                current_stamps = self.stamps()
+                now, wall_now = time.monotonic(), time.time()
+                if current_stamps != seen_stamps:
+                    seen_stamps = current_stamps
+                    last_change = now
+                    if first_change is None:
+                        first_change, detected_at, window_start = now, wall_now, last_check
+                last_check = wall_now
+                if current_stamps == built_stamps:
+                    first_change = None  # Changed back (e.g. a file that was removed again)
+                    continue
+                if first_change is None or (now - last_change < self.debounce and now - first_change < self.max_wait):
+                    continue
+
+                raw_changes = changed_paths(built_stamps[0], current_stamps[0])
+                script_changes = changed_paths(built_stamps[1], current_stamps[1])
+                # A file landed when it was written, but no earlier than the check before it was noticed
+                # (copies can keep an older modification time)
+                modified = [stamps[path][1] / 1e9 for stamps, paths in ((current_stamps[0], raw_changes), (current_stamps[1], script_changes))
+                            for path in paths if path in stamps]
+                landed_at = min(max(min(modified), window_start), detected_at) if modified else detected_at
+                stages, incremental = self.stages_for(raw_changes, script_changes)
+                built_stamps = current_stamps
+                self.run(stages, incremental, raw_changes + script_changes, landed_at, detected_at)
+                first_change = None
+        except KeyboardInterrupt:
+            print("\n[INFO] Stopped watching.")
+        print(f"[INFO] Watch mode finished after {self.runs} run(s).")
+        print(seperation_bar)
+
+
+def default_raw_path():
+    """
+    :return: The raw data path configured in script 02.
+    """
+    return load_stage(CLEANING_SCRIPT).RAW_MATCH_DATA_PATH
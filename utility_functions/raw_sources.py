@@ -0,0 +1,192 @@
+import os
+import glob
+from operator import itemgetter
+from utility_functions.json_streaming import iter_raw_entries, load_raw_entries
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+RAW_FILE_EXTENSIONS = (".json", ".ndjson", ".jsonl")  # Files picked up when the raw data path is a folder
+METADATA_KEY = "metadata"
+# An entry whose metadata repeats these fields from an entry of the same event in an earlier file is a duplicate export
+DEDUPLICATION_KEY_FIELDS = ("matchNumber", "robotPosition", "scouterName")
+EVENT_FIELD = "event"  # Metadata field that receives each entry's event when the raw files span several events
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def resolve_raw_files(path):
+    """
+    Lists the raw data files a path refers to, in the order their entries are merged.
+
+    :param path: A raw data file, a folder (searched recursively for `RAW_FILE_EXTENSIONS`),
+                 or a glob pattern (e.g. `data/raw/*/tablet_*.json`).
+    :return: List of file paths, sorted by path so every run merges them in the same order.
+    """
+    if os.path.isdir(path):
+        files = []
+        for folder, subfolders, file_names in os.walk(path):
+            subfolders.sort()
+            for file_name in sorted(file_names):
+                if os.path.splitext(file_name)[1].lower() in RAW_FILE_EXTENSIONS:
+                    files.append(os.path.join(folder, file_name))
+        if not files:
+            raise ValueError(f"No raw data files ({', '.join(RAW_FILE_EXTENSIONS)}) found in: {path}")
+        return files
+    if glob.has_magic(path):
+        files = sorted(file_path for file_path in glob.glob(path, recursive=True) if os.path.isfile(file_path))
+        if not files:
+            raise ValueError(f"No raw data files match: {path}")
+        return files
+    # A single file; a missing one fails when it is opened, as before
+    return [path]
+
+
+def source_event(file_path):
+    """
+    Names the event a raw file belongs to: the folder holding it (e.g. `data/raw/2025caln/tablet_1.json`
+    belongs to "2025caln").
+
+    :param file_path: Path of a raw data file.
+    :return: Event name.
+    """
+    return os.path.basename(os.path.dirname(os.path.abspath(file_path)))
+
+
+def with_event_field(expected_structure):
+    """
+    Adds the event field to the metadata of an expected structure, for raw files that span several events
+    (see `RawSourceMerger.tags_events`).
+
+    :param expected_structure: Nested dictionary mapping keys to expected types.
+    :return: A copy of the structure with `metadata.event` (a string) as its last metadata field.
+    """
+    structure = dict(expected_structure)
+    structure[METADATA_KEY] = {**expected_structure.get(METADATA_KEY, {}), EVENT_FIELD: str}
+    return structure
+
+
+_key_fields = itemgetter(*DEDUPLICATION_KEY_FIELDS)
+
+
+def deduplication_key(entry):
+    """
+    Returns the (matchNumber, robotPosition, scouterName) key of a raw entry.
+
+    :param entry: A raw data entry.
+    :return: Tuple of the key values, or None if the entry has no usable key (it is never deduplicated).
+    """
+    try:
+        key = _key_fields(entry[METADATA_KEY])
+        hash(key)
+    except (KeyError, IndexError, TypeError):
+        # Missing metadata or fields, or values of the wrong kind (e.g. a list): validation reports these
+        return None
+    return key
+
+
+class RawSourceMerger:
+    """
+    Merges the entries of several raw files into one sequence, dropping entries that an earlier file
+    of the same event already holds and recording which entries came from which file.
+
+    Only entries repeated across files are dropped: repeats within one file are kept, so a single raw
+    file is cleaned exactly as before and its duplicate submissions are still reported. The same match
+    number, position and scouter at two events are two different entries.
+
+    When the files span several events, each merged entry's metadata gets the event of its file as
+    `metadata.event`, so later stages can tell the events' matches apart. Files from a single event are
+    merged without it.
+
+    :param files: Raw file paths, in merge order.
+    """
+
+    def __init__(self, files):
+        self.files = files
+        self.events = [source_event(file_path) for file_path in files]  # Event of each file
+        self.tags_events = len(set(self.events)) > 1  # True if merged entries carry `metadata.event`
+        self.sources = []  # One record per file: file, event, first_entry, entries, duplicates
+        self.duplicates = []  # (match number, position, scouter, dropped file, kept file) per dropped entry
+        self.num_entries = 0  # Entries kept so far
+        self._first_file = {}  # (event, deduplication key) -> index of the first file holding it
+
+    def merge_file(self, file_index, entries):
+        """
+        Yields the entries of one file that no earlier file of its event holds, with their event added
+        when the files span several events. Files must be merged in order.
+
+        :param file_index: Index of the file in `files`.
+        :param entries: Iterable of the file's raw entries.
+        """
+        file_path = self.files[file_index]
+        event = self.events[file_index]
+        source = {
+            "file": file_path,
+            "event": event,
+            "first_entry": self.num_entries,
+            "entries": 0,
+            "duplicates": 0,
+        }
+        self.sources.append(source)
+        first_file = self._first_file
+        tags_events = self.tags_events
+        for entry in entries:
+            key = deduplication_key(entry)
+            if key is not None:
+                kept_index = first_file.setdefault((event, key), file_index)
+                if kept_index != file_index:
+                    source["duplicates"] += 1
+                    self.duplicates.append(key + (file_path, self.files[kept_index]))
+                    continue
+            if tags_events:
+                metadata = entry.get(METADATA_KEY) if isinstance(entry, dict) else None
+                if isinstance(metadata, dict):
+                    # Malformed metadata is left alone; validation reports it
+                    metadata[EVENT_FIELD] = event
+            source["entries"] += 1
+            yield entry
+        self.num_entries += source["entries"]
+
+    def iter_entries(self):
+        """
+        Streams the merged entries, reading the files one after another.
+        """
+        for file_index, file_path in enumerate(self.files):
+            yield from self.merge_file(file_index, iter_raw_entries(file_path))
+
+    def load_entries(self, threads=1):
+        """
+        Loads every file (several at a time in a thread pool) and merges them in file order.
+
+        :param threads: Files read at the same time.
+        :return: List of merged entries.
+        """
+        if threads > 1 and len(self.files) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=min(threads, len(self.files))) as executor:
+                # `map` returns the results in file order, whichever file finishes loading first
+                loaded = list(executor.map(load_raw_file, self.files))
+        else:
+            loaded = [load_raw_file(file_path) for file_path in self.files]
+
+        merged = []
+        for file_index, entries in enumerate(loaded):
+            merged.extend(self.merge_file(file_index, entries))
+            loaded[file_index] = None  # Let each file's entries go once they are merged
+        return merged
+
+
+def load_raw_file(file_path):
+    """
+    Loads one raw file, naming the file in any error about its contents.
+
+    :param file_path: Path of a raw data file.
+    :return: List of entries.
+    """
+    try:
+        return load_raw_entries(file_path)
+    except ValueError as e:
+        raise ValueError(f"{file_path}: {e}") from e
@@ -0,0 +1,186 @@
+from utility_functions.warning_log import MISSING_KEY, EXTRA_KEY, INCORRECT_TYPE, INVALID_POSITION, NEGATIVE_VALUE
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+ROBOT_POSITION_KEY = "robotPosition"  # Key whose values are checked against the valid robot positions
+UNKNOWN_ROBOT_POSITION = "unknown"  # Replacement for invalid robot positions
+
+# Check kinds used in the compiled instruction list
+FIELD = 0    # A leaf value with an expected type
+NESTED = 1   # A nested dictionary; its checks follow directly after this one
+EXTRAS = 2   # End of a dictionary level; reports and drops keys that are not expected
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def _admits_int(expected_type):
+    """
+    Returns True if values of `expected_type` can be ints, so the negative clamp must run.
+
+    :param expected_type: A type or tuple of types.
+    """
+    types = expected_type if isinstance(expected_type, tuple) else (expected_type,)
+    return any(issubclass(t, int) or issubclass(int, t) for t in types)
+
+
+class CompiledSchema:
+    """
+    A validator compiled once from an expected-structure dictionary.
+
+    The nested structure is flattened into a list of precomputed checks (key paths, expected types
+    and fix-up rules), so validating an entry never rebuilds key paths or key sets. Entries that are
+    already valid take a fast path that only reads values and returns the entry itself.
+    """
+
+    def __init__(self, expected_structure, valid_robot_positions):
+        """
+        :param expected_structure: Nested dictionary mapping keys to expected types.
+        :param valid_robot_positions: Allowed values for the robot position key.
+        """
+        self.expected_structure = expected_structure
+        self.valid_robot_positions = frozenset(valid_robot_positions)
+        self.checks = []
+        self.fast_levels = []
+        self.fast_fields = []
+        self._compile_level(expected_structure, path="", parent_keys=())
+
+    def _compile_level(self, structure, path, parent_keys):
+        """
+        Appends the checks for one dictionary level (and its nested levels) in validation order.
+
+        :param structure: Expected structure of this level.
+        :param path: Dotted key path of this level ("" for the root).
+        :param parent_keys: Keys leading from the entry root to this level.
+        """
+        self.fast_levels.append((parent_keys, tuple(structure.keys())))
+
+        for key, expected_type in structure.items():
+            full_key_path = f"{path}.{key}" if path else key
+
+            if isinstance(expected_type, dict):
+                start = len(self.checks)
+                self.checks.append(None)  # Placeholder until the subtree length is known
+                self._compile_level(expected_type, full_key_path, parent_keys + (key,))
+                skip = len(self.checks) - start
+                self.checks[start] = (NESTED, key, full_key_path, dict, skip, False, False)
+            else:
+                check_position = key == ROBOT_POSITION_KEY
+                check_negative = _admits_int(expected_type)
+                self.checks.append(
+                    (FIELD, key, full_key_path, expected_type, 1, check_position, check_negative)
+                )
+                self.fast_fields.append((parent_keys, key, expected_type, check_position, check_negative))
+
+        self.checks.append((EXTRAS, frozenset(structure.keys()), f"{path}.", None, 1, False, False))
+
+    def is_valid(self, entry):
+        """
+        Checks whether an entry already matches the schema exactly (same keys, in the same order,
+        with valid types and values). Builds no strings, sets or dictionaries.
+
+        :param entry: The raw data entry.
+        :return: True if validation would return the entry unchanged without warnings.
+        """
+        for parent_keys, expected_keys in self.fast_levels:
+            level = entry
+            for parent_key in parent_keys:
+                level = level[parent_key]
+            if not isinstance(level, dict) or len(level) != len(expected_keys):
+                return False
+            for key, expected_key in zip(level, expected_keys):
+                if key != expected_key:
+                    return False
+
+        for parent_keys, key, expected_type, check_position, check_negative in self.fast_fields:
+            level = entry
+            for parent_key in parent_keys:
+                level = level[parent_key]
+            value = level[key]
+            if not isinstance(value, expected_type):
+                return False
+            if check_position and value not in self.valid_robot_positions:
+                return False
+            if check_negative and isinstance(value, int) and value < 0:
+                return False
+        return True
+
+    def validate(self, entry, scouter, log_warning):
+        """
+        Validates and fixes an entry, reporting every problem through `log_warning`.
+
+        Produces the same cleaned entry and warnings as a recursive walk of the expected structure.
+        Warnings are reported as a code plus values (see `warning_log`); no message strings are built here.
+
+        :param entry: The raw data entry.
+        :param scouter: The scouter responsible for the data.
+        :param log_warning: Callable taking (code, key path, scouter, detail).
+        :return: A validated and cleaned version of the entry.
+        """
+        if self.is_valid(entry):
+            return entry
+
+        validated = {}
+        sources = [entry]
+        targets = [validated]
+        checks = self.checks
+        index = 0
+        while index < len(checks):
+            kind, key, full_key_path, expected_type, skip, check_position, check_negative = checks[index]
+            source = sources[-1]
+
+            if kind == EXTRAS:
+                # `key` holds the expected key set and `full_key_path` the path prefix for this level
+                for extra_key in source:
+                    if extra_key not in key:
+                        log_warning(EXTRA_KEY, f"{full_key_path}{extra_key}", scouter, None)
+                sources.pop()
+                targets.pop()
+                index += 1
+                continue
+
+            if key not in source:
+                log_warning(MISSING_KEY, full_key_path, scouter, None)
+                index += skip
+                continue
+
+            value = source[key]
+            if not isinstance(value, expected_type):
+                log_warning(INCORRECT_TYPE, full_key_path, scouter, (expected_type, type(value)))
+                index += skip
+                continue
+
+            if kind == NESTED:
+                child = {}
+                targets[-1][key] = child
+                sources.append(value)
+                targets.append(child)
+                index += 1
+                continue
+
+            # Handle specific cases (robotPosition, negative integers)
+            if check_position and value not in self.valid_robot_positions:
+                log_warning(INVALID_POSITION, full_key_path, scouter, (value, UNKNOWN_ROBOT_POSITION))
+                value = UNKNOWN_ROBOT_POSITION
+
+            if check_negative and isinstance(value, int) and value < 0:
+                log_warning(NEGATIVE_VALUE, full_key_path, scouter, value)
+                value = 0
+
+            targets[-1][key] = value
+            index += 1
+
+        return validated
+
+
+def compile_schema(expected_structure, valid_robot_positions):
+    """
+    Compiles an expected-structure dictionary into a reusable validator.
+
+    :param expected_structure: Nested dictionary mapping keys to expected types.
+    :param valid_robot_positions: Allowed values for the robot position key.
+    :return: A `CompiledSchema`.
+    """
+    return CompiledSchema(expected_structure, valid_robot_positions)
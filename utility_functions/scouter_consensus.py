@@ -0,0 +1,235 @@
+from functools import partial
+from utility_functions.intermediate_formats import flatten_structure, flatten_entry
+
+# pandas and NumPy are imported inside the functions that need them, so importing this module is cheap.
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+MATCH_COLUMN = "metadata.matchNumber"
+TEAM_COLUMN = "metadata.robotTeam"
+SCOUTER_COLUMN = "metadata.scouterName"
+EVENT_COLUMN = "metadata.event"  # Only present when the raw files span several events
+METADATA_PREFIX = "metadata."
+AGREEMENT_SHARE = 0.5  # A text or true/false value agrees if at least this share of the other scouters reported it
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def consensus_fields(expected_structure):
+    """
+    Splits the scouted fields of the expected structure into numeric and categorical fields.
+    Metadata (match, team, position, scouter) is what entries are aligned on, so it is not compared.
+
+    :param expected_structure: Nested dictionary mapping keys to expected types.
+    :return: Tuple of (numeric field columns, categorical field columns), as flattened column names.
+    """
+    numeric_fields, categorical_fields = [], []
+    for name, _, expected_type in flatten_structure(expected_structure):
+        if name.startswith(METADATA_PREFIX):
+            continue
+        if expected_type is bool or expected_type is str:
+            categorical_fields.append(name)
+        elif expected_type in (int, float) or expected_type in ((int, float), (float, int)):
+            numeric_fields.append(name)
+    return numeric_fields, categorical_fields
+
+
+def entries_to_frame(entries, expected_structure):
+    """
+    Builds a flat DataFrame (one flattened column per field) from cleaned entries.
+
+    :param entries: Iterable of cleaned entries.
+    :param expected_structure: Nested dictionary mapping keys to expected types.
+    :return: A DataFrame with one row per entry.
+    """
+    import pandas as pd
+
+    columns = flatten_structure(expected_structure)
+    encode = partial(flatten_entry, key_paths=tuple(key_path for _, key_path, _ in columns))
+    return pd.DataFrame.from_records([encode(entry) for entry in entries], columns=[name for name, _, _ in columns])
+
+
+def _group_codes(*columns):
+    """
+    Numbers the distinct combinations of several key columns.
+
+    :param columns: Equal-length arrays or Series.
+    :return: Tuple of (int64 codes, number of groups).
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes = np.zeros(len(columns[0]), dtype=np.int64)
+    for column in columns:
+        column_codes, uniques = pd.factorize(column, use_na_sentinel=False)
+        codes = codes * len(uniques) + column_codes
+    codes, uniques = pd.factorize(codes)
+    return codes.astype(np.int64), len(uniques)
+
+
+def _numeric_disagreement(values, groups, num_groups, scale, tolerance):
+    """
+    Compares each value with the average of the other scouters' values of the same robot in the same match.
+
+    :return: Tuple of (compared mask, disagreement in [0, 1], agrees mask, absolute differences).
+    """
+    import numpy as np
+
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    counts = np.bincount(groups, weights=present, minlength=num_groups)
+    sums = np.bincount(groups, weights=filled, minlength=num_groups)
+    others = counts[groups] - present
+    compared = present & (others > 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        others_average = (sums[groups] - filled) / others
+    difference = np.where(compared, np.abs(values - others_average), 0.0)
+    disagreement = np.minimum(difference / scale, 1.0)
+    return compared, disagreement, compared & (difference <= tolerance), difference
+
+
+def _categorical_disagreement(column, groups, num_groups):
+    """
+    Compares each value with the other scouters' values of the same robot in the same match: the
+    disagreement is the share of the others who reported something else.
+
+    :return: Tuple of (compared mask, disagreement in [0, 1], agrees mask).
+    """
+    import numpy as np
+    import pandas as pd
+
+    value_codes, uniques = pd.factorize(column)
+    present = value_codes >= 0
+    counts = np.bincount(groups, weights=present, minlength=num_groups)
+    others = counts[groups] - present
+    compared = present & (others > 0)
+    # Scouters in the same group who reported the same value, counted per (group, value) pair
+    pair_codes = groups * (len(uniques) + 1) + (value_codes + 1)
+    pair_index = pd.factorize(pair_codes)[0]
+    same = np.bincount(pair_index)[pair_index] - 1
+    with np.errstate(invalid="ignore", divide="ignore"):
+        agreement = np.where(compared, same / others, 1.0)
+    disagreement = np.where(compared, 1.0 - agreement, 0.0)
+    return compared, disagreement, compared & (agreement >= AGREEMENT_SHARE)
+
+
+def score_scouters(matches_df, numeric_fields, categorical_fields, tolerances=None):
+    """
+    Scores each scouter by how well their values agree with the other scouters of the same robot in the
+    same match (duplicate scouting, or entries from several tablets or exports).
+
+    Entries are aligned on (event, match, team), or (match, team) for a single event without an event column.
+    A scouter's repeated submissions for the same robot keep only the last one. Each value is compared with the others of its group, leaving itself out:
+    - Numbers: difference from the others' average, as a share of the field's standard deviation (capped at 1).
+      They agree when the difference is within the field's tolerance.
+    - Text and true/false: share of the others who reported something else. They agree when at least
+      `AGREEMENT_SHARE` of the others reported the same value.
+
+    Every step is a vectorized group operation over all entries (factorize, bincount), so a whole season is
+    scored in one pass with no loops over pairs of scouters.
+
+    :param matches_df: Flat DataFrame of cleaned entries (one flattened column per field).
+    :param numeric_fields: Numeric field columns.
+    :param categorical_fields: Text and true/false field columns.
+    :param tolerances: Optional dictionary of numeric field -> largest difference that still agrees (default 0).
+    :return: Tuple of (scouter DataFrame sorted by accuracy, field DataFrame), both empty if no robot
+             was scouted by more than one scouter.
+    """
+    import numpy as np
+    import pandas as pd
+
+    tolerances = tolerances or {}
+    numeric_fields = [field for field in numeric_fields if field in matches_df.columns]
+    categorical_fields = [field for field in categorical_fields if field in matches_df.columns]
+    fields = numeric_fields + categorical_fields
+
+    keys = [MATCH_COLUMN, TEAM_COLUMN, SCOUTER_COLUMN]
+    if matches_df.empty or not set(keys) <= set(matches_df.columns):
+        return pd.DataFrame(), pd.DataFrame()
+    # Match N of two events is two different matches
+    robot_keys = ([EVENT_COLUMN] if EVENT_COLUMN in matches_df.columns else []) + [MATCH_COLUMN, TEAM_COLUMN]
+    df = matches_df[matches_df[keys].notna().all(axis=1).to_numpy()]
+    df = df[~df.duplicated(robot_keys + [SCOUTER_COLUMN], keep="last").to_numpy()]
+
+    # Only robots scouted by more than one scouter can be compared
+    groups, num_groups = _group_codes(*(df[column].to_numpy() for column in robot_keys))
+    shared = np.bincount(groups, minlength=num_groups)[groups] > 1
+    df = df[shared]
+    if df.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    groups, num_groups = _group_codes(groups[shared])
+    scouter_codes, scouters = pd.factorize(df[SCOUTER_COLUMN])
+    num_scouters = len(scouters)
+
+    compared_counts = np.zeros((num_scouters, len(fields)))
+    disagreement_sums = np.zeros((num_scouters, len(fields)))
+    agree_counts = np.zeros((num_scouters, len(fields)))
+    field_rows = []
+    for index, field in enumerate(fields):
+        if field in numeric_fields:
+            values = pd.to_numeric(matches_df[field], errors="coerce").to_numpy(dtype="float64")
+            scale = np.nanstd(values) if np.isfinite(values).any() else 0.0
+            compared, disagreement, agrees, difference = _numeric_disagreement(
+                pd.to_numeric(df[field], errors="coerce").to_numpy(dtype="float64"), groups, num_groups,
+                scale if scale > 0 else 1.0, tolerances.get(field, 0),
+            )
+            mean_difference = difference[compared].mean() if compared.any() else float("nan")
+        else:
+            compared, disagreement, agrees = _categorical_disagreement(df[field], groups, num_groups)
+            mean_difference = float("nan")
+        compared_counts[:, index] = np.bincount(scouter_codes, weights=compared, minlength=num_scouters)
+        disagreement_sums[:, index] = np.bincount(scouter_codes, weights=disagreement, minlength=num_scouters)
+        agree_counts[:, index] = np.bincount(scouter_codes, weights=agrees, minlength=num_scouters)
+        num_compared = int(compared.sum())
+        field_rows.append({
+            "field": field,
+            "compared_values": num_compared,
+            "agreement_rate": agrees.sum() / num_compared if num_compared else float("nan"),
+            "mean_disagreement": disagreement[compared].mean() if num_compared else float("nan"),
+            "mean_abs_difference": mean_difference,
+        })
+
+    total_compared = compared_counts.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        field_disagreement = disagreement_sums / compared_counts
+        scouter_df = pd.DataFrame({
+            "shared_entries": np.bincount(scouter_codes, minlength=num_scouters),
+            "compared_values": total_compared.astype(np.int64),
+            "accuracy": 1.0 - disagreement_sums.sum(axis=1) / total_compared,
+            "agreement_rate": agree_counts.sum(axis=1) / total_compared,
+        }, index=pd.Index(scouters, name="scouter"))
+    worst = np.where(np.isnan(field_disagreement), -1.0, field_disagreement)
+    scouter_df["most_disputed_field"] = [
+        fields[column] if worst[row, column] > 0 else "" for row, column in enumerate(worst.argmax(axis=1))
+    ] if fields else ""
+    for index, field in enumerate(fields):
+        scouter_df[f"{field}_disagreement"] = field_disagreement[:, index]
+    scouter_df = scouter_df.sort_values(["accuracy", "compared_values"], ascending=[False, False], kind="stable")
+    return scouter_df, pd.DataFrame(field_rows).set_index("field") if field_rows else pd.DataFrame()
+
+
+def write_consensus_report(scouter_df, field_df, file_path):
+    """
+    Writes the scouter accuracy ranking and the per-field disagreement as a text report.
+
+    :param scouter_df: Scouter DataFrame from `score_scouters`.
+    :param field_df: Field DataFrame from `score_scouters`.
+    :param file_path: Output path.
+    """
+    with open(file_path, "w") as report_file:
+        report_file.write("Scouter Consensus Accuracy:\n")
+        report_file.write("(Each value is compared with the other scouters of the same robot in the same match. "
+                          "accuracy = 1 - average disagreement; 1 means always agreeing.)\n\n")
+        if scouter_df.empty:
+            report_file.write("No robot was scouted by more than one scouter in the same match.\n")
+            return
+        summary_columns = ["shared_entries", "compared_values", "accuracy", "agreement_rate", "most_disputed_field"]
+        report_file.write(scouter_df[summary_columns].to_string(float_format="{:.3f}".format) + "\n\n")
+        report_file.write("Disagreement by Field:\n")
+        report_file.write(field_df.to_string(float_format="{:.3f}".format) + "\n\n")
+        report_file.write("Disagreement by Scouter and Field:\n")
+        field_columns = [column for column in scouter_df.columns if column.endswith("_disagreement")]
+        report_file.write(scouter_df[field_columns].to_string(float_format="{:.3f}".format) + "\n")
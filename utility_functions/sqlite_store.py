@@ -0,0 +1,517 @@
+import os
+import math
+import sqlite3
+from functools import partial
+from utility_functions.intermediate_formats import flatten_structure, flatten_entry, unflatten_row, json_normalize_column_order
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+MATCHES_TABLE = "matches"  # One row per cleaned entry, one column per flattened field
+COLUMNS_TABLE = "match_columns"  # Name and kind (int, float, str, bool) of each field column, in entry order
+TEAMS_TABLE = "teams"  # Team summary written by script 03: first entry and number of matches per team
+ENTRY_ID_COLUMN = "entry_id"  # Position of the entry in the cleaned data
+TEAM_COLUMN = "metadata.robotTeam"
+
+# Columns with an index, so one team's matches, one match or one scouter's entries are found without a scan
+INDEXED_COLUMNS = ("metadata.robotTeam", "metadata.matchNumber", "metadata.scouterName")
+SQLITE_BATCH_SIZE = 10_000  # Rows inserted per `executemany` call (all in one transaction)
+SQLITE_TYPES = {"int": "INTEGER", "float": "REAL", "str": "TEXT", "bool": "INTEGER"}
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def field_kind(expected_type):
+    """
+    Maps an expected Python type to the kind of value its column holds.
+
+    :param expected_type: A type from the expected structure.
+    :return: "int", "float", "str" or "bool".
+    """
+    # bool must be checked before int, since bool is a subclass of int
+    if expected_type is bool:
+        return "bool"
+    if expected_type is int:
+        return "int"
+    if expected_type is float or expected_type == (int, float) or expected_type == (float, int):
+        return "float"
+    if expected_type is str:
+        return "str"
+    raise ValueError(
+        f"The SQLite format supports str, int, float and bool fields, got {expected_type}. "
+        f"Use the JSON format for this structure."
+    )
+
+
+def quote(name):
+    """
+    Quotes a column or table name for SQL (field names contain dots).
+
+    :param name: The name.
+    :return: The quoted name.
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+def connect(file_path):
+    """
+    Opens a database in WAL mode, so readers keep reading the last committed data while a writer inserts.
+    Transactions are started and committed explicitly.
+
+    :param file_path: Path of the database file.
+    :return: A `sqlite3.Connection`.
+    """
+    connection = sqlite3.connect(file_path, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")  # Durable at each checkpoint; a crash can't corrupt the file
+    return connection
+
+
+def _insert_statement(columns):
+    """
+    Builds the INSERT statement for the field columns.
+
+    :param columns: List of (column name, key path, kind).
+    :return: SQL text.
+    """
+    names = ", ".join(quote(name) for name, _, _ in columns)
+    return f"INSERT INTO {MATCHES_TABLE} ({names}) VALUES ({', '.join('?' for _ in columns)})"
+
+
+def _stored_columns(connection):
+    """
+    Reads the field columns a database was created with.
+
+    :param connection: An open connection.
+    :return: List of (column name, kind), or None if the database has no match table.
+    """
+    try:
+        return connection.execute(f"SELECT name, kind FROM {COLUMNS_TABLE} ORDER BY position").fetchall()
+    except sqlite3.OperationalError:
+        return None
+
+
+class SQLiteEntryWriter:
+    """
+    Writes cleaned entries to a SQLite database with one flattened column per field, replacing any
+    previous data. Every row is inserted with `executemany` inside a single transaction, and the indexes
+    on `INDEXED_COLUMNS` are built after the rows are in. In WAL mode, readers see the previous data
+    until the transaction commits.
+
+    Has the same interface as the JSON writers in `json_streaming` and `ParquetEntryWriter`, so every
+    cleaning path (batch, streaming and parallel) can write SQLite without changes.
+    """
+
+    def __init__(self, file_path, expected_structure, batch_size=SQLITE_BATCH_SIZE):
+        """
+        :param file_path: Path of the database file.
+        :param expected_structure: Nested dictionary mapping keys to expected types.
+        :param batch_size: Rows buffered before they are inserted.
+        """
+        self.file_path = file_path
+        self.columns = [
+            (name, key_path, field_kind(expected_type))
+            for name, key_path, expected_type in flatten_structure(expected_structure)
+        ]
+        self.batch_size = batch_size
+        self.encode = partial(flatten_entry, key_paths=tuple(key_path for _, key_path, _ in self.columns))
+        self.count = 0
+        self._insert = _insert_statement(self.columns)
+        self._rows = []
+        self._connection = None
+
+    def __enter__(self):
+        self._connection = connect(self.file_path)
+        self._connection.execute("BEGIN IMMEDIATE")
+        for table in (TEAMS_TABLE, COLUMNS_TABLE, MATCHES_TABLE):
+            self._connection.execute(f"DROP TABLE IF EXISTS {table}")
+        field_columns = ", ".join(f"{quote(name)} {SQLITE_TYPES[kind]}" for name, _, kind in self.columns)
+        self._connection.execute(f"CREATE TABLE {MATCHES_TABLE} ({ENTRY_ID_COLUMN} INTEGER PRIMARY KEY, {field_columns})")
+        self._connection.execute(f"CREATE TABLE {COLUMNS_TABLE} (position INTEGER PRIMARY KEY, name TEXT, kind TEXT)")
+        self._connection.executemany(
+            f"INSERT INTO {COLUMNS_TABLE} VALUES (?, ?, ?)",
+            [(position, name, kind) for position, (name, _, kind) in enumerate(self.columns)],
+        )
+        return self
+
+    def write(self, item):
+        """
+        Appends one cleaned entry.
+
+        :param item: The cleaned entry.
+        """
+        self.write_encoded(self.encode(item))
+
+    def write_encoded(self, row):
+        """
+        Appends one entry that was already flattened with `self.encode`.
+
+        :param row: Tuple of column values.
+        """
+        self._rows.append(row)
+        self.count += 1
+        if len(self._rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        """
+        Inserts the buffered rows.
+        """
+        if self._rows:
+            self._connection.executemany(self._insert, self._rows)
+            self._rows = []
+
+    def __exit__(self, exc_type, exc_value, tb):
+        try:
+            if exc_type is None:
+                self._flush()
+                # Indexes are built once after the bulk insert, which is faster than updating them per row
+                stored_names = {name for name, _, _ in self.columns}
+                for name in INDEXED_COLUMNS:
+                    if name in stored_names:
+                        index_name = quote("index_" + name.replace(".", "_"))
+                        self._connection.execute(f"CREATE INDEX {index_name} ON {MATCHES_TABLE} ({quote(name)})")
+                self._connection.execute("COMMIT")
+            else:
+                self._connection.execute("ROLLBACK")
+        finally:
+            self._connection.close()
+            self._connection = None
+        return False
+
+
+def append_cleaned_entries(file_path, expected_structure, entries, expected_count):
+    """
+    Appends cleaned entries to an existing database in one transaction, if it holds exactly the entries
+    they follow. The team summary is dropped, so script 03 rebuilds it.
+
+    :param file_path: Path of the database file.
+    :param expected_structure: Nested dictionary mapping keys to expected types.
+    :param entries: Cleaned entries to append.
+    :param expected_count: Number of entries the database must already hold.
+    :return: True if the entries were appended, False if the database must be rewritten instead.
+    """
+    if not os.path.exists(file_path):
+        return False
+    columns = [
+        (name, key_path, field_kind(expected_type))
+        for name, key_path, expected_type in flatten_structure(expected_structure)
+    ]
+    connection = connect(file_path)
+    try:
+        if _stored_columns(connection) != [(name, kind) for name, _, kind in columns]:
+            return False
+        connection.execute("BEGIN IMMEDIATE")
+        if connection.execute(f"SELECT COUNT(*) FROM {MATCHES_TABLE}").fetchone()[0] != expected_count:
+            connection.execute("ROLLBACK")
+            return False
+        encode = partial(flatten_entry, key_paths=tuple(key_path for _, key_path, _ in columns))
+        connection.executemany(_insert_statement(columns), (encode(entry) for entry in entries))
+        connection.execute(f"DROP TABLE IF EXISTS {TEAMS_TABLE}")
+        connection.execute("COMMIT")
+        return True
+    finally:
+        connection.close()
+
+
+def value_count_order(sizes):
+    """
+    Orders counted values the way `Series.value_counts` does (and script 04's groupby engine), so tied
+    values come out in the same order.
+
+    :param sizes: Counts of the values, in order of first appearance.
+    :return: List of positions into `sizes`.
+    """
+    import numpy as np
+
+    sizes = np.asarray(sizes)
+    return list(np.arange(len(sizes))[::-1][sizes[::-1].argsort(kind="quicksort")][::-1])
+
+
+class MatchStore:
+    """
+    Reads cleaned match data from a SQLite database written by `SQLiteEntryWriter`.
+
+    Lookups by team, match or scouter use the column indexes instead of scanning every entry. Grouping
+    (`build_team_summary`) and team statistics (`team_statistics`) run as SQL aggregations, so matches are
+    never loaded into Python just to be grouped or summed. Has the team-lookup interface of `TeamIndex`.
+
+    :param file_path: Path of the database file.
+    :param team_column: Name of the team number column.
+    """
+
+    def __init__(self, file_path, team_column=TEAM_COLUMN):
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Cleaned data not found: {file_path}. Run script 02 first.")
+        self.file_path = file_path
+        self.team_column = team_column
+        self.connection = connect(file_path)
+        stored_columns = _stored_columns(self.connection)
+        if stored_columns is None:
+            raise ValueError(f"{file_path} holds no cleaned match data. Run script 02 first.")
+        self.columns = [name for name, _ in stored_columns]
+        self.kinds = dict(stored_columns)
+        self._select = ", ".join(quote(name) for name in self.columns)
+        self._bool_positions = [position for position, name in enumerate(self.columns) if self.kinds[name] == "bool"]
+        self.teams = []  # Team keys (strings) in order of their first match, once the team summary is loaded
+        self._team_values = {}  # Team key -> team number as stored
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self.connection.close()
+
+    def _decode(self, row):
+        """
+        Rebuilds a nested entry from a row, turning stored 0/1 back into true/false.
+
+        :param row: Tuple of column values.
+        :return: The entry.
+        """
+        if self._bool_positions:
+            row = list(row)
+            for position in self._bool_positions:
+                if row[position] is not None:
+                    row[position] = bool(row[position])
+        return unflatten_row(self.columns, row)
+
+    def count_entries(self):
+        return self.connection.execute(f"SELECT COUNT(*) FROM {MATCHES_TABLE}").fetchone()[0]
+
+    def iter_entries(self):
+        """
+        Yields every entry in cleaned-data order.
+        """
+        for row in self.connection.execute(f"SELECT {self._select} FROM {MATCHES_TABLE} ORDER BY {ENTRY_ID_COLUMN}"):
+            yield self._decode(row)
+
+    def entries_where(self, column, value):
+        """
+        Returns the entries whose column holds a value (e.g. every entry of team 254, or by one scouter).
+
+        :param column: Flattened column name (e.g. "metadata.scouterName").
+        :param value: The value.
+        :return: List of entries in cleaned-data order.
+        """
+        if column not in self.kinds:
+            raise KeyError(f"Unknown column: {column}")
+        rows = self.connection.execute(
+            f"SELECT {self._select} FROM {MATCHES_TABLE} WHERE {quote(column)} = ? ORDER BY {ENTRY_ID_COLUMN}", (value,)
+        )
+        return [self._decode(row) for row in rows]
+
+    def build_team_summary(self):
+        """
+        Groups the entries by team in SQL and stores each team's first entry and number of matches.
+
+        :return: Tuple of (number of entries, number of teams).
+        """
+        team = quote(self.team_column)
+        self.connection.execute("BEGIN IMMEDIATE")
+        self.connection.execute(f"DROP TABLE IF EXISTS {TEAMS_TABLE}")
+        self.connection.execute(
+            f"CREATE TABLE {TEAMS_TABLE} AS SELECT {team} AS team, MIN({ENTRY_ID_COLUMN}) AS first_entry, "
+            f"COUNT(*) AS matches FROM {MATCHES_TABLE} GROUP BY {team}"
+        )
+        self.connection.execute("COMMIT")
+        num_entries, num_teams = self.connection.execute(f"SELECT SUM(matches), COUNT(*) FROM {TEAMS_TABLE}").fetchone()
+        return num_entries or 0, num_teams
+
+    def has_team_summary(self):
+        query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+        return self.connection.execute(query, (TEAMS_TABLE,)).fetchone() is not None
+
+    def load_team_summary(self):
+        """
+        Loads the team order written by `build_team_summary`.
+
+        :return: This store.
+        """
+        if not self.has_team_summary():
+            raise FileNotFoundError(f"Team summary not found in: {self.file_path}. Run script 03 first.")
+        team_values = self.connection.execute(f"SELECT team FROM {TEAMS_TABLE} ORDER BY first_entry").fetchall()
+        self._team_values = {str(value): value for value, in team_values}
+        self.teams = list(self._team_values)
+        return self
+
+    def team_matches(self, team):
+        """
+        Returns one team's matches, found through the team column's index.
+
+        :param team: Team key (string).
+        :return: List of entries in match order.
+        """
+        value = self._team_values.get(team, team)
+        if value is None:
+            query = f"SELECT {self._select} FROM {MATCHES_TABLE} WHERE {quote(self.team_column)} IS NULL ORDER BY {ENTRY_ID_COLUMN}"
+            return [self._decode(row) for row in self.connection.execute(query)]
+        return self.entries_where(self.team_column, value)
+
+    def iter_team_matches(self, teams=None):
+        """
+        Reads teams' matches one team at a time.
+
+        :param teams: Optional set of team keys; all teams if None.
+        :return: Iterator of (team key, list of matches) in team summary order.
+        """
+        for team in self.teams:
+            if teams is None or team in teams:
+                yield team, self.team_matches(team)
+
+    def team_data(self, teams=None):
+        """
+        Reads teams' matches into the team-based layout of script 03.
+
+        :param teams: Optional set of team keys; all teams if None.
+        :return: Dictionary of team key -> {"matches": [...]}.
+        """
+        return {team: {"matches": matches} for team, matches in self.iter_team_matches(teams)}
+
+    def _team_filter(self, teams, prefix="WHERE"):
+        """
+        Builds the SQL condition selecting some teams.
+
+        :param teams: Optional set of team keys; all teams if None.
+        :param prefix: "WHERE" or "AND".
+        :return: Tuple of (SQL text, parameters).
+        """
+        if teams is None:
+            return "", ()
+        values = [self._team_values[team] for team in self.teams if team in teams]
+        return f"{prefix} {quote(self.team_column)} IN ({', '.join('?' for _ in values)})", tuple(values)
+
+    def team_statistics(self, teams=None):
+        """
+        Calculates team statistics with SQL aggregations, producing the same keys, in the same order, as
+        script 04's groupby engine: numeric and true/false columns get average/min/max/std_dev, other
+        columns get value counts, columns a team never reported are skipped, and true/false columns with
+        missing values are counted for teams that did not report them in every match.
+
+        :param teams: Optional set of team keys to calculate; all teams if None.
+        :return: A dictionary with aggregated team statistics, keyed by team.
+        """
+        import numpy as np
+
+        team = quote(self.team_column)
+        where, params = self._team_filter(teams)
+        columns = json_normalize_column_order(self.columns)
+        quoted = [quote(column) for column in columns]
+
+        # Matches, reported values and first entry reporting each column, per team
+        parts = ["COUNT(*)"] + [f"COUNT({column})" for column in quoted] + [
+            f"MIN(CASE WHEN {column} IS NOT NULL THEN {ENTRY_ID_COLUMN} END)" for column in quoted
+        ]
+        summary = self.connection.execute(
+            f"SELECT {team}, {', '.join(parts)} FROM {MATCHES_TABLE} {where} GROUP BY {team} "
+            f"ORDER BY MIN({ENTRY_ID_COLUMN})", params
+        ).fetchall()
+        if not summary:
+            return {}
+
+        # Classify columns the way the flat DataFrame of all matches would type them
+        bool_columns = [column for column in columns if self.kinds[column] == "bool"]
+        bool_with_missing = set()
+        if bool_columns:
+            missing = self.connection.execute(
+                f"SELECT {', '.join(f'COUNT(*) - COUNT({quote(column)})' for column in bool_columns)} FROM {MATCHES_TABLE}"
+            ).fetchone()
+            bool_with_missing = {column for column, count in zip(bool_columns, missing) if count}
+        categorical_columns = [
+            column for column in columns if self.kinds[column] == "str" or column in bool_with_missing
+        ]
+        stat_columns = [column for column in columns if self.kinds[column] != "str"]
+
+        # One pass for average/min/max, a second for the squared deviations from each team's average
+        numeric_stats = {}
+        if stat_columns:
+            stat_quoted = [quote(column) for column in stat_columns]
+            mean_parts = ", ".join(f"AVG({column}) AS mean_{index}" for index, column in enumerate(stat_quoted))
+            stat_parts = ", ".join(
+                f"COUNT({column}), AVG({column}), MIN({column}), MAX({column}), "
+                f"SUM(({column} - mean_{index}) * ({column} - mean_{index}))"
+                for index, column in enumerate(stat_quoted)
+            )
+            # Joining the per-team averages also restricts the second pass to the selected teams
+            rows = self.connection.execute(
+                f"WITH means AS (SELECT {team} AS team_value, {mean_parts} FROM {MATCHES_TABLE} {where} GROUP BY {team}) "
+                f"SELECT means.team_value, {stat_parts} FROM {MATCHES_TABLE} "
+                f"JOIN means ON {MATCHES_TABLE}.{team} IS means.team_value GROUP BY means.team_value",
+                params,
+            )
+            for row in rows:
+                values = {}
+                for index, column in enumerate(stat_columns):
+                    count, mean, minimum, maximum, squares = row[1 + 5 * index:6 + 5 * index]
+                    if count:
+                        std = math.sqrt(squares / (count - 1)) if count > 1 else float("nan")
+                        values[column] = (float(mean), float(minimum), float(maximum), std)
+                numeric_stats[str(row[0])] = values
+
+        # One grouped count per categorical column, values in order of first appearance
+        value_counts = {}
+        for column in categorical_columns:
+            condition, condition_params = self._team_filter(teams, "AND")
+            rows = self.connection.execute(
+                f"SELECT {team}, {quote(column)}, COUNT(*) FROM {MATCHES_TABLE} "
+                f"WHERE {quote(column)} IS NOT NULL {condition} GROUP BY {team}, {quote(column)} "
+                f"ORDER BY MIN({ENTRY_ID_COLUMN})", condition_params
+            )
+            counted = {}
+            for team_value, value, count in rows:
+                if self.kinds[column] == "bool":
+                    value = bool(value)
+                counted.setdefault(str(team_value), []).append((value, count))
+            for team_key, pairs in counted.items():
+                order = value_count_order([count for _, count in pairs])
+                value_counts[(team_key, column)] = {pairs[index][0]: pairs[index][1] for index in order}
+
+        # Assemble the per-team dictionaries in the groupby engine's key order
+        num_columns = len(columns)
+        column_positions = np.arange(num_columns)
+        categorical_set = set(categorical_columns)
+        all_team_performance_data = {}
+        for row in summary:
+            team_key = str(row[0])
+            team_size = row[1]
+            reported_counts = row[2:2 + num_columns]
+            first_reported = np.array([
+                position if position is not None else np.iinfo(np.int64).max for position in row[2 + num_columns:]
+            ], dtype=np.int64)
+            team_performance = {"number_of_matches": team_size}
+            for column_index in np.lexsort((column_positions, first_reported)):
+                column = columns[column_index]
+                count = reported_counts[column_index]
+                if count == 0:
+                    continue  # The per-team path has no column for fields the team never reported
+                if column in categorical_set and (column not in bool_with_missing or count < team_size):
+                    team_performance[f"{column}_value_counts"] = value_counts[(team_key, column)]
+                else:
+                    mean, minimum, maximum, std = numeric_stats[team_key][column]
+                    team_performance[f"{column}_average"] = mean
+                    team_performance[f"{column}_min"] = minimum
+                    team_performance[f"{column}_max"] = maximum
+                    team_performance[f"{column}_std_dev"] = std
+            all_team_performance_data[team_key] = team_performance
+
+        return all_team_performance_data
+
+
+def export_store_to_json(file_path, json_path):
+    """
+    Writes the cleaned entries of a database as a JSON array, for people reading the data.
+
+    :param file_path: Path of the database file.
+    :param json_path: Output JSON path.
+    """
+    from utility_functions.json_streaming import JsonArrayWriter
+
+    with MatchStore(file_path) as store, JsonArrayWriter(json_path) as writer:
+        for entry in store.iter_entries():
+            writer.write(entry)
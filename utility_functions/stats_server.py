@@ -0,0 +1,528 @@
+import os
+import json
+import math
+import time
+import hashlib
+import asyncio
+import argparse
+from urllib.parse import parse_qs, unquote, urlsplit
+from utility_functions.print_formats import seperation_bar
+from utility_functions.json_output import dumps
+from utility_functions.pick_list import DEFAULT_PICK_LIST_SIZE, PickListEngine, parse_weights
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+# Outputs served (written by scripts 04 and 05)
+TEAM_PERFORMANCE_DATA_PATH = "outputs/team_data/team_performance_data.json"
+ADVANCED_TEAM_PERFORMANCE_DATA_PATH = "outputs/team_data/advanced_team_performance_data.json"
+COMPARISON_SCRIPT = "05_team_comparison_analysis.py"  # Its CUSTOM_METRICS decide which way each metric ranks
+
+# Only reachable from this computer by default; use "0.0.0.0" to serve tablets on the same network
+HOST = "127.0.0.1"
+PORT = 8050
+DEFAULT_TOP_N = 10
+RELOAD_CHECK_INTERVAL = 0.5  # Seconds between checks of whether the pipeline wrote new outputs
+MAX_CACHED_QUERIES = 1024  # Encoded top-N and ranking responses kept per snapshot
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def file_stamp(file_path):
+    """
+    Returns the size and modification time of a file, so rewritten outputs are detected.
+
+    :param file_path: Path to the file.
+    :return: Tuple of (size in bytes, mtime in nanoseconds), or None if the file is missing.
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def strict_json_value(value):
+    """
+    Replaces NaN and infinite floats (nested ones too) with None, so responses are strict JSON.
+
+    :param value: A value loaded from an output file.
+    :return: The value with non-finite floats replaced.
+    """
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: strict_json_value(item) for key, item in value.items()}
+    return value
+
+
+def is_rankable(value):
+    """
+    :return: True if a value is a number teams can be ranked by (not a bool, not missing).
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def rank_values(values, ascending):
+    """
+    Ranks teams by a value, with ties sharing their average rank like `Series.rank` in script 05.
+
+    :param values: List of (team, value) in team order.
+    :param ascending: True if lower values rank first.
+    :return: List of {"rank", "team", "value"} in rank order; tied teams keep their team order.
+    """
+    ordered = sorted(values, key=lambda item: item[1] if ascending else -item[1])
+    ranking = []
+    start = 0
+    while start < len(ordered):
+        end = start
+        while end + 1 < len(ordered) and ordered[end + 1][1] == ordered[start][1]:
+            end += 1
+        rank = (start + end) / 2 + 1
+        for team, value in ordered[start:end + 1]:
+            ranking.append({"rank": rank, "team": team, "value": value})
+        start = end + 1
+    return ranking
+
+
+def load_metric_directions():
+    """
+    Reads which way each custom metric ranks from script 05's configuration.
+
+    :return: Dictionary of metric name -> {"description", "ascending"}.
+    """
+    from utility_functions.pipeline_runner import load_stage
+
+    custom_metrics = load_stage(COMPARISON_SCRIPT).CUSTOM_METRICS
+    return {
+        name: {"description": details.get("description", ""), "ascending": details.get("ascending", False)}
+        for name, details in custom_metrics.items()
+    }
+
+
+class Response:
+    """
+    An encoded JSON response body and its ETag, built once and served to every client.
+
+    :param data: JSON-serializable data.
+    """
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, data):
+        self.body = dumps(data).encode("utf-8")
+        self.etag = '"' + hashlib.blake2b(self.body, digest_size=8).hexdigest() + '"'
+
+
+class StatsSnapshot:
+    """
+    In-memory indexes over one version of the outputs of scripts 04 and 05: per-team responses,
+    rankings by custom metric or numeric statistic, and encoded top-N responses.
+
+    :param performance_data: Team statistics from script 04, keyed by team.
+    :param advanced_data: Team statistics with custom metrics from script 05, or None if it has not run.
+    :param metric_directions: Dictionary of metric name -> {"description", "ascending"}.
+    :param stamps: File stamps of the outputs this snapshot was built from.
+    """
+
+    def __init__(self, performance_data, advanced_data, metric_directions, stamps):
+        self.teams = list(performance_data)
+        self.stamps = stamps
+        self.loaded_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        advanced_data = advanced_data or {}
+
+        # Custom metrics are the columns script 05 added to the team statistics
+        self.metrics = {}
+        for team_statistics in advanced_data.values():
+            for name in team_statistics:
+                if name in metric_directions and name not in self.metrics:
+                    self.metrics[name] = metric_directions[name]
+        self._values = {
+            name: [(team, advanced_data[team].get(name)) for team in advanced_data] for name in self.metrics
+        }
+        self.fields = []  # Numeric statistics, in the order of the first team that has them
+        seen_fields = set()
+        for team_statistics in performance_data.values():
+            for name, value in team_statistics.items():
+                if is_rankable(value) and name not in seen_fields:
+                    seen_fields.add(name)
+                    self.fields.append(name)
+        self._performance_data = performance_data
+        self._advanced_data = advanced_data
+        self._pick_list_engine = None
+        self._rankings = {}
+        self._queries = {}
+
+        metric_ranks = {name: {entry["team"]: entry["rank"] for entry in self.ranking(name)} for name in self.metrics}
+        self.team_responses = {
+            team: Response({
+                "team": team,
+                "statistics": team_statistics,
+                "metrics": {
+                    name: {"value": advanced_data.get(team, {}).get(name), "rank": metric_ranks[name].get(team)}
+                    for name in self.metrics
+                },
+            })
+            for team, team_statistics in performance_data.items()
+        }
+        self.index_response = Response({
+            "teams": len(self.teams),
+            "metrics": list(self.metrics),
+            "loaded_at": self.loaded_at,
+            "endpoints": ["/teams", "/teams/<team>", "/metrics", "/rankings/<metric>", "/top/<metric>?n=10",
+                          "/picklist?weights=<name>:<weight>,...&picked=<team>,...&n=24"],
+        })
+        self.teams_response = Response(self.teams)
+        self.metrics_response = Response({
+            "metrics": [{"name": name, **details} for name, details in self.metrics.items()],
+            "fields": self.fields,
+        })
+
+    def default_ascending(self, name):
+        """
+        :return: True if a metric or statistic ranks lowest first by default.
+        """
+        return self.metrics[name]["ascending"] if name in self.metrics else False
+
+    def ranking(self, name, ascending=None):
+        """
+        Ranks teams by a custom metric or numeric statistic; each ranking is built once per snapshot.
+
+        :param name: Metric or statistic name (e.g. "consistency", "var1_average").
+        :param ascending: True for lowest first, None for the metric's configured direction.
+        :return: List of {"rank", "team", "value"}, or None for unknown names.
+        """
+        if ascending is None:
+            ascending = self.default_ascending(name)
+        key = (name, ascending)
+        if key not in self._rankings:
+            if name in self.metrics:
+                values = self._values[name]
+            elif name in self.fields:
+                values = [(team, statistics.get(name)) for team, statistics in self._performance_data.items()]
+            else:
+                return None
+            self._rankings[key] = rank_values([(team, value) for team, value in values if is_rankable(value)], ascending)
+        return self._rankings[key]
+
+    def pick_list_engine(self):
+        """
+        Returns the pick-list engine over every custom metric and numeric statistic, built on first use.
+
+        :return: A `PickListEngine`.
+        """
+        if self._pick_list_engine is None:
+            records = {
+                team: {**statistics, **self._advanced_data.get(team, {})} for team, statistics in self._performance_data.items()
+            }
+            names = self.fields + [name for name in self.metrics if name not in self.fields]
+            ascending_names = [name for name, details in self.metrics.items() if details["ascending"]]
+            self._pick_list_engine = PickListEngine.from_records(records, names, ascending_names)
+        return self._pick_list_engine
+
+    def pick_list(self, weights, picked, top_n):
+        """
+        Ranks the available teams by a weighted sum of z-scored metrics and statistics.
+
+        :param weights: Dictionary of name -> weight.
+        :param picked: List of teams already picked.
+        :param top_n: Number of teams to list.
+        :return: Pick-list response data.
+        :raises ValueError: If a weight names an unknown metric or statistic.
+        """
+        pick_list = self.pick_list_engine().rank(weights, picked, top_n)
+        return {
+            "weights": weights,
+            "picked": picked,
+            "teams": [{"rank": position, "team": team, "score": score} for position, (team, score) in enumerate(pick_list, start=1)],
+        }
+
+    def query_response(self, key, build):
+        """
+        Returns an encoded response for a query, building it on first use.
+
+        :param key: Hashable query key.
+        :param build: Function returning the response data, or None if the query names nothing.
+        :return: A `Response`, or None.
+        """
+        response = self._queries.get(key)
+        if response is None:
+            data = build()
+            if data is None:
+                return None
+            if len(self._queries) >= MAX_CACHED_QUERIES:
+                self._queries.clear()
+            response = self._queries[key] = Response(data)
+        return response
+
+
+class StatsCache:
+    """
+    Holds the current `StatsSnapshot` and replaces it when the pipeline rewrites its outputs.
+
+    Files are checked at most every `check_interval` seconds, from the thread serving requests. A file that
+    cannot be parsed (e.g. while a script is still writing it) keeps the previous snapshot until the next check.
+
+    :param performance_path: Path to the team performance data of script 04.
+    :param advanced_path: Path to the advanced team performance data of script 05.
+    :param metric_directions: Dictionary of metric name -> {"description", "ascending"}.
+    :param check_interval: Seconds between file checks.
+    """
+
+    def __init__(self, performance_path, advanced_path, metric_directions, check_interval=RELOAD_CHECK_INTERVAL):
+        self.performance_path = performance_path
+        self.advanced_path = advanced_path
+        self.metric_directions = metric_directions
+        self.check_interval = check_interval
+        self.snapshot = None
+        self._next_check = 0.0
+
+    def current(self):
+        """
+        Returns the current snapshot, reloading the outputs first if they changed.
+
+        :return: A `StatsSnapshot`, or None if script 04 has not written its output yet.
+        """
+        if time.monotonic() >= self._next_check:
+            self._reload_if_changed()
+            self._next_check = time.monotonic() + self.check_interval
+        return self.snapshot
+
+    def _reload_if_changed(self):
+        """
+        Builds a new snapshot if an output file was written, removed or created since the last one.
+        """
+        stamps = (file_stamp(self.performance_path), file_stamp(self.advanced_path))
+        if self.snapshot is not None and stamps == self.snapshot.stamps:
+            return
+        if stamps[0] is None:
+            self.snapshot = None
+            return
+        try:
+            with open(self.performance_path, "r") as infile:
+                performance_data = strict_json_value(json.load(infile))
+            advanced_data = None
+            if stamps[1] is not None:
+                with open(self.advanced_path, "r") as infile:
+                    advanced_data = strict_json_value(json.load(infile))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[ERROR] Could not load the pipeline outputs (keeping the previous data): {e}")
+            return
+        self.snapshot = StatsSnapshot(performance_data, advanced_data, self.metric_directions, stamps)
+        print(f"[INFO] Loaded statistics for {len(self.snapshot.teams)} teams and {len(self.snapshot.metrics)} metrics.")
+
+    def respond(self, path):
+        """
+        Answers a GET request.
+
+        :param path: Request path with query string.
+        :return: Tuple of (HTTP status, `Response`).
+        """
+        snapshot = self.current()
+        if snapshot is None:
+            return 503, Response({"error": f"No team statistics found at {self.performance_path}. Run scripts 04 and 05."})
+
+        url = urlsplit(path)
+        parts = [unquote(part) for part in url.path.strip("/").split("/") if part]
+        query = parse_qs(url.query)
+        order = query.get("order", [None])[0]
+        if order not in (None, "asc", "desc"):
+            return 400, Response({"error": "order must be 'asc' or 'desc'."})
+        ascending = None if order is None else order == "asc"
+
+        if not parts:
+            return 200, snapshot.index_response
+        if parts == ["teams"]:
+            return 200, snapshot.teams_response
+        if parts == ["metrics"]:
+            return 200, snapshot.metrics_response
+        if len(parts) == 2 and parts[0] == "teams":
+            response = snapshot.team_responses.get(parts[1])
+            if response is None:
+                return 404, Response({"error": f"Unknown team: {parts[1]}"})
+            return 200, response
+        if len(parts) == 2 and parts[0] in ("rankings", "top"):
+            name = parts[1]
+            top_n = None
+            if parts[0] == "top":
+                try:
+                    top_n = max(int(query.get("n", [DEFAULT_TOP_N])[0]), 0)
+                except ValueError:
+                    return 400, Response({"error": "n must be a whole number."})
+
+            def build():
+                ranking = snapshot.ranking(name, ascending)
+                return ranking if ranking is None or top_n is None else ranking[:top_n]
+
+            response = snapshot.query_response((name, ascending, top_n), build)
+            if response is None:
+                return 404, Response({"error": f"Unknown metric or statistic: {name}"})
+            return 200, response
+        if parts == ["picklist"]:
+            try:
+                top_n = max(int(query.get("n", [DEFAULT_PICK_LIST_SIZE])[0]), 0)
+            except ValueError:
+                return 400, Response({"error": "n must be a whole number."})
+            try:
+                weights = parse_weights(query.get("weights", [""])[0])
+            except ValueError as e:
+                return 400, Response({"error": str(e)})
+            if not weights:
+                return 400, Response({"error": "weights is required, e.g. weights=var1_average:2"})
+            picked = [team.strip() for team in query.get("picked", [""])[0].split(",") if team.strip()]
+            key = ("picklist", tuple(weights.items()), tuple(picked), top_n)
+            try:
+                return 200, snapshot.query_response(key, lambda: snapshot.pick_list(weights, picked, top_n))
+            except ValueError as e:
+                return 400, Response({"error": str(e)})
+        return 404, Response({"error": f"Unknown path: {url.path}"})
+
+
+STATUS_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+                  405: "Method Not Allowed", 503: "Service Unavailable"}
+MAX_HEADER_BYTES = 16_384
+
+
+def etag_matches(header, etag):
+    """
+    Checks an If-None-Match header against a response's ETag.
+
+    :param header: Header value (one or more tags, or "*"), or None.
+    :param etag: The response's ETag.
+    :return: True if the client's copy is current.
+    """
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def encode_response(status, response, include_body, keep_alive):
+    """
+    Encodes a full HTTP/1.1 response (headers and body in one buffer, so it is sent in one write).
+
+    :param status: HTTP status.
+    :param response: A `Response`.
+    :param include_body: False for HEAD requests and 304 responses.
+    :param keep_alive: False to ask the client to close the connection.
+    :return: Response bytes.
+    """
+    headers = [
+        f"HTTP/1.1 {status} {STATUS_REASONS[status]}",
+        f"ETag: {response.etag}",
+        "Cache-Control: no-cache",  # Clients revalidate with If-None-Match
+    ]
+    if status != 304:
+        headers += ["Content-Type: application/json", f"Content-Length: {len(response.body)}"]
+    if not keep_alive:
+        headers.append("Connection: close")
+    head = ("\r\n".join(headers) + "\r\n\r\n").encode("latin-1")
+    return head + response.body if include_body and status != 304 else head
+
+
+class StatsServer:
+    """
+    Serves `StatsCache` responses over HTTP/1.1 keep-alive connections with asyncio.
+
+    All connections are served by one event loop in one thread: responses are prebuilt in memory, so
+    each request is a dictionary lookup, and no thread ever waits for another to release the GIL.
+    Only GET and HEAD are supported; a matching If-None-Match header is answered with 304 Not Modified.
+
+    :param stats_cache: The `StatsCache` to serve.
+    :param verbose: If True, every request is logged.
+    """
+
+    def __init__(self, stats_cache, verbose=False):
+        self.stats_cache = stats_cache
+        self.verbose = verbose
+
+    async def handle_connection(self, reader, writer):
+        """
+        Answers the requests of one client connection until it closes.
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    writer.write(encode_response(400, Response({"error": "Malformed request line."}), True, False))
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, separator, value = line.partition(":")
+                    if separator:
+                        headers[name.strip().lower()] = value.strip()
+
+                connection_header = headers.get("connection", "").lower()
+                keep_alive = connection_header == "keep-alive" if version == "HTTP/1.0" else connection_header != "close"
+                if method not in ("GET", "HEAD") or "content-length" in headers or "transfer-encoding" in headers:
+                    # Read-only: request bodies are never read, so the connection can't be reused
+                    status, response, keep_alive = 405, Response({"error": "Only GET and HEAD are supported."}), False
+                else:
+                    status, response = self.stats_cache.respond(target)
+                    if status == 200 and etag_matches(headers.get("if-none-match"), response.etag):
+                        status = 304
+                writer.write(encode_response(status, response, method != "HEAD", keep_alive))
+                if self.verbose:
+                    print(f"[INFO] {method} {target} {status}")
+                if not keep_alive:
+                    break
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def start(self, host, port):
+        """
+        Starts listening.
+
+        :return: The `asyncio.Server`.
+        """
+        return await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES, backlog=128)
+
+
+async def serve(host, port, verbose):
+    """
+    Loads the outputs and serves them until interrupted.
+    """
+    stats_cache = StatsCache(TEAM_PERFORMANCE_DATA_PATH, ADVANCED_TEAM_PERFORMANCE_DATA_PATH, load_metric_directions())
+    stats_cache.current()  # Load the outputs before the first request
+    server = await StatsServer(stats_cache, verbose).start(host, port)
+    bound_host, bound_port = server.sockets[0].getsockname()[:2]
+    print(f"[INFO] Serving team statistics on http://{bound_host}:{bound_port}/ (Ctrl+C to stop).", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    """
+    Command-line entry point: `python -m utility_functions.stats_server`.
+
+    :param argv: Command-line arguments (defaults to `sys.argv`).
+    """
+    parser = argparse.ArgumentParser(description="Serve team statistics and rankings from scripts 04 and 05 over HTTP.")
+    parser.add_argument("--host", default=HOST, help="Address to listen on (0.0.0.0 for every network interface).")
+    parser.add_argument("--port", type=int, default=PORT, help="Port to listen on (0 picks a free port).")
+    parser.add_argument("--verbose", action="store_true", help="Log every request.")
+    args = parser.parse_args(argv)
+
+    print(seperation_bar)
+    print("Stats Server\n")
+    try:
+        asyncio.run(serve(args.host, args.port, args.verbose))
+    except KeyboardInterrupt:
+        print("\n[INFO] Stopping the stats server.")
+    print(seperation_bar)
+
+# ===========================
+# MAIN SCRIPT SECTION
+# ===========================
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+import math
+from collections import deque
+
+# Pure Python on purpose: a match updates each statistic in constant time, so no DataFrame is
+# rebuilt (and pandas isn't needed) when a new match comes in during an event.
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+MATCH_NUMBER_KEY = "metadata.matchNumber"  # Flattened key that event windows are keyed on
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def flatten_match(match, prefix=""):
+    """
+    Flattens nested dictionaries into `parent.child` keys in the column order of `pd.json_normalize`
+    (plain values first, then nested dictionaries).
+
+    :param match: A match entry (nested or already flat).
+    :param prefix: Key prefix for nested values.
+    :return: Flat dictionary.
+    """
+    flat = {f"{prefix}{key}": value for key, value in match.items() if not isinstance(value, dict)}
+    for key, value in match.items():
+        if isinstance(value, dict):
+            flat.update(flatten_match(value, f"{prefix}{key}."))
+    return flat
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class ColumnAccumulator:
+    """
+    Statistics of one column: count, Welford mean/variance, min/max and value counts.
+
+    In a sliding window (`windowed=True`) values can also be removed, oldest first; min/max are then
+    kept with monotonic queues, so every update stays O(1) amortized.
+    """
+
+    __slots__ = ("count", "mean", "m2", "minimum", "maximum", "non_numeric", "booleans", "value_counts",
+                 "_min_queue", "_max_queue")
+
+    def __init__(self, windowed=False):
+        self.count = 0  # Numeric (int, float, bool) values
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared differences from the mean (Welford)
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.non_numeric = 0  # Strings and other non-numeric values
+        self.booleans = 0
+        self.value_counts = {}
+        self._min_queue = deque() if windowed else None  # (sequence, value), values increasing
+        self._max_queue = deque() if windowed else None  # (sequence, value), values decreasing
+
+    def add(self, value, sequence=0):
+        """
+        Adds a reported value.
+
+        :param value: The value (not missing).
+        :param sequence: Position of the match, increasing by one per match (sliding windows only).
+        """
+        if isinstance(value, (bool, int, float)):
+            if isinstance(value, bool):
+                self.booleans += 1
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+            if self._min_queue is None:
+                self.minimum = min(self.minimum, value)
+                self.maximum = max(self.maximum, value)
+            else:
+                while self._min_queue and self._min_queue[-1][1] >= value:
+                    self._min_queue.pop()
+                self._min_queue.append((sequence, value))
+                while self._max_queue and self._max_queue[-1][1] <= value:
+                    self._max_queue.pop()
+                self._max_queue.append((sequence, value))
+        else:
+            self.non_numeric += 1
+        if value.__hash__ is not None:
+            self.value_counts[value] = self.value_counts.get(value, 0) + 1
+
+    def remove(self, value, sequence=0):
+        """
+        Removes the oldest value still in a sliding window (inverse Welford update).
+
+        :param value: The value that was added with this sequence number.
+        :param sequence: Its sequence number.
+        """
+        if isinstance(value, (bool, int, float)):
+            if isinstance(value, bool):
+                self.booleans -= 1
+            self.count -= 1
+            if self.count == 0:
+                self.mean, self.m2 = 0.0, 0.0
+            else:
+                delta = value - self.mean
+                self.mean -= delta / self.count
+                self.m2 = max(0.0, self.m2 - delta * (value - self.mean))
+            if self._min_queue and self._min_queue[0][0] == sequence:
+                self._min_queue.popleft()
+            if self._max_queue and self._max_queue[0][0] == sequence:
+                self._max_queue.popleft()
+        else:
+            self.non_numeric -= 1
+        if value.__hash__ is not None:
+            remaining = self.value_counts[value] - 1
+            if remaining:
+                self.value_counts[value] = remaining
+            else:
+                del self.value_counts[value]
+
+    def state(self):
+        """
+        :return: JSON-serializable list of the accumulator's fields (value counts as [value, count] pairs,
+                 so booleans, numbers and strings keep their types).
+        """
+        return [
+            self.count, self.mean, self.m2, self.minimum, self.maximum, self.non_numeric, self.booleans,
+            [[value, count] for value, count in self.value_counts.items()],
+            None if self._min_queue is None else [list(item) for item in self._min_queue],
+            None if self._max_queue is None else [list(item) for item in self._max_queue],
+        ]
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Restores an accumulator saved with `state`.
+
+        :param state: List from `state`.
+        :return: A `ColumnAccumulator`.
+        """
+        min_queue, max_queue = state[8], state[9]
+        accumulator = cls(windowed=min_queue is not None)
+        (accumulator.count, accumulator.mean, accumulator.m2, accumulator.minimum, accumulator.maximum,
+         accumulator.non_numeric, accumulator.booleans) = state[:7]
+        accumulator.value_counts = {value: count for value, count in state[7]}
+        if min_queue is not None:
+            accumulator._min_queue = deque(tuple(item) for item in min_queue)
+            accumulator._max_queue = deque(tuple(item) for item in max_queue)
+        return accumulator
+
+    def recompute_moments(self, values):
+        """
+        Recomputes the mean and variance exactly from the values still in a sliding window, so rounding
+        errors from repeated removals don't build up. Called once per window length, so it stays O(1) amortized.
+
+        :param values: The numeric values in the window.
+        """
+        self.mean = math.fsum(values) / len(values) if values else 0.0
+        self.m2 = math.fsum((value - self.mean) ** 2 for value in values)
+
+    def statistics(self, column, number_of_matches):
+        """
+        Returns the column's statistics with the keys script 04 writes.
+
+        Follows pandas' type rules: numeric columns get average/min/max/std_dev (a true/false column only
+        if every match reported it), everything else gets value counts (most common first).
+
+        :param column: Column name (key prefix).
+        :param number_of_matches: Matches covered, to tell complete true/false columns from partial ones.
+        :return: Dictionary of statistics, empty if the column has no reported values.
+        """
+        if self.count + self.non_numeric == 0:
+            return {}
+        partial_booleans = self.booleans == self.count and self.count < number_of_matches
+        if self.non_numeric or partial_booleans:
+            counts = sorted(self.value_counts.items(), key=lambda item: -item[1])
+            return {f"{column}_value_counts": dict(counts)}
+        if self._min_queue is None:
+            minimum, maximum = self.minimum, self.maximum
+        else:
+            minimum, maximum = self._min_queue[0][1], self._max_queue[0][1]
+        # Equal values have no spread; removals could otherwise leave a tiny rounding residue
+        m2 = 0.0 if minimum == maximum else self.m2
+        return {
+            f"{column}_average": float(self.mean),
+            f"{column}_min": float(minimum),
+            f"{column}_max": float(maximum),
+            f"{column}_std_dev": math.sqrt(m2 / (self.count - 1)) if self.count > 1 else math.nan,
+        }
+
+
+class TeamStatsAccumulator:
+    """
+    Streaming version of one team's statistics in script 04, updated one match at a time.
+
+    :param window: Keep only the last `window` matches (None = every match).
+    """
+
+    def __init__(self, window=None):
+        self.window = window
+        self.columns = {}  # Column -> ColumnAccumulator, in first-reported order
+        self.number_of_matches = 0
+        self._matches = deque() if window else None  # (sequence, flat match) still in the window
+        self._sequence = 0
+
+    def add_match(self, match):
+        """
+        Adds a match, evicting the oldest one if the window is full.
+
+        :param match: A match entry (nested or flat).
+        """
+        flat = flatten_match(match)
+        for column, value in flat.items():
+            if _is_missing(value):
+                continue
+            accumulator = self.columns.get(column)
+            if accumulator is None:
+                accumulator = self.columns[column] = ColumnAccumulator(windowed=self.window is not None)
+            accumulator.add(value, self._sequence)
+        self.number_of_matches += 1
+
+        if self._matches is not None:
+            self._matches.append((self._sequence, flat))
+            if len(self._matches) > self.window:
+                sequence, oldest = self._matches.popleft()
+                for column, value in oldest.items():
+                    if not _is_missing(value):
+                        self.columns[column].remove(value, sequence)
+                self.number_of_matches -= 1
+            if self._sequence % self.window == self.window - 1:
+                self._recompute_moments()
+        self._sequence += 1
+
+    def state(self):
+        """
+        :return: JSON-serializable dictionary of the accumulator (matches still in the window included).
+        """
+        return {
+            "window": self.window,
+            "columns": {column: accumulator.state() for column, accumulator in self.columns.items()},
+            "number_of_matches": self.number_of_matches,
+            "matches": None if self._matches is None else [[sequence, flat] for sequence, flat in self._matches],
+            "sequence": self._sequence,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Restores an accumulator saved with `state`.
+
+        :param state: Dictionary from `state`.
+        :return: A `TeamStatsAccumulator`.
+        """
+        accumulator = cls(window=state["window"])
+        accumulator.columns = {
+            column: ColumnAccumulator.from_state(column_state) for column, column_state in state["columns"].items()
+        }
+        accumulator.number_of_matches = state["number_of_matches"]
+        if state["matches"] is not None:
+            accumulator._matches = deque((sequence, flat) for sequence, flat in state["matches"])
+        accumulator._sequence = state["sequence"]
+        return accumulator
+
+    def _recompute_moments(self):
+        """
+        Recomputes every column's mean and variance from the matches in the window.
+        """
+        window_values = {column: [] for column in self.columns}
+        for _, flat in self._matches:
+            for column, value in flat.items():
+                if isinstance(value, (bool, int, float)) and not _is_missing(value):
+                    window_values[column].append(value)
+        for column, accumulator in self.columns.items():
+            accumulator.recompute_moments(window_values[column])
+
+    def statistics(self):
+        """
+        Returns the statistics with the keys script 04 writes.
+
+        :return: Dictionary of team statistics.
+        """
+        team_performance = {"number_of_matches": self.number_of_matches}
+        for column, accumulator in self.columns.items():
+            team_performance.update(accumulator.statistics(column, self.number_of_matches))
+        return team_performance
+
+
+class TeamTrendAccumulator:
+    """
+    One team's statistics over every match, the last N matches and fixed blocks of match numbers
+    (e.g. matches 1-20, 21-40), all updated with each new match.
+
+    :param recent_matches: Size of the last-N-matches window (0 = no recent window).
+    :param event_window_matches: Match numbers per event window (0 = no event windows).
+    """
+
+    def __init__(self, recent_matches=5, event_window_matches=0):
+        self.overall = TeamStatsAccumulator()
+        self.recent_matches = recent_matches
+        self.recent = TeamStatsAccumulator(window=recent_matches) if recent_matches else None
+        self.event_window_matches = event_window_matches
+        self.events = {}  # Window label -> TeamStatsAccumulator, in first-seen order
+
+    def event_window_label(self, match_number):
+        """
+        :param match_number: A match number.
+        :return: Label of the event window holding it (e.g. "matches_21-40").
+        """
+        start = (int(match_number) - 1) // self.event_window_matches * self.event_window_matches + 1
+        return f"matches_{start}-{start + self.event_window_matches - 1}"
+
+    def add_match(self, match):
+        """
+        Adds a match to every view.
+
+        :param match: A match entry (nested or flat).
+        """
+        self.overall.add_match(match)
+        if self.recent is not None:
+            self.recent.add_match(match)
+        if self.event_window_matches:
+            match_number = flatten_match(match).get(MATCH_NUMBER_KEY)
+            if not _is_missing(match_number):
+                label = self.event_window_label(match_number)
+                if label not in self.events:
+                    self.events[label] = TeamStatsAccumulator()
+                self.events[label].add_match(match)
+
+    def statistics(self):
+        """
+        :return: Dictionary of view name -> team statistics.
+        """
+        trends = {"all_matches": self.overall.statistics()}
+        if self.recent is not None:
+            trends[f"last_{self.recent_matches}_matches"] = self.recent.statistics()
+        for label, accumulator in self.events.items():
+            trends[label] = accumulator.statistics()
+        return trends
+
+    def state(self):
+        """
+        :return: JSON-serializable dictionary of every view, so a later run can keep adding matches.
+        """
+        return {
+            "recent_matches": self.recent_matches,
+            "event_window_matches": self.event_window_matches,
+            "overall": self.overall.state(),
+            "recent": None if self.recent is None else self.recent.state(),
+            "events": {label: accumulator.state() for label, accumulator in self.events.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Restores an accumulator saved with `state`.
+
+        :param state: Dictionary from `state`.
+        :return: A `TeamTrendAccumulator`.
+        """
+        trends = cls(state["recent_matches"], state["event_window_matches"])
+        trends.overall = TeamStatsAccumulator.from_state(state["overall"])
+        if state["recent"] is not None:
+            trends.recent = TeamStatsAccumulator.from_state(state["recent"])
+        trends.events = {label: TeamStatsAccumulator.from_state(events) for label, events in state["events"].items()}
+        return trends
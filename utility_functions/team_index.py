@@ -0,0 +1,236 @@
+import os
+import json
+import mmap
+from utility_functions.json_streaming import iter_json_array_spans
+
+# numpy is imported inside the functions that need it, so scripts that exit early don't pay for it.
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+TEAM_INDEX_PATH = "data/processed/team_index.npz"  # Team -> row offsets into the cleaned match data
+TEAM_KEY_PATH = ("metadata", "robotTeam")  # Where the team number sits in a cleaned entry
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def _source_stamp(file_path):
+    """
+    Returns the size and modification time of a file, used to detect a stale index.
+
+    :param file_path: Path to the cleaned data file.
+    :return: numpy array of [size in bytes, mtime in nanoseconds].
+    """
+    import numpy as np
+
+    stat = os.stat(file_path)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+class TeamIndex:
+    """
+    Maps each team to the rows of its matches in the cleaned match data (JSON array or Parquet),
+    so later stages can read a team's matches without a team-based copy of the data.
+
+    Stored as one `.npz` file of flat arrays:
+    - `teams`: team keys (strings) in order of their first match.
+    - `team_starts`: `rows[team_starts[i]:team_starts[i + 1]]` are the rows of `teams[i]`.
+    - `rows`: row numbers in the cleaned data, grouped by team, in match order within each team.
+    - `spans`: byte `[start, end)` of each row in a cleaned JSON file (empty for Parquet).
+    - `source_stamp`: size and modification time of the cleaned file the index was built from.
+    """
+
+    def __init__(self, source_path, teams, team_starts, rows, spans, source_stamp):
+        """
+        :param source_path: Path to the cleaned data file the index points into.
+        :param teams: Array of team keys.
+        :param team_starts: Array of offsets into `rows`, one per team plus the end.
+        :param rows: Array of row numbers grouped by team.
+        :param spans: Array of byte spans per row (shape (rows, 2)), or an empty array.
+        :param source_stamp: Array of [size, mtime_ns] of the source file.
+        """
+        self.source_path = source_path
+        self.teams = [str(team) for team in teams]
+        self.team_starts = team_starts
+        self.rows = rows
+        self.spans = spans
+        self.source_stamp = source_stamp
+        self._team_positions = {team: position for position, team in enumerate(self.teams)}
+
+    @classmethod
+    def from_team_column(cls, source_path, team_values, spans=None):
+        """
+        Builds an index from the team of every row, in row order.
+
+        :param source_path: Path to the cleaned data file.
+        :param team_values: Sequence with the team of each row.
+        :param spans: Optional sequence of byte `(start, end)` per row.
+        :return: A `TeamIndex`.
+        """
+        import numpy as np
+
+        team_rows = {}
+        for row, team in enumerate(team_values):
+            team_rows.setdefault(str(team), []).append(row)
+
+        sizes = [len(rows) for rows in team_rows.values()]
+        team_starts = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=team_starts[1:])
+        rows = np.fromiter((row for rows in team_rows.values() for row in rows), dtype=np.int64, count=int(team_starts[-1]))
+        spans = np.asarray(spans if spans is not None else [], dtype=np.int64).reshape(-1, 2)
+        return cls(source_path, list(team_rows), team_starts, rows, spans, _source_stamp(source_path))
+
+    @classmethod
+    def build_from_json(cls, cleaned_file_path, team_key_path=TEAM_KEY_PATH):
+        """
+        Builds an index by scanning a cleaned JSON array once, recording the byte span of every entry.
+
+        :param cleaned_file_path: Path to the cleaned JSON file.
+        :param team_key_path: Keys leading to the team number in an entry.
+        :return: A `TeamIndex`.
+        """
+        team_values, spans = [], []
+        for start, end, entry in iter_json_array_spans(cleaned_file_path):
+            team = entry
+            for key in team_key_path:
+                team = team[key]
+            team_values.append(team)
+            spans.append((start, end))
+        return cls.from_team_column(cleaned_file_path, team_values, spans)
+
+    @classmethod
+    def build_from_table(cls, cleaned_file_path, table, team_column):
+        """
+        Builds an index from the team column of a cleaned Parquet table.
+
+        :param cleaned_file_path: Path to the cleaned Parquet file.
+        :param table: The `pyarrow.Table` loaded from that file.
+        :param team_column: Name of the team number column.
+        :return: A `TeamIndex`.
+        """
+        return cls.from_team_column(cleaned_file_path, table.column(team_column).to_pylist())
+
+    @classmethod
+    def load(cls, index_path=TEAM_INDEX_PATH):
+        """
+        Loads an index written by `save`.
+
+        :param index_path: Path to the `.npz` index file.
+        :return: A `TeamIndex`.
+        """
+        import numpy as np
+
+        with np.load(index_path, allow_pickle=False) as arrays:
+            return cls(
+                str(arrays["source_path"]), arrays["teams"].tolist(), arrays["team_starts"],
+                arrays["rows"], arrays["spans"], arrays["source_stamp"],
+            )
+
+    def save(self, index_path=TEAM_INDEX_PATH):
+        """
+        Writes the index as an uncompressed `.npz` file (written to a temporary file, then renamed).
+
+        :param index_path: Path to the `.npz` index file.
+        """
+        import numpy as np
+
+        os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+        temp_path = index_path + ".tmp"
+        with open(temp_path, "wb") as outfile:
+            np.savez(
+                outfile, source_path=np.array(self.source_path), teams=np.array(self.teams, dtype=str),
+                team_starts=self.team_starts, rows=self.rows, spans=self.spans, source_stamp=self.source_stamp,
+            )
+        os.replace(temp_path, index_path)
+
+    def is_current(self):
+        """
+        Returns True if the cleaned data file is unchanged since the index was built.
+        """
+        import numpy as np
+
+        try:
+            return bool(np.array_equal(_source_stamp(self.source_path), self.source_stamp))
+        except FileNotFoundError:
+            return False
+
+    def team_rows(self, team):
+        """
+        Returns the row numbers of a team's matches in match order.
+
+        :param team: Team key.
+        :return: numpy array of row numbers (empty for unknown teams).
+        """
+        position = self._team_positions.get(str(team))
+        if position is None:
+            return self.rows[:0]
+        return self.rows[self.team_starts[position]:self.team_starts[position + 1]]
+
+    def grouped_rows(self, teams=None):
+        """
+        Returns the row numbers of several teams' matches, grouped by team in index order.
+
+        :param teams: Optional set of team keys; all teams if None.
+        :return: numpy array of row numbers.
+        """
+        import numpy as np
+
+        if teams is None:
+            return self.rows
+        return np.concatenate([self.rows[:0]] + [self.team_rows(team) for team in self.teams if team in teams])
+
+    def iter_team_matches(self, teams=None):
+        """
+        Reads teams' matches lazily from a cleaned JSON file, one team at a time. Only the
+        bytes of the requested matches are read and decoded.
+
+        :param teams: Optional set of team keys; all teams if None.
+        :return: Iterator of (team key, list of matches) in index order.
+        """
+        if len(self.spans) != len(self.rows):
+            raise ValueError("This team index has no byte offsets (it was built from a Parquet file).")
+        with open(self.source_path, "rb") as infile:
+            if os.fstat(infile.fileno()).st_size == 0:
+                return
+            with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for team in self.teams:
+                    if teams is not None and team not in teams:
+                        continue
+                    yield team, [json.loads(data[start:end]) for start, end in self.spans[self.team_rows(team)]]
+
+    def team_data(self, teams=None):
+        """
+        Reads teams' matches into the team-based layout script 03 used to write to disk.
+
+        :param teams: Optional set of team keys; all teams if None.
+        :return: Dictionary of team key -> {"matches": [...]}.
+        """
+        return {team: {"matches": matches} for team, matches in self.iter_team_matches(teams)}
+
+    def take(self, table, teams=None):
+        """
+        Reorders a cleaned Parquet table so each team's matches are contiguous (the team-based order).
+
+        :param table: The `pyarrow.Table` the index was built from.
+        :param teams: Optional set of team keys to keep; all teams if None.
+        :return: The reordered `pyarrow.Table`.
+        """
+        return table.take(self.grouped_rows(teams))
+
+
+def load_current_team_index(cleaned_file_path, index_path=TEAM_INDEX_PATH):
+    """
+    Loads the team index and checks that it still describes the cleaned data file.
+
+    :param cleaned_file_path: Path to the cleaned data file the caller is about to read.
+    :param index_path: Path to the `.npz` index file.
+    :return: A `TeamIndex`.
+    """
+    if not os.path.exists(index_path):
+        raise FileNotFoundError(f"Team index not found: {index_path}. Run script 03 first.")
+    team_index = TeamIndex.load(index_path)
+    if os.path.abspath(team_index.source_path) != os.path.abspath(cleaned_file_path) or not team_index.is_current():
+        raise ValueError(f"Team index {index_path} is out of date with {cleaned_file_path}. Run script 03 again.")
+    return team_index
@@ -0,0 +1,217 @@
+import csv
+import json
+from collections import defaultdict
+
+# ===========================
+# CONFIGURATION SECTION
+# ===========================
+
+# Warning codes. A warning is stored as a compact record and only turned into a message when it is printed
+# or written to the warning log.
+MISSING_KEY = "missing_key"
+EXTRA_KEY = "extra_key"
+INCORRECT_TYPE = "incorrect_type"
+INVALID_POSITION = "invalid_position"
+NEGATIVE_VALUE = "negative_value"
+INCONSISTENT_MATCH_COUNTS = "inconsistent_match_counts"
+MISSING_POSITIONS = "missing_positions"
+DUPLICATE_SUBMISSION = "duplicate_submission"
+TEAM_SCOUTED_TWICE = "team_scouted_twice"
+DUPLICATE_ENTRY = "duplicate_entry"
+
+# Message templates; `path` is the record's key path and `detail` its extra values
+WARNING_TEMPLATES = {
+    MISSING_KEY: "[WARNING] Missing key '{path}'.",
+    EXTRA_KEY: "[WARNING] Extra key '{path}' found and removed.",
+    INCORRECT_TYPE: "[WARNING] Incorrect type for '{path}'. Expected {detail[0]}, got {detail[1]}.",
+    INVALID_POSITION: "[WARNING] Invalid robot position '{detail[0]}' at '{path}'. Defaulting to '{detail[1]}'.",
+    NEGATIVE_VALUE: "[WARNING] Negative value '{detail}' at '{path}'. Defaulting to 0.",
+    MISSING_POSITIONS: "[WARNING] Match {detail[0]} is missing positions: {detail[1]}.",
+    DUPLICATE_SUBMISSION: (
+        "[WARNING] Match {detail[0]} has {detail[2]} submissions for position '{detail[1]}' (scouters: {detail[3]})."
+    ),
+    TEAM_SCOUTED_TWICE: "[WARNING] Team {detail[1]} was scouted at more than one position in match {detail[0]}: {detail[2]}.",
+    DUPLICATE_ENTRY: (
+        "[WARNING] Match {detail[0]}, position '{detail[1]}' by {detail[2]} in {detail[3]} was already in {detail[4]}. "
+        "Duplicate removed."
+    ),
+}
+
+WARNING_RECORD_VERSION = 1  # Bump when record contents change, so stored records (incremental manifest) are rebuilt
+
+# Output modes for printing warnings
+WARNING_OUTPUT_MODES = ("all", "sample", "summary")
+WARNING_LOG_BUFFER_SIZE = 1 << 20  # Bytes buffered before the warning log is written to disk
+CSV_WARNING_FIELDS = ["code", "key_path", "scouter", "entry_index", "message"]
+
+# ===========================
+# HELPER FUNCTIONS SECTION
+# ===========================
+
+def warning_record(code, key_path=None, scouter=None, entry_index=None, detail=None):
+    """
+    Builds a warning record: a plain tuple, so millions of them stay small and can be sent between processes.
+
+    :param code: One of the warning codes above.
+    :param key_path: Dotted key path the warning is about (None for dataset-wide warnings).
+    :param scouter: Scouter responsible for the entry (None for dataset-wide warnings).
+    :param entry_index: Index of the raw entry (None for dataset-wide warnings).
+    :param detail: Extra values used in the message (e.g. the offending value).
+    :return: Tuple of (code, key path, scouter, entry index, detail).
+    """
+    return (code, key_path, scouter, entry_index, detail)
+
+
+def format_warning(record):
+    """
+    Turns a warning record into the message printed by script 02.
+
+    :param record: A warning record.
+    :return: Message string.
+    """
+    code, key_path, _, _, detail = record
+    if code == INCONSISTENT_MATCH_COUNTS:
+        return "[WARNING] Inconsistent match counts detected:\n" + "\n".join(
+            f"  Teams with {count} matches: {teams}" for count, teams in detail
+        )
+    return WARNING_TEMPLATES[code].format(path=key_path, detail=detail)
+
+
+def jsonable_detail(detail):
+    """
+    Converts a record's detail to JSON-compatible values (types become their names as printed),
+    so records can be stored in the incremental manifest and still format to the same message.
+
+    :param detail: A record's detail.
+    :return: JSON-compatible detail.
+    """
+    if isinstance(detail, (list, tuple)):
+        return [jsonable_detail(item) for item in detail]
+    if detail is None or isinstance(detail, (str, int, float, bool)):
+        return detail
+    return str(detail)
+
+
+class NdjsonWarningWriter:
+    """
+    Writes one JSON object per warning to a buffered file.
+    """
+
+    def __init__(self, file_path):
+        self.outfile = open(file_path, "w", buffering=WARNING_LOG_BUFFER_SIZE)
+
+    def write(self, record):
+        code, key_path, scouter, entry_index, detail = record
+        self.outfile.write(json.dumps({
+            "code": code,
+            "key_path": key_path,
+            "scouter": scouter,
+            "entry_index": entry_index,
+            "detail": jsonable_detail(detail),
+            "message": format_warning(record),
+        }) + "\n")
+
+    def close(self):
+        self.outfile.close()
+
+
+class CsvWarningWriter:
+    """
+    Writes one CSV row per warning to a buffered file.
+    """
+
+    def __init__(self, file_path):
+        self.outfile = open(file_path, "w", newline="", buffering=WARNING_LOG_BUFFER_SIZE)
+        self.writer = csv.writer(self.outfile)
+        self.writer.writerow(CSV_WARNING_FIELDS)
+
+    def write(self, record):
+        code, key_path, scouter, entry_index, _ = record
+        self.writer.writerow([code, key_path, scouter, entry_index, format_warning(record)])
+
+    def close(self):
+        self.outfile.close()
+
+
+def open_warning_log(file_path):
+    """
+    Opens a warning log writer for the file's extension (`.csv`, otherwise NDJSON).
+
+    :param file_path: Path of the warning log.
+    :return: An `NdjsonWarningWriter` or `CsvWarningWriter`.
+    """
+    if file_path.lower().endswith(".csv"):
+        return CsvWarningWriter(file_path)
+    return NdjsonWarningWriter(file_path)
+
+
+class WarningSink:
+    """
+    Receives warning records as they are produced and keeps only what the chosen output needs:
+    counts per warning type and per scouter, the first few records of each type, every record
+    (only for the "all" output), and optionally a streamed warning log file.
+
+    :param output_mode: "all" prints every warning, "sample" the first `sample_size` of each type,
+                        "summary" only the counts.
+    :param sample_size: Warnings kept per type for the "sample" output.
+    :param log_path: Optional `.ndjson`/`.jsonl` or `.csv` file every warning is written to.
+    """
+
+    def __init__(self, output_mode="sample", sample_size=5, log_path=None):
+        if output_mode not in WARNING_OUTPUT_MODES:
+            raise ValueError(f"Unknown warning output '{output_mode}'. Use one of: {', '.join(WARNING_OUTPUT_MODES)}.")
+        self.output_mode = output_mode
+        self.sample_size = sample_size
+        self.total = 0
+        self.code_counts = {}  # Code -> count, in order of first appearance
+        self.scouter_counts = defaultdict(int)  # Scouter -> count, in order of first warning
+        self.samples = defaultdict(list)
+        self.records = [] if output_mode == "all" else None
+        self.log_path = log_path
+        self._log_writer = open_warning_log(log_path) if log_path else None
+
+    def emit(self, record):
+        """
+        Records one warning.
+
+        :param record: A warning record.
+        """
+        code, _, scouter, _, _ = record
+        self.total += 1
+        self.code_counts[code] = self.code_counts.get(code, 0) + 1
+        if scouter:
+            self.scouter_counts[scouter] += 1
+        if self.records is not None:
+            self.records.append(record)
+        elif len(self.samples[code]) < self.sample_size:
+            self.samples[code].append(record)
+        if self._log_writer is not None:
+            self._log_writer.write(record)
+
+    def close(self):
+        """
+        Flushes and closes the warning log, if any.
+        """
+        if self._log_writer is not None:
+            self._log_writer.close()
+            self._log_writer = None
+
+    def print_report(self):
+        """
+        Prints the warnings in the chosen output mode, followed by the total.
+        """
+        if self.output_mode == "all":
+            for record in self.records:
+                print(format_warning(record))
+        else:
+            print("[INFO] Warnings by type:")
+            for code, count in self.code_counts.items():
+                print(f"  {code}: {count}")
+            if self.output_mode == "sample":
+                for code, count in self.code_counts.items():
+                    print(f"\n[INFO] First {min(count, self.sample_size)} of {count} '{code}' warnings:")
+                    for record in self.samples[code]:
+                        print(format_warning(record))
+        if self.log_path:
+            print(f"[INFO] Every warning was written to: {self.log_path}")
+        print(f"[INFO] Total warnings/errors: {self.total}")